@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Booking claim throughput benchmark
+
+Seeds open bookings around Cairo and lets many providers claim them at
+once, each provider thread claiming until the queue is empty. Reports
+claims per second, claim latency percentiles, and any double
+assignments (there must be none).
+
+Runs on a throwaway SQLite file by default, using the in-process
+SKIP LOCKED emulation. Point --database-url at an empty scratch Postgres
+database to measure real FOR UPDATE SKIP LOCKED. The tables are created
+and dropped there.
+
+Usage (from backend/):
+    python -m benchmarks.bench_booking_claims --providers 500 --bookings 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import func
+from src.models import db
+from src.models import location  # noqa: F401 (mapped by User relationships)
+from src.models.user import User, CustomerProfile, ServiceProviderProfile
+from src.models.service import ServiceCategory, Service, ProviderService, Booking, BookingStatusHistory
+from src.utils.claims import claim_next_booking
+
+CAIRO = (30.0444, 31.2357)
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of floats"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def create_app(database_url, pool_size):
+    app = Flask(__name__)
+    options = {'pool_size': pool_size, 'max_overflow': 0, 'pool_timeout': 300}
+    if database_url.startswith('sqlite'):
+        options['connect_args'] = {'timeout': 60, 'check_same_thread': False}
+    app.config.update(SQLALCHEMY_DATABASE_URI=database_url, SQLALCHEMY_ENGINE_OPTIONS=options)
+    db.init_app(app)
+    return app
+
+def seed(providers, bookings, radius_km):
+    """Create providers offering one service and open bookings within their radius"""
+    rng = random.Random(42)
+    category = ServiceCategory(name_ar='سباكة', name_en='Plumbing')
+    db.session.add(category)
+    db.session.flush()
+    service = Service(category_id=category.id, name_ar='إصلاح', name_en='Repair', base_price=100)
+    customer_user = User(email=f'{uuid.uuid4().hex}@bench.local', user_type='customer', password_hash='!')
+    db.session.add_all([service, customer_user])
+    db.session.flush()
+    customer = CustomerProfile(user_id=customer_user.id, first_name='Bench', last_name='Customer')
+    db.session.add(customer)
+
+    provider_ids = []
+    for index in range(providers):
+        user = User(id=uuid.uuid4(), email=f'{uuid.uuid4().hex}@bench.local', user_type='service_provider',
+                    password_hash='!')
+        provider = ServiceProviderProfile(id=uuid.uuid4(), user_id=user.id, first_name='Bench',
+                                          last_name=str(index), verification_status='approved',
+                                          service_radius=radius_km)
+        db.session.add_all([user, provider])
+        db.session.add(ProviderService(provider_id=str(provider.id), service_id=service.id))
+        provider_ids.append((user.id, provider.id))
+
+    now = datetime.utcnow()
+    spread = radius_km / 111.32 / 2
+    for index in range(bookings):
+        db.session.add(Booking(
+            customer_id=str(customer.id), service_id=service.id, booking_status='pending',
+            scheduled_date=now + timedelta(hours=1, minutes=index),
+            service_address={'governorate': 'Cairo'},
+            service_latitude=CAIRO[0] + rng.uniform(-spread, spread),
+            service_longitude=CAIRO[1] + rng.uniform(-spread, spread),
+            total_amount=100, platform_commission=15, provider_earnings=85
+        ))
+    db.session.commit()
+    return provider_ids
+
+def run(app, provider_ids, radius_km):
+    """Every provider claims concurrently until nothing is left"""
+    barrier = threading.Barrier(len(provider_ids))
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def provider_loop(user_id, provider_id):
+        with app.app_context():
+            provider = db.session.get(ServiceProviderProfile, provider_id)
+            db.session.commit()  # hand the connection back to the pool before racing
+            barrier.wait()
+            while True:
+                started = time.perf_counter()
+                try:
+                    booking = claim_next_booking(provider, *CAIRO, radius_km=radius_km, changed_by=user_id)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors.append(repr(e))
+                    continue
+                if booking is None:
+                    return
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=provider_loop, args=pair) for pair in provider_ids]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--providers', type=int, default=500, help='concurrent provider threads')
+    parser.add_argument('--bookings', type=int, default=2000, help='open bookings to seed')
+    parser.add_argument('--radius-km', type=int, default=10, help='provider service radius')
+    parser.add_argument('--pool-size', type=int, default=32, help='database connection pool size')
+    parser.add_argument('--database-url', help='scratch database (default: temporary SQLite file)')
+    args = parser.parse_args()
+
+    scratch = None
+    database_url = args.database_url
+    if not database_url:
+        scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        database_url = f'sqlite:///{scratch.name}'
+
+    app = create_app(database_url, args.pool_size)
+    try:
+        with app.app_context():
+            db.create_all()
+            provider_ids = seed(args.providers, args.bookings, args.radius_km)
+            dialect = db.engine.dialect.name
+
+        print('📦 Booking claim benchmark')
+        print('=' * 78)
+        print(f"dialect={dialect} providers={args.providers} bookings={args.bookings} pool={args.pool_size}")
+
+        latencies, errors, elapsed = run(app, provider_ids, args.radius_km)
+
+        with app.app_context():
+            assigned = Booking.query.filter(Booking.provider_id.isnot(None)).count()
+            duplicates = db.session.query(BookingStatusHistory.booking_id).group_by(
+                BookingStatusHistory.booking_id
+            ).having(func.count() > 1).count()
+
+        print(f"{'claims':>8} {'claims/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>7} "
+              f"{'double':>7} {'total s':>9}")
+        print(f"{len(latencies):>8} {len(latencies) / elapsed if elapsed else 0.0:>10.1f} "
+              f"{percentile(latencies, 50) * 1000:>10.1f} {percentile(latencies, 95) * 1000:>10.1f} "
+              f"{percentile(latencies, 99) * 1000:>10.1f} {len(errors):>7} {duplicates:>7} {elapsed:>9.2f}")
+        if errors:
+            print(f"⚠️ First error: {errors[0]}")
+        if assigned != len(latencies) or duplicates:
+            print(f"❌ {assigned} bookings assigned for {len(latencies)} successful claims")
+            sys.exit(1)
+    finally:
+        with app.app_context():
+            db.drop_all()
+            db.engine.dispose()
+        if scratch:
+            os.unlink(scratch.name)
+
+if __name__ == '__main__':
+    main()
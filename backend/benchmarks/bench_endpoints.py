@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Hot endpoint benchmark suite
+
+Boots the app against a local database seeded with a deterministic data
+set (providers with positions around Cairo, customers with booking
+history, daily rollups) and drives app.test_client() through the hot
+paths: categories, search, online providers, live location, booking
+create/list/status and the admin dashboard and analytics. Reports latency
+percentiles and the queries each request ran (X-Query-Count), and compares
+them with a stored baseline:
+
+- a scenario running more queries than its baseline is a regression;
+- p95 above baseline * (1 + --tolerance) + --slack-ms is a regression.
+
+Any regression (or an unexpected status code) exits 1. Latency baselines
+only mean something on the machine that recorded them; query counts hold
+everywhere (tests/test_bench_endpoints.py checks them in CI).
+
+Runs on a throwaway SQLite file by default; point --database-url at an
+empty local Postgres database to measure it instead (tables are created
+there and dropped afterwards). A database that already holds data, such
+as one loaded by `flask data generate`, is benchmarked with the suite's
+accounts added on top and is not dropped. On SQLite, search finds no providers: its
+String(36) provider join doesn't match the hex-stored UUIDs there, so use
+Postgres for representative search figures.
+
+Usage (from backend/):
+    python -m benchmarks.bench_endpoints
+    python -m benchmarks.bench_endpoints --update-baseline
+    python -m benchmarks.bench_endpoints --queries-only --iterations 20
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'endpoints.json')
+
+CAIRO = (30.0444, 31.2357)
+
+# Settings the suite needs whatever the shell has: no Redis, no rate limits, query headers on
+BENCH_ENV = {
+    'REDIS_URL': '',
+    'RATELIMIT_ENABLED': 'false',
+    'QUERY_STATS_ENABLED': 'true',
+    'QUERY_TIMING_HEADERS': 'true',
+    'BOOKING_SWEEP_INTERVAL': '0',
+    'METRICS_DIR': '',
+    'DB_BOOTSTRAP_ON_STARTUP': 'false',
+}
+
+class Scenario:
+    """One hot path: request builder, who calls it and the status it must return"""
+    __slots__ = ('name', 'method', 'path', 'body', 'role', 'status')
+
+    def __init__(self, name, method, path, body=None, role=None, status=200):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.role = role
+        self.status = status
+
+def _near_cairo(rng, spread=0.05):
+    return CAIRO[0] + rng.uniform(-spread, spread), CAIRO[1] + rng.uniform(-spread, spread)
+
+SCENARIOS = [
+    Scenario('categories', 'GET', lambda data, i: '/api/services/categories'),
+    Scenario('category_services', 'GET', lambda data, i: f"/api/services/categories/{data['category_id']}/services"),
+    Scenario('search', 'POST', lambda data, i: '/api/services/search',
+             body=lambda data, i: {'latitude': CAIRO[0], 'longitude': CAIRO[1], 'service_id': data['service_id'],
+                                   'max_distance_km': 25}),
+    Scenario('online_providers', 'GET',
+             lambda data, i: f'/api/providers/online?latitude={CAIRO[0]}&longitude={CAIRO[1]}&radius=25'),
+    Scenario('live_location', 'POST', lambda data, i: '/api/providers/live-location', role='provider',
+             body=lambda data, i: dict(zip(('latitude', 'longitude'), _near_cairo(random.Random(i), 0.01)))),
+    Scenario('booking_create', 'POST', lambda data, i: '/api/services/bookings', role='customer', status=201,
+             body=lambda data, i: {
+                 'service_id': data['service_id'],
+                 'provider_id': data['provider_id'],
+                 'scheduled_date': (datetime.utcnow() + timedelta(days=2)).isoformat(),
+                 'service_address': {'street': '26 July St', 'city': 'Cairo', 'governorate': 'Cairo',
+                                     'latitude': CAIRO[0], 'longitude': CAIRO[1]}
+             }),
+    Scenario('booking_list', 'GET', lambda data, i: '/api/services/bookings?per_page=20', role='customer'),
+    Scenario('booking_status', 'PUT', lambda data, i: f"/api/services/bookings/{data['pending_bookings'][i]}/status",
+             role='provider', body=lambda data, i: {'status': 'confirmed'}),
+    Scenario('admin_dashboard_stats', 'GET', lambda data, i: '/api/admin/dashboard/stats', role='admin'),
+    Scenario('admin_analytics', 'GET', lambda data, i: '/api/admin/analytics?days=90', role='admin'),
+]
+
+@contextmanager
+def bench_environment(database_url):
+    """Environment create_app reads, restored afterwards"""
+    values = dict(BENCH_ENV, DATABASE_URL=database_url)
+    saved = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+def create_bench_app(database_url):
+    with bench_environment(database_url):
+        from src.main import create_app
+        app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+def seed(app, providers=50, customers=20, bookings_per_customer=10, pending=250, seed_value=42):
+    """Create the schema and a deterministic data set; returns ids and tokens the scenarios use"""
+    from flask_jwt_extended import create_access_token
+    from src.models import db
+    from src.models.user import User, CustomerProfile, ServiceProviderProfile
+    from src.models.service import Service, ProviderService, Booking
+    from src.models.location import ProviderLocation
+    from src.sample_data import seed_sample_data
+    from src.utils.rollups import rebuild_booking_rollups
+
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    # Unique per run, so the suite can be pointed at the same database again
+    run = uuid.uuid4().hex[:8]
+    with app.app_context():
+        db.create_all()
+        seed_sample_data()
+        services = Service.query.order_by(Service.name_en).all()
+        service = services[0]
+
+        def add_user(user_type, email):
+            # '!' never matches a bcrypt hash: these accounts only use minted tokens
+            user = User(email=email, user_type=user_type, status='active', password_hash='!')
+            db.session.add(user)
+            return user
+
+        admin = add_user('admin', f'bench-{run}-admin@example.com')
+        provider_users, provider_profiles = [], []
+        for index in range(providers):
+            user = add_user('service_provider', f'bench-{run}-provider-{index}@example.com')
+            db.session.flush()
+            profile = ServiceProviderProfile(user_id=user.id, first_name=f'Provider{index}', last_name='Bench',
+                                             verification_status='approved', is_available=True)
+            db.session.add(profile)
+            provider_users.append(user)
+            provider_profiles.append(profile)
+        db.session.flush()
+
+        for user, profile in zip(provider_users, provider_profiles):
+            offered = [service] + rng.sample(services[1:], 2)
+            db.session.add_all(ProviderService(provider_id=str(profile.id), service_id=s.id) for s in offered)
+            # A short trail of older positions behind the current online one
+            for hours_ago in (6, 3, 1):
+                latitude, longitude = _near_cairo(rng)
+                db.session.add(ProviderLocation(provider_id=user.id, latitude=latitude, longitude=longitude,
+                                                is_online=hours_ago == 1,
+                                                created_at=now - timedelta(hours=hours_ago),
+                                                last_updated=now - timedelta(hours=hours_ago)))
+
+        customer_users, customer_profiles = [], []
+        for index in range(customers):
+            user = add_user('customer', f'bench-{run}-customer-{index}@example.com')
+            db.session.flush()
+            profile = CustomerProfile(user_id=user.id, first_name=f'Customer{index}', last_name='Bench')
+            db.session.add(profile)
+            customer_users.append(user)
+            customer_profiles.append(profile)
+        db.session.flush()
+
+        def add_booking(customer, provider, status, created_at):
+            amount = rng.choice((150, 200, 250, 400))
+            booking = Booking(customer_id=str(customer.id), provider_id=str(provider.id), service_id=service.id,
+                              booking_status=status, scheduled_date=created_at + timedelta(days=2),
+                              service_address={'street': 'Tahrir St', 'city': 'Cairo', 'governorate': 'Cairo'},
+                              total_amount=amount, platform_commission=amount * 0.15,
+                              provider_earnings=amount * 0.85, created_at=created_at)
+            db.session.add(booking)
+            return booking
+
+        for customer in customer_profiles:
+            for _ in range(bookings_per_customer):
+                add_booking(customer, rng.choice(provider_profiles),
+                            rng.choice(('completed', 'completed', 'cancelled', 'confirmed', 'pending')),
+                            now - timedelta(days=rng.randint(1, 180), minutes=rng.randint(0, 1440)))
+
+        # One fresh pending booking per booking_status request, kept off the benchmarked customer's list
+        pending_bookings = [add_booking(customer_profiles[-1], provider_profiles[0], 'pending', now)
+                            for _ in range(pending)]
+        db.session.flush()
+        rebuild_booking_rollups()
+        db.session.commit()
+
+        return {
+            'category_id': service.category_id,
+            'service_id': service.id,
+            'provider_id': str(provider_profiles[0].id),
+            'pending_bookings': [booking.id for booking in pending_bookings],
+            # The seed arguments, stored with a baseline so its query counts can be reproduced
+            'sizes': {'providers': providers, 'customers': customers, 'bookings_per_customer': bookings_per_customer},
+            'tokens': {
+                'admin': create_access_token(identity=str(admin.id)),
+                'provider': create_access_token(identity=str(provider_users[0].id)),
+                'customer': create_access_token(identity=str(customer_users[0].id)),
+            }
+        }
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of floats"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def run_scenario(client, scenario, data, iterations, warmup):
+    """Latency and query figures for one scenario; raises if a response has the wrong status"""
+    headers = {}
+    if scenario.role:
+        headers['Authorization'] = f"Bearer {data['tokens'][scenario.role]}"
+    latencies, queries = [], []
+    for i in range(warmup + iterations):
+        kwargs = {'headers': headers}
+        if scenario.body is not None:
+            kwargs['json'] = scenario.body(data, i)
+        started = time.perf_counter()
+        response = client.open(scenario.path(data, i), method=scenario.method, **kwargs)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if response.status_code != scenario.status:
+            raise RuntimeError(f'{scenario.name}: expected {scenario.status}, got {response.status_code}: '
+                               f'{response.get_data(as_text=True)[:200]}')
+        if i >= warmup:
+            latencies.append(elapsed_ms)
+            queries.append(int(response.headers.get('X-Query-Count', 0)))
+    return {
+        'requests': iterations,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'max_ms': round(max(latencies), 3),
+        # The typical request; a cache refill now and then shouldn't move it
+        'queries': int(percentile(queries, 50)),
+        'max_queries': max(queries)
+    }
+
+def run_suite(app, data, iterations=200, warmup=20, scenarios=None):
+    client = app.test_client()
+    selected = [scenario for scenario in SCENARIOS if scenarios is None or scenario.name in scenarios]
+    return {scenario.name: run_scenario(client, scenario, data, iterations, warmup) for scenario in selected}
+
+def compare(results, baseline, tolerance=0.5, slack_ms=2.0, check_latency=True):
+    """Regressions against a baseline, one message each"""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get('scenarios', {}).get(name)
+        if expected is None:
+            continue
+        if result['queries'] > expected['queries']:
+            regressions.append(f"{name}: {result['queries']} queries per request, baseline {expected['queries']}")
+        limit = expected['p95_ms'] * (1 + tolerance) + slack_ms
+        if check_latency and result['p95_ms'] > limit:
+            regressions.append(f"{name}: p95 {result['p95_ms']:.2f} ms, baseline {expected['p95_ms']:.2f} ms "
+                               f"(limit {limit:.2f} ms)")
+    return regressions
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_baseline(results, data, dialect, path=BASELINE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    baseline = {
+        'recorded_at': datetime.utcnow().replace(microsecond=0).isoformat() + 'Z',
+        'environment': {'dialect': dialect, 'python': platform.python_version(), 'machine': platform.machine()},
+        'data': data['sizes'],
+        'scenarios': results
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency and query counts of the hot endpoints against a baseline')
+    parser.add_argument('--database-url', default=None, help='Defaults to a temporary SQLite file')
+    parser.add_argument('--iterations', type=int, default=200, help='Measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per scenario first')
+    parser.add_argument('--providers', type=int, default=50)
+    parser.add_argument('--customers', type=int, default=20)
+    parser.add_argument('--bookings-per-customer', type=int, default=10)
+    parser.add_argument('--scenario', action='append', help='Run only these scenarios (repeatable)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help='Write these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed relative p95 growth')
+    parser.add_argument('--slack-ms', type=float, default=2.0, help='Allowed absolute p95 growth on top')
+    parser.add_argument('--queries-only', action='store_true', help='Compare query counts, not latency')
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-endpoints-'), 'bench.db')}"
+
+    app = create_bench_app(database_url)
+    with app.app_context():
+        from sqlalchemy import inspect
+        from src.models import db
+        # A database that already has data (e.g. from `flask data generate`) is benchmarked as is and kept
+        fresh = not inspect(db.engine).get_table_names()
+    data = seed(app, args.providers, args.customers, args.bookings_per_customer,
+                pending=args.warmup + args.iterations)
+    try:
+        with app.app_context():
+            from src.models import db
+            dialect = db.engine.dialect.name
+        print(f"🏁 Hot endpoints on {dialect}: {args.iterations} requests per scenario "
+              f"({args.providers} providers, {args.customers} customers x {args.bookings_per_customer} bookings)")
+        results = run_suite(app, data, args.iterations, args.warmup, args.scenario)
+    finally:
+        if args.database_url is not None and fresh:
+            with app.app_context():
+                from src.models import db
+                db.drop_all()
+
+    baseline = load_baseline(args.baseline)
+    print(f"{'scenario':<24}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'base p95':>10}{'base q':>8}")
+    for name, result in results.items():
+        expected = (baseline or {}).get('scenarios', {}).get(name, {})
+        print(f"{name:<24}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+              f"{result['queries']:>9}{expected.get('p95_ms', float('nan')):>10.2f}{expected.get('queries', '-'):>8}")
+
+    if args.update_baseline:
+        save_baseline(results, data, dialect, args.baseline)
+        print(f"📝 Baseline written to {args.baseline}")
+        return
+
+    if baseline is None:
+        print(f"⚠️ No baseline at {args.baseline}; run with --update-baseline to record one")
+        return
+    if baseline.get('environment', {}).get('dialect') != dialect:
+        print(f"⚠️ Baseline was recorded on {baseline['environment'].get('dialect')}, this run is on {dialect}")
+    regressions = compare(results, baseline, args.tolerance, args.slack_ms, check_latency=not args.queries_only)
+    if regressions:
+        print('❌ Regressions against the baseline:')
+        for regression in regressions:
+            print(f'  {regression}')
+        sys.exit(1)
+    print('✅ No regressions against the baseline')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark across bcrypt cost settings
+
+Simulates a burst of concurrent logins against the password hashing pool
+and reports verifications per second, latency percentiles and how many
+attempts were shed because the pool was saturated.
+
+Usage (from backend/):
+    python -m benchmarks.bench_login_throughput --rounds 10 11 12 --clients 32 --logins 256
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.passwords import PasswordHasher, PasswordHashingBusy
+
+PASSWORD = 'BenchPassword123'
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of floats"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def run_burst(hasher, password_hash, clients, logins):
+    """Fire ``logins`` verifications from ``clients`` concurrent request threads"""
+    latencies = []
+    rejected = 0
+
+    def attempt(_):
+        started = time.perf_counter()
+        try:
+            ok = hasher.verify(PASSWORD, password_hash)
+        except PasswordHashingBusy:
+            return None
+        assert ok
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for result in pool.map(attempt, range(logins)):
+            if result is None:
+                rejected += 1
+            else:
+                latencies.append(result)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'elapsed_s': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'rejected': rejected
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, nargs='+', default=[10, 11, 12], help='bcrypt cost factors to compare')
+    parser.add_argument('--workers', type=int, default=4, help='hashing pool size')
+    parser.add_argument('--queue-size', type=int, default=32, help='hashing queue depth')
+    parser.add_argument('--timeout', type=float, default=30.0, help='per-job timeout in seconds')
+    parser.add_argument('--clients', type=int, default=32, help='concurrent login requests')
+    parser.add_argument('--logins', type=int, default=128, help='total login attempts per cost')
+    args = parser.parse_args()
+
+    print('🔐 Login throughput benchmark')
+    print('=' * 78)
+    print(f"workers={args.workers} queue={args.queue_size} clients={args.clients} logins={args.logins}")
+    print(f"{'rounds':>6} {'logins/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'rejected':>9} {'total s':>9}")
+
+    for rounds in args.rounds:
+        hasher = PasswordHasher(
+            log_rounds=rounds,
+            workers=args.workers,
+            queue_size=args.queue_size,
+            timeout=args.timeout
+        )
+        password_hash = hasher.hash(PASSWORD)
+        result = run_burst(hasher, password_hash, args.clients, args.logins)
+        print(f"{rounds:>6} {result['throughput']:>10.1f} {result['p50_ms']:>10.1f} {result['p95_ms']:>10.1f} "
+              f"{result['p99_ms']:>10.1f} {result['rejected']:>9} {result['elapsed_s']:>9.2f}")
+
+if __name__ == '__main__':
+    main()
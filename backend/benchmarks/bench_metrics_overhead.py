@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Request metrics overhead benchmark
+
+Times the metrics hooks on their own (before_request, after_request and
+teardown_request for one request, inside an already-pushed request context), with the
+process-local store and with the memory-mapped METRICS_DIR store, then
+the same tiny endpoint through the test client with metrics on and off.
+The hook cost is what every request pays; the end-to-end delta includes
+Flask's hook dispatch too.
+
+Usage (from backend/):
+    python -m benchmarks.bench_metrics_overhead --requests 200000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+from src.utils.metrics import request_metrics
+
+def create_app(metrics_dir=None, enabled=True):
+    app = Flask(__name__)
+    app.config.update(METRICS_ENABLED=enabled, METRICS_DIR=metrics_dir)
+    request_metrics.init_app(app)
+
+    @app.route('/items/<int:item_id>')
+    def get_item(item_id):
+        return jsonify({'id': item_id})
+
+    return app
+
+def time_hooks(app, requests):
+    """Microseconds per request spent in the metrics before/after/teardown hooks"""
+    response = app.response_class('{}', status=200)
+    with app.test_request_context('/items/7'):
+        # Route matching normally happens when the request context is pushed by the server
+        request_metrics._start_request()
+        request_metrics._finish_request(response)
+        request_metrics._teardown_request(None)
+        started = time.perf_counter()
+        for _ in range(requests):
+            request_metrics._start_request()
+            request_metrics._finish_request(response)
+            request_metrics._teardown_request(None)
+        elapsed = time.perf_counter() - started
+    return elapsed / requests * 1e6
+
+def time_client(app, requests):
+    """Microseconds per request through the Flask test client"""
+    client = app.test_client()
+    client.get('/items/7')
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get('/items/7')
+    return (time.perf_counter() - started) / requests * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-request cost of the request metrics hooks')
+    parser.add_argument('--requests', type=int, default=200000, help='Hook invocations per store')
+    parser.add_argument('--client-requests', type=int, default=10000, help='Test client requests per round')
+    parser.add_argument('--rounds', type=int, default=3, help='Alternating test client rounds per mode')
+    args = parser.parse_args()
+
+    metrics_dir = tempfile.mkdtemp(prefix='bench-metrics-')
+    print(f"📈 Metrics hook overhead: {args.requests} requests per store")
+    print(f"{'mode':<34}{'us/request':>12}")
+    for label, directory in (('hooks, in-process store', None), ('hooks, mmap store (METRICS_DIR)', metrics_dir)):
+        print(f"{label:<34}{time_hooks(create_app(directory), args.requests):>12.2f}")
+
+    # Alternate the modes and keep each one's best round: the test client is noisy
+    off_app, on_app = create_app(enabled=False), create_app(metrics_dir)
+    off = on = float('inf')
+    for _ in range(args.rounds):
+        off = min(off, time_client(off_app, args.client_requests))
+        on = min(on, time_client(on_app, args.client_requests))
+    print(f"{'test client, metrics off':<34}{off:>12.2f}")
+    print(f"{'test client, metrics on (mmap)':<34}{on:>12.2f}")
+    print(f"{'end-to-end delta':<34}{on - off:>12.2f}")
+    request_metrics.reset()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Cold worker boot benchmark: bootstrap-at-startup vs. no DB I/O at boot
+
+Boots the app in fresh interpreters (what every gunicorn worker does
+without preload_app) and reports import/create_app time and the number of
+SQL statements issued before the first request. --db-latency-ms adds a
+simulated round trip per statement and per new connection, standing in for
+a remote database such as the Supabase pooler.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup --boots 5 --db-latency-ms 40
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BOOT_SCRIPT = r'''
+import json, os, sys, time
+started = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+latency = float(os.environ['BENCH_DB_LATENCY_MS']) / 1000
+stats = {'statements': 0, 'connections': 0}
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def statement(*args):
+    stats['statements'] += 1
+    time.sleep(latency)
+
+@event.listens_for(Engine, 'connect')
+def connect(*args):
+    stats['connections'] += 1
+    # TCP + TLS + auth handshakes
+    time.sleep(latency * 3)
+
+import src.main
+stats['boot_ms'] = (time.perf_counter() - started) * 1000
+print('BENCH ' + json.dumps(stats))
+'''
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of floats"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def boot(database_url, bootstrap, latency_ms):
+    """Boot the app once in a fresh interpreter; returns the child's stats"""
+    env = dict(os.environ, DATABASE_URL=database_url, BENCH_DB_LATENCY_MS=str(latency_ms),
+               DB_BOOTSTRAP_ON_STARTUP='true' if bootstrap else 'false', REDIS_URL='', BOOKING_SWEEP_INTERVAL='0')
+    result = subprocess.run([sys.executable, '-c', BOOT_SCRIPT], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    line = next(line for line in result.stdout.splitlines() if line.startswith('BENCH '))
+    return json.loads(line[len('BENCH '):])
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold worker boot time with and without DB bootstrap')
+    parser.add_argument('--boots', type=int, default=5, help='Cold boots per mode')
+    parser.add_argument('--db-latency-ms', type=float, default=0.0, help='Simulated DB round trip per statement')
+    parser.add_argument('--workers', type=int, default=4, help='Workers per instance, for the restart estimate')
+    parser.add_argument('--database-url', default=None, help='Defaults to a seeded temporary SQLite file')
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix='bench-startup-'), 'bench.db')
+        database_url = f'sqlite:///{path}'
+        # Existing deployments restart against a database that is already created and seeded
+        boot(database_url, True, 0)
+
+    print(f"🚀 Cold boot: {args.boots} boots per mode, {args.db_latency_ms:.0f} ms simulated DB round trip")
+    print(f"{'mode':<22}{'p50 ms':>10}{'p95 ms':>10}{'statements':>12}{'connects':>10}{'restart ms':>12}")
+    for label, bootstrap in (('bootstrap at startup', True), ('no DB I/O at boot', False)):
+        runs = [boot(database_url, bootstrap, args.db_latency_ms) for _ in range(args.boots)]
+        times = [run['boot_ms'] for run in runs]
+        p50 = percentile(times, 50)
+        # Without preload every worker boots on its own; with it the master boots once and forks
+        restart = p50 * args.workers if bootstrap else p50
+        print(f"{label:<22}{p50:>10.1f}{percentile(times, 95):>10.1f}{runs[-1]['statements']:>12}"
+              f"{runs[-1]['connections']:>10}{restart:>12.1f}")
+    print(f"restart ms: {args.workers} workers booting separately vs. one preloaded boot shared by fork")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Traffic replay load test
+
+Replays request logs recorded by the app (REQUEST_LOG_DIR, see
+src/utils/request_log.py) against a local instance, keeping the recorded
+arrival pattern at --speed times the original rate with up to
+--concurrency requests in flight. The logs hold route templates and
+payload shapes only, so ids, locations and text are filled in here:
+requests run as the `flask data generate` accounts of --seed (by the role
+recorded for them), path and body ids come from what those accounts can
+see through the API, and the rest is made up deterministically.
+
+Reports per route throughput, errors (5xx and connection failures),
+requests that failed although they succeeded when recorded, and latency
+percentiles next to the recorded server time. Schedule lag is how late
+requests started because every slot was busy: when it grows, the target
+is saturated at that speed, which is the number to size gunicorn workers
+against before a campaign.
+
+Usage (from backend/):
+    # 1. record: serve with REQUEST_LOG_DIR=/var/tmp/request-logs (REQUEST_LOG_SAMPLE_RATE=0.1 in production)
+    # 2. load a local database: flask data generate --scale 1 --seed 42
+    # 3. serve it without rate limits or recording:
+    #    RATELIMIT_ENABLED=false gunicorn -c gunicorn.conf.py src.main:app
+    python -m benchmarks.replay_traffic /var/tmp/request-logs --target http://127.0.0.1:8000 --speed 10 --concurrency 32
+    python -m benchmarks.replay_traffic requests-123.jsonl --database-url postgresql://localhost/bench --speed 2
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from urllib.parse import urlencode, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.synthetic_data import SYNTHETIC_PASSWORD
+from src.utils.request_log import load_request_logs
+
+CAIRO = (30.0444, 31.2357)
+LOGIN_ROUTE = '/api/auth/login'
+MARKERS = ('<str>', '<int>', '<float>')
+# Email kind of the generated accounts for each recorded role
+ACCOUNT_KINDS = {'customer': 'customer', 'service_provider': 'provider'}
+# Id fields filled from what the replay accounts can see (per account for their own rows)
+SHARED_POOLS = {'category_id': 'categories', 'service_id': 'services', 'provider_id': 'providers'}
+ACCOUNT_POOLS = {'booking_id': 'bookings', 'provider_service_id': 'provider_services'}
+
+_PATH_ARG = re.compile(r'<(?:[^:<>]+:)?([^<>]+)>')
+
+class HttpTarget:
+    """A running instance, one keep-alive connection per replay thread"""
+
+    def __init__(self, base_url, timeout=30.0):
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == 'https'
+        self.netloc = parts.netloc
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            factory = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            connection = self._local.connection = factory(self.netloc, timeout=self.timeout)
+        return connection
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Accept': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        for attempt in (0, 1):
+            connection = self._connection()
+            try:
+                connection.request(method, path, body=data, headers=headers)
+                response = connection.getresponse()
+                payload = response.read()
+                if response.getheader('Connection', '').lower() == 'close':
+                    self._reset()
+                break
+            except (http.client.HTTPException, OSError):
+                # gunicorn sync workers close idle keep-alive connections: retry once on a new one
+                self._reset()
+                if attempt:
+                    return 0, None
+        try:
+            return response.status, json.loads(payload) if payload else None
+        except ValueError:
+            return response.status, None
+
+    def _reset(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+        self._local.connection = None
+
+class AppTarget:
+    """The app in this process through its test client (no HTTP server needed)"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, token=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+class Account:
+    __slots__ = ('email', 'role', 'token', 'profile_id', 'pools')
+
+    def __init__(self, email, role, token, profile_id):
+        self.email = email
+        self.role = role
+        self.token = token
+        self.profile_id = profile_id
+        self.pools = {'bookings': [], 'provider_services': [], 'offerings': []}
+
+class ReplayContext:
+    """Logged-in accounts per role and the ids the replayed requests can use"""
+
+    def __init__(self, target, seed=42, accounts=5, password=SYNTHETIC_PASSWORD, admin=None, rng=None):
+        self.target = target
+        self.seed = seed
+        self.password = password
+        self.rng = rng or random.Random(seed)
+        self.accounts = {role: [] for role in ('customer', 'service_provider', 'admin')}
+        self.pools = {'categories': [], 'services': [], 'providers': []}
+        for role, kind in ACCOUNT_KINDS.items():
+            for index in range(accounts):
+                self.login(f'synthetic-{seed}-{kind}-{index}@example.com', password, role)
+        if admin:
+            self.login(admin[0], admin[1], 'admin')
+
+    def login(self, email, password, role):
+        status, payload = self.target.request('POST', LOGIN_ROUTE, {'email_or_phone': email, 'password': password})
+        if status != 200:
+            print(f"⚠️ Replay login failed for {email}: {status} {(payload or {}).get('error', '')}")
+            return None
+        profile = payload.get('profile') or {}
+        account = Account(email, role, payload['access_token'], profile.get('id'))
+        self.accounts[role].append(account)
+        return account
+
+    def harvest(self):
+        """Collect ids through the API (what the accounts could have clicked on)"""
+        customer = self.account('customer')
+        token = customer.token if customer else None
+        status, payload = self.target.request('GET', '/api/services/categories')
+        categories = [c['id'] for c in (payload or {}).get('categories', [])] if status == 200 else []
+        self.pools['categories'] = categories
+        for category_id in categories:
+            status, payload = self.target.request('GET', f'/api/services/categories/{category_id}/services')
+            if status == 200:
+                self.pools['services'].extend(s['id'] for s in payload.get('services', []))
+        status, payload = self.target.request('GET', '/api/providers/online', token=token)
+        providers = {p['id'] for p in (payload or {}).get('online_providers', [])} if status == 200 else set()
+        for account in self.accounts['service_provider']:
+            if account.profile_id:
+                providers.add(account.profile_id)
+            status, payload = self.target.request('GET', '/api/providers/profile', token=account.token)
+            if status == 200:
+                for offering in payload.get('services', []):
+                    account.pools['provider_services'].append(offering['id'])
+                    account.pools['offerings'].append((account.profile_id, offering['service_id']))
+        self.pools['providers'] = sorted(providers)
+        for account in self.accounts['customer'] + self.accounts['service_provider']:
+            status, payload = self.target.request('GET', '/api/services/bookings?per_page=50', token=account.token)
+            if status == 200:
+                account.pools['bookings'] = [b['id'] for b in payload.get('bookings', [])]
+        return {name: len(ids) for name, ids in self.pools.items()}
+
+    def account(self, role):
+        accounts = self.accounts.get(role) or []
+        return self.rng.choice(accounts) if accounts else None
+
+    def materialize(self, entry):
+        """(method, path, body, token) for a recorded entry, or the reason it is skipped"""
+        role = entry.get('role')
+        account = None
+        if role is not None:
+            account = self.account(role)
+            if account is None:
+                return f'no {role} account'
+        body = entry.get('body')
+        if isinstance(body, dict) and '<form>' in body:
+            return 'multipart upload'
+        if entry['route'] == LOGIN_ROUTE:
+            login = self.account('customer') or self.account('service_provider')
+            if login is None:
+                return 'no account to log in'
+            body = {'email_or_phone': login.email, 'password': self.password}
+        elif body is not None:
+            body = self.build(body, None, account)
+        args = entry.get('args') or {}
+        path = _PATH_ARG.sub(lambda m: str(self.fill(m.group(1), args.get(m.group(1), '<str>'), account)),
+                             entry['route'])
+        query = {key: self.build(value, key, account) for key, value in (entry.get('query') or {}).items()}
+        if query:
+            path = f'{path}?{urlencode(query)}'
+        return entry['method'], path, body, account.token if account else None
+
+    def build(self, shape, key, account):
+        if isinstance(shape, dict):
+            if '<list>' in shape:
+                return [self.build(shape['<list>'], key, account) for _ in range(shape.get('length', 1))]
+            value = {k: self.build(v, k, account) for k, v in shape.items()}
+            if 'provider_id' in value and 'service_id' in value:
+                # A provider that offers the service, or the booking is rejected
+                offerings = [o for a in self.accounts['service_provider'] for o in a.pools['offerings']]
+                if offerings:
+                    value['provider_id'], value['service_id'] = self.rng.choice(offerings)
+            return value
+        if shape in MARKERS:
+            return self.fill(key, shape, account)
+        return shape
+
+    def fill(self, key, marker, account):
+        """A plausible value for a sanitized field"""
+        rng = self.rng
+        key = key or ''
+        if key in SHARED_POOLS and self.pools[SHARED_POOLS[key]]:
+            return rng.choice(self.pools[SHARED_POOLS[key]])
+        if key in ACCOUNT_POOLS and account is not None and account.pools[ACCOUNT_POOLS[key]]:
+            return rng.choice(account.pools[ACCOUNT_POOLS[key]])
+        if key in ('latitude', 'lat'):
+            return round(CAIRO[0] + rng.uniform(-0.1, 0.1), 6)
+        if key in ('longitude', 'lng'):
+            return round(CAIRO[1] + rng.uniform(-0.1, 0.1), 6)
+        if 'password' in key:
+            return self.password
+        if key == 'email':
+            return f'replay-{rng.getrandbits(48):x}@example.com'
+        if key == 'phone':
+            return f'+2010{rng.randrange(10 ** 8):08d}'
+        if marker == '<str>' and (key.endswith('date') or key.endswith('_at') or key.endswith('time')):
+            return (datetime.utcnow() + timedelta(days=rng.randint(1, 14), hours=rng.randint(0, 23))).isoformat()
+        if marker == '<int>':
+            return 1
+        if marker == '<float>':
+            return 1.0
+        return 'replay'
+
+def plan(entries, context, speed=1.0, duration=None):
+    """Requests with their start offsets (seconds) at the given speed, and skip counts per route"""
+    requests, skipped = [], defaultdict(lambda: defaultdict(int))
+    if not entries:
+        return requests, skipped
+    first = entries[0]['ts']
+    for entry in entries:
+        offset = (entry['ts'] - first) / speed
+        if duration is not None and offset > duration:
+            break
+        request = context.materialize(entry)
+        route = f"{entry['method']} {entry['route']}"
+        if isinstance(request, str):
+            skipped[route][request] += 1
+            continue
+        requests.append((offset, route, request, entry.get('status'), entry.get('duration_ms')))
+    return requests, skipped
+
+def replay(target, requests, concurrency=16):
+    """Send the planned requests on schedule; returns per request results and the wall time"""
+    results = []
+    position = [0]
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def worker():
+        while True:
+            with lock:
+                index = position[0]
+                if index >= len(requests):
+                    return
+                position[0] += 1
+            offset, route, (method, path, body, token), recorded_status, recorded_ms = requests[index]
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            t0 = time.perf_counter()
+            try:
+                status, _ = target.request(method, path, body, token)
+            except Exception as e:
+                print(f"⚠️ Replay request {method} {path} failed: {e}")
+                status = 0
+            results.append((route, status, time.perf_counter() - t0, max(0.0, -delay),
+                            recorded_status, recorded_ms))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def summarize(results, wall, skipped=None):
+    """Per route and overall throughput, error rates and latency percentiles (ms)"""
+    by_route = defaultdict(list)
+    for result in results:
+        by_route[result[0]].append(result)
+
+    def stats(rows):
+        latencies = [row[2] * 1000 for row in rows]
+        recorded = [row[5] for row in rows if row[5] is not None]
+        errors = sum(1 for row in rows if row[1] == 0 or row[1] >= 500)
+        # Failed now although it succeeded when recorded (missing data, validation, auth)
+        drifted = sum(1 for row in rows if 400 <= row[1] < 500 and row[4] is not None and row[4] < 400)
+        return {
+            'requests': len(rows),
+            'throughput_rps': round(len(rows) / wall, 2) if wall else 0.0,
+            'error_rate': round(errors / len(rows), 4) if rows else 0.0,
+            'status_drift_rate': round(drifted / len(rows), 4) if rows else 0.0,
+            'p50_ms': round(percentile(latencies, 0.5), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'recorded_p50_ms': round(percentile(recorded, 0.5), 2),
+            'statuses': dict(sorted(Counter(row[1] for row in rows).items())),
+        }
+
+    lags = [row[3] * 1000 for row in results]
+    total = stats(results)
+    total.update({'wall_s': round(wall, 2), 'lag_p95_ms': round(percentile(lags, 0.95), 2),
+                  'lag_max_ms': round(max(lags, default=0.0), 2)})
+    return {
+        'total': total,
+        'routes': {route: stats(rows) for route, rows in sorted(by_route.items())},
+        'skipped': {route: dict(reasons) for route, reasons in sorted((skipped or {}).items())},
+    }
+
+def print_report(report, speed, concurrency):
+    total = report['total']
+    print(f"🔁 Replayed {total['requests']} requests in {total['wall_s']} s at {speed}x "
+          f"with {concurrency} in flight: {total['throughput_rps']} req/s")
+    print(f"{'route':<56}{'reqs':>7}{'req/s':>9}{'err%':>7}{'drift%':>8}"
+          f"{'p50':>9}{'p95':>9}{'p99':>9}{'rec p50':>9}")
+    for route, stats in list(report['routes'].items()) + [('TOTAL', total)]:
+        print(f"{route[:55]:<56}{stats['requests']:>7}{stats['throughput_rps']:>9.1f}"
+              f"{stats['error_rate'] * 100:>7.1f}{stats['status_drift_rate'] * 100:>8.1f}"
+              f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['recorded_p50_ms']:>9.1f}")
+    print(f"Schedule lag p95 {total['lag_p95_ms']} ms, max {total['lag_max_ms']} ms "
+          f"(growing lag means the target could not keep up)")
+    for route, reasons in report['skipped'].items():
+        print(f"⚠️ Skipped {route}: " + ', '.join(f'{count} {reason}' for reason, count in reasons.items()))
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay recorded request logs against a local instance')
+    parser.add_argument('logs', nargs='+', help='requests-*.jsonl files or REQUEST_LOG_DIR directories')
+    parser.add_argument('--target', default='http://127.0.0.1:5000', help='Base URL of the instance under test')
+    parser.add_argument('--database-url', help='Replay in-process through the test client against this database instead')
+    parser.add_argument('--speed', type=float, default=1.0, help='Multiple of the recorded request rate')
+    parser.add_argument('--concurrency', type=int, default=16, help='Requests in flight at most')
+    parser.add_argument('--duration', type=float, help='Stop after this many seconds of (sped up) schedule')
+    parser.add_argument('--limit', type=int, help='Replay at most this many recorded requests')
+    parser.add_argument('--route', help='Only replay routes matching this regular expression')
+    parser.add_argument('--seed', type=int, default=42, help='Seed the database was generated with (accounts and fill values)')
+    parser.add_argument('--accounts', type=int, default=5, help='Generated accounts to log in per role')
+    parser.add_argument('--admin-email', default=os.getenv('REPLAY_ADMIN_EMAIL'), help='Admin account for admin routes')
+    parser.add_argument('--admin-password', default=os.getenv('REPLAY_ADMIN_PASSWORD'))
+    parser.add_argument('--json', dest='json_path', help='Also write the report to this file')
+    args = parser.parse_args()
+
+    entries = load_request_logs(args.logs)
+    if args.route:
+        pattern = re.compile(args.route)
+        entries = [entry for entry in entries if pattern.search(f"{entry['method']} {entry['route']}")]
+    if args.limit:
+        entries = entries[:args.limit]
+    if not entries:
+        parser.error('no recorded requests to replay')
+
+    if args.database_url:
+        from benchmarks.bench_endpoints import create_bench_app
+        target = AppTarget(create_bench_app(args.database_url))
+    else:
+        target = HttpTarget(args.target)
+    admin = (args.admin_email, args.admin_password) if args.admin_email and args.admin_password else None
+    context = ReplayContext(target, seed=args.seed, accounts=args.accounts, admin=admin)
+    sizes = context.harvest()
+    print(f"👥 Logged in {sum(len(a) for a in context.accounts.values())} accounts; ids: "
+          + ', '.join(f'{count} {name}' for name, count in sizes.items()))
+
+    requests, skipped = plan(entries, context, speed=args.speed, duration=args.duration)
+    results, wall = replay(target, requests, concurrency=args.concurrency)
+    report = summarize(results, wall, skipped)
+    report['settings'] = {'speed': args.speed, 'concurrency': args.concurrency, 'recorded': len(entries),
+                          'target': 'in-process' if args.database_url else args.target}
+    print_report(report, args.speed, args.concurrency)
+    if args.json_path:
+        with open(args.json_path, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    sys.exit(1 if report['total']['error_rate'] > 0 else 0)
+
+if __name__ == '__main__':
+    main()
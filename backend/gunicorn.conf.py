@@ -0,0 +1,41 @@
+"""gunicorn settings (gunicorn -c gunicorn.conf.py src.main:app)
+
+The app is imported once in the master and shared copy-on-write with the
+workers. Booting does no database I/O (migrations and seed data are `flask
+schema upgrade` / `flask schema seed`), so the master holds no connections;
+each worker still drops any inherited pool state before serving.
+
+Request metrics are shared through memory-mapped files in METRICS_DIR
+(a fresh temporary directory unless set), so /metrics on any worker
+reports the whole instance.
+"""
+import os
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Set before the app is loaded so create_app picks it up
+os.environ.setdefault('METRICS_DIR', tempfile.mkdtemp(prefix='metrics-'))
+
+def on_starting(server):
+    from src.utils.metrics import clear_metrics_dir
+    clear_metrics_dir(os.environ['METRICS_DIR'])
+
+def post_fork(server, worker):
+    from src.models import db
+    from src.utils.replicas import replica_router
+
+    app = worker.app.wsgi()
+    with app.app_context():
+        # close=False leaves the parent's sockets alone and just forgets them here
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    for engine in replica_router.engines.values():
+        engine.dispose(close=False)
+
+def child_exit(server, worker):
+    from src.utils.metrics import mark_process_dead
+    mark_process_dead(os.environ['METRICS_DIR'], worker.pid)
@@ -0,0 +1,53 @@
+"""hot-path indexes
+
+Indexes for the busiest predicates: provider positions, customer/provider
+booking lists, service offers, provider reviews and provider documents.
+On Postgres they are built with CREATE INDEX CONCURRENTLY outside the
+migration transaction, so writes to these tables are not blocked; IF NOT
+EXISTS makes the revision safe on databases where create_all already
+built some of them. A failed concurrent build leaves an INVALID index
+behind: drop it and re-run the upgrade.
+
+Revision ID: 0002_hot_path_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-19 02:10:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_hot_path_indexes'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+HOT_PATH_INDEXES = (
+    ('ix_provider_locations_provider_online_updated', 'provider_locations', ['provider_id', 'is_online', 'last_updated']),
+    ('ix_bookings_customer_created_id', 'bookings', ['customer_id', 'created_at', 'id']),
+    ('ix_bookings_provider_created_id', 'bookings', ['provider_id', 'created_at', 'id']),
+    ('ix_provider_services_service_active', 'provider_services', ['service_id', 'is_active']),
+    ('ix_booking_reviews_provider_created', 'booking_reviews', ['provider_id', 'created_at']),
+    ('ix_provider_documents_provider_id', 'provider_documents', ['provider_id']),
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # CONCURRENTLY cannot run inside a transaction block
+        with op.get_context().autocommit_block():
+            for name, table, columns in HOT_PATH_INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in HOT_PATH_INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns in reversed(HOT_PATH_INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, columns in reversed(HOT_PATH_INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,317 @@
+"""rollups, rating aggregates, search text and booking versions
+
+Everything the models gained after the baseline: the booking_daily_rollups
+table, provider rating sums and star histograms, search_text on users and
+providers (trigram-indexed on Postgres), booking versions and service
+coordinates, and the listing, claim and review indexes.
+
+New tables and columns are added in the migration transaction, then the
+columns that summarize existing rows are backfilled in primary-key batches:
+service coordinates from the booking address, search text, provider
+ratings (from booking_reviews) and the daily rollups. The backfill is
+frozen here as SQL and local helpers rather than importing app code, so
+this revision keeps doing the same thing however src/ changes later.
+
+Indexes on the existing tables are built last. On Postgres they use CREATE
+INDEX CONCURRENTLY outside the transaction (as in 0002), so writes to
+bookings, users and provider profiles are not blocked while they build; a
+failed concurrent build leaves an INVALID index behind: drop it and re-run
+the upgrade.
+
+Revision ID: 0003_rollups_ratings_search
+Revises: 0002_hot_path_indexes
+Create Date: 2026-10-19 03:05:00.000000
+
+"""
+import re
+import unicodedata
+import uuid
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_rollups_ratings_search'
+down_revision = '0002_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+OPEN_CLAIM_WHERE = "booking_status = 'pending' AND provider_id IS NULL"
+# (name, table, columns, options) built on tables that already hold rows
+INDEXES = (
+    ('ix_booking_reviews_booking_id', 'booking_reviews', ['booking_id'], {}),
+    ('ix_booking_reviews_provider_id', 'booking_reviews', ['provider_id'], {}),
+    ('ix_bookings_created_id', 'bookings', ['created_at', 'id'], {}),
+    ('ix_bookings_open_claim', 'bookings', ['service_latitude', 'service_longitude', 'scheduled_date'],
+     {'postgresql_where': sa.text(OPEN_CLAIM_WHERE), 'sqlite_where': sa.text(OPEN_CLAIM_WHERE)}),
+    ('ix_bookings_status_created_id', 'bookings', ['booking_status', 'created_at', 'id'], {}),
+    ('ix_bookings_status_scheduled', 'bookings', ['booking_status', 'scheduled_date'], {}),
+    ('ix_service_provider_profiles_created_id', 'service_provider_profiles', ['created_at', 'id'], {}),
+    ('ix_service_provider_profiles_status_created_id', 'service_provider_profiles',
+     ['verification_status', 'created_at', 'id'], {}),
+    ('ix_users_created_id', 'users', ['created_at', 'id'], {}),
+)
+TRIGRAM_INDEXES = (
+    ('ix_users_search_trgm', 'users'),
+    ('ix_service_provider_profiles_search_trgm', 'service_provider_profiles'),
+)
+
+# Tables as this revision sees them (never the app's models)
+users = sa.table('users', sa.column('id'), sa.column('email'), sa.column('phone'), sa.column('search_text'))
+providers = sa.table(
+    'service_provider_profiles', sa.column('id'), sa.column('first_name'), sa.column('last_name'),
+    sa.column('business_name'), sa.column('search_text'), sa.column('rating_sum'), sa.column('total_reviews'),
+    sa.column('average_rating'), sa.column('rating'), *[sa.column(f'rating_count_{stars}') for stars in range(1, 6)]
+)
+bookings = sa.table(
+    'bookings', sa.column('id'), sa.column('service_id'), sa.column('provider_id'), sa.column('booking_status'),
+    sa.column('service_address', sa.JSON), sa.column('service_latitude'), sa.column('service_longitude'),
+    sa.column('total_amount'), sa.column('platform_commission'), sa.column('provider_earnings'),
+    sa.column('created_at')
+)
+reviews = sa.table('booking_reviews', sa.column('id'), sa.column('booking_id'), sa.column('provider_id'),
+                   sa.column('rating'))
+services = sa.table('services', sa.column('id'), sa.column('category_id'))
+rollups = sa.table(
+    'booking_daily_rollups', sa.column('day'), sa.column('service_id'), sa.column('category_id'),
+    sa.column('provider_id'), sa.column('governorate'), sa.column('booking_status'), sa.column('booking_count'),
+    sa.column('gross_amount'), sa.column('commission_amount'), sa.column('provider_earnings'),
+    sa.column('rating_sum'), sa.column('rating_count'), sa.column('updated_at')
+)
+
+
+def upgrade():
+    op.create_table('booking_daily_rollups',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('service_id', sa.String(length=36), nullable=False),
+    sa.Column('category_id', sa.String(length=36), nullable=False),
+    sa.Column('provider_id', sa.String(length=36), nullable=False),
+    sa.Column('governorate', sa.String(length=100), nullable=False),
+    sa.Column('booking_status', sa.String(length=20), nullable=False),
+    sa.Column('booking_count', sa.Integer(), nullable=False),
+    sa.Column('gross_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('commission_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('provider_earnings', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), nullable=False),
+    sa.Column('rating_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day', 'service_id', 'category_id', 'provider_id', 'governorate', 'booking_status', name='uq_booking_daily_rollup_key')
+    )
+    with op.batch_alter_table('booking_daily_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_booking_daily_rollups_status_day', ['booking_status', 'day'], unique=False)
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('service_latitude', sa.Numeric(precision=10, scale=8), nullable=True))
+        batch_op.add_column(sa.Column('service_longitude', sa.Numeric(precision=11, scale=8), nullable=True))
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+    with op.batch_alter_table('service_provider_profiles', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_count_1', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_count_2', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_count_3', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_count_4', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_count_5', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('search_text', sa.Text(), nullable=True))
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('search_text', sa.Text(), nullable=True))
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Trigram search indexes need pg_trgm
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    bind = op.get_bind()
+    backfill_service_coordinates(bind)
+    backfill_search_text(bind)
+    backfill_provider_ratings(bind)
+    backfill_booking_rollups(bind)
+
+    if bind.dialect.name == 'postgresql':
+        # CONCURRENTLY cannot run inside a transaction block
+        with op.get_context().autocommit_block():
+            for name, table, columns, options in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **options)
+            for name, table in TRIGRAM_INDEXES:
+                op.create_index(name, table, ['search_text'], postgresql_using='gin',
+                                postgresql_ops={'search_text': 'gin_trgm_ops'}, postgresql_concurrently=True,
+                                if_not_exists=True)
+    else:
+        for name, table, columns, options in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, **options)
+
+
+def _batches(bind, table, *columns):
+    """Rows of ``table`` in primary-key order, BATCH_SIZE at a time"""
+    last_id = None
+    while True:
+        stmt = sa.select(table.c.id, *columns).order_by(table.c.id).limit(BATCH_SIZE)
+        if last_id is not None:
+            stmt = stmt.where(table.c.id > last_id)
+        rows = bind.execute(stmt).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def _update_by_id(bind, table, rows, **values):
+    if rows:
+        bind.execute(table.update().where(table.c.id == sa.bindparam('row_id')).values(
+            **{column: sa.bindparam(key) for column, key in values.items()}), rows)
+
+
+def backfill_service_coordinates(bind):
+    """Copy the address coordinates of existing bookings into the claim index columns"""
+    for batch in _batches(bind, bookings, bookings.c.service_address):
+        rows = []
+        for booking_id, address in batch:
+            try:
+                latitude, longitude = float(address['latitude']), float(address['longitude'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            rows.append({'row_id': booking_id, 'latitude': latitude, 'longitude': longitude})
+        _update_by_id(bind, bookings, rows, service_latitude='latitude', service_longitude='longitude')
+
+
+# Search text normalization as of this revision
+ARABIC_FOLDING = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي', 'ؤ': 'و',
+    'ة': 'ه',
+    '\u0640': None  # tatweel
+})
+ARABIC_DIACRITICS = re.compile('[\u064B-\u0652\u0670]')
+
+
+def _search_text(text):
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKC', str(text)).lower()
+    text = ARABIC_DIACRITICS.sub('', text).translate(ARABIC_FOLDING)
+    return ' '.join(text.split())
+
+
+def _phone_key(phone):
+    digits = re.sub(r'\D', '', unicodedata.normalize('NFKC', phone or ''))
+    if not digits:
+        return ''
+    # Digits of the canonical +20 form
+    if digits.startswith('0020'):
+        return '20' + digits[4:]
+    if digits.startswith('20'):
+        return digits
+    if digits.startswith('01'):
+        return '20' + digits[1:]
+    return '20' + digits
+
+
+def backfill_search_text(bind):
+    """Build search_text for existing users and providers (the app keeps it current from here on)"""
+    for batch in _batches(bind, users, users.c.email, users.c.phone):
+        rows = [{'row_id': row.id, 'text': ' '.join(filter(None, [_search_text(row.email), _phone_key(row.phone)]))}
+                for row in batch]
+        _update_by_id(bind, users, rows, search_text='text')
+
+    for batch in _batches(bind, providers, providers.c.first_name, providers.c.last_name, providers.c.business_name):
+        rows = [{'row_id': row.id, 'text': ' '.join(filter(None, [
+            _search_text(row.first_name), _search_text(row.last_name), _search_text(row.business_name)
+        ]))} for row in batch]
+        _update_by_id(bind, providers, rows, search_text='text')
+
+
+def backfill_provider_ratings(bind):
+    """Rebuild rating sums, star histograms and averages from booking_reviews, a batch of providers at a time"""
+    for batch in _batches(bind, providers):
+        # booking_reviews.provider_id holds the dashed UUID string whatever the profile id column stores
+        keys = {str(uuid.UUID(str(row.id))): row.id for row in batch}
+        stars = {key: [0] * 6 for key in keys}
+        counts = bind.execute(
+            sa.select(reviews.c.provider_id, reviews.c.rating, sa.func.count(reviews.c.id))
+            .where(reviews.c.provider_id.in_(list(keys)))
+            .group_by(reviews.c.provider_id, reviews.c.rating)
+        )
+        for provider_id, rating, count in counts:
+            if rating in range(1, 6):
+                stars[provider_id][rating] += count
+
+        rows = []
+        for key, row_id in keys.items():
+            histogram = stars[key]
+            total = sum(histogram)
+            rating_sum = sum(rating * count for rating, count in enumerate(histogram))
+            average = round(rating_sum / total, 2) if total else 0
+            rows.append({'row_id': row_id, 'rating_sum_value': rating_sum, 'total': total, 'average': average,
+                         **{f'count_{rating}': histogram[rating] for rating in range(1, 6)}})
+        _update_by_id(bind, providers, rows, rating_sum='rating_sum_value', total_reviews='total',
+                      average_rating='average', rating='average',
+                      **{f'rating_count_{rating}': f'count_{rating}' for rating in range(1, 6)})
+
+
+def backfill_booking_rollups(bind):
+    """Fill booking_daily_rollups with one INSERT ... SELECT over bookings and their reviews"""
+    review_totals = sa.select(
+        reviews.c.booking_id,
+        sa.func.sum(reviews.c.rating).label('rating_sum'),
+        sa.func.count(reviews.c.id).label('rating_count')
+    ).group_by(reviews.c.booking_id).subquery()
+    governorate = sa.func.substr(sa.func.coalesce(bookings.c.service_address['governorate'].as_string(), ''), 1, 100)
+    keys = [
+        sa.func.date(bookings.c.created_at),
+        bookings.c.service_id,
+        sa.func.coalesce(services.c.category_id, ''),
+        sa.func.coalesce(bookings.c.provider_id, ''),
+        governorate,
+        sa.func.coalesce(bookings.c.booking_status, 'pending')
+    ]
+    select = sa.select(
+        *keys,
+        sa.func.count(bookings.c.id),
+        sa.func.coalesce(sa.func.sum(bookings.c.total_amount), 0),
+        sa.func.coalesce(sa.func.sum(bookings.c.platform_commission), 0),
+        sa.func.coalesce(sa.func.sum(bookings.c.provider_earnings), 0),
+        sa.func.coalesce(sa.func.sum(review_totals.c.rating_sum), 0),
+        sa.func.coalesce(sa.func.sum(review_totals.c.rating_count), 0),
+        sa.func.current_timestamp()
+    ).select_from(
+        bookings.outerjoin(services, services.c.id == bookings.c.service_id)
+        .outerjoin(review_totals, review_totals.c.booking_id == bookings.c.id)
+    ).group_by(*keys)
+    bind.execute(rollups.insert().from_select([column.name for column in rollups.c], select))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table in reversed(TRIGRAM_INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+            for name, table, columns, options in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, columns, options in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('search_text')
+
+    with op.batch_alter_table('service_provider_profiles', schema=None) as batch_op:
+        batch_op.drop_column('search_text')
+        batch_op.drop_column('rating_count_5')
+        batch_op.drop_column('rating_count_4')
+        batch_op.drop_column('rating_count_3')
+        batch_op.drop_column('rating_count_2')
+        batch_op.drop_column('rating_count_1')
+        batch_op.drop_column('rating_sum')
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_column('version')
+        batch_op.drop_column('service_longitude')
+        batch_op.drop_column('service_latitude')
+
+    with op.batch_alter_table('booking_daily_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_booking_daily_rollups_status_day')
+
+    op.drop_table('booking_daily_rollups')
@@ -0,0 +1,235 @@
+import click
+from datetime import datetime
+from flask.cli import AppGroup
+from src.models import db
+
+rollups_cli = AppGroup('rollups', help='Maintain analytics rollup tables')
+
+@rollups_cli.command('rebuild')
+@click.option('--since', default=None, help='Only rebuild days on or after this date (YYYY-MM-DD)')
+def rebuild_rollups_command(since):
+    """Backfill or rebuild booking_daily_rollups from bookings and reviews"""
+    from src.utils.rollups import rebuild_booking_rollups
+
+    since_date = datetime.strptime(since, '%Y-%m-%d').date() if since else None
+    try:
+        rows = rebuild_booking_rollups(since=since_date)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    scope = f'since {since_date.isoformat()}' if since_date else 'for all history'
+    click.echo(f'✅ Rebuilt {rows} booking rollup rows {scope}')
+
+search_cli = AppGroup('search', help='Maintain admin search indexes')
+
+@search_cli.command('reindex')
+def reindex_search_command():
+    """Recompute normalized search_text for users and providers"""
+    from src.utils.search import search_index
+
+    try:
+        updated = search_index.reindex()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    click.echo(f'✅ Reindexed search text ({updated} rows changed)')
+
+ratings_cli = AppGroup('ratings', help='Maintain provider rating aggregates')
+
+@ratings_cli.command('reconcile')
+@click.option('--provider', 'provider_ids', multiple=True, help='Only reconcile these provider ids (repeatable)')
+def reconcile_ratings_command(provider_ids):
+    """Rebuild provider rating sums, counts and histograms from booking_reviews"""
+    from src.utils.ratings import reconcile_provider_ratings
+    from src.utils.provider_profiles import provider_profiles
+
+    try:
+        updated = reconcile_provider_ratings(provider_ids=list(provider_ids) or None)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    # Ratings were rewritten with bulk UPDATEs, which bypass session change tracking
+    provider_profiles.invalidate()
+    click.echo(f'✅ Reconciled ratings for {updated} providers')
+
+bookings_cli = AppGroup('bookings', help='Maintain booking-derived counters')
+
+@bookings_cli.command('reconcile-counters')
+def reconcile_counters_command():
+    """Rebuild provider completed-job and earnings counters from completed bookings"""
+    from src.models.service import reconcile_provider_job_counters
+    from src.utils.provider_profiles import provider_profiles
+
+    try:
+        updated = reconcile_provider_job_counters()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    provider_profiles.invalidate()
+    click.echo(f'✅ Reconciled job counters for {updated} providers')
+
+@bookings_cli.command('sweep')
+@click.option('--batch-size', type=int, default=None, help='Bookings per batch (default BOOKING_SWEEP_BATCH_SIZE)')
+@click.option('--max-batches', type=int, default=None, help='Batches per run (default BOOKING_SWEEP_MAX_BATCHES)')
+def sweep_bookings_command(batch_size, max_batches):
+    """Expire pending/confirmed bookings whose scheduled date has long passed"""
+    from src.utils.sweeper import stale_booking_sweeper
+
+    if batch_size:
+        stale_booking_sweeper.batch_size = batch_size
+    if max_batches:
+        stale_booking_sweeper.max_batches = max_batches
+    run = stale_booking_sweeper.run()
+    if run.skipped:
+        click.echo('⚠️ Another sweep is running; skipped')
+        return
+    click.echo(f'✅ Expired {run.swept} stale bookings in {run.duration_ms:.1f} ms ({run.batches} batches)')
+
+schema_cli = AppGroup('schema', help='Create the database schema and sample data')
+
+@schema_cli.command('create')
+def create_schema_command():
+    """Bootstrap an empty database with the current schema (deploys run `flask schema upgrade`)"""
+    from flask import current_app
+    from sqlalchemy import inspect
+
+    if inspect(db.engine).get_table_names():
+        # create_all never alters existing tables, so it would leave new columns and indexes out
+        raise click.ClickException('Database is not empty; run `flask schema upgrade` to bring it up to date')
+    db.create_all()
+    click.echo(f'✅ Schema ready ({len(db.metadata.tables)} tables)')
+    if 'migrate' in current_app.extensions:
+        # A fresh create_all matches the latest migration
+        from flask_migrate import stamp
+        stamp(revision='head')
+        click.echo('✅ Stamped migrations at head')
+
+# Revision matching databases built with create_all before migrations existed
+BASELINE_REVISION = '0001_baseline'
+BASELINE_TABLES = frozenset({'users', 'service_provider_profiles', 'bookings', 'booking_reviews'})
+
+@schema_cli.command('upgrade')
+def upgrade_schema_command():
+    """Apply pending migrations, stamping a pre-migration database at the baseline first"""
+    from flask_migrate import stamp, upgrade
+    from sqlalchemy import inspect
+
+    tables = set(inspect(db.engine).get_table_names())
+    if tables and 'alembic_version' not in tables:
+        # create_all built this database before migrations were tracked; replaying 0001 would fail
+        missing = BASELINE_TABLES - tables
+        if missing:
+            raise click.ClickException(f'Database has no migration history and is missing baseline tables '
+                                       f'{sorted(missing)}; refusing to stamp it')
+        stamp(revision=BASELINE_REVISION)
+        click.echo(f'✅ Stamped existing schema at {BASELINE_REVISION}')
+    upgrade()
+    click.echo('✅ Schema up to date')
+
+@schema_cli.command('seed')
+def seed_schema_command():
+    """Create the sample catalogue and governorates if no categories exist yet"""
+    from src.sample_data import seed_sample_data
+
+    if seed_sample_data():
+        click.echo('✅ Seeded sample data')
+    else:
+        click.echo('ℹ️ Categories already exist; nothing seeded')
+
+@schema_cli.command('verify')
+def verify_schema_command():
+    """Compare the live database with the models and report missing tables, columns and indexes"""
+    from flask import current_app
+    from src.utils.schema import verify_schema, create_index_sql
+
+    report = verify_schema(db.engine, db.metadata)
+    migrate = current_app.extensions.get('migrate')
+    if migrate is not None:
+        from alembic.runtime.migration import MigrationContext
+        from alembic.script import ScriptDirectory
+        from flask_migrate import Config
+
+        with db.engine.connect() as conn:
+            current = MigrationContext.configure(conn).get_current_revision()
+        config = Config()
+        config.set_main_option('script_location', migrate.directory)
+        head = ScriptDirectory.from_config(config).get_current_head()
+        click.echo(f'Migrations: at {current or "(none)"}, head {head}')
+
+    for table in report.missing_tables:
+        click.echo(f'❌ Missing table {table}')
+    for table, column in report.missing_columns:
+        click.echo(f'❌ Missing column {table}.{column}')
+    for index in report.missing_indexes:
+        click.echo(f'❌ Missing index {index.name}: {create_index_sql(index, db.engine)}')
+    for table, column in report.unexpected_columns:
+        click.echo(f'ℹ️ Column {table}.{column} is not in the models')
+
+    if not report.ok:
+        raise click.ClickException('Schema differs from the models')
+    click.echo('✅ Schema matches the models')
+
+data_cli = AppGroup('data', help='Generate synthetic data for local benchmarking')
+
+LOCAL_DATABASE_HOSTS = frozenset({'localhost', '127.0.0.1', '::1'})
+
+def is_local_database(url):
+    """Whether a database URL points at this machine (SQLite files count as local)"""
+    return not url.host or url.host in LOCAL_DATABASE_HOSTS
+
+@data_cli.command('generate')
+@click.option('--scale', type=float, default=1.0, show_default=True,
+              help='Multiplier on production volumes (100k customers, 10k providers)')
+@click.option('--seed', type=int, default=42, show_default=True, help='Same seed, same rows')
+@click.option('--customers', type=int, default=None, help='Override the scaled customer count')
+@click.option('--providers', type=int, default=None, help='Override the scaled provider count')
+@click.option('--pings-per-provider', type=int, default=None, help='Location pings per provider (default 200)')
+@click.option('--bookings-per-customer', type=int, default=None, help='Average bookings per customer (default 5)')
+@click.option('--days', type=int, default=365, show_default=True, help='Booking history length')
+@click.option('--batch-size', type=int, default=10000, show_default=True, help='Rows per COPY/executemany batch')
+@click.option('--skip-derived', is_flag=True, help='Skip rebuilding rollups, rating aggregates and search text')
+@click.option('--force', is_flag=True, help='Allow a non-local database host or FLASK_ENV=production')
+def generate_data_command(scale, seed, customers, providers, pings_per_provider, bookings_per_customer, days,
+                          batch_size, skip_derived, force):
+    """Bulk-load synthetic customers, providers, location pings and booking histories"""
+    import os
+    from src.synthetic_data import SyntheticDataGenerator, SYNTHETIC_PASSWORD
+
+    if not force:
+        if os.getenv('FLASK_ENV') == 'production':
+            raise click.ClickException('Refusing to load synthetic data with FLASK_ENV=production (use --force)')
+        if not is_local_database(db.engine.url):
+            raise click.ClickException(f'Refusing to load synthetic data into database host '
+                                       f'{db.engine.url.host} (use --force)')
+
+    generator = SyntheticDataGenerator(
+        seed=seed, scale=scale, customers=customers, providers=providers, pings_per_provider=pings_per_provider,
+        bookings_per_customer=bookings_per_customer, days=days, batch_size=batch_size, log=click.echo
+    )
+    mode = 'COPY' if generator.writer.use_copy else 'executemany'
+    click.echo(f'Generating {generator.customers:,} customers and {generator.providers:,} providers '
+               f'(seed {seed}, {mode})')
+    try:
+        counts = generator.run(derived=not skip_derived)
+    except ValueError as e:
+        db.session.rollback()
+        raise click.ClickException(str(e))
+    except Exception:
+        db.session.rollback()
+        raise
+    for table, rows in counts.items():
+        click.echo(f'  {table}: {rows:,}')
+    click.echo(f'✅ Synthetic accounts log in as synthetic-{seed}-customer-0@example.com / {SYNTHETIC_PASSWORD}')
+
+def register_commands(app):
+    """Register custom Flask CLI command groups"""
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(ratings_cli)
+    app.cli.add_command(bookings_cli)
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(data_cli)
@@ -5,7 +5,7 @@ from datetime import timedelta
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask, Response, send_from_directory, jsonify, request
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
@@ -19,6 +19,24 @@ from src.models import db
 from src.models.user import User, CustomerProfile, ServiceProviderProfile, CustomerAddress, ProviderDocument
 from src.models.service import ServiceCategory, Service, ProviderService, Booking, BookingStatusHistory, BookingReview
 from src.models.location import ProviderLocation, ProviderServiceArea, BookingLocation, Governorate, City, CustomerLocation
+from src.models.analytics import BookingDailyRollup
+
+from src.utils.passwords import password_hasher
+from src.utils.rate_limit import rate_limiter
+from src.utils.search import search_index
+from src.utils.presence import provider_presence
+from src.utils.provider_profiles import provider_profiles
+from src.utils.sweeper import stale_booking_sweeper
+from src.utils.quotes import quote_engine
+from src.utils.db_engine import engine_options, resolve_profile, pool_metrics
+from src.utils.replicas import replica_router
+from src.utils.query_stats import query_instrumentation
+from src.utils.metrics import request_metrics
+from src.utils.proxy import trust_proxies
+from src.utils.request_log import request_recorder
+from src.utils.counts import count_cache
+from src.cli import register_commands
+from src.sample_data import seed_sample_data
 
 # Import routes
 from src.routes.auth import auth_bp
@@ -36,6 +54,71 @@ def create_app():
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
     app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
     
+    # Password hashing (bcrypt cost and thread pool limits)
+    app.config['BCRYPT_LOG_ROUNDS'] = int(os.getenv('BCRYPT_LOG_ROUNDS', '12'))
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', '4'))
+    app.config['PASSWORD_HASH_QUEUE_SIZE'] = int(os.getenv('PASSWORD_HASH_QUEUE_SIZE', '32'))
+    app.config['PASSWORD_HASH_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_TIMEOUT', '5'))
+    
+    # Reverse proxies in front of the app; client IPs come from X-Forwarded-For only through these hops
+    app.config['PROXY_FIX_X_FOR'] = int(os.getenv('PROXY_FIX_X_FOR', '1'))
+    
+    # Rate limiting (Redis-backed when available) and DB pool load shedding
+    app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'true').lower() == 'true'
+    app.config['RATELIMIT_STORAGE_URL'] = os.getenv('RATELIMIT_STORAGE_URL', os.getenv('REDIS_URL'))
+    app.config['RATELIMIT_SHED_THRESHOLD'] = float(os.getenv('RATELIMIT_SHED_THRESHOLD', '0.9'))
+    app.config['RATELIMIT_SHED_RETRY_AFTER'] = int(os.getenv('RATELIMIT_SHED_RETRY_AFTER', '2'))
+    
+    # Admin dashboard snapshot (seconds fresh, then served stale while refreshing)
+    app.config['DASHBOARD_STATS_TTL'] = int(os.getenv('DASHBOARD_STATS_TTL', '60'))
+    app.config['DASHBOARD_STATS_STALE_TTL'] = int(os.getenv('DASHBOARD_STATS_STALE_TTL', '300'))
+    
+    # Public provider profile documents (invalidated on change, broadcast via Redis)
+    app.config['PROVIDER_PROFILE_CACHE_TTL'] = int(os.getenv('PROVIDER_PROFILE_CACHE_TTL', '300'))
+    app.config['PROVIDER_PROFILE_CACHE_URL'] = os.getenv('PROVIDER_PROFILE_CACHE_URL', os.getenv('REDIS_URL'))
+    app.config['PRESENCE_STORAGE_URL'] = os.getenv('PRESENCE_STORAGE_URL', os.getenv('REDIS_URL'))
+    app.config['PRESENCE_TTL'] = int(os.getenv('PRESENCE_TTL', '30'))
+    
+    # Pagination totals: counted exactly below the threshold, planner-estimated above it
+    app.config['COUNT_EXACT_THRESHOLD'] = int(os.getenv('COUNT_EXACT_THRESHOLD', '10000'))
+    app.config['COUNT_CACHE_TTL'] = int(os.getenv('COUNT_CACHE_TTL', '30'))
+    
+    # Rows fetched per server-side cursor batch in admin exports
+    app.config['EXPORT_BATCH_SIZE'] = int(os.getenv('EXPORT_BATCH_SIZE', '2000'))
+    
+    # Price quotes: cached price tables (version shared via Redis) and signed quote lifetime
+    app.config['QUOTE_TTL'] = int(os.getenv('QUOTE_TTL', '900'))
+    app.config['QUOTE_TABLES_MAX_AGE'] = int(os.getenv('QUOTE_TABLES_MAX_AGE', '60'))
+    app.config['QUOTE_VERSION_CHECK_INTERVAL'] = int(os.getenv('QUOTE_VERSION_CHECK_INTERVAL', '5'))
+    app.config['QUOTE_VERSION_URL'] = os.getenv('QUOTE_VERSION_URL', os.getenv('REDIS_URL'))
+    
+    # Stale booking sweeper (interval in seconds; 0 leaves it to `flask bookings sweep`)
+    app.config['BOOKING_SWEEP_INTERVAL'] = int(os.getenv('BOOKING_SWEEP_INTERVAL', '0'))
+    app.config['BOOKING_SWEEP_BATCH_SIZE'] = int(os.getenv('BOOKING_SWEEP_BATCH_SIZE', '200'))
+    app.config['BOOKING_SWEEP_MAX_BATCHES'] = int(os.getenv('BOOKING_SWEEP_MAX_BATCHES', '10'))
+    app.config['BOOKING_SWEEP_GRACE_MINUTES'] = int(os.getenv('BOOKING_SWEEP_GRACE_MINUTES', '120'))
+    
+    # Per-request query counts, DB time and N+1 detection (timing headers outside production)
+    app.config['QUERY_STATS_ENABLED'] = os.getenv('QUERY_STATS_ENABLED', 'true').lower() == 'true'
+    app.config['QUERY_TIMING_HEADERS'] = os.getenv('QUERY_TIMING_HEADERS', str(os.getenv('FLASK_ENV') != 'production')).lower() == 'true'
+    app.config['SLOW_REQUEST_MS'] = int(os.getenv('SLOW_REQUEST_MS', '500'))
+    app.config['N_PLUS_ONE_THRESHOLD'] = int(os.getenv('N_PLUS_ONE_THRESHOLD', '5'))
+    
+    # Prometheus request metrics; METRICS_DIR (shared by all workers) aggregates them across processes.
+    # In production /metrics stays closed until METRICS_TOKEN is set
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    app.config['METRICS_DIR'] = os.getenv('METRICS_DIR')
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+    app.config['METRICS_REQUIRE_TOKEN'] = os.getenv('METRICS_REQUIRE_TOKEN', str(os.getenv('FLASK_ENV') == 'production')).lower() == 'true'
+    app.config['METRICS_SNAPSHOT_INTERVAL'] = float(os.getenv('METRICS_SNAPSHOT_INTERVAL', '1'))
+    
+    # Sanitized request log for traffic replay (off unless REQUEST_LOG_DIR is set; sample rate 0-1)
+    app.config['REQUEST_LOG_DIR'] = os.getenv('REQUEST_LOG_DIR')
+    app.config['REQUEST_LOG_SAMPLE_RATE'] = float(os.getenv('REQUEST_LOG_SAMPLE_RATE', '1'))
+    
+    # Boot without DB I/O; set true to create tables and seed on startup (local development)
+    app.config['DB_BOOTSTRAP_ON_STARTUP'] = os.getenv('DB_BOOTSTRAP_ON_STARTUP', 'false').lower() == 'true'
+    
     # Database configuration
     database_url = os.getenv('DATABASE_URL')
     if not database_url:
@@ -56,11 +139,29 @@ def create_app():
     
     app.config['SQLALCHEMY_DATABASE_URI'] = database_url
     
+    # Engine profile (direct, pooler or sqlite; detected from the URL) and per-worker pool budget
+    app.config['DB_PROFILE'] = resolve_profile(database_url, os.getenv('DB_PROFILE'))
+    app.config['WEB_CONCURRENCY'] = int(os.getenv('WEB_CONCURRENCY', '1'))
+    app.config['DB_MAX_CONNECTIONS'] = int(os.getenv('DB_MAX_CONNECTIONS', '0'))
+    app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE')) if os.getenv('DB_POOL_SIZE') else None
+    app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW')) if os.getenv('DB_MAX_OVERFLOW') else None
+    app.config['DB_POOL_TIMEOUT'] = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+    app.config['DB_POOL_PRE_PING'] = os.getenv('DB_POOL_PRE_PING', 'false').lower() == 'true'
+    if os.getenv('DB_POOL_RECYCLE'):
+        app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE'))
+    
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        'pool_pre_ping': True,
-        'pool_recycle': 300,
-    }
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(database_url, app.config)
+    
+    # Read replicas (comma-separated URLs); GETs and @read_only endpoints read from them
+    app.config['DATABASE_REPLICA_URLS'] = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    app.config['REPLICA_MAX_LAG'] = float(os.getenv('REPLICA_MAX_LAG', '5'))
+    app.config['REPLICA_CHECK_INTERVAL'] = float(os.getenv('REPLICA_CHECK_INTERVAL', '5'))
+    app.config['REPLICA_STICKY_SECONDS'] = int(os.getenv('REPLICA_STICKY_SECONDS', '10'))
+    app.config['REPLICA_STICKY_URL'] = os.getenv('REPLICA_STICKY_URL', os.getenv('REDIS_URL'))
+    
+    # Trusted client addresses for rate limits and replica stickiness
+    trust_proxies(app)
     
     # Initialize extensions
     CORS(app, 
@@ -73,9 +174,49 @@ def create_app():
     # Initialize database
     db.init_app(app)
     
+    # Pool checkout latency, waits and connections in use
+    with app.app_context():
+        pool_metrics.init_app(app, db.engine)
+    
+    # Per-route latency histograms and status counts (first hook, so rate-limited requests count too)
+    request_metrics.init_app(app, pool_metrics=pool_metrics)
+    request_metrics.track_cache('provider_profiles', provider_profiles.cache)
+    request_metrics.track_cache('counts', count_cache)
+    
+    # Record sanitized request shapes for benchmarks/replay_traffic.py (no-op without REQUEST_LOG_DIR)
+    request_recorder.init_app(app)
+    
+    # Route read-only requests to healthy replicas (no-op without DATABASE_REPLICA_URLS)
+    replica_router.init_app(app)
+    
+    # Query counting and N+1 detection per request
+    query_instrumentation.init_app(app)
+    
+    # Configure the password hashing pool
+    password_hasher.init_app(app)
+    
+    # Configure rate limiting; shedding watches checkout waits on the SQLAlchemy pool
+    rate_limiter.init_app(app, pool_metrics=pool_metrics)
+    
+    # Keep normalized search_text columns (and the SQLite n-gram index) current
+    search_index.init_app(app)
+    
+    # Provider presence and cached public profiles
+    provider_presence.init_app(app)
+    provider_profiles.init_app(app)
+    
+    # Price quote engine (in-memory price tables, invalidated on pricing edits)
+    quote_engine.init_app(app)
+    
+    # Expire overdue pending/confirmed bookings (background thread only if an interval is set)
+    stale_booking_sweeper.init_app(app)
+    
     # Initialize Flask-Migrate
     migrate = Migrate(app, db)
     
+    # Custom CLI commands (flask rollups ..., flask search ...)
+    register_commands(app)
+    
     # JWT error handlers
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
@@ -96,6 +237,9 @@ def create_app():
     app.register_blueprint(providers_bp, url_prefix='/api/providers')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
     
+    from src.routes.admin import dashboard_cache
+    request_metrics.track_cache('dashboard', dashboard_cache)
+    
     # Customer-specific routes
     from src.routes.customers import customers_bp
     app.register_blueprint(customers_bp, url_prefix='/api/customers')
@@ -134,6 +278,16 @@ def create_app():
             'version': '1.0.0'
         }), 200
     
+    # Prometheus scrape endpoint (summed over every worker when METRICS_DIR is set)
+    @app.route('/metrics', methods=['GET'])
+    def prometheus_metrics():
+        status = request_metrics.scrape_status(request.headers.get('Authorization'))
+        if status == 404:
+            return jsonify({'error': 'Not found'}), 404
+        if status == 401:
+            return jsonify({'error': 'Invalid metrics token'}), 401
+        return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+    
     # API info endpoint
     @app.route('/api/info', methods=['GET'])
     def api_info():
@@ -212,214 +366,17 @@ def create_app():
             return jsonify({'error': 'Static folder not configured'}), 404
         return send_from_directory(static_folder_path, filename)
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-        
-        # Create sample data if tables are empty
-        if not ServiceCategory.query.first():
-            create_sample_data()
+    # Schema and sample data are `flask schema create` / `flask schema seed`; opt in to doing it at boot
+    if app.config['DB_BOOTSTRAP_ON_STARTUP']:
+        bootstrap_database(app)
     
     return app
 
-def create_sample_data():
-    """Create sample service categories and services"""
-    try:
-        # Service Categories
-        categories = [
-            {
-                'name_ar': 'السباكة',
-                'name_en': 'Plumbing',
-                'description_ar': 'خدمات السباكة وإصلاح الأنابيب والحنفيات',
-                'description_en': 'Plumbing services and pipe repairs',
-                'icon_url': '/icons/plumbing.svg',
-                'color_code': '#2196F3',
-                'is_emergency_available': True,
-                'sort_order': 1
-            },
-            {
-                'name_ar': 'الكهرباء',
-                'name_en': 'Electrical',
-                'description_ar': 'خدمات الكهرباء والإصلاحات الكهربائية',
-                'description_en': 'Electrical services and repairs',
-                'icon_url': '/icons/electrical.svg',
-                'color_code': '#FF9800',
-                'is_emergency_available': True,
-                'sort_order': 2
-            },
-            {
-                'name_ar': 'التنظيف',
-                'name_en': 'Cleaning',
-                'description_ar': 'خدمات التنظيف المنزلي والمكتبي',
-                'description_en': 'Home and office cleaning services',
-                'icon_url': '/icons/cleaning.svg',
-                'color_code': '#4CAF50',
-                'is_emergency_available': False,
-                'sort_order': 3
-            },
-            {
-                'name_ar': 'النجارة',
-                'name_en': 'Carpentry',
-                'description_ar': 'خدمات النجارة وإصلاح الأثاث',
-                'description_en': 'Carpentry and furniture repair services',
-                'icon_url': '/icons/carpentry.svg',
-                'color_code': '#795548',
-                'is_emergency_available': False,
-                'sort_order': 4
-            },
-            {
-                'name_ar': 'صيانة التكييف',
-                'name_en': 'AC Maintenance',
-                'description_ar': 'صيانة وإصلاح أجهزة التكييف والتبريد',
-                'description_en': 'Air conditioning maintenance and repair',
-                'icon_url': '/icons/ac.svg',
-                'color_code': '#00BCD4',
-                'is_emergency_available': True,
-                'sort_order': 5
-            },
-            {
-                'name_ar': 'الدهان',
-                'name_en': 'Painting',
-                'description_ar': 'خدمات الدهان والديكور',
-                'description_en': 'Painting and decoration services',
-                'icon_url': '/icons/painting.svg',
-                'color_code': '#E91E63',
-                'is_emergency_available': False,
-                'sort_order': 6
-            }
-        ]
-        
-        category_objects = []
-        for cat_data in categories:
-            category = ServiceCategory(**cat_data)
-            db.session.add(category)
-            category_objects.append(category)
-        
-        db.session.flush()  # Get category IDs
-        
-        # Services for each category
-        services_data = [
-            # Plumbing services
-            {
-                'category': category_objects[0],
-                'services': [
-                    {
-                        'name_ar': 'إصلاح الحنفيات',
-                        'name_en': 'Faucet Repair',
-                        'description_ar': 'إصلاح وتركيب الحنفيات المتسربة والمعطلة',
-                        'description_en': 'Repair and installation of leaky and broken faucets',
-                        'base_price': 150.00,
-                        'estimated_duration': 60
-                    },
-                    {
-                        'name_ar': 'تسليك المجاري',
-                        'name_en': 'Drain Unclogging',
-                        'description_ar': 'تسليك المجاري والبالوعات المسدودة',
-                        'description_en': 'Unclogging blocked drains and sewers',
-                        'base_price': 200.00,
-                        'estimated_duration': 90
-                    },
-                    {
-                        'name_ar': 'إصلاح المراحيض',
-                        'name_en': 'Toilet Repair',
-                        'description_ar': 'إصلاح وصيانة المراحيض والخزانات',
-                        'description_en': 'Toilet and tank repair and maintenance',
-                        'base_price': 180.00,
-                        'estimated_duration': 75
-                    }
-                ]
-            },
-            # Electrical services
-            {
-                'category': category_objects[1],
-                'services': [
-                    {
-                        'name_ar': 'إصلاح الكهرباء',
-                        'name_en': 'Electrical Repair',
-                        'description_ar': 'إصلاح الأعطال الكهربائية والدوائر',
-                        'description_en': 'Electrical fault and circuit repairs',
-                        'base_price': 180.00,
-                        'estimated_duration': 75,
-                        'is_emergency_service': True,
-                        'emergency_surcharge_percentage': 50.00
-                    },
-                    {
-                        'name_ar': 'تركيب الإضاءة',
-                        'name_en': 'Light Installation',
-                        'description_ar': 'تركيب وحدات الإضاءة والثريات',
-                        'description_en': 'Installation of lighting fixtures and chandeliers',
-                        'base_price': 120.00,
-                        'estimated_duration': 45
-                    },
-                    {
-                        'name_ar': 'تركيب المراوح',
-                        'name_en': 'Fan Installation',
-                        'description_ar': 'تركيب وصيانة المراوح السقفية',
-                        'description_en': 'Ceiling fan installation and maintenance',
-                        'base_price': 160.00,
-                        'estimated_duration': 60
-                    }
-                ]
-            },
-            # Cleaning services
-            {
-                'category': category_objects[2],
-                'services': [
-                    {
-                        'name_ar': 'تنظيف المنازل',
-                        'name_en': 'House Cleaning',
-                        'description_ar': 'تنظيف شامل للمنازل والشقق',
-                        'description_en': 'Complete house and apartment cleaning',
-                        'base_price': 250.00,
-                        'price_unit': 'hourly',
-                        'estimated_duration': 180
-                    },
-                    {
-                        'name_ar': 'تنظيف السجاد',
-                        'name_en': 'Carpet Cleaning',
-                        'description_ar': 'تنظيف وغسيل السجاد والموكيت',
-                        'description_en': 'Carpet and rug cleaning and washing',
-                        'base_price': 80.00,
-                        'price_unit': 'per_item',
-                        'estimated_duration': 120
-                    }
-                ]
-            }
-        ]
-        
-        for service_group in services_data:
-            category = service_group['category']
-            for service_data in service_group['services']:
-                service = Service(
-                    category_id=category.id,
-                    **service_data
-                )
-                db.session.add(service)
-        
-        # Egyptian Governorates
-        governorates = [
-            {'name_ar': 'القاهرة', 'name_en': 'Cairo', 'code': 'CAI', 'center_latitude': 30.0444, 'center_longitude': 31.2357},
-            {'name_ar': 'الجيزة', 'name_en': 'Giza', 'code': 'GIZ', 'center_latitude': 30.0131, 'center_longitude': 31.2089},
-            {'name_ar': 'الإسكندرية', 'name_en': 'Alexandria', 'code': 'ALX', 'center_latitude': 31.2001, 'center_longitude': 29.9187},
-            {'name_ar': 'القليوبية', 'name_en': 'Qalyubia', 'code': 'QLY', 'center_latitude': 30.1792, 'center_longitude': 31.2045},
-            {'name_ar': 'بورسعيد', 'name_en': 'Port Said', 'code': 'PTS', 'center_latitude': 31.2653, 'center_longitude': 32.3019},
-            {'name_ar': 'السويس', 'name_en': 'Suez', 'code': 'SUZ', 'center_latitude': 29.9668, 'center_longitude': 32.5498},
-            {'name_ar': 'الإسماعيلية', 'name_en': 'Ismailia', 'code': 'ISM', 'center_latitude': 30.5965, 'center_longitude': 32.2715},
-            {'name_ar': 'الدقهلية', 'name_en': 'Dakahlia', 'code': 'DAK', 'center_latitude': 31.0409, 'center_longitude': 31.3785},
-            {'name_ar': 'الشرقية', 'name_en': 'Sharqia', 'code': 'SHR', 'center_latitude': 30.5965, 'center_longitude': 31.5041},
-            {'name_ar': 'الغربية', 'name_en': 'Gharbia', 'code': 'GHR', 'center_latitude': 30.8754, 'center_longitude': 31.0335}
-        ]
-        
-        for gov_data in governorates:
-            governorate = Governorate(**gov_data)
-            db.session.add(governorate)
-        
-        db.session.commit()
-        print("✅ Sample data created successfully!")
-        
-    except Exception as e:
-        db.session.rollback()
-        print(f"❌ Error creating sample data: {e}")
+def bootstrap_database(app):
+    """Create missing tables and seed sample data into an empty catalogue"""
+    with app.app_context():
+        db.create_all()
+        seed_sample_data()
 
 # Create Flask app
 app = create_app()
@@ -432,5 +389,7 @@ def uploaded_documents(filename):
     return send_from_directory(upload_dir, filename)
 
 if __name__ == '__main__':
+    # The dev server bootstraps a fresh database itself
+    bootstrap_database(app)
     app.run(host='0.0.0.0', port=5000, debug=True)
 
@@ -1,10 +1,32 @@
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from datetime import datetime
 import uuid
 
-db = SQLAlchemy()
+class RoutingSession(Session):
+    """Session that lets the replica router (src.utils.replicas) pick a replica for reads"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            router = current_app.extensions.get('replica_router')
+            if router is not None:
+                engine = router.engine_for(self, clause)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 def generate_uuid():
     """Generate a UUID string for primary keys"""
     return str(uuid.uuid4())
 
+def as_uuid(value):
+    """Coerce a string id for comparison against UUID(as_uuid=True) columns"""
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
@@ -0,0 +1,48 @@
+from src.models import db
+from datetime import datetime
+
+class BookingDailyRollup(db.Model):
+    """Daily booking aggregates per service, category, provider, governorate and status
+
+    Maintained incrementally whenever a booking is created, changes status or
+    is reviewed, so admin analytics never scan the raw bookings table. Empty
+    provider/governorate values are stored as '' to keep the unique key usable
+    for upserts (NULLs never conflict).
+    """
+    __tablename__ = 'booking_daily_rollups'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    day = db.Column(db.Date, nullable=False)
+    service_id = db.Column(db.String(36), nullable=False)
+    category_id = db.Column(db.String(36), nullable=False, default='')
+    provider_id = db.Column(db.String(36), nullable=False, default='')
+    governorate = db.Column(db.String(100), nullable=False, default='')
+    booking_status = db.Column(db.String(20), nullable=False)
+    booking_count = db.Column(db.Integer, nullable=False, default=0)
+    gross_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    commission_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    provider_earnings = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('day', 'service_id', 'category_id', 'provider_id', 'governorate', 'booking_status',
+                            name='uq_booking_daily_rollup_key'),
+        db.Index('ix_booking_daily_rollups_status_day', 'booking_status', 'day'),
+    )
+
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat() if self.day else None,
+            'service_id': self.service_id,
+            'category_id': self.category_id,
+            'provider_id': self.provider_id or None,
+            'governorate': self.governorate or None,
+            'booking_status': self.booking_status,
+            'booking_count': self.booking_count,
+            'gross_amount': float(self.gross_amount or 0),
+            'commission_amount': float(self.commission_amount or 0),
+            'provider_earnings': float(self.provider_earnings or 0),
+            'average_rating': round(self.rating_sum / self.rating_count, 2) if self.rating_count else None
+        }
@@ -19,6 +19,11 @@ class ProviderLocation(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # A provider's latest online position (nearby search, claim queue, tracking)
+        db.Index('ix_provider_locations_provider_online_updated', 'provider_id', 'is_online', 'last_updated'),
+    )
+    
     def to_dict(self):
         return {
             'id': str(self.id),
@@ -1,5 +1,8 @@
-from src.models import db, generate_uuid
+from src.models import db, generate_uuid, as_uuid
+from src.models.user import ServiceProviderProfile
 from datetime import datetime
+from sqlalchemy import func, update, insert
+from sqlalchemy.orm.exc import StaleDataError
 
 class ServiceCategory(db.Model):
     """Service category model"""
@@ -105,8 +108,11 @@ class ProviderService(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Unique constraint
-    __table_args__ = (db.UniqueConstraint('provider_id', 'service_id', name='unique_provider_service'),)
+    __table_args__ = (
+        db.UniqueConstraint('provider_id', 'service_id', name='unique_provider_service'),
+        # Providers offering a service (search, quotes)
+        db.Index('ix_provider_services_service_active', 'service_id', 'is_active'),
+    )
     
     def to_dict(self):
         return {
@@ -141,6 +147,9 @@ class Booking(db.Model):
     # Service address (JSON)
     service_address = db.Column(db.JSON, nullable=False)
     special_instructions = db.Column(db.Text)
+    # Copied from service_address so open bookings can be searched by area
+    service_latitude = db.Column(db.Numeric(10, 8))
+    service_longitude = db.Column(db.Numeric(11, 8))
     
     # Pricing
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
@@ -154,11 +163,29 @@ class Booking(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Optimistic concurrency: every ORM UPDATE is "... WHERE id = ? AND version = ?"
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     # Relationships
     status_history = db.relationship('BookingStatusHistory', backref='booking', cascade='all, delete-orphan')
     reviews = db.relationship('BookingReview', backref='booking', cascade='all, delete-orphan')
-    
+
+    __table_args__ = (
+        # Ordered (created_at, id) scans for exports and keyset pagination
+        db.Index('ix_bookings_created_id', 'created_at', 'id'),
+        # Per-customer, per-provider and per-status booking lists (keyset pagination)
+        db.Index('ix_bookings_customer_created_id', 'customer_id', 'created_at', 'id'),
+        db.Index('ix_bookings_provider_created_id', 'provider_id', 'created_at', 'id'),
+        db.Index('ix_bookings_status_created_id', 'booking_status', 'created_at', 'id'),
+        # Stale booking sweeps walk overdue pending/confirmed rows in scheduled order
+        db.Index('ix_bookings_status_scheduled', 'booking_status', 'scheduled_date'),
+        # Open-booking claim queue: only pending, unassigned rows are indexed
+        db.Index('ix_bookings_open_claim', 'service_latitude', 'service_longitude', 'scheduled_date',
+                 postgresql_where=db.text("booking_status = 'pending' AND provider_id IS NULL"),
+                 sqlite_where=db.text("booking_status = 'pending' AND provider_id IS NULL")),
+    )
+    __mapper_args__ = {'version_id_col': version}
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -173,11 +200,14 @@ class Booking(db.Model):
             'actual_duration': self.actual_duration,
             'service_address': self.service_address,
             'special_instructions': self.special_instructions,
+            'service_latitude': float(self.service_latitude) if self.service_latitude is not None else None,
+            'service_longitude': float(self.service_longitude) if self.service_longitude is not None else None,
             'total_amount': float(self.total_amount),
             'platform_commission': float(self.platform_commission),
             'provider_earnings': float(self.provider_earnings),
             'payment_status': self.payment_status,
             'payment_method': self.payment_method,
+            'version': self.version,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'customer': self.customer.to_dict() if self.customer else None,
@@ -213,16 +243,24 @@ class BookingReview(db.Model):
     __tablename__ = 'booking_reviews'
     
     id = db.Column(db.String(36), primary_key=True, default=generate_uuid)
-    booking_id = db.Column(db.String(36), db.ForeignKey('bookings.id'), nullable=False)
+    booking_id = db.Column(db.String(36), db.ForeignKey('bookings.id'), nullable=False, index=True)
     customer_id = db.Column(db.String(36), db.ForeignKey('customer_profiles.id'), nullable=False)
-    provider_id = db.Column(db.String(36), db.ForeignKey('service_provider_profiles.id'), nullable=False)
+    provider_id = db.Column(db.String(36), db.ForeignKey('service_provider_profiles.id'), nullable=False, index=True)
     rating = db.Column(db.Integer, nullable=False)  # 1-5 stars
     review_text = db.Column(db.Text)
     review_photos = db.Column(db.JSON)  # Array of photo URLs
     is_verified = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
+    __table_args__ = (
+        # A provider's reviews, newest first
+        db.Index('ix_booking_reviews_provider_created', 'provider_id', 'created_at'),
+    )
+    
+    def to_dict(self, customer=None):
+        # Pass the customer profile when batch-loaded to skip the booking -> customer lazy loads
+        if customer is None and self.booking:
+            customer = self.booking.customer
         return {
             'id': self.id,
             'booking_id': self.booking_id,
@@ -233,6 +271,266 @@ class BookingReview(db.Model):
             'review_photos': self.review_photos,
             'is_verified': self.is_verified,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'customer_name': f"{self.booking.customer.first_name} {self.booking.customer.last_name}" if self.booking and self.booking.customer else None
+            'customer_name': f"{customer.first_name} {customer.last_name}" if customer else None
         }
 
+# Who may move a booking from one status to another
+BOOKING_TRANSITIONS = {
+    'customer': {
+        'pending': ['cancelled'],
+        'confirmed': ['cancelled'],
+        'completed': []
+    },
+    'service_provider': {
+        'pending': ['confirmed'],
+        'confirmed': ['in_progress', 'cancelled'],
+        'in_progress': ['completed'],
+        'completed': []
+    },
+    'admin': {
+        'pending': ['confirmed', 'cancelled'],
+        'confirmed': ['in_progress', 'cancelled'],
+        'in_progress': ['completed', 'cancelled'],
+        'completed': ['disputed']
+    }
+}
+
+# Columns read by guards, effects, counters and rollups when moving bookings in bulk
+BULK_TRANSITION_COLUMNS = (
+    Booking.id, Booking.booking_status, Booking.customer_id, Booking.provider_id, Booking.service_id,
+    Booking.service_address, Booking.created_at, Booking.actual_start_time, Booking.total_amount,
+    Booking.platform_commission, Booking.provider_earnings
+)
+
+class BookingTransitionError(Exception):
+    """A status change the booking state machine refuses"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+class BookingStateMachine:
+    """Booking status transitions and their side effects
+
+    The transition table is compiled once into frozensets, forwards (status ->
+    targets) and backwards (target -> sources). Guards veto a transition for a
+    given actor, effects return booking column values to set, and counters
+    return deltas for the assigned provider's profile counters. The same hooks
+    drive single updates on loaded bookings and set-based bulk updates.
+    """
+
+    def __init__(self, transitions):
+        self.targets = {
+            role: {source: frozenset(targets) for source, targets in edges.items()}
+            for role, edges in transitions.items()
+        }
+        self.sources = {}
+        for role, edges in self.targets.items():
+            reverse = self.sources.setdefault(role, {})
+            for source, targets in edges.items():
+                for target in targets:
+                    reverse.setdefault(target, set()).add(source)
+        self.sources = {
+            role: {target: frozenset(sources) for target, sources in reverse.items()}
+            for role, reverse in self.sources.items()
+        }
+        self.statuses = frozenset(
+            status for edges in self.targets.values() for source, targets in edges.items()
+            for status in (source, *targets)
+        )
+        self.guards = []
+        self.effects = []
+        self.counters = []
+
+    def guard(self, fn):
+        """Register fn(booking, actor, new_status) -> error message or None"""
+        self.guards.append(fn)
+        return fn
+
+    def effect(self, fn):
+        """Register fn(booking, old_status, new_status, now) -> {column: value}"""
+        self.effects.append(fn)
+        return fn
+
+    def counter(self, fn):
+        """Register fn(booking, old_status, new_status) -> {provider column: delta}"""
+        self.counters.append(fn)
+        return fn
+
+    def can(self, role, old_status, new_status):
+        return new_status in self.targets.get(role, {}).get(old_status, ())
+
+    def sources_of(self, role, new_status):
+        return self.sources.get(role, {}).get(new_status, frozenset())
+
+    def check(self, booking, actor, new_status):
+        """Raise BookingTransitionError unless actor may move booking to new_status"""
+        old_status = booking.booking_status
+        if not self.can(actor.user_type, old_status, new_status):
+            raise BookingTransitionError(f'Cannot transition from {old_status} to {new_status}')
+        for guard in self.guards:
+            error = guard(booking, actor, new_status)
+            if error:
+                raise BookingTransitionError(error, 403)
+
+    def changes(self, booking, old_status, new_status, now):
+        """Booking column values and provider counter deltas for one transition"""
+        values = {'booking_status': new_status, 'updated_at': now}
+        for effect in self.effects:
+            values.update(effect(booking, old_status, new_status, now))
+        deltas = {}
+        for counter in self.counters:
+            for column, delta in counter(booking, old_status, new_status).items():
+                deltas[column] = deltas.get(column, 0) + delta
+        return values, deltas
+
+    def apply(self, booking, new_status, now=None):
+        """Move a loaded booking (after check()); returns the previous status
+
+        The caller adds the history row and commits; the flush is a
+        compare-and-swap on booking.version.
+        """
+        now = now or datetime.utcnow()
+        old_status = booking.booking_status
+        values, deltas = self.changes(booking, old_status, new_status, now)
+        for column, value in values.items():
+            setattr(booking, column, value)
+        if deltas and booking.provider_id:
+            self.apply_counters({booking.provider_id: deltas})
+        return old_status
+
+    def apply_counters(self, deltas_by_provider):
+        """Add counter deltas with one atomic UPDATE per provider"""
+        for provider_id, deltas in deltas_by_provider.items():
+            values = {
+                getattr(ServiceProviderProfile, column): func.coalesce(getattr(ServiceProviderProfile, column), 0) + delta
+                for column, delta in deltas.items() if delta
+            }
+            if values:
+                db.session.execute(
+                    update(ServiceProviderProfile)
+                    .where(ServiceProviderProfile.id == as_uuid(provider_id))
+                    .values(values)
+                    .execution_options(synchronize_session=False)
+                )
+
+    def bulk_transition(self, criteria, role, new_status, changed_by=None, reason=None, limit=500, order_by=None):
+        """Move every matching booking that role may move to new_status in set-based statements
+
+        Candidates are locked (FOR UPDATE on Postgres), then updated with one
+        UPDATE per distinct (source status, effect values) group, one
+        multi-row history INSERT, and one counter UPDATE per provider. Runs in
+        the caller's transaction; returns [(row, old_status)] for the moved
+        bookings in order_by order (oldest first by default). Raises
+        StaleDataError if a booking changed between the read and the write.
+        """
+        sources = self.sources_of(role, new_status)
+        if not sources:
+            raise BookingTransitionError(f'{role} cannot move bookings to {new_status}')
+
+        query = db.session.query(*BULK_TRANSITION_COLUMNS, Service.category_id).join(
+            Service, Service.id == Booking.service_id
+        ).filter(*criteria).filter(
+            Booking.booking_status.in_(sources)
+        ).order_by(*(order_by or (Booking.created_at, Booking.id))).limit(limit)
+        if db.session.get_bind().dialect.name == 'postgresql':
+            query = query.with_for_update(of=Booking)
+        rows = query.all()
+        if not rows:
+            return []
+
+        now = datetime.utcnow()
+        groups = {}
+        deltas_by_provider = {}
+        for row in rows:
+            values, deltas = self.changes(row, row.booking_status, new_status, now)
+            key = (row.booking_status, tuple(sorted(values.items())))
+            groups.setdefault(key, []).append(row.id)
+            if deltas and row.provider_id:
+                provider_deltas = deltas_by_provider.setdefault(row.provider_id, {})
+                for column, delta in deltas.items():
+                    provider_deltas[column] = provider_deltas.get(column, 0) + delta
+
+        for (old_status, values), booking_ids in groups.items():
+            result = db.session.execute(
+                update(Booking)
+                .where(Booking.id.in_(booking_ids), Booking.booking_status == old_status)
+                .values({**dict(values), 'version': Booking.version + 1})
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != len(booking_ids):
+                raise StaleDataError(f'{len(booking_ids) - result.rowcount} bookings changed during the bulk update')
+
+        db.session.execute(insert(BookingStatusHistory), [
+            {
+                'booking_id': row.id,
+                'previous_status': row.booking_status,
+                'new_status': new_status,
+                'changed_by': str(changed_by) if changed_by else None,
+                'change_reason': reason or f'Status changed to {new_status}',
+                'created_at': now
+            }
+            for row in rows
+        ])
+        self.apply_counters(deltas_by_provider)
+        return [(row, row.booking_status) for row in rows]
+
+booking_state_machine = BookingStateMachine(BOOKING_TRANSITIONS)
+
+@booking_state_machine.guard
+def _participants_only(booking, actor, new_status):
+    # Customers and providers may only move their own bookings
+    if actor.user_type == 'customer' and booking.customer_id != str(actor.customer_profile.id):
+        return 'Access denied'
+    if actor.user_type == 'service_provider' and booking.provider_id != str(actor.provider_profile.id):
+        return 'Access denied'
+    return None
+
+@booking_state_machine.effect
+def _work_timestamps(booking, old_status, new_status, now):
+    if new_status == 'in_progress':
+        return {'actual_start_time': now}
+    if new_status == 'completed':
+        values = {'actual_end_time': now}
+        if booking.actual_start_time:
+            values['actual_duration'] = int((now - booking.actual_start_time).total_seconds() / 60)  # minutes
+        return values
+    return {}
+
+@booking_state_machine.counter
+def _completed_job_counters(booking, old_status, new_status):
+    # Completed jobs and earnings follow bookings into and out of 'completed'
+    sign = (new_status == 'completed') - (old_status == 'completed')
+    if not sign:
+        return {}
+    return {'total_completed_jobs': sign, 'total_earnings': sign * (booking.provider_earnings or 0)}
+
+def reconcile_provider_job_counters():
+    """Recompute completed-job counters from bookings; returns providers updated
+
+    Runs in the caller's transaction. Providers without completed bookings are reset to zero.
+    """
+    db.session.execute(
+        update(ServiceProviderProfile)
+        .values(total_completed_jobs=0, total_earnings=0)
+        .execution_options(synchronize_session=False)
+    )
+    rows = db.session.query(
+        Booking.provider_id,
+        func.count(Booking.id),
+        func.coalesce(func.sum(Booking.provider_earnings), 0)
+    ).filter(
+        Booking.booking_status == 'completed',
+        Booking.provider_id.isnot(None)
+    ).group_by(Booking.provider_id)
+
+    updated = 0
+    for provider_id, jobs, earnings in rows.all():
+        result = db.session.execute(
+            update(ServiceProviderProfile)
+            .where(ServiceProviderProfile.id == as_uuid(provider_id))
+            .values(total_completed_jobs=jobs, total_earnings=earnings)
+            .execution_options(synchronize_session=False)
+        )
+        updated += result.rowcount
+    return updated
@@ -1,8 +1,7 @@
 from src.models import db, generate_uuid
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy.dialects.postgresql import UUID
-import bcrypt
+from src.utils.passwords import password_hasher
 import uuid
 
 class User(db.Model):
@@ -20,6 +19,7 @@ class User(db.Model):
     email_verified_at = db.Column(db.DateTime)
     phone_verified_at = db.Column(db.DateTime)
     last_login_at = db.Column(db.DateTime)
+    search_text = db.Column(db.Text)  # Normalized email/phone, maintained by src.utils.search
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -29,14 +29,25 @@ class User(db.Model):
     verified_providers = db.relationship('ServiceProviderProfile', foreign_keys='ServiceProviderProfile.verified_by', backref='verifier', lazy='dynamic')
     provider_locations = db.relationship('ProviderLocation', backref='user', cascade='all, delete-orphan')
     customer_locations = db.relationship('CustomerLocation', backref='user', cascade='all, delete-orphan')
+
+    __table_args__ = (
+        db.Index('ix_users_created_id', 'created_at', 'id'),
+        # Trigram index for admin email/phone search (pg_trgm)
+        db.Index('ix_users_search_trgm', 'search_text', postgresql_using='gin',
+                 postgresql_ops={'search_text': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
         """Check if provided password matches hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        return password_hasher.verify(password, self.password_hash)
+    
+    def password_needs_rehash(self):
+        """Check if the stored hash is legacy or below the configured cost"""
+        return password_hasher.needs_rehash(self.password_hash)
     
     def to_dict(self):
         return {
@@ -116,6 +127,13 @@ class ServiceProviderProfile(db.Model):
     average_rating = db.Column(db.Numeric(3, 2), default=0.00)
     rating = db.Column(db.Numeric(3, 2), default=0.00)
     total_reviews = db.Column(db.Integer, default=0)
+    # Running rating aggregates maintained by src.utils.ratings (1-5 star histogram)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     total_bookings = db.Column(db.Integer, default=0)
     total_completed_jobs = db.Column(db.Integer, default=0)
     total_earnings = db.Column(db.Numeric(12, 2), default=0.00)
@@ -123,6 +141,7 @@ class ServiceProviderProfile(db.Model):
     service_radius = db.Column(db.Integer, default=10)
     hourly_rate = db.Column(db.Numeric(10, 2))
     emergency_rate_multiplier = db.Column(db.Numeric(3, 2), default=1.5)
+    search_text = db.Column(db.Text)  # Normalized names, maintained by src.utils.search
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -131,7 +150,16 @@ class ServiceProviderProfile(db.Model):
     bookings = db.relationship('Booking', backref='provider', lazy='dynamic')
     service_areas = db.relationship('ProviderServiceArea', backref='provider', cascade='all, delete-orphan')
     documents = db.relationship('ProviderDocument', backref='provider', cascade='all, delete-orphan')
-    
+
+    __table_args__ = (
+        # Keyset pagination of admin listings and the verification queue
+        db.Index('ix_service_provider_profiles_created_id', 'created_at', 'id'),
+        db.Index('ix_service_provider_profiles_status_created_id', 'verification_status', 'created_at', 'id'),
+        # Trigram index for admin name search (pg_trgm)
+        db.Index('ix_service_provider_profiles_search_trgm', 'search_text', postgresql_using='gin',
+                 postgresql_ops={'search_text': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -159,6 +187,7 @@ class ServiceProviderProfile(db.Model):
             'average_rating': float(self.average_rating) if self.average_rating else 0.0,
             'rating': float(self.rating) if self.rating else 0.0,
             'total_reviews': self.total_reviews,
+            'rating_histogram': {str(stars): getattr(self, f'rating_count_{stars}') or 0 for stars in range(1, 6)},
             'total_bookings': self.total_bookings,
             'total_completed_jobs': self.total_completed_jobs,
             'total_earnings': float(self.total_earnings) if self.total_earnings else 0.0,
@@ -211,7 +240,7 @@ class ProviderDocument(db.Model):
     __tablename__ = 'provider_documents'
     
     id = db.Column(db.String(36), primary_key=True, default=generate_uuid)
-    provider_id = db.Column(db.String(36), db.ForeignKey('service_provider_profiles.id'), nullable=False)
+    provider_id = db.Column(db.String(36), db.ForeignKey('service_provider_profiles.id'), nullable=False, index=True)
     document_type = db.Column(db.Enum('national_id', 'certificate', 'license', 'insurance', 'background_check', 
                                      name='document_types'), nullable=False)
     document_url = db.Column(db.Text, nullable=False)
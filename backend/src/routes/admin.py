@@ -1,122 +1,139 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
 from datetime import datetime, timedelta
-from sqlalchemy import func, and_, or_
-from src.models import db
+from sqlalchemy import func, and_, or_, true
+from sqlalchemy.orm.exc import StaleDataError
+from src.models import db, as_uuid
 from src.models.user import User, CustomerProfile, ServiceProviderProfile, ProviderDocument
-from src.models.service import ServiceCategory, Service, Booking, BookingReview
+from src.models.service import ServiceCategory, Service, Booking, BookingReview, booking_state_machine, BookingTransitionError
 from src.models.location import Governorate, City
+from src.models.analytics import BookingDailyRollup
 from src.utils.auth import admin_required
+from src.utils.rate_limit import rate_limiter
+from src.utils.cache import SnapshotCache
+from src.utils.aggregates import supports_aggregate_filter, count_where, sum_where
+from src.utils.pagination import keyset_paginate, offset_paginate, InvalidCursor, MAX_PAGE_SIZE
+from src.utils.counts import paginated_total
+from src.utils.search import search_index
+from src.utils.loaders import load_users_by_id, load_documents_by_provider, has_valid_document_url
+from src.utils.exports import EXPORT_FORMATS, build_export_query, stream_export, gzip_stream
+from src.utils.rollups import record_booking_transitions
+from src.utils.provider_profiles import provider_profiles
+from src.utils.sweeper import stale_booking_sweeper
+from src.utils.db_engine import pool_metrics
+from src.utils.replicas import replica_router
+from src.utils.query_stats import query_instrumentation
+from src.utils.metrics import request_metrics
 
 admin_bp = Blueprint('admin', __name__)
 
+dashboard_cache = SnapshotCache()
+
+MAX_BULK_BOOKINGS = 500
+# Ranked searches page by OFFSET, so only the best matches are reachable
+MAX_SEARCH_RESULTS = 500
+
+def compute_dashboard_stats():
+    """Compute all dashboard figures in one statement using conditional aggregation"""
+    today = datetime.utcnow().date()
+    week_start = datetime.combine(today - timedelta(days=7), datetime.min.time())
+    month_start = datetime.combine(today - timedelta(days=30), datetime.min.time())
+    use_filter = supports_aggregate_filter(db.engine)
+    
+    # One single-pass aggregate per table, cross joined into one row
+    user_stats = db.session.query(
+        func.count().label('total_users'),
+        count_where(User.user_type == 'customer', use_filter).label('total_customers'),
+        count_where(User.user_type == 'service_provider', use_filter).label('total_providers'),
+        count_where(User.created_at >= week_start, use_filter).label('new_users_week')
+    ).subquery()
+    
+    provider_stats = db.session.query(
+        count_where(ServiceProviderProfile.verification_status == 'pending', use_filter).label('pending_verification'),
+        count_where(ServiceProviderProfile.verification_status == 'approved', use_filter).label('verified_providers')
+    ).subquery()
+    
+    completed = Booking.booking_status == 'completed'
+    booking_stats = db.session.query(
+        func.count().label('total_bookings'),
+        count_where(completed, use_filter).label('completed_bookings'),
+        count_where(Booking.booking_status.in_(['pending', 'confirmed', 'in_progress']), use_filter).label('active_bookings'),
+        count_where(Booking.created_at >= month_start, use_filter).label('bookings_this_month'),
+        sum_where(Booking.total_amount, completed, use_filter).label('total_revenue'),
+        sum_where(Booking.platform_commission, completed, use_filter).label('platform_revenue'),
+        sum_where(Booking.platform_commission, and_(completed, Booking.created_at >= month_start), use_filter).label('monthly_revenue')
+    ).subquery()
+    
+    service_stats = db.session.query(
+        count_where(Service.is_active == True, use_filter).label('total_services')
+    ).subquery()
+    
+    category_stats = db.session.query(
+        count_where(ServiceCategory.is_active == True, use_filter).label('total_categories')
+    ).subquery()
+    
+    rating_stats = db.session.query(
+        func.avg(BookingReview.rating).label('avg_rating')
+    ).subquery()
+    
+    # Each subquery yields exactly one row, so joining on TRUE keeps it one row
+    row = db.session.query(
+        user_stats, provider_stats, booking_stats, service_stats, category_stats, rating_stats
+    ).select_from(user_stats).join(provider_stats, true()).join(booking_stats, true()).join(
+        service_stats, true()
+    ).join(category_stats, true()).join(rating_stats, true()).one()
+    
+    total_providers = row.total_providers or 0
+    verified_providers = row.verified_providers or 0
+    total_bookings = row.total_bookings or 0
+    completed_bookings = row.completed_bookings or 0
+    total_revenue = float(row.total_revenue) if row.total_revenue else 0
+    platform_revenue = float(row.platform_revenue) if row.platform_revenue else 0
+    
+    return {
+        'users': {
+            'total': row.total_users or 0,
+            'customers': row.total_customers or 0,
+            'providers': total_providers,
+            'new_this_week': row.new_users_week or 0
+        },
+        'providers': {
+            'total': total_providers,
+            'verified': verified_providers,
+            'pending_verification': row.pending_verification or 0,
+            'verification_rate': round((verified_providers / total_providers * 100), 2) if total_providers > 0 else 0
+        },
+        'bookings': {
+            'total': total_bookings,
+            'completed': completed_bookings,
+            'active': row.active_bookings or 0,
+            'this_month': row.bookings_this_month or 0,
+            'completion_rate': round((completed_bookings / total_bookings * 100), 2) if total_bookings > 0 else 0
+        },
+        'revenue': {
+            'total_revenue': total_revenue,
+            'platform_revenue': platform_revenue,
+            'monthly_revenue': float(row.monthly_revenue) if row.monthly_revenue else 0,
+            'commission_rate': round((platform_revenue / total_revenue * 100), 2) if total_revenue > 0 else 15
+        },
+        'services': {
+            'total_services': row.total_services or 0,
+            'total_categories': row.total_categories or 0,
+            'average_rating': round(float(row.avg_rating), 2) if row.avg_rating else 0
+        }
+    }
+
 @admin_bp.route('/dashboard/stats', methods=['GET'])
 @admin_required
 def get_dashboard_stats(current_user):
-    """Get dashboard statistics for admin"""
+    """Get dashboard statistics for admin (shared cached snapshot)"""
     try:
-        # Date range for statistics
-        today = datetime.utcnow().date()
-        week_ago = today - timedelta(days=7)
-        month_ago = today - timedelta(days=30)
-        
-        # User statistics
-        total_users = User.query.count()
-        total_customers = User.query.filter_by(user_type='customer').count()
-        total_providers = User.query.filter_by(user_type='service_provider').count()
-        
-        # New users this week
-        new_users_week = User.query.filter(
-            User.created_at >= datetime.combine(week_ago, datetime.min.time())
-        ).count()
-        
-        # Provider verification statistics
-        pending_verification = ServiceProviderProfile.query.filter_by(
-            verification_status='pending'
-        ).count()
-        
-        verified_providers = ServiceProviderProfile.query.filter_by(
-            verification_status='approved'
-        ).count()
-        
-        # Booking statistics
-        total_bookings = Booking.query.count()
-        completed_bookings = Booking.query.filter_by(booking_status='completed').count()
-        active_bookings = Booking.query.filter(
-            Booking.booking_status.in_(['pending', 'confirmed', 'in_progress'])
-        ).count()
-        
-        # Bookings this month
-        bookings_this_month = Booking.query.filter(
-            Booking.created_at >= datetime.combine(month_ago, datetime.min.time())
-        ).count()
-        
-        # Revenue statistics (from completed bookings)
-        revenue_query = db.session.query(
-            func.sum(Booking.total_amount).label('total_revenue'),
-            func.sum(Booking.platform_commission).label('platform_revenue')
-        ).filter(Booking.booking_status == 'completed')
-        
-        revenue_result = revenue_query.first()
-        total_revenue = float(revenue_result.total_revenue) if revenue_result.total_revenue else 0
-        platform_revenue = float(revenue_result.platform_revenue) if revenue_result.platform_revenue else 0
-        
-        # Monthly revenue
-        monthly_revenue_query = db.session.query(
-            func.sum(Booking.platform_commission).label('monthly_revenue')
-        ).filter(
-            and_(
-                Booking.booking_status == 'completed',
-                Booking.created_at >= datetime.combine(month_ago, datetime.min.time())
-            )
-        )
-        
-        monthly_revenue_result = monthly_revenue_query.first()
-        monthly_revenue = float(monthly_revenue_result.monthly_revenue) if monthly_revenue_result.monthly_revenue else 0
-        
-        # Service statistics
-        total_services = Service.query.filter_by(is_active=True).count()
-        total_categories = ServiceCategory.query.filter_by(is_active=True).count()
-        
-        # Average rating (remove is_verified filter as column doesn't exist)
-        avg_rating_query = db.session.query(
-            func.avg(BookingReview.rating).label('avg_rating')
+        stats = dashboard_cache.get(
+            'dashboard_stats',
+            compute_dashboard_stats,
+            ttl=current_app.config.get('DASHBOARD_STATS_TTL', 60),
+            stale_ttl=current_app.config.get('DASHBOARD_STATS_STALE_TTL', 300)
         )
-        
-        avg_rating_result = avg_rating_query.first()
-        average_rating = round(float(avg_rating_result.avg_rating), 2) if avg_rating_result.avg_rating else 0
-        
-        return jsonify({
-            'users': {
-                'total': total_users,
-                'customers': total_customers,
-                'providers': total_providers,
-                'new_this_week': new_users_week
-            },
-            'providers': {
-                'total': total_providers,
-                'verified': verified_providers,
-                'pending_verification': pending_verification,
-                'verification_rate': round((verified_providers / total_providers * 100), 2) if total_providers > 0 else 0
-            },
-            'bookings': {
-                'total': total_bookings,
-                'completed': completed_bookings,
-                'active': active_bookings,
-                'this_month': bookings_this_month,
-                'completion_rate': round((completed_bookings / total_bookings * 100), 2) if total_bookings > 0 else 0
-            },
-            'revenue': {
-                'total_revenue': total_revenue,
-                'platform_revenue': platform_revenue,
-                'monthly_revenue': monthly_revenue,
-                'commission_rate': round((platform_revenue / total_revenue * 100), 2) if total_revenue > 0 else 15
-            },
-            'services': {
-                'total_services': total_services,
-                'total_categories': total_categories,
-                'average_rating': average_rating
-            }
-        }), 200
+        return jsonify(stats), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -143,24 +160,20 @@ def get_users(current_user):
         if status:
             query = query.filter_by(status=status)
         
-        # Search by email or phone
+        # Ranked search by email or phone (010..., +2010... and 2010... all match)
+        rank = None
         if search:
-            query = query.filter(
-                or_(
-                    User.email.ilike(f'%{search}%'),
-                    User.phone.ilike(f'%{search}%')
-                )
-            )
+            query, rank = search_index.apply(query, User, search)
         
-        # Order by creation date (newest first)
-        query = query.order_by(User.created_at.desc())
+        # Best matches first when searching, otherwise newest first
+        if rank is not None:
+            query = query.order_by(rank.desc(), User.created_at.desc())
+        else:
+            query = query.order_by(User.created_at.desc())
         
-        # Paginate
-        users = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        # Paginate without COUNT(*); the total comes from the count strategy
+        users = offset_paginate(query, page=page, per_page=per_page)
+        total = paginated_total(query, table_name='users')
         
         # Prepare user data with profiles
         users_data = []
@@ -177,14 +190,7 @@ def get_users(current_user):
         
         return jsonify({
             'users': users_data,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': users.total,
-                'pages': users.pages,
-                'has_next': users.has_next,
-                'has_prev': users.has_prev
-            }
+            'pagination': users.to_dict(total)
         }), 200
         
     except Exception as e:
@@ -229,13 +235,14 @@ def update_user_status(current_user, user_id):
 @admin_bp.route('/bookings', methods=['GET'])
 @admin_required
 def get_all_bookings(current_user):
-    """Get all bookings with filtering and pagination"""
+    """Get all bookings with filtering and cursor pagination"""
     try:
-        page = request.args.get('page', 1, type=int)
+        cursor = request.args.get('cursor')
         per_page = request.args.get('per_page', 20, type=int)
         status = request.args.get('status')
         date_from = request.args.get('date_from')
         date_to = request.args.get('date_to')
+        include_total = request.args.get('include_total', 'true').lower() == 'true'
         
         # Build query
         query = Booking.query
@@ -259,37 +266,155 @@ def get_all_bookings(current_user):
             except ValueError:
                 return jsonify({'error': 'Invalid date_to format'}), 400
         
-        # Order by creation date (newest first)
-        query = query.order_by(Booking.created_at.desc())
-        
-        # Paginate
-        bookings = query.paginate(
-            page=page,
+        # Newest first, seeking on (created_at, id) instead of OFFSET
+        page = keyset_paginate(
+            query,
+            [Booking.created_at, Booking.id],
+            cursor=cursor,
             per_page=per_page,
-            error_out=False
+            descending=True,
+            dialect_name=db.engine.dialect.name
         )
         
+        pagination = page.to_dict()
+        if include_total:
+            pagination.update(paginated_total(query, table_name='bookings').to_dict())
+        
         return jsonify({
-            'bookings': [booking.to_dict() for booking in bookings.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': bookings.total,
-                'pages': bookings.pages,
-                'has_next': bookings.has_next,
-                'has_prev': bookings.has_prev
-            }
+            'bookings': [booking.to_dict() for booking in page.items],
+            'pagination': pagination
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/bookings/bulk-status', methods=['POST'])
+@rate_limiter.limit('10/minute', burst=3, key='user')
+@admin_required
+def bulk_update_booking_status(current_user):
+    """Move many bookings to a new status in one transaction (e.g. cancel a suspended provider's jobs)"""
+    try:
+        data = request.get_json() or {}
+        new_status = data.get('status')
+        booking_ids = data.get('booking_ids')
+        provider_id = data.get('provider_id')
+        
+        if not new_status:
+            return jsonify({'error': 'status is required'}), 400
+        if not booking_ids and not provider_id:
+            return jsonify({'error': 'booking_ids or provider_id is required'}), 400
+        if booking_ids and len(booking_ids) > MAX_BULK_BOOKINGS:
+            return jsonify({'error': f'At most {MAX_BULK_BOOKINGS} booking_ids per request'}), 400
+        from_status = data.get('from_status')
+        if from_status is not None and (
+            not isinstance(from_status, list) or not from_status
+            or not all(isinstance(status, str) and status in booking_state_machine.statuses for status in from_status)
+        ):
+            return jsonify({'error': f'from_status must be a list of: {sorted(booking_state_machine.statuses)}'}), 400
+        
+        criteria = []
+        if booking_ids:
+            criteria.append(Booking.id.in_([str(booking_id) for booking_id in booking_ids]))
+        if provider_id:
+            criteria.append(Booking.provider_id == str(provider_id))
+        if from_status:
+            criteria.append(Booking.booking_status.in_(from_status))
+        
+        moved = booking_state_machine.bulk_transition(
+            criteria,
+            'admin',
+            new_status,
+            changed_by=current_user.id,
+            reason=data.get('reason'),
+            limit=MAX_BULK_BOOKINGS
+        )
+        record_booking_transitions(moved, new_status)
+        db.session.commit()
+        
+        # Completed-job counters are shown on the public profile
+        for provider_id in {row.provider_id for row, old_status in moved
+                            if row.provider_id and 'completed' in (old_status, new_status)}:
+            provider_profiles.invalidate(provider_id)
+        
+        moved_ids = [row.id for row, old_status in moved]
+        response = {
+            'message': f'{len(moved_ids)} bookings moved to {new_status}',
+            'status': new_status,
+            'moved': len(moved_ids),
+            'booking_ids': moved_ids,
+            # Filter-based requests are capped per call; repeat until has_more is false
+            'has_more': not booking_ids and len(moved_ids) == MAX_BULK_BOOKINGS
+        }
+        if booking_ids:
+            moved_set = set(moved_ids)
+            response['skipped'] = [str(booking_id) for booking_id in booking_ids if str(booking_id) not in moved_set]
+        
+        return jsonify(response), 200
+        
+    except BookingTransitionError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), e.status_code
+    except StaleDataError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'code': 'version_conflict'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/bookings/sweeper', methods=['GET'])
+@admin_required
+def get_booking_sweeper_stats(current_user):
+    """Get stale booking sweeper settings and recent runs (this worker)"""
+    try:
+        return jsonify(stale_booking_sweeper.stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/db/pool', methods=['GET'])
+@admin_required
+def get_db_pool_metrics(current_user):
+    """Get database pool checkout latency, waits and connections in use (this worker)"""
+    try:
+        return jsonify(pool_metrics.stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/db/replicas', methods=['GET'])
+@admin_required
+def get_db_replica_status(current_user):
+    """Get read replica health, lag and routed reads (this worker)"""
+    try:
+        return jsonify(replica_router.stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/metrics', methods=['GET'])
+@admin_required
+def get_request_metrics(current_user):
+    """Get per-endpoint query counts, DB time and N+1 signatures (this worker)"""
+    try:
+        return jsonify(query_instrumentation.stats()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/metrics/routes', methods=['GET'])
+@admin_required
+def get_route_latency(current_user):
+    """Get per-route latency percentiles, status counts and in-flight requests (all workers)"""
+    try:
+        return jsonify(request_metrics.summary()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/providers', methods=['GET'])
 @admin_required
 def get_all_providers(current_user):
-    """Get all service providers with filtering and pagination"""
+    """Get service providers with filtering and keyset pagination (page numbers when searching)"""
     try:
-        page = request.args.get('page', 1, type=int)
+        cursor = request.args.get('cursor')
+        page_number = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         verification_status = request.args.get('verification_status')
         search = request.args.get('search')
@@ -301,60 +426,61 @@ def get_all_providers(current_user):
         if verification_status:
             query = query.filter(ServiceProviderProfile.verification_status == verification_status)
         
-        # Search by name
+        # Ranked name search pages by number through the best MAX_SEARCH_RESULTS matches
+        truncated = False
         if search:
-            query = query.filter(
-                or_(
-                    ServiceProviderProfile.first_name.ilike(f'%{search}%'),
-                    ServiceProviderProfile.last_name.ilike(f'%{search}%')
-                )
+            if cursor:
+                return jsonify({'error': 'cursor cannot be combined with search; use page'}), 400
+            per_page = max(1, min(per_page, MAX_PAGE_SIZE))
+            page_number = max(1, page_number)
+            if (page_number - 1) * per_page >= MAX_SEARCH_RESULTS:
+                return jsonify({'error': f'Search results are limited to the best {MAX_SEARCH_RESULTS} matches; '
+                                         f'refine the search'}), 400
+            
+            query, rank = search_index.apply(query, ServiceProviderProfile, search)
+            # Newest first among equal ranks, with id keeping pages stable
+            ranking = [rank.desc()] if rank is not None else []
+            query = query.order_by(*ranking, ServiceProviderProfile.created_at.desc(), ServiceProviderProfile.id.desc())
+            page = offset_paginate(query, page=page_number, per_page=per_page)
+            if page.has_next and page_number * per_page >= MAX_SEARCH_RESULTS:
+                page.has_next = False
+                truncated = True
+        else:
+            # Newest first, seeking on (created_at, id) instead of OFFSET
+            page = keyset_paginate(
+                query,
+                [ServiceProviderProfile.created_at, ServiceProviderProfile.id],
+                cursor=cursor,
+                per_page=per_page,
+                descending=True,
+                dialect_name=db.engine.dialect.name
             )
         
-        # Order by creation date (newest first)
-        query = query.order_by(ServiceProviderProfile.created_at.desc())
-        
-        # Get all providers (skip pagination for now to avoid issues)
-        providers = query.all()
+        # One IN query each for the page's users and documents
+        users = load_users_by_id(provider.user_id for provider in page.items)
+        documents = load_documents_by_provider(provider.id for provider in page.items)
         
-        # Prepare provider data
         providers_data = []
-        for provider in providers:
-            try:
-                provider_data = provider.to_dict()
-                # Try to get user data safely
-                if hasattr(provider, 'user') and provider.user:
-                    provider_data['user'] = provider.user.to_dict()
-                else:
-                    provider_data['user'] = None
-                
-                # Get documents and validate them
-                documents = ProviderDocument.query.filter_by(provider_id=provider.id).all()
-                valid_documents = []
-                
-                for doc in documents:
-                    doc_dict = doc.to_dict()
-                    # Only include documents with valid URLs
-                    if doc_dict.get('document_url') and doc_dict['document_url'].strip() and doc_dict['document_url'] != '#':
-                        valid_documents.append(doc_dict)
-                
-                provider_data['documents'] = valid_documents
-                providers_data.append(provider_data)
-            except Exception as provider_error:
-                print(f"Error processing provider {provider.id}: {provider_error}")
-                continue
+        for provider in page.items:
+            provider_data = provider.to_dict()
+            user = users.get(provider.user_id)
+            provider_data['user'] = user.to_dict() if user else None
+            provider_data['documents'] = [
+                doc.to_dict() for doc in documents.get(str(provider.id), []) if has_valid_document_url(doc)
+            ]
+            providers_data.append(provider_data)
+        
+        pagination = page.to_dict()
+        if search:
+            pagination['truncated'] = truncated
         
         return jsonify({
             'providers': providers_data,
-            'pagination': {
-                'page': 1,
-                'per_page': len(providers_data),
-                'total': len(providers_data),
-                'pages': 1,
-                'has_next': False,
-                'has_prev': False
-            }
+            'pagination': pagination
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error in get_all_providers: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -435,11 +561,8 @@ def get_pending_documents(current_user):
         query = query.join(ServiceProviderProfile, ProviderDocument.provider_id == ServiceProviderProfile.id)
         query = query.join(User, ServiceProviderProfile.user_id == User.id)
         
-        documents = query.order_by(ProviderDocument.created_at.desc()).paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        documents = offset_paginate(query.order_by(ProviderDocument.created_at.desc()), page=page, per_page=per_page)
+        total = paginated_total(query, table_name='provider_documents')
         
         document_data = []
         for doc in documents.items:
@@ -456,14 +579,7 @@ def get_pending_documents(current_user):
         
         return jsonify({
             'documents': document_data,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': documents.total,
-                'pages': documents.pages,
-                'has_next': documents.has_next,
-                'has_prev': documents.has_prev
-            }
+            'pagination': documents.to_dict(total)
         }), 200
         
     except Exception as e:
@@ -803,96 +919,106 @@ def get_all_service_categories(current_user):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def rollup_window(days):
+    """Filter completed-booking rollups to the last ``days`` days"""
+    start_day = datetime.utcnow().date() - timedelta(days=days)
+    return and_(
+        BookingDailyRollup.booking_status == 'completed',
+        BookingDailyRollup.day >= start_day
+    )
+
+def top_rollup_groups(column, window, order_by, limit=10):
+    """Aggregate windowed rollups by one dimension, returning the top groups"""
+    return db.session.query(
+        column.label('key'),
+        func.sum(BookingDailyRollup.booking_count).label('bookings'),
+        func.sum(BookingDailyRollup.gross_amount).label('revenue'),
+        func.sum(BookingDailyRollup.commission_amount).label('commission'),
+        func.sum(BookingDailyRollup.provider_earnings).label('earnings'),
+        func.sum(BookingDailyRollup.rating_sum).label('rating_sum'),
+        func.sum(BookingDailyRollup.rating_count).label('rating_count')
+    ).filter(window, column != '').group_by(column).order_by(order_by.desc()).limit(limit).all()
+
+def provider_names(provider_ids):
+    """Map provider profile ids to display names in one query"""
+    ids = [as_uuid(pid) for pid in provider_ids if as_uuid(pid)]
+    if not ids:
+        return {}
+    profiles = db.session.query(
+        ServiceProviderProfile.id, ServiceProviderProfile.first_name, ServiceProviderProfile.last_name
+    ).filter(ServiceProviderProfile.id.in_(ids)).all()
+    return {str(p.id): f"{p.first_name} {p.last_name}" for p in profiles}
+
+def average_from_sums(rating_sum, rating_count):
+    return float(rating_sum) / rating_count if rating_count else 0
+
 @admin_bp.route('/analytics', methods=['GET'])
 @admin_required
 def get_analytics_data(current_user):
-    """Get comprehensive analytics data for admin dashboard"""
+    """Get comprehensive analytics data for admin dashboard (from daily rollups)"""
     try:
-        # Date range for analytics
-        today = datetime.utcnow().date()
-        week_ago = today - timedelta(days=7)
-        month_ago = today - timedelta(days=30)
-        year_ago = today - timedelta(days=365)
+        days = request.args.get('days', 365, type=int)
+        window = rollup_window(days)
         
         # Revenue analytics
-        revenue_query = db.session.query(
-            func.sum(Booking.total_price).label('total'),
-            func.count(Booking.id).label('count')
-        ).filter(
-            Booking.booking_status == 'completed',
-            Booking.total_price.isnot(None)
-        )
-        
-        total_revenue = revenue_query.scalar() or 0
-        
-        # Monthly revenue for chart
-        monthly_revenue = db.session.query(
-            func.date_trunc('month', Booking.created_at).label('month'),
-            func.sum(Booking.total_price).label('revenue'),
-            func.count(Booking.id).label('bookings')
-        ).filter(
-            Booking.booking_status == 'completed',
-            Booking.created_at >= datetime.combine(year_ago, datetime.min.time())
-        ).group_by(
-            func.date_trunc('month', Booking.created_at)
-        ).order_by('month').all()
+        total_revenue = db.session.query(
+            func.sum(BookingDailyRollup.gross_amount)
+        ).filter(BookingDailyRollup.booking_status == 'completed').scalar() or 0
+        
+        # Monthly revenue for chart: at most one row per day, folded into months here
+        daily_rows = db.session.query(
+            BookingDailyRollup.day,
+            func.sum(BookingDailyRollup.gross_amount).label('revenue'),
+            func.sum(BookingDailyRollup.booking_count).label('bookings')
+        ).filter(rollup_window(365)).group_by(BookingDailyRollup.day).all()
+        
+        months = {}
+        for row in daily_rows:
+            month = months.setdefault(row.day.strftime('%Y-%m'), {'revenue': 0.0, 'bookings': 0})
+            month['revenue'] += float(row.revenue or 0)
+            month['bookings'] += int(row.bookings or 0)
         
         # Service performance
-        service_stats = db.session.query(
-            Service.name_ar,
-            Service.name_en,
-            func.count(Booking.id).label('bookings'),
-            func.sum(Booking.total_price).label('revenue'),
-            func.avg(BookingReview.rating).label('avg_rating')
-        ).join(Booking).outerjoin(BookingReview).filter(
-            Booking.booking_status == 'completed'
-        ).group_by(Service.id, Service.name_ar, Service.name_en).order_by(
-            func.count(Booking.id).desc()
-        ).limit(10).all()
+        service_stats = top_rollup_groups(
+            BookingDailyRollup.service_id, window, func.sum(BookingDailyRollup.booking_count)
+        )
+        services = {
+            service.id: service for service in
+            Service.query.filter(Service.id.in_([row.key for row in service_stats])).all()
+        } if service_stats else {}
         
         # Provider performance
-        provider_stats = db.session.query(
-            ServiceProviderProfile.first_name,
-            ServiceProviderProfile.last_name,
-            func.count(Booking.id).label('bookings'),
-            func.sum(Booking.total_price).label('revenue'),
-            func.avg(BookingReview.rating).label('avg_rating')
-        ).join(Booking).outerjoin(BookingReview).filter(
-            Booking.booking_status == 'completed'
-        ).group_by(
-            ServiceProviderProfile.id,
-            ServiceProviderProfile.first_name,
-            ServiceProviderProfile.last_name
-        ).order_by(
-            func.count(Booking.id).desc()
-        ).limit(10).all()
+        provider_stats = top_rollup_groups(
+            BookingDailyRollup.provider_id, window, func.sum(BookingDailyRollup.booking_count)
+        )
+        names = provider_names([row.key for row in provider_stats])
         
         return jsonify({
             'revenue': {
                 'total': float(total_revenue),
                 'monthly_data': [
                     {
-                        'month': row.month.strftime('%Y-%m'),
-                        'revenue': float(row.revenue or 0),
-                        'bookings': row.bookings
-                    } for row in monthly_revenue
+                        'month': month,
+                        'revenue': data['revenue'],
+                        'bookings': data['bookings']
+                    } for month, data in sorted(months.items())
                 ]
             },
             'services': [
                 {
-                    'name': row.name_ar,
-                    'name_en': row.name_en,
-                    'bookings': row.bookings,
+                    'name': services[row.key].name_ar if row.key in services else None,
+                    'name_en': services[row.key].name_en if row.key in services else None,
+                    'bookings': int(row.bookings or 0),
                     'revenue': float(row.revenue or 0),
-                    'rating': float(row.avg_rating or 0)
+                    'rating': average_from_sums(row.rating_sum, row.rating_count)
                 } for row in service_stats
             ],
             'providers': [
                 {
-                    'name': f"{row.first_name} {row.last_name}",
-                    'bookings': row.bookings,
+                    'name': names.get(row.key),
+                    'bookings': int(row.bookings or 0),
                     'revenue': float(row.revenue or 0),
-                    'rating': float(row.avg_rating or 0)
+                    'rating': average_from_sums(row.rating_sum, row.rating_count)
                 } for row in provider_stats
             ]
         }), 200
@@ -903,73 +1029,64 @@ def get_analytics_data(current_user):
 @admin_bp.route('/analytics/revenue', methods=['GET'])
 @admin_required
 def get_revenue_analytics(current_user):
-    """Get revenue analytics data"""
+    """Get revenue analytics data (from daily rollups)"""
     try:
         # Get date range from query params
         days = request.args.get('days', 30, type=int)
         end_date = datetime.utcnow().date()
         start_date = end_date - timedelta(days=days)
         
-        # Daily revenue data
+        # Daily revenue data; plain range predicate on the indexed day column
         daily_revenue = db.session.query(
-            func.date(Booking.created_at).label('date'),
-            func.sum(Booking.platform_commission).label('revenue'),
-            func.count(Booking.id).label('bookings')
+            BookingDailyRollup.day.label('date'),
+            func.sum(BookingDailyRollup.commission_amount).label('revenue'),
+            func.sum(BookingDailyRollup.booking_count).label('bookings')
         ).filter(
-            and_(
-                Booking.booking_status == 'completed',
-                func.date(Booking.created_at) >= start_date,
-                func.date(Booking.created_at) <= end_date
-            )
-        ).group_by(func.date(Booking.created_at)).all()
+            BookingDailyRollup.booking_status == 'completed',
+            BookingDailyRollup.day >= start_date,
+            BookingDailyRollup.day <= end_date
+        ).group_by(BookingDailyRollup.day).order_by(BookingDailyRollup.day).all()
+        
+        window = rollup_window(days)
         
         # Revenue by service category
-        category_revenue = db.session.query(
-            ServiceCategory.name_en.label('category'),
-            func.sum(Booking.platform_commission).label('revenue'),
-            func.count(Booking.id).label('bookings')
-        ).join(Service).join(Booking).filter(
-            Booking.booking_status == 'completed'
-        ).group_by(ServiceCategory.id, ServiceCategory.name_en).all()
+        category_revenue = top_rollup_groups(
+            BookingDailyRollup.category_id, window, func.sum(BookingDailyRollup.commission_amount), limit=None
+        )
+        categories = {
+            category.id: category for category in
+            ServiceCategory.query.filter(ServiceCategory.id.in_([row.key for row in category_revenue])).all()
+        } if category_revenue else {}
         
         # Top performing providers
-        top_providers = db.session.query(
-            ServiceProviderProfile.first_name,
-            ServiceProviderProfile.last_name,
-            func.sum(Booking.provider_earnings).label('earnings'),
-            func.count(Booking.id).label('completed_jobs'),
-            func.avg(BookingReview.rating).label('avg_rating')
-        ).join(Booking).outerjoin(BookingReview).filter(
-            Booking.booking_status == 'completed'
-        ).group_by(
-            ServiceProviderProfile.id,
-            ServiceProviderProfile.first_name,
-            ServiceProviderProfile.last_name
-        ).order_by(func.sum(Booking.provider_earnings).desc()).limit(10).all()
+        top_providers = top_rollup_groups(
+            BookingDailyRollup.provider_id, window, func.sum(BookingDailyRollup.provider_earnings)
+        )
+        names = provider_names([row.key for row in top_providers])
         
         return jsonify({
             'daily_revenue': [
                 {
                     'date': item.date.isoformat(),
                     'revenue': float(item.revenue) if item.revenue else 0,
-                    'bookings': item.bookings
+                    'bookings': int(item.bookings or 0)
                 }
                 for item in daily_revenue
             ],
             'category_revenue': [
                 {
-                    'category': item.category,
-                    'revenue': float(item.revenue) if item.revenue else 0,
-                    'bookings': item.bookings
+                    'category': categories[item.key].name_en if item.key in categories else None,
+                    'revenue': float(item.commission) if item.commission else 0,
+                    'bookings': int(item.bookings or 0)
                 }
                 for item in category_revenue
             ],
             'top_providers': [
                 {
-                    'name': f"{item.first_name} {item.last_name}",
+                    'name': names.get(item.key),
                     'earnings': float(item.earnings) if item.earnings else 0,
-                    'completed_jobs': item.completed_jobs,
-                    'avg_rating': round(float(item.avg_rating), 2) if item.avg_rating else 0
+                    'completed_jobs': int(item.bookings or 0),
+                    'avg_rating': round(average_from_sums(item.rating_sum, item.rating_count), 2)
                 }
                 for item in top_providers
             ]
@@ -1020,3 +1137,75 @@ def get_system_settings(current_user):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@admin_bp.route('/rate-limits', methods=['GET'])
+@admin_required
+def get_rate_limit_stats(current_user):
+    """Get rejected request counters per route (rate limited or shed)"""
+    try:
+        return jsonify({
+            'rejected': rate_limiter.stats(),
+            'storage': type(rate_limiter.store).__name__,
+            'db_pool_pressure': round(rate_limiter.pool_pressure(), 3)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/export/<dataset>', methods=['GET'])
+@rate_limiter.limit('10/minute', burst=3, key='user')
+@admin_required
+def export_dataset(current_user, dataset):
+    """Stream bookings, users or providers as CSV or NDJSON"""
+    try:
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'Invalid format. Must be one of: {list(EXPORT_FORMATS)}'}), 400
+        if dataset not in ('bookings', 'users', 'providers'):
+            return jsonify({'error': 'Dataset must be one of: bookings, users, providers'}), 404
+        
+        filters = {
+            'status': request.args.get('status'),
+            'user_type': request.args.get('user_type'),
+            'verification_status': request.args.get('verification_status')
+        }
+        for param in ('date_from', 'date_to'):
+            value = request.args.get(param)
+            if value:
+                try:
+                    filters[param] = datetime.fromisoformat(value)
+                except ValueError:
+                    return jsonify({'error': f'Invalid {param} format'}), 400
+        
+        stmt, headers = build_export_query(
+            dataset,
+            filters,
+            cursor=request.args.get('cursor'),
+            dialect_name=db.engine.dialect.name
+        )
+        chunks = stream_export(stmt, headers, export_format, current_app.config.get('EXPORT_BATCH_SIZE', 2000))
+        
+        mimetype, extension = EXPORT_FORMATS[export_format]
+        filename = f"{dataset}-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.{extension}"
+        response_headers = {
+            'Cache-Control': 'no-store',
+            # Stop nginx-style proxies from buffering the whole export
+            'X-Accel-Buffering': 'no',
+            'Vary': 'Accept-Encoding'
+        }
+        
+        # gzip=1 downloads a .gz file; otherwise compress transparently when accepted
+        if request.args.get('gzip', type=int) == 1:
+            chunks = gzip_stream(chunks)
+            mimetype = 'application/gzip'
+            filename += '.gz'
+        elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+            chunks = gzip_stream(chunks)
+            response_headers['Content-Encoding'] = 'gzip'
+        response_headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        
+        return Response(stream_with_context(chunks), mimetype=mimetype, headers=response_headers)
+        
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -6,10 +6,13 @@ from src.models.user import User, CustomerProfile, ServiceProviderProfile
 from src.models.location import ProviderLocation, ProviderServiceArea
 from src.utils.auth import validate_email, validate_phone, normalize_phone, validate_password, token_required
 from src.utils.location import validate_coordinates
+from src.utils.passwords import PasswordHashingBusy, password_busy_response
+from src.utils.rate_limit import rate_limiter
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/register', methods=['POST'])
+@rate_limiter.limit('5/minute', burst=5, key='ip')
 def register():
     """Register a new user (customer or service provider)"""
     try:
@@ -155,11 +158,15 @@ def register():
             'refresh_token': refresh_token
         }), 201
         
+    except PasswordHashingBusy as e:
+        db.session.rollback()
+        return password_busy_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limiter.limit('10/minute', burst=5, key='ip')
 def login():
     """Login user with email/phone and password"""
     try:
@@ -186,6 +193,10 @@ def login():
         if user.status == 'suspended':
             return jsonify({'error': 'Account is suspended'}), 403
         
+        # Upgrade legacy werkzeug or low-cost bcrypt hashes while we have the plaintext
+        if user.password_needs_rehash():
+            user.set_password(password)
+        
         # Update last login
         user.last_login = datetime.utcnow()
         db.session.commit()
@@ -215,6 +226,9 @@ def login():
             'refresh_token': refresh_token
         }), 200
         
+    except PasswordHashingBusy as e:
+        db.session.rollback()
+        return password_busy_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -345,6 +359,7 @@ def update_profile(current_user):
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/change-password', methods=['POST'])
+@rate_limiter.limit('5/minute', burst=3, key='user')
 @token_required
 def change_password(current_user):
     """Change user password"""
@@ -371,6 +386,9 @@ def change_password(current_user):
         
         return jsonify({'message': 'Password changed successfully'}), 200
         
+    except PasswordHashingBusy as e:
+        db.session.rollback()
+        return password_busy_response(e)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
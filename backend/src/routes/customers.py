@@ -6,11 +6,13 @@ from src.models.location import CustomerLocation, ProviderLocation
 from src.models.service import ProviderService
 from src.utils.auth import customer_required
 from src.utils.location import validate_coordinates, calculate_distance
+from src.utils.rate_limit import rate_limiter
 from sqlalchemy import and_, func
 
 customers_bp = Blueprint('customers', __name__)
 
 @customers_bp.route('/location', methods=['POST'])
+@rate_limiter.limit('30/minute', burst=10, key='user')
 @customer_required
 def update_customer_location(current_user):
     """Update customer live location"""
@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime
+import math
 import os
-from src.models import db
+from src.models import db, as_uuid
 from src.models.user import ServiceProviderProfile, ProviderDocument
 from src.models.service import ProviderService, Service
 from src.models.location import ProviderLocation, ProviderServiceArea
 from src.utils.auth import token_required, provider_required, admin_required
 from src.utils.location import validate_coordinates
+from src.utils.rate_limit import rate_limiter
+from src.utils.pagination import keyset_paginate, InvalidCursor
+from src.utils.loaders import load_documents_by_provider
+from src.utils.presence import provider_presence
+from src.utils.provider_profiles import provider_profiles
+from src.utils.claims import claim_next_booking
 
 providers_bp = Blueprint('providers', __name__)
 
@@ -133,6 +140,7 @@ def update_provider_service(current_user, provider_service_id):
         return jsonify({'error': str(e)}), 500
 
 @providers_bp.route('/location', methods=['POST'])
+@rate_limiter.limit('30/minute', burst=10, key='user')
 @provider_required
 def update_location(current_user):
     """Update provider's current location and online status"""
@@ -174,6 +182,7 @@ def update_location(current_user):
         provider.updated_at = datetime.utcnow()
         
         db.session.commit()
+        provider_presence.mark(current_user.id, is_online)
         
         return jsonify({
             'message': 'Location and status updated successfully',
@@ -192,6 +201,7 @@ def update_location(current_user):
 
 # Toggle provider online/offline status with live location
 @providers_bp.route('/status', methods=['POST'])
+@rate_limiter.limit('20/minute', burst=5, key='user')
 @provider_required
 def toggle_online_status(current_user):
     """Toggle provider online/offline status with automatic live location sharing"""
@@ -238,6 +248,7 @@ def toggle_online_status(current_user):
         provider.updated_at = datetime.utcnow()
         
         db.session.commit()
+        provider_presence.mark(current_user.id, is_online)
         
         response_data = {
             'message': f'Provider status updated to {"online with live location" if is_online else "offline"}',
@@ -265,6 +276,7 @@ def toggle_online_status(current_user):
 
 # Update live location while online (for continuous tracking)
 @providers_bp.route('/live-location', methods=['POST'])
+@rate_limiter.limit('30/minute', burst=10, key='user')
 @provider_required
 def update_live_location(current_user):
     """Update live location for online providers (continuous tracking)"""
@@ -315,6 +327,7 @@ def update_live_location(current_user):
             db.session.add(location)
         
         db.session.commit()
+        provider_presence.mark(current_user.id, True)
         
         return jsonify({
             'message': 'Live location updated successfully',
@@ -467,6 +480,62 @@ def update_availability(current_user):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@providers_bp.route('/bookings/claim', methods=['POST'])
+@rate_limiter.limit('30/minute', burst=10, key='user')
+@provider_required
+def claim_booking(current_user):
+    """Claim the next open booking near the provider"""
+    try:
+        data = request.get_json(silent=True) or {}
+        provider = current_user.provider_profile
+        
+        if provider.verification_status != 'approved':
+            return jsonify({'error': 'Only approved providers can claim bookings'}), 403
+        
+        max_radius = provider.service_radius or 10
+        try:
+            radius_km = float(data.get('radius_km', max_radius))
+            # Search around the given position, or the provider's last reported one
+            if 'latitude' in data and 'longitude' in data:
+                latitude = float(data['latitude'])
+                longitude = float(data['longitude'])
+            else:
+                latitude = longitude = None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'latitude, longitude and radius_km must be numbers'}), 400
+        
+        if not math.isfinite(radius_km) or radius_km <= 0:
+            return jsonify({'error': 'radius_km must be a positive number'}), 400
+        radius_km = min(radius_km, max_radius)
+        
+        if latitude is None:
+            location = ProviderLocation.query.filter_by(
+                provider_id=current_user.id
+            ).order_by(ProviderLocation.created_at.desc()).first()
+            if not location:
+                return jsonify({'error': 'latitude and longitude are required'}), 400
+            latitude = float(location.latitude)
+            longitude = float(location.longitude)
+        
+        if not validate_coordinates(latitude, longitude):
+            return jsonify({'error': 'Invalid coordinates for Egypt'}), 400
+        
+        booking = claim_next_booking(provider, latitude, longitude, radius_km, changed_by=current_user.id)
+        if booking is None:
+            db.session.rollback()
+            return jsonify({'message': 'No open bookings nearby', 'booking': None}), 200
+        
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Booking claimed successfully',
+            'booking': booking.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @providers_bp.route('/service-areas', methods=['POST'])
 @provider_required
 def add_service_area(current_user):
@@ -686,45 +755,13 @@ def upload_document(current_user):
 def get_provider_public_profile(provider_id):
     """Get public provider profile for customers"""
     try:
-        provider = ServiceProviderProfile.query.get_or_404(provider_id)
-        
-        # Only show verified providers
-        if provider.verification_status != 'approved':
+        # Only verified providers are visible; the document is cached per provider
+        profile = provider_profiles.get(provider_id) if as_uuid(provider_id) else None
+        if profile is None:
             return jsonify({'error': 'Provider not found'}), 404
         
-        # Get provider services
-        provider_services = ProviderService.query.filter_by(
-            provider_id=provider.id,
-            is_active=True
-        ).all()
-        
-        # Get recent reviews (last 10)
-        from src.models.service import BookingReview
-        reviews = BookingReview.query.filter_by(
-            provider_id=provider.id,
-            is_verified=True
-        ).order_by(BookingReview.created_at.desc()).limit(10).all()
-        
-        # Get current location (if online)
-        current_location = ProviderLocation.query.filter_by(
-            provider_id=provider.id,
-            is_online=True
-        ).order_by(ProviderLocation.last_updated.desc()).first()
-        
-        profile_data = provider.to_dict()
-        profile_data.update({
-            'services': [ps.to_dict() for ps in provider_services],
-            'reviews': [review.to_dict() for review in reviews],
-            'is_online': current_location is not None,
-            'last_seen': current_location.last_updated.isoformat() if current_location else None
-        })
-        
-        # Remove sensitive information
-        profile_data.pop('national_id', None)
-        profile_data.pop('date_of_birth', None)
-        
         return jsonify({
-            'provider': profile_data
+            'provider': profile
         }), 200
         
     except Exception as e:
@@ -733,43 +770,36 @@ def get_provider_public_profile(provider_id):
 @providers_bp.route('/verification-queue', methods=['GET'])
 @admin_required
 def get_verification_queue(current_user):
-    """Get providers pending verification (admin only)"""
+    """Get providers pending verification, oldest first (admin only)"""
     try:
-        page = request.args.get('page', 1, type=int)
+        cursor = request.args.get('cursor')
         per_page = request.args.get('per_page', 20, type=int)
         
-        providers = ServiceProviderProfile.query.filter_by(
-            verification_status='pending'
-        ).order_by(ServiceProviderProfile.created_at.asc()).paginate(
-            page=page,
+        page = keyset_paginate(
+            ServiceProviderProfile.query.filter_by(verification_status='pending'),
+            [ServiceProviderProfile.created_at, ServiceProviderProfile.id],
+            cursor=cursor,
             per_page=per_page,
-            error_out=False
+            descending=False,
+            dialect_name=db.engine.dialect.name
         )
         
+        # Get documents for the whole page in one query
+        documents = load_documents_by_provider(provider.id for provider in page.items)
+        
         provider_data = []
-        for provider in providers.items:
+        for provider in page.items:
             data = provider.to_dict()
-            
-            # Get documents
-            documents = ProviderDocument.query.filter_by(
-                provider_id=provider.id
-            ).all()
-            data['documents'] = [doc.to_dict() for doc in documents]
-            
+            data['documents'] = [doc.to_dict() for doc in documents.get(str(provider.id), [])]
             provider_data.append(data)
         
         return jsonify({
             'providers': provider_data,
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': providers.total,
-                'pages': providers.pages,
-                'has_next': providers.has_next,
-                'has_prev': providers.has_prev
-            }
+            'pagination': page.to_dict()
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
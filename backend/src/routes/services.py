@@ -1,14 +1,28 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
-from src.models import db
-from src.models.service import ServiceCategory, Service, ProviderService, Booking, BookingStatusHistory, BookingReview
+from sqlalchemy.orm import contains_eager
+from sqlalchemy.orm.exc import StaleDataError
+from src.models import db, as_uuid
+from src.models.service import (ServiceCategory, Service, ProviderService, Booking, BookingStatusHistory, BookingReview,
+                                booking_state_machine, BookingTransitionError)
 from src.models.user import ServiceProviderProfile, CustomerProfile
-from src.models.location import ProviderLocation, ProviderServiceArea
+from src.models.location import ProviderServiceArea
 from src.utils.auth import token_required, customer_required, provider_required
 from src.utils.location import find_nearby_providers, calculate_distance, estimate_travel_time
+from src.utils.rollups import record_booking_created, record_booking_transition, record_booking_review
+from src.utils.ratings import apply_provider_rating
+from src.utils.pagination import keyset_paginate, InvalidCursor
+from src.utils.counts import paginated_total
+from src.utils.provider_profiles import provider_profiles
+from src.utils.quotes import quote_engine, InvalidQuote
+from src.utils.rate_limit import rate_limiter
+from src.utils.replicas import read_only
+from src.utils.loaders import load_latest_locations
 
 services_bp = Blueprint('services', __name__)
 
+MAX_QUOTE_PROVIDERS = 100
+
 @services_bp.route('/categories', methods=['GET'])
 def get_service_categories():
     """Get all active service categories"""
@@ -70,18 +84,27 @@ def search_providers():
         ).join(ServiceProviderProfile).filter(
             ServiceProviderProfile.verification_status == 'approved',
             ServiceProviderProfile.is_available == True
-        ).all()
+        ).options(contains_eager(ProviderService.provider)).all()
+        
+        # Price every candidate in one pass over the cached price tables
+        quotes = quote_engine.quote_many(
+            service.id,
+            [ps.provider_id for ps in provider_services],
+            is_emergency=bool(data.get('is_emergency', False))
+        )
+        
+        # Latest online position of every candidate in one query (ProviderLocation references users.id)
+        locations = load_latest_locations(ps.provider.user_id for ps in provider_services)
         
         available_providers = []
         
         for provider_service in provider_services:
             provider = provider_service.provider
+            quote = quotes.get(str(provider_service.provider_id))
+            if quote is None:
+                continue
             
-            # Get provider's current location
-            location = ProviderLocation.query.filter_by(
-                provider_id=provider.user_id,  # Use user_id since ProviderLocation references users.id
-                is_online=True
-            ).order_by(ProviderLocation.last_updated.desc()).first()
+            location = locations.get(provider.user_id)
             
             if location:
                 distance = calculate_distance(
@@ -98,7 +121,8 @@ def search_providers():
                         'estimated_travel_time': travel_time,
                         'current_location': location.to_dict(),
                         'service_details': provider_service.to_dict(),
-                        'price': float(provider_service.custom_price) if provider_service.custom_price else float(service.base_price)
+                        'price': float(quote.total_amount),
+                        'quote': quote_engine.issue(quote).to_dict()
                     })
                     
                     available_providers.append(provider_data)
@@ -119,6 +143,39 @@ def search_providers():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@services_bp.route('/quotes', methods=['POST'])
+@read_only
+@rate_limiter.limit('60/minute', burst=20, key='ip')
+def create_quotes():
+    """Quote a service, optionally for a list of providers; quote ids lock the price for checkout"""
+    try:
+        data = request.get_json() or {}
+        
+        if 'service_id' not in data:
+            return jsonify({'error': 'service_id is required'}), 400
+        
+        provider_ids = data.get('provider_ids') or []
+        if len(provider_ids) > MAX_QUOTE_PROVIDERS:
+            return jsonify({'error': f'At most {MAX_QUOTE_PROVIDERS} provider_ids per request'}), 400
+        
+        is_emergency = bool(data.get('is_emergency', False))
+        if provider_ids:
+            quotes = list(quote_engine.quote_many(data['service_id'], provider_ids, is_emergency=is_emergency).values())
+        else:
+            quote = quote_engine.quote(data['service_id'], is_emergency=is_emergency)
+            quotes = [quote] if quote else []
+        
+        if not quotes:
+            return jsonify({'error': 'Service is not available for booking'}), 404
+        
+        return jsonify({
+            'quotes': [quote_engine.issue(quote).to_dict() for quote in quotes],
+            'expires_in': quote_engine.ttl
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @services_bp.route('/bookings', methods=['POST'])
 @customer_required
 def create_booking(current_user):
@@ -152,49 +209,54 @@ def create_booking(current_user):
             if field not in address:
                 return jsonify({'error': f'service_address.{field} is required'}), 400
         
-        # Calculate pricing
-        base_price = float(service.base_price)
-        is_emergency = data.get('is_emergency', False)
-        
-        if is_emergency and service.is_emergency_service:
-            emergency_surcharge = base_price * (float(service.emergency_surcharge_percentage) / 100)
-            total_amount = base_price + emergency_surcharge
-        else:
-            total_amount = base_price
-        
-        # Calculate platform commission (15%)
-        commission_rate = 0.15
-        platform_commission = total_amount * commission_rate
-        provider_earnings = total_amount - platform_commission
-        
-        # Create booking
-        booking = Booking(
-            customer_id=current_user.customer_profile.id,
-            service_id=data['service_id'],
-            scheduled_date=scheduled_date,
-            service_address=address,
-            special_instructions=data.get('special_instructions'),
-            total_amount=total_amount,
-            platform_commission=platform_commission,
-            provider_earnings=provider_earnings,
-            estimated_duration=service.estimated_duration
-        )
-        
         # If provider is specified, assign directly
+        provider = None
         if 'provider_id' in data:
-            provider = ServiceProviderProfile.query.get_or_404(data['provider_id'])
+            provider = db.get_or_404(ServiceProviderProfile, as_uuid(data['provider_id']))
             
             # Verify provider offers this service
             provider_service = ProviderService.query.filter_by(
-                provider_id=provider.id,
+                provider_id=str(provider.id),
                 service_id=service.id,
                 is_active=True
             ).first()
             
             if not provider_service:
                 return jsonify({'error': 'Provider does not offer this service'}), 400
-            
-            booking.provider_id = provider.id
+        
+        # Price from a quote the customer was shown, or quote it now
+        provider_id = str(provider.id) if provider else None
+        is_emergency = bool(data.get('is_emergency', False))
+        if data.get('quote_id'):
+            try:
+                quote = quote_engine.redeem(data['quote_id'])
+            except InvalidQuote as e:
+                return jsonify({'error': str(e), 'code': 'invalid_quote'}), 400
+            if quote.service_id != service.id or quote.provider_id != provider_id or quote.is_emergency != (
+                    is_emergency and service.is_emergency_service):
+                return jsonify({'error': 'Quote does not match this booking', 'code': 'invalid_quote'}), 400
+        else:
+            quote = quote_engine.quote(service.id, provider_id=provider_id, is_emergency=is_emergency)
+            if quote is None:
+                return jsonify({'error': 'Service is not available for booking'}), 400
+        
+        # Create booking
+        booking = Booking(
+            customer_id=str(current_user.customer_profile.id),
+            service_id=service.id,
+            scheduled_date=scheduled_date,
+            service_address=address,
+            service_latitude=float(address['latitude']),
+            service_longitude=float(address['longitude']),
+            special_instructions=data.get('special_instructions'),
+            total_amount=quote.total_amount,
+            platform_commission=quote.platform_commission,
+            provider_earnings=quote.provider_earnings,
+            estimated_duration=service.estimated_duration
+        )
+        
+        if provider:
+            booking.provider_id = provider_id
             booking.booking_status = 'confirmed'
         
         db.session.add(booking)
@@ -204,11 +266,14 @@ def create_booking(current_user):
         status_history = BookingStatusHistory(
             booking_id=booking.id,
             new_status=booking.booking_status,
-            changed_by=current_user.id,
+            changed_by=str(current_user.id),
             change_reason='Booking created'
         )
         db.session.add(status_history)
         
+        # Keep analytics rollups in step within the same transaction
+        record_booking_created(booking, category_id=service.category_id)
+        
         db.session.commit()
         
         return jsonify({
@@ -223,17 +288,18 @@ def create_booking(current_user):
 @services_bp.route('/bookings', methods=['GET'])
 @token_required
 def get_bookings(current_user):
-    """Get user's bookings"""
+    """Get user's bookings, newest first, with cursor pagination"""
     try:
-        page = request.args.get('page', 1, type=int)
+        cursor = request.args.get('cursor')
         per_page = request.args.get('per_page', 10, type=int)
         status = request.args.get('status')
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
         
         # Build query based on user type
         if current_user.user_type == 'customer':
-            query = Booking.query.filter_by(customer_id=current_user.customer_profile.id)
+            query = Booking.query.filter_by(customer_id=str(current_user.customer_profile.id))
         elif current_user.user_type == 'service_provider':
-            query = Booking.query.filter_by(provider_id=current_user.provider_profile.id)
+            query = Booking.query.filter_by(provider_id=str(current_user.provider_profile.id))
         else:  # admin
             query = Booking.query
         
@@ -241,28 +307,27 @@ def get_bookings(current_user):
         if status:
             query = query.filter_by(booking_status=status)
         
-        # Order by creation date (newest first)
-        query = query.order_by(Booking.created_at.desc())
-        
-        # Paginate results
-        bookings = query.paginate(
-            page=page,
+        # Seek on (created_at, id) so every page costs one index range scan
+        page = keyset_paginate(
+            query,
+            [Booking.created_at, Booking.id],
+            cursor=cursor,
             per_page=per_page,
-            error_out=False
+            descending=True,
+            dialect_name=db.engine.dialect.name
         )
         
+        pagination = page.to_dict()
+        if include_total:
+            pagination.update(paginated_total(query, table_name='bookings').to_dict())
+        
         return jsonify({
-            'bookings': [booking.to_dict() for booking in bookings.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': bookings.total,
-                'pages': bookings.pages,
-                'has_next': bookings.has_next,
-                'has_prev': bookings.has_prev
-            }
+            'bookings': [booking.to_dict() for booking in page.items],
+            'pagination': pagination
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -289,6 +354,14 @@ def get_booking(current_user, booking_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def version_conflict_response(booking):
+    """409 for a stale booking write; the client should re-read and retry against this state"""
+    return jsonify({
+        'error': 'Booking was modified by another request. Reload it and retry.',
+        'code': 'version_conflict',
+        'booking': booking.to_dict() if booking else None
+    }), 409
+
 @services_bp.route('/bookings/<booking_id>/status', methods=['PUT'])
 @token_required
 def update_booking_status(current_user, booking_id):
@@ -302,72 +375,51 @@ def update_booking_status(current_user, booking_id):
         booking = Booking.query.get_or_404(booking_id)
         new_status = data['status']
         
-        # Validate status transitions based on user type
-        valid_transitions = {
-            'customer': {
-                'pending': ['cancelled'],
-                'confirmed': ['cancelled'],
-                'completed': []
-            },
-            'service_provider': {
-                'pending': ['confirmed'],
-                'confirmed': ['in_progress', 'cancelled'],
-                'in_progress': ['completed'],
-                'completed': []
-            },
-            'admin': {
-                'pending': ['confirmed', 'cancelled'],
-                'confirmed': ['in_progress', 'cancelled'],
-                'in_progress': ['completed', 'cancelled'],
-                'completed': ['disputed']
-            }
-        }
+        # Clients may send the version they last saw to fail fast on stale state
+        expected_version = data.get('version')
+        if expected_version is not None:
+            if isinstance(expected_version, str) and expected_version.isdigit():
+                expected_version = int(expected_version)
+            if isinstance(expected_version, bool) or not isinstance(expected_version, int):
+                return jsonify({'error': 'Version must be an integer'}), 400
+            if expected_version != booking.version:
+                return version_conflict_response(booking)
         
-        current_status = booking.booking_status
-        allowed_transitions = valid_transitions.get(current_user.user_type, {}).get(current_status, [])
+        # Transition table, participant guard and side effects live in the state machine
+        booking_state_machine.check(booking, current_user, new_status)
         
-        if new_status not in allowed_transitions:
-            return jsonify({'error': f'Cannot transition from {current_status} to {new_status}'}), 400
-        
-        # Check user permissions
-        if current_user.user_type == 'customer':
-            if booking.customer_id != current_user.customer_profile.id:
-                return jsonify({'error': 'Access denied'}), 403
-        elif current_user.user_type == 'service_provider':
-            if booking.provider_id != current_user.provider_profile.id:
-                return jsonify({'error': 'Access denied'}), 403
-        
-        # Update booking status
-        old_status = booking.booking_status
-        booking.booking_status = new_status
-        booking.updated_at = datetime.utcnow()
-        
-        # Update timing fields
-        if new_status == 'in_progress':
-            booking.actual_start_time = datetime.utcnow()
-        elif new_status == 'completed':
-            booking.actual_end_time = datetime.utcnow()
-            if booking.actual_start_time:
-                duration = booking.actual_end_time - booking.actual_start_time
-                booking.actual_duration = int(duration.total_seconds() / 60)  # minutes
+        # Update booking status (the flush is a compare-and-swap on booking.version)
+        old_status = booking_state_machine.apply(booking, new_status)
         
         # Create status history entry
         status_history = BookingStatusHistory(
             booking_id=booking.id,
             previous_status=old_status,
             new_status=new_status,
-            changed_by=current_user.id,
+            changed_by=str(current_user.id),
             change_reason=data.get('reason', f'Status changed to {new_status}')
         )
         
         db.session.add(status_history)
+        record_booking_transition(booking, old_status, new_status)
         db.session.commit()
         
+        # Completed-job counters are shown on the public profile
+        if 'completed' in (old_status, new_status) and booking.provider_id:
+            provider_profiles.invalidate(booking.provider_id)
+        
         return jsonify({
             'message': 'Booking status updated successfully',
             'booking': booking.to_dict()
         }), 200
         
+    except BookingTransitionError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), e.status_code
+    except StaleDataError:
+        # Another request changed the booking after we read it; nothing was written
+        db.session.rollback()
+        return version_conflict_response(db.session.get(Booking, booking_id))
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -390,7 +442,7 @@ def create_review(current_user, booking_id):
         booking = Booking.query.get_or_404(booking_id)
         
         # Check if customer owns this booking
-        if booking.customer_id != current_user.customer_profile.id:
+        if booking.customer_id != str(current_user.customer_profile.id):
             return jsonify({'error': 'Access denied'}), 403
         
         # Check if booking is completed
@@ -405,7 +457,7 @@ def create_review(current_user, booking_id):
         # Create review
         review = BookingReview(
             booking_id=booking.id,
-            customer_id=current_user.customer_profile.id,
+            customer_id=str(current_user.customer_profile.id),
             provider_id=booking.provider_id,
             rating=rating,
             review_text=data.get('review_text'),
@@ -414,12 +466,11 @@ def create_review(current_user, booking_id):
         
         db.session.add(review)
         
-        # Update provider's average rating
-        if booking.provider:
-            provider_reviews = BookingReview.query.filter_by(provider_id=booking.provider_id).all()
-            total_rating = sum(r.rating for r in provider_reviews) + rating
-            review_count = len(provider_reviews) + 1
-            booking.provider.average_rating = total_rating / review_count
+        # Update provider's running rating aggregates in the same transaction
+        if booking.provider_id:
+            apply_provider_rating(booking.provider_id, rating)
+        
+        record_booking_review(booking, rating)
         
         db.session.commit()
         
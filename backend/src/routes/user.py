@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import User, CustomerProfile, ServiceProviderProfile, db
 from src.utils.auth import validate_email, validate_phone, normalize_phone, validate_password
+from src.utils.passwords import PasswordHashingBusy, password_busy_response
 from datetime import datetime
 
 user_bp = Blueprint('user', __name__)
@@ -99,6 +100,9 @@ def create_user():
             'user': user.to_dict()
         }), 201
         
+    except PasswordHashingBusy as e:
+        db.session.rollback()
+        return password_busy_response(e)
     except Exception as e:
         db.session.rollback()
         # Log the error for debugging
@@ -167,6 +171,9 @@ def update_user(user_id):
             'user': user.to_dict()
         })
         
+    except PasswordHashingBusy as e:
+        db.session.rollback()
+        return password_busy_response(e)
     except Exception as e:
         db.session.rollback()
         print(f"Error updating user: {str(e)}")
@@ -0,0 +1,209 @@
+from src.models import db
+from src.models.service import ServiceCategory, Service
+from src.models.location import Governorate
+
+def seed_sample_data():
+    """Create the sample catalogue and governorates unless categories already exist; returns True if seeded"""
+    if ServiceCategory.query.first():
+        return False
+    create_sample_data()
+    return True
+
+def create_sample_data():
+    """Create sample service categories and services"""
+    try:
+        # Service Categories
+        categories = [
+            {
+                'name_ar': 'السباكة',
+                'name_en': 'Plumbing',
+                'description_ar': 'خدمات السباكة وإصلاح الأنابيب والحنفيات',
+                'description_en': 'Plumbing services and pipe repairs',
+                'icon_url': '/icons/plumbing.svg',
+                'color_code': '#2196F3',
+                'is_emergency_available': True,
+                'sort_order': 1
+            },
+            {
+                'name_ar': 'الكهرباء',
+                'name_en': 'Electrical',
+                'description_ar': 'خدمات الكهرباء والإصلاحات الكهربائية',
+                'description_en': 'Electrical services and repairs',
+                'icon_url': '/icons/electrical.svg',
+                'color_code': '#FF9800',
+                'is_emergency_available': True,
+                'sort_order': 2
+            },
+            {
+                'name_ar': 'التنظيف',
+                'name_en': 'Cleaning',
+                'description_ar': 'خدمات التنظيف المنزلي والمكتبي',
+                'description_en': 'Home and office cleaning services',
+                'icon_url': '/icons/cleaning.svg',
+                'color_code': '#4CAF50',
+                'is_emergency_available': False,
+                'sort_order': 3
+            },
+            {
+                'name_ar': 'النجارة',
+                'name_en': 'Carpentry',
+                'description_ar': 'خدمات النجارة وإصلاح الأثاث',
+                'description_en': 'Carpentry and furniture repair services',
+                'icon_url': '/icons/carpentry.svg',
+                'color_code': '#795548',
+                'is_emergency_available': False,
+                'sort_order': 4
+            },
+            {
+                'name_ar': 'صيانة التكييف',
+                'name_en': 'AC Maintenance',
+                'description_ar': 'صيانة وإصلاح أجهزة التكييف والتبريد',
+                'description_en': 'Air conditioning maintenance and repair',
+                'icon_url': '/icons/ac.svg',
+                'color_code': '#00BCD4',
+                'is_emergency_available': True,
+                'sort_order': 5
+            },
+            {
+                'name_ar': 'الدهان',
+                'name_en': 'Painting',
+                'description_ar': 'خدمات الدهان والديكور',
+                'description_en': 'Painting and decoration services',
+                'icon_url': '/icons/painting.svg',
+                'color_code': '#E91E63',
+                'is_emergency_available': False,
+                'sort_order': 6
+            }
+        ]
+        
+        category_objects = []
+        for cat_data in categories:
+            category = ServiceCategory(**cat_data)
+            db.session.add(category)
+            category_objects.append(category)
+        
+        db.session.flush()  # Get category IDs
+        
+        # Services for each category
+        services_data = [
+            # Plumbing services
+            {
+                'category': category_objects[0],
+                'services': [
+                    {
+                        'name_ar': 'إصلاح الحنفيات',
+                        'name_en': 'Faucet Repair',
+                        'description_ar': 'إصلاح وتركيب الحنفيات المتسربة والمعطلة',
+                        'description_en': 'Repair and installation of leaky and broken faucets',
+                        'base_price': 150.00,
+                        'estimated_duration': 60
+                    },
+                    {
+                        'name_ar': 'تسليك المجاري',
+                        'name_en': 'Drain Unclogging',
+                        'description_ar': 'تسليك المجاري والبالوعات المسدودة',
+                        'description_en': 'Unclogging blocked drains and sewers',
+                        'base_price': 200.00,
+                        'estimated_duration': 90
+                    },
+                    {
+                        'name_ar': 'إصلاح المراحيض',
+                        'name_en': 'Toilet Repair',
+                        'description_ar': 'إصلاح وصيانة المراحيض والخزانات',
+                        'description_en': 'Toilet and tank repair and maintenance',
+                        'base_price': 180.00,
+                        'estimated_duration': 75
+                    }
+                ]
+            },
+            # Electrical services
+            {
+                'category': category_objects[1],
+                'services': [
+                    {
+                        'name_ar': 'إصلاح الكهرباء',
+                        'name_en': 'Electrical Repair',
+                        'description_ar': 'إصلاح الأعطال الكهربائية والدوائر',
+                        'description_en': 'Electrical fault and circuit repairs',
+                        'base_price': 180.00,
+                        'estimated_duration': 75,
+                        'is_emergency_service': True,
+                        'emergency_surcharge_percentage': 50.00
+                    },
+                    {
+                        'name_ar': 'تركيب الإضاءة',
+                        'name_en': 'Light Installation',
+                        'description_ar': 'تركيب وحدات الإضاءة والثريات',
+                        'description_en': 'Installation of lighting fixtures and chandeliers',
+                        'base_price': 120.00,
+                        'estimated_duration': 45
+                    },
+                    {
+                        'name_ar': 'تركيب المراوح',
+                        'name_en': 'Fan Installation',
+                        'description_ar': 'تركيب وصيانة المراوح السقفية',
+                        'description_en': 'Ceiling fan installation and maintenance',
+                        'base_price': 160.00,
+                        'estimated_duration': 60
+                    }
+                ]
+            },
+            # Cleaning services
+            {
+                'category': category_objects[2],
+                'services': [
+                    {
+                        'name_ar': 'تنظيف المنازل',
+                        'name_en': 'House Cleaning',
+                        'description_ar': 'تنظيف شامل للمنازل والشقق',
+                        'description_en': 'Complete house and apartment cleaning',
+                        'base_price': 250.00,
+                        'price_unit': 'hourly',
+                        'estimated_duration': 180
+                    },
+                    {
+                        'name_ar': 'تنظيف السجاد',
+                        'name_en': 'Carpet Cleaning',
+                        'description_ar': 'تنظيف وغسيل السجاد والموكيت',
+                        'description_en': 'Carpet and rug cleaning and washing',
+                        'base_price': 80.00,
+                        'price_unit': 'per_item',
+                        'estimated_duration': 120
+                    }
+                ]
+            }
+        ]
+        
+        for service_group in services_data:
+            category = service_group['category']
+            for service_data in service_group['services']:
+                service = Service(
+                    category_id=category.id,
+                    **service_data
+                )
+                db.session.add(service)
+        
+        # Egyptian Governorates
+        governorates = [
+            {'name_ar': 'القاهرة', 'name_en': 'Cairo', 'code': 'CAI', 'center_latitude': 30.0444, 'center_longitude': 31.2357},
+            {'name_ar': 'الجيزة', 'name_en': 'Giza', 'code': 'GIZ', 'center_latitude': 30.0131, 'center_longitude': 31.2089},
+            {'name_ar': 'الإسكندرية', 'name_en': 'Alexandria', 'code': 'ALX', 'center_latitude': 31.2001, 'center_longitude': 29.9187},
+            {'name_ar': 'القليوبية', 'name_en': 'Qalyubia', 'code': 'QLY', 'center_latitude': 30.1792, 'center_longitude': 31.2045},
+            {'name_ar': 'بورسعيد', 'name_en': 'Port Said', 'code': 'PTS', 'center_latitude': 31.2653, 'center_longitude': 32.3019},
+            {'name_ar': 'السويس', 'name_en': 'Suez', 'code': 'SUZ', 'center_latitude': 29.9668, 'center_longitude': 32.5498},
+            {'name_ar': 'الإسماعيلية', 'name_en': 'Ismailia', 'code': 'ISM', 'center_latitude': 30.5965, 'center_longitude': 32.2715},
+            {'name_ar': 'الدقهلية', 'name_en': 'Dakahlia', 'code': 'DAK', 'center_latitude': 31.0409, 'center_longitude': 31.3785},
+            {'name_ar': 'الشرقية', 'name_en': 'Sharqia', 'code': 'SHR', 'center_latitude': 30.5965, 'center_longitude': 31.5041},
+            {'name_ar': 'الغربية', 'name_en': 'Gharbia', 'code': 'GHR', 'center_latitude': 30.8754, 'center_longitude': 31.0335}
+        ]
+        
+        for gov_data in governorates:
+            governorate = Governorate(**gov_data)
+            db.session.add(governorate)
+        
+        db.session.commit()
+        print("✅ Sample data created successfully!")
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error creating sample data: {e}")
@@ -0,0 +1,416 @@
+import csv
+import io
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from src.models import db
+from src.models.user import User, CustomerProfile, ServiceProviderProfile, CustomerAddress
+from src.models.service import Service, ProviderService, Booking, BookingStatusHistory, BookingReview
+from src.models.location import Governorate, ProviderLocation, ProviderServiceArea
+
+# Volumes at --scale 1.0: roughly production
+DEFAULT_VOLUMES = {
+    'customers': 100_000,
+    'providers': 10_000,
+    'pings_per_provider': 200,
+    'bookings_per_customer': 5,
+}
+
+# Every synthetic account logs in with this password
+SYNTHETIC_PASSWORD = 'Synthetic123!'
+
+# Relative weight of each governorate (by code) when placing people; unknown codes get 1
+GOVERNORATE_WEIGHTS = {'CAI': 10, 'GIZ': 8, 'ALX': 6, 'QLY': 4, 'SHR': 3, 'DAK': 3, 'GHR': 2}
+
+FIRST_NAMES = ['Ahmed', 'Mohamed', 'Mahmoud', 'Omar', 'Youssef', 'Mostafa', 'Karim', 'Tarek', 'Hassan', 'Ali',
+               'Fatma', 'Mariam', 'Nour', 'Salma', 'Yasmin', 'Aya', 'Heba', 'Dina', 'Rana', 'Mona']
+LAST_NAMES = ['Hassan', 'Ibrahim', 'Mahmoud', 'Abdelrahman', 'Saleh', 'Farouk', 'Khalil', 'Mansour', 'Nasser',
+              'Soliman', 'Fathy', 'Gamal', 'Shawky', 'Zaki', 'Ragab', 'Hamdy', 'Samir', 'Lotfy', 'Emam', 'Badawy']
+STREETS = ['Tahrir St', '26 July St', 'El Haram St', 'Corniche Rd', 'Gameat El Dewal St', 'Abbas El Akkad St',
+           'Salah Salem Rd', 'El Nasr Rd', 'Port Said St', 'Talaat Harb St']
+REVIEW_TEXTS = {
+    5: ['Excellent work, very professional', 'Fast and clean job', 'Highly recommended'],
+    4: ['Good job, arrived a bit late', 'Solid work overall'],
+    3: ['Okay, but had to explain twice', 'Average service'],
+    2: ['Job took much longer than quoted', 'Not very careful'],
+    1: ['Did not fix the problem', 'Very poor experience'],
+}
+RATING_WEIGHTS = {5: 45, 4: 30, 3: 12, 2: 6, 1: 7}
+
+class BulkWriter:
+    """Inserts rows in batches: COPY on Postgres (psycopg2), executemany elsewhere
+
+    Rows are dicts keyed by column name. Python-side column defaults are
+    filled in first, so both paths store the same values.
+    """
+
+    def __init__(self, session, batch_size=10000):
+        self.session = session
+        self.batch_size = batch_size
+        self.counts = Counter()
+        dialect = session.get_bind().dialect
+        self.use_copy = dialect.name == 'postgresql' and dialect.driver == 'psycopg2'
+        self._defaults = {}
+
+    def write(self, table, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._flush(table, batch)
+                batch = []
+        if batch:
+            self._flush(table, batch)
+
+    def _flush(self, table, rows):
+        defaults = self._column_defaults(table)
+        for row in rows:
+            for name, default in defaults:
+                if name not in row:
+                    row[name] = default.arg(None) if default.is_callable else default.arg
+        if self.use_copy:
+            self._copy(table, rows)
+        else:
+            self.session.execute(table.insert(), rows)
+        self.counts[table.name] += len(rows)
+
+    def _column_defaults(self, table):
+        defaults = self._defaults.get(table.name)
+        if defaults is None:
+            defaults = self._defaults[table.name] = [
+                (column.name, column.default) for column in table.columns
+                if column.default is not None and (column.default.is_scalar or column.default.is_callable)
+            ]
+        return defaults
+
+    def _copy(self, table, rows):
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([_copy_value(row[column]) for column in columns])
+        buffer.seek(0)
+        # The session's own connection, so the rows land in its transaction
+        cursor = self.session.connection().connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                               buffer)
+        finally:
+            cursor.close()
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, (date, uuid.UUID, Decimal)):
+        return str(value)
+    return value
+
+class SyntheticDataGenerator:
+    """Production-scale synthetic customers, providers, location pings and booking histories
+
+    Providers are spread around governorate centroids with service offerings
+    and service areas; each sends a trail of location pings. Customers book
+    providers near them, and every booking gets a status timeline (history
+    rows plus start/end times) and, when completed, often a review. The same
+    seed gives the same rows. Rollups, rating aggregates, job counters and
+    search text are rebuilt afterwards, as the app would have maintained them.
+    """
+
+    def __init__(self, seed=42, scale=1.0, customers=None, providers=None, pings_per_provider=None,
+                 bookings_per_customer=None, days=365, ping_days=30, batch_size=10000, log=print):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.customers = customers if customers is not None else max(1, int(DEFAULT_VOLUMES['customers'] * scale))
+        self.providers = providers if providers is not None else max(1, int(DEFAULT_VOLUMES['providers'] * scale))
+        self.pings_per_provider = (pings_per_provider if pings_per_provider is not None
+                                   else DEFAULT_VOLUMES['pings_per_provider'])
+        self.bookings_per_customer = (bookings_per_customer if bookings_per_customer is not None
+                                      else DEFAULT_VOLUMES['bookings_per_customer'])
+        self.days = days
+        self.ping_days = ping_days
+        self.log = log
+        self.now = datetime.utcnow().replace(microsecond=0)
+        self.writer = BulkWriter(db.session, batch_size)
+
+    def run(self, derived=True):
+        """Generate everything; returns {table: rows inserted}"""
+        from src.sample_data import seed_sample_data
+        from src.utils.passwords import password_hasher
+
+        seed_sample_data()
+        if User.query.filter_by(email=self._email('provider', 0)).first() is not None:
+            raise ValueError(f'Synthetic data for seed {self.seed} already exists; use another --seed')
+
+        self.governorates = Governorate.query.order_by(Governorate.code).all()
+        if not self.governorates:
+            raise ValueError('No governorates to place people in; run `flask schema seed` first')
+        self.governorate_weights = [GOVERNORATE_WEIGHTS.get(g.code, 1) for g in self.governorates]
+        self.services = Service.query.filter_by(is_active=True).order_by(Service.name_en).all()
+        self.password_hash = password_hasher.hash(SYNTHETIC_PASSWORD)
+
+        self._stage('providers', self._write_providers)
+        self._stage('customers', self._write_customers)
+        self._stage('location pings', self._write_pings)
+        self._stage('bookings', self._write_bookings)
+        if derived:
+            self._stage('derived tables', self._rebuild_derived)
+        return dict(self.writer.counts)
+
+    def _stage(self, name, fn):
+        started = time.perf_counter()
+        before = sum(self.writer.counts.values())
+        fn()
+        db.session.commit()
+        elapsed = time.perf_counter() - started
+        rows = sum(self.writer.counts.values()) - before
+        rate = f', {rows / elapsed:,.0f} rows/s' if rows and elapsed else ''
+        self.log(f'✅ {name}: {rows:,} rows in {elapsed:.1f} s{rate}')
+
+    def _uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _email(self, kind, index):
+        return f'synthetic-{self.seed}-{kind}-{index}@example.com'
+
+    def _place(self, spread=0.08):
+        """A governorate (weighted) and a point scattered around its centroid"""
+        governorate = self.rng.choices(self.governorates, self.governorate_weights)[0]
+        latitude = float(governorate.center_latitude) + self.rng.gauss(0, spread)
+        longitude = float(governorate.center_longitude) + self.rng.gauss(0, spread)
+        return governorate, round(latitude, 6), round(longitude, 6)
+
+    def _user(self, user_id, email, user_type, created_at):
+        return {
+            'id': user_id, 'email': email, 'phone': None, 'password_hash': self.password_hash,
+            'user_type': user_type, 'status': 'active', 'is_active': True, 'is_verified': True,
+            'created_at': created_at, 'updated_at': created_at
+        }
+
+    def _write_providers(self):
+        rng = self.rng
+        # Kept for the later stages: who lives where and offers what
+        self.provider_rows = []
+        self.providers_by_governorate = {}
+        users, profiles, offerings, areas = [], [], [], []
+        for index in range(self.providers):
+            user_id, profile_id = self._uuid(), self._uuid()
+            governorate, latitude, longitude = self._place()
+            joined = self.now - timedelta(days=rng.randint(30, 3 * 365))
+            status = rng.choices(('approved', 'pending', 'rejected'), (85, 10, 5))[0]
+            available = status == 'approved' and rng.random() < 0.3
+            users.append(self._user(user_id, self._email('provider', index), 'service_provider', joined))
+            profiles.append({
+                'id': profile_id, 'user_id': user_id,
+                'first_name': rng.choice(FIRST_NAMES), 'last_name': rng.choice(LAST_NAMES),
+                'business_name': f'{rng.choice(LAST_NAMES)} Maintenance' if rng.random() < 0.3 else None,
+                'years_of_experience': rng.randint(0, 25), 'verification_status': status,
+                'verified_at': joined + timedelta(days=2) if status == 'approved' else None,
+                'is_available': available, 'service_radius': rng.choice((5, 10, 15, 20, 30)),
+                'hourly_rate': rng.choice((80, 100, 120, 150, 200)), 'created_at': joined, 'updated_at': joined
+            })
+
+            category = rng.choice(self.services).category_id
+            in_category = [s for s in self.services if s.category_id == category]
+            offered = rng.sample(in_category, min(len(in_category), rng.randint(1, 3)))
+            if rng.random() < 0.3:
+                offered.append(rng.choice(self.services))
+            offered = list({s.id: s for s in offered}.values())
+            prices = {}
+            for service in offered:
+                custom = round(float(service.base_price) * rng.uniform(0.8, 1.3), 2) if rng.random() < 0.5 else None
+                prices[service.id] = custom if custom is not None else float(service.base_price)
+                offerings.append({
+                    'id': str(self._uuid()), 'provider_id': str(profile_id), 'service_id': service.id,
+                    'custom_price': custom, 'experience_years': rng.randint(0, 15), 'created_at': joined,
+                    'updated_at': joined
+                })
+
+            for area_index in range(rng.randint(1, 3)):
+                center = (latitude, longitude) if area_index == 0 else self._place()[1:]
+                areas.append({
+                    'id': str(self._uuid()), 'provider_id': str(profile_id),
+                    'area_name': f'{governorate.name_en} {area_index + 1}', 'center_latitude': center[0],
+                    'center_longitude': center[1], 'radius_km': rng.choice((5, 10, 15, 25)),
+                    'is_primary_area': area_index == 0, 'travel_time_minutes': rng.choice((15, 30, 45, 60)),
+                    'created_at': joined
+                })
+
+            provider = {'user_id': user_id, 'profile_id': profile_id, 'latitude': latitude,
+                        'longitude': longitude, 'available': available, 'prices': prices}
+            self.provider_rows.append(provider)
+            if status == 'approved':
+                self.providers_by_governorate.setdefault(governorate.id, []).append(provider)
+
+        self.writer.write(User.__table__, users)
+        self.writer.write(ServiceProviderProfile.__table__, profiles)
+        self.writer.write(ProviderService.__table__, offerings)
+        self.writer.write(ProviderServiceArea.__table__, areas)
+
+    def _write_customers(self):
+        rng = self.rng
+        self.customer_rows = []
+        users, profiles, addresses = [], [], []
+        for index in range(self.customers):
+            user_id, profile_id = self._uuid(), self._uuid()
+            governorate, latitude, longitude = self._place(spread=0.05)
+            joined = self.now - timedelta(days=rng.randint(1, 2 * 365))
+            users.append(self._user(user_id, self._email('customer', index), 'customer', joined))
+            profiles.append({
+                'id': profile_id, 'user_id': user_id,
+                'first_name': rng.choice(FIRST_NAMES), 'last_name': rng.choice(LAST_NAMES),
+                'created_at': joined, 'updated_at': joined
+            })
+            street = f'{rng.randint(1, 200)} {rng.choice(STREETS)}'
+            addresses.append({
+                'id': str(self._uuid()), 'customer_id': str(profile_id), 'address_line1': street,
+                'city': governorate.name_en, 'governorate': governorate.name_en, 'latitude': latitude,
+                'longitude': longitude, 'is_default': True, 'created_at': joined, 'updated_at': joined
+            })
+            self.customer_rows.append({
+                'user_id': user_id, 'profile_id': profile_id, 'governorate': governorate, 'joined': joined,
+                'address': {'street': street, 'city': governorate.name_en, 'governorate': governorate.name_en,
+                            'latitude': latitude, 'longitude': longitude}
+            })
+        self.writer.write(User.__table__, users)
+        self.writer.write(CustomerProfile.__table__, profiles)
+        self.writer.write(CustomerAddress.__table__, addresses)
+
+    def _write_pings(self):
+        self.writer.write(ProviderLocation.__table__, self._pings())
+
+    def _pings(self):
+        """A random-walk trail per provider over the last ping_days; online providers pinged just now"""
+        rng = self.rng
+        window = self.ping_days * 86400
+        for provider in self.provider_rows:
+            latitude, longitude = provider['latitude'], provider['longitude']
+            offsets = sorted((rng.uniform(0, window) for _ in range(self.pings_per_provider)), reverse=True)
+            if provider['available'] and offsets:
+                offsets[-1] = rng.uniform(0, 120)
+            for position, seconds_ago in enumerate(offsets):
+                latitude += rng.gauss(0, 0.002)
+                longitude += rng.gauss(0, 0.002)
+                at = self.now - timedelta(seconds=int(seconds_ago))
+                last = position == len(offsets) - 1
+                yield {
+                    'id': self._uuid(), 'provider_id': provider['user_id'],
+                    'latitude': round(latitude, 6), 'longitude': round(longitude, 6),
+                    'accuracy': round(rng.uniform(3, 30), 2), 'heading': round(rng.uniform(0, 359), 2),
+                    'speed': round(rng.uniform(0, 60), 2), 'is_online': provider['available'] if last else True,
+                    'battery_level': rng.randint(5, 100), 'created_at': at, 'last_updated': at
+                }
+
+    def _write_bookings(self):
+        bookings, history, reviews = [], [], []
+        for customer in self.customer_rows:
+            for _ in range(self.rng.randint(0, 2 * self.bookings_per_customer)):
+                self._booking(customer, bookings, history, reviews)
+            # Bookings first: history and reviews reference them
+            if len(bookings) >= self.writer.batch_size:
+                self._write_booking_batch(bookings, history, reviews)
+                bookings, history, reviews = [], [], []
+        self._write_booking_batch(bookings, history, reviews)
+
+    def _write_booking_batch(self, bookings, history, reviews):
+        self.writer.write(Booking.__table__, bookings)
+        self.writer.write(BookingStatusHistory.__table__, history)
+        self.writer.write(BookingReview.__table__, reviews)
+
+    def _booking(self, customer, bookings, history, reviews):
+        rng = self.rng
+        nearby = self.providers_by_governorate.get(customer['governorate'].id)
+        if not nearby:
+            return
+        provider = rng.choice(nearby)
+        service_id, price = rng.choice(list(provider['prices'].items()))
+
+        history_days = min(self.days, (self.now - customer['joined']).days or 1)
+        created_at = self.now - timedelta(days=rng.uniform(0, history_days))
+        scheduled = created_at + timedelta(days=rng.choice((0, 1, 1, 2, 3, 7)), hours=rng.randint(1, 10))
+        duration = rng.choice((45, 60, 90, 120, 180))
+
+        # Timeline: (status, when, changed by the provider?), confirmed some time before the visit
+        confirmed_at = created_at + (scheduled - created_at) * rng.uniform(0.05, 0.5)
+        if scheduled > self.now:
+            timeline = [('pending', created_at, False)]
+            if rng.random() < 0.6:
+                timeline.append(('confirmed', confirmed_at, True))
+        else:
+            outcome = rng.choices(('completed', 'cancelled', 'disputed'), (75, 22, 3))[0]
+            timeline = [('pending', created_at, False), ('confirmed', confirmed_at, True)]
+            if outcome == 'cancelled':
+                timeline.append(('cancelled', confirmed_at + (scheduled - confirmed_at) / 2, rng.random() < 0.3))
+            else:
+                timeline.append(('in_progress', scheduled, True))
+                timeline.append(('completed', scheduled + timedelta(minutes=duration), True))
+                if outcome == 'disputed':
+                    timeline.append(('disputed', scheduled + timedelta(days=1), False))
+        timeline = [step for step in timeline if step[1] <= self.now]
+        status = timeline[-1][0]
+        unassigned = status == 'pending' and rng.random() < 0.3
+
+        booking_id = str(self._uuid())
+        amount = round(price * (1.5 if rng.random() < 0.05 else 1), 2)
+        started = scheduled if status in ('in_progress', 'completed', 'disputed') else None
+        ended = scheduled + timedelta(minutes=duration) if status in ('completed', 'disputed') else None
+        bookings.append({
+            'id': booking_id, 'customer_id': str(customer['profile_id']),
+            'provider_id': None if unassigned else str(provider['profile_id']), 'service_id': service_id,
+            'booking_status': status, 'scheduled_date': scheduled, 'actual_start_time': started,
+            'actual_end_time': ended, 'estimated_duration': duration, 'actual_duration': duration if ended else None,
+            'service_address': customer['address'], 'service_latitude': customer['address']['latitude'],
+            'service_longitude': customer['address']['longitude'], 'total_amount': amount,
+            'platform_commission': round(amount * 0.15, 2), 'provider_earnings': round(amount * 0.85, 2),
+            'payment_status': 'paid' if status == 'completed' else 'pending',
+            'payment_method': rng.choice(('cash', 'card', 'wallet')) if status == 'completed' else None,
+            'created_at': created_at, 'updated_at': timeline[-1][1], 'version': len(timeline)
+        })
+
+        previous = None
+        for step_status, at, by_provider in timeline:
+            history.append({
+                'id': str(self._uuid()), 'booking_id': booking_id, 'previous_status': previous,
+                'new_status': step_status,
+                'changed_by': str(provider['user_id'] if by_provider else customer['user_id']),
+                'change_reason': 'Booking created' if previous is None else f'Status changed to {step_status}',
+                'created_at': at
+            })
+            previous = step_status
+
+        if status == 'completed' and rng.random() < 0.6:
+            reviewed_at = ended + timedelta(hours=rng.randint(1, 72))
+            if reviewed_at <= self.now:
+                rating = rng.choices(list(RATING_WEIGHTS), list(RATING_WEIGHTS.values()))[0]
+                reviews.append({
+                    'id': str(self._uuid()), 'booking_id': booking_id, 'customer_id': str(customer['profile_id']),
+                    'provider_id': str(provider['profile_id']), 'rating': rating,
+                    'review_text': rng.choice(REVIEW_TEXTS[rating]), 'is_verified': True, 'created_at': reviewed_at
+                })
+
+    def _rebuild_derived(self):
+        from src.utils.rollups import rebuild_booking_rollups
+        from src.utils.ratings import reconcile_provider_ratings
+        from src.utils.search import search_index
+        from src.models.service import reconcile_provider_job_counters
+
+        rebuild_booking_rollups()
+        reconcile_provider_ratings()
+        reconcile_provider_job_counters()
+        search_index.reindex()
+        if db.session.get_bind().dialect.name == 'postgresql':
+            # Fresh planner statistics, or the first benchmark runs plan against empty tables
+            tables = [User, CustomerProfile, ServiceProviderProfile, CustomerAddress, ProviderService,
+                      ProviderServiceArea, ProviderLocation, Booking, BookingStatusHistory, BookingReview]
+            db.session.commit()
+            for model in tables:
+                db.session.execute(db.text(f'ANALYZE {model.__tablename__}'))
@@ -0,0 +1,22 @@
+import sqlite3
+from sqlalchemy import func, case
+
+def supports_aggregate_filter(engine):
+    """Check if the database understands COUNT(*) FILTER (WHERE ...)"""
+    if engine.dialect.name == 'postgresql':
+        return True
+    if engine.dialect.name == 'sqlite':
+        return sqlite3.sqlite_version_info >= (3, 30, 0)
+    return False
+
+def count_where(condition, use_filter=True):
+    """COUNT(*) of rows matching condition, in a single pass over the table"""
+    if use_filter:
+        return func.count().filter(condition)
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+def sum_where(column, condition, use_filter=True):
+    """SUM(column) of rows matching condition (NULL when none match)"""
+    if use_filter:
+        return func.sum(column).filter(condition)
+    return func.sum(case((condition, column), else_=None))
@@ -1,19 +1,20 @@
 from functools import wraps
-from flask import jsonify, request, current_app
+from flask import jsonify, request, current_app, g
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt, create_access_token
-from werkzeug.security import generate_password_hash, check_password_hash
+from src.models import as_uuid
 from src.models.user import User
+from src.utils.passwords import password_hasher
 import re
 import jwt
 from datetime import datetime, timedelta
 
 def hash_password(password):
-    """Hash password using werkzeug"""
-    return generate_password_hash(password)
+    """Hash password with bcrypt on the bounded hashing pool (may raise PasswordHashingBusy)"""
+    return password_hasher.hash(password)
 
 def verify_password(password, password_hash):
-    """Verify password against hash"""
-    return check_password_hash(password_hash, password)
+    """Verify password against a bcrypt or werkzeug hash"""
+    return password_hasher.verify(password, password_hash)
 
 def generate_token(user_id):
     """Generate JWT token for user"""
@@ -86,7 +87,7 @@ def token_required(f):
         try:
             verify_jwt_in_request()
             current_user_id = get_jwt_identity()
-            current_user = User.query.get(current_user_id)
+            current_user = User.query.get(as_uuid(current_user_id))
             
             if not current_user:
                 return jsonify({'error': 'User not found'}), 401
@@ -94,6 +95,7 @@ def token_required(f):
             if current_user.status != 'active':
                 return jsonify({'error': 'Account is not active'}), 401
             
+            g.current_user = current_user
             return f(current_user=current_user, *args, **kwargs)
         except Exception as e:
             return jsonify({'error': 'Invalid token'}), 401
@@ -107,7 +109,7 @@ def admin_required(f):
         try:
             verify_jwt_in_request()
             current_user_id = get_jwt_identity()
-            current_user = User.query.get(current_user_id)
+            current_user = User.query.get(as_uuid(current_user_id))
             
             if not current_user:
                 return jsonify({'error': 'User not found'}), 401
@@ -118,6 +120,7 @@ def admin_required(f):
             if current_user.status != 'active':
                 return jsonify({'error': 'Account is not active'}), 401
             
+            g.current_user = current_user
             return f(current_user=current_user, *args, **kwargs)
         except Exception as e:
             return jsonify({'error': 'Invalid token or insufficient privileges'}), 401
@@ -131,7 +134,7 @@ def provider_required(f):
         try:
             verify_jwt_in_request()
             current_user_id = get_jwt_identity()
-            current_user = User.query.get(current_user_id)
+            current_user = User.query.get(as_uuid(current_user_id))
             
             if not current_user:
                 return jsonify({'error': 'User not found'}), 401
@@ -142,6 +145,7 @@ def provider_required(f):
             if current_user.status != 'active':
                 return jsonify({'error': 'Account is not active'}), 401
             
+            g.current_user = current_user
             return f(current_user=current_user, *args, **kwargs)
         except Exception as e:
             return jsonify({'error': 'Invalid token or insufficient privileges'}), 401
@@ -155,7 +159,7 @@ def customer_required(f):
         try:
             verify_jwt_in_request()
             current_user_id = get_jwt_identity()
-            current_user = User.query.get(current_user_id)
+            current_user = User.query.get(as_uuid(current_user_id))
             
             if not current_user:
                 return jsonify({'error': 'User not found'}), 401
@@ -166,6 +170,7 @@ def customer_required(f):
             if current_user.status != 'active':
                 return jsonify({'error': 'Account is not active'}), 401
             
+            g.current_user = current_user
             return f(current_user=current_user, *args, **kwargs)
         except Exception as e:
             return jsonify({'error': 'Invalid token or insufficient privileges'}), 401
@@ -0,0 +1,134 @@
+import threading
+import time
+from flask import current_app, has_app_context
+
+class _Entry:
+    __slots__ = ('value', 'fresh_until', 'stale_until', 'refreshing')
+
+    def __init__(self, value, fresh_until, stale_until):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        self.refreshing = False
+
+class SnapshotCache:
+    """In-process snapshot cache with single-flight and stale-while-revalidate
+
+    Concurrent callers missing the same key share one computation. Once an
+    entry passes its TTL it is still served until ``stale_ttl`` while a
+    background thread recomputes it, so readers never wait on a refresh.
+    """
+
+    def __init__(self, ttl=60, stale_ttl=300, max_entries=10000):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def get(self, key, compute, ttl=None, stale_ttl=None):
+        """Return the cached value for key, computing it at most once at a time"""
+        ttl = self.ttl if ttl is None else ttl
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry is not None and now < entry.fresh_until:
+            self.hits += 1
+            return entry.value
+
+        if entry is not None and now < entry.stale_until:
+            self.stale_hits += 1
+            self._refresh_in_background(key, entry, compute, ttl, stale_ttl)
+            return entry.value
+
+        with self._key_lock(key):
+            # Another thread may have filled the entry while we waited
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() < entry.fresh_until:
+                self.hits += 1
+                return entry.value
+
+            self.misses += 1
+            value = compute()
+            self.set(key, value, ttl, stale_ttl)
+            return value
+
+    def set(self, key, value, ttl=None, stale_ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                self._evict(now)
+            self._entries[key] = _Entry(value, now + ttl, now + max(ttl, stale_ttl))
+
+    def peek(self, key):
+        """Return the cached value (fresh or stale) without computing"""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() < entry.stale_until:
+            return entry.value
+        return None
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+        }
+
+    def _key_lock(self, key):
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _evict(self, now):
+        expired = [k for k, e in self._entries.items() if e.stale_until <= now]
+        for k in expired:
+            del self._entries[k]
+            self._key_locks.pop(k, None)
+        if len(self._entries) >= self.max_entries:
+            # Still full: drop the entries closest to expiry
+            for k, _ in sorted(self._entries.items(), key=lambda item: item[1].stale_until)[:len(self._entries) // 10 or 1]:
+                del self._entries[k]
+                self._key_locks.pop(k, None)
+
+    def _refresh_in_background(self, key, entry, compute, ttl, stale_ttl):
+        with self._lock:
+            if entry.refreshing:
+                return
+            entry.refreshing = True
+
+        app = current_app._get_current_object() if has_app_context() else None
+
+        def refresh():
+            try:
+                if app is not None:
+                    with app.app_context():
+                        value = compute()
+                else:
+                    value = compute()
+                self.set(key, value, ttl, stale_ttl)
+            except Exception as e:
+                print(f"⚠️ Background refresh failed for {key}: {e}")
+            finally:
+                entry.refreshing = False
+
+        threading.Thread(target=refresh, name=f'snapshot-refresh-{key}', daemon=True).start()
@@ -0,0 +1,119 @@
+import math
+import threading
+from datetime import datetime
+from sqlalchemy import event
+from src.models import db
+from src.models.service import Booking, BookingStatusHistory, ProviderService, booking_state_machine
+from src.utils.rollups import record_booking_transition
+
+KM_PER_DEGREE = 111.32
+CANDIDATE_BATCH = 20
+
+class LocalRowLocks:
+    """In-process stand-in for FOR UPDATE SKIP LOCKED on databases without row locks
+
+    A claimed row id is held until the claiming session's transaction ends
+    (commit, rollback or close), and other claimers skip it meanwhile. Only
+    threads of one process are coordinated, which is what SQLite tests need.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._held = set()
+        self._listening = False
+
+    def listen(self):
+        if not self._listening:
+            event.listen(db.session, 'after_transaction_end', self._release)
+            self._listening = True
+
+    def held(self):
+        with self._lock:
+            return set(self._held)
+
+    def try_acquire(self, session, key):
+        with self._lock:
+            if key in self._held:
+                return False
+            self._held.add(key)
+        session.info.setdefault('claim_locks', set()).add(key)
+        return True
+
+    def _release(self, session, transaction):
+        if transaction.parent is not None:
+            return
+        keys = session.info.pop('claim_locks', None)
+        if keys:
+            with self._lock:
+                self._held -= keys
+
+local_row_locks = LocalRowLocks()
+
+def open_bookings_near(provider, latitude, longitude, radius_km):
+    """Pending, unassigned bookings for the provider's services within radius_km"""
+    lat_delta = radius_km / KM_PER_DEGREE
+    lon_scale = max(math.cos(math.radians(latitude)), 0.01)
+    lon_delta = lat_delta / lon_scale
+    offered = db.session.query(ProviderService.service_id).filter(
+        ProviderService.provider_id == str(provider.id),
+        ProviderService.is_active.is_(True)
+    )
+
+    return Booking.query.filter(
+        Booking.booking_status == 'pending',
+        Booking.provider_id.is_(None),
+        Booking.scheduled_date > datetime.utcnow(),
+        Booking.service_id.in_(offered.scalar_subquery()),
+        # Bounding box first (index friendly), then an equirectangular circle
+        Booking.service_latitude.between(latitude - lat_delta, latitude + lat_delta),
+        Booking.service_longitude.between(longitude - lon_delta, longitude + lon_delta),
+        (Booking.service_latitude - latitude) * (Booking.service_latitude - latitude)
+        + (Booking.service_longitude - longitude) * (Booking.service_longitude - longitude) * (lon_scale * lon_scale)
+        <= lat_delta * lat_delta
+    ).order_by(Booking.scheduled_date, Booking.created_at, Booking.id)
+
+def _lock_next(query):
+    session = db.session
+    if session.get_bind().dialect.name == 'postgresql':
+        # Rows another transaction is claiming are skipped, never waited on
+        return query.with_for_update(skip_locked=True, of=Booking).first()
+
+    local_row_locks.listen()
+    while True:
+        held = local_row_locks.held()
+        candidates = query.with_entities(Booking.id)
+        if held:
+            candidates = candidates.filter(Booking.id.notin_(held))
+        ids = [row.id for row in candidates.limit(CANDIDATE_BATCH).all()]
+        if not ids:
+            return None
+        for booking_id in ids:
+            if not local_row_locks.try_acquire(session, booking_id):
+                continue
+            # Re-read under the lock: a claim may have committed since the candidate scan
+            booking = query.filter(Booking.id == booking_id).populate_existing().first()
+            if booking is not None:
+                return booking
+
+def claim_next_booking(provider, latitude, longitude, radius_km, changed_by=None):
+    """Assign the next open booking near the provider to them, or return None
+
+    The row is locked with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+    claimers each take a different booking without blocking one another.
+    The caller commits; the lock is held until then.
+    """
+    booking = _lock_next(open_bookings_near(provider, latitude, longitude, radius_km))
+    if booking is None:
+        return None
+
+    booking.provider_id = str(provider.id)
+    booking_state_machine.apply(booking, 'confirmed')
+    db.session.add(BookingStatusHistory(
+        booking_id=booking.id,
+        previous_status='pending',
+        new_status='confirmed',
+        changed_by=str(changed_by) if changed_by else None,
+        change_reason='Claimed by provider'
+    ))
+    record_booking_transition(booking, 'pending', 'confirmed', previous_provider_id='')
+    return booking
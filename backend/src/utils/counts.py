@@ -0,0 +1,73 @@
+import json
+from flask import current_app
+from sqlalchemy import text
+from src.models import db
+from src.utils.cache import SnapshotCache
+
+count_cache = SnapshotCache(ttl=30, stale_ttl=120)
+
+class Total:
+    """A pagination total and whether it is exact or a planner estimate"""
+    __slots__ = ('value', 'estimated')
+
+    def __init__(self, value, estimated=False):
+        self.value = value
+        self.estimated = estimated
+
+    def to_dict(self):
+        return {'total': self.value, 'total_estimated': self.estimated}
+
+def _cache_key(statement, dialect):
+    compiled = statement.compile(dialect=dialect)
+    params = sorted((key, repr(value)) for key, value in compiled.params.items())
+    return f'count:{compiled}:{params}'
+
+def _table_estimate(connection, table_name):
+    """Row estimate for a whole table from pg_class (no scan); None if never analyzed"""
+    estimate = connection.execute(
+        text('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)'),
+        {'table': table_name}
+    ).scalar()
+    return estimate if estimate is not None and estimate >= 0 else None
+
+def _plan_estimate(connection, statement):
+    """Planner's row estimate for a filtered query from EXPLAIN"""
+    compiled = statement.compile(dialect=connection.dialect)
+    plan = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+def _compute_total(query, table_name):
+    statement = query.order_by(None).statement
+    session = db.session
+    if session.get_bind().dialect.name != 'postgresql':
+        return Total(query.order_by(None).count())
+
+    threshold = current_app.config.get('COUNT_EXACT_THRESHOLD', 10000)
+    connection = session.connection()
+    try:
+        if query.whereclause is None and table_name:
+            estimate = _table_estimate(connection, table_name)
+        else:
+            estimate = _plan_estimate(connection, statement)
+    except Exception as e:
+        print(f"⚠️ Count estimate failed, counting exactly: {e}")
+        estimate = None
+
+    # Small (typically filtered) sets are cheap to count exactly
+    if estimate is None or estimate < threshold:
+        return Total(query.order_by(None).count())
+    return Total(estimate, estimated=True)
+
+def paginated_total(query, table_name=None):
+    """Total rows for a paginated query: exact when small, estimated when large
+
+    Results are cached per distinct SQL + parameters for COUNT_CACHE_TTL
+    seconds, so popular filters are counted at most once per window.
+    """
+    ttl = current_app.config.get('COUNT_CACHE_TTL', 30)
+    key = _cache_key(query.order_by(None).statement, db.session.get_bind().dialect)
+    # Rebind to the calling thread's session: stale entries refresh in the background
+    compute = lambda: _compute_total(query.with_session(db.session()), table_name)
+    return count_cache.get(key, compute, ttl=ttl, stale_ttl=ttl * 4)
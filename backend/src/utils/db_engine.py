@@ -0,0 +1,285 @@
+import threading
+import time
+from collections import deque
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, NullPool
+
+PROFILES = ('direct', 'pooler', 'sqlite')
+# Supabase's transaction-mode pooler (Supavisor/PgBouncer) listens here; 5432 is session mode/direct
+TRANSACTION_POOLER_PORT = 6543
+
+def resolve_profile(database_url, profile=None):
+    """The configured engine profile, else one detected from the database URL"""
+    if profile:
+        if profile not in PROFILES:
+            raise ValueError(f"❌ Unknown DB_PROFILE '{profile}', expected one of {', '.join(PROFILES)}")
+        return profile
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite':
+        return 'sqlite'
+    if url.port == TRANSACTION_POOLER_PORT:
+        return 'pooler'
+    return 'direct'
+
+def worker_pool_budget(config, default_size, default_overflow):
+    """(pool_size, max_overflow) for one gunicorn worker
+
+    DB_MAX_CONNECTIONS is the connection budget for the whole deployment; it
+    is split across WEB_CONCURRENCY workers so their pools can't together
+    exceed it. Explicit DB_POOL_SIZE/DB_MAX_OVERFLOW win over the split.
+    """
+    pool_size, max_overflow = default_size, default_overflow
+    budget = config.get('DB_MAX_CONNECTIONS') or 0
+    if budget > 0:
+        per_worker = max(1, budget // max(1, config.get('WEB_CONCURRENCY') or 1))
+        pool_size = min(default_size, per_worker)
+        max_overflow = per_worker - pool_size
+    if config.get('DB_POOL_SIZE') is not None:
+        pool_size = config['DB_POOL_SIZE']
+    if config.get('DB_MAX_OVERFLOW') is not None:
+        max_overflow = config['DB_MAX_OVERFLOW']
+    return pool_size, max_overflow
+
+def engine_options(database_url, config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured (or detected) profile
+
+    direct: a per-worker QueuePool with LIFO reuse so idle connections age out
+      by pool_recycle; no pre-ping, stale connections surface as disconnects
+      that invalidate the pool.
+    pooler: the transaction pooler already multiplexes server connections, so
+      workers keep a small pool of cheap client connections, or none at all
+      (NullPool) with DB_POOL_SIZE=0. Server-side prepared statements are
+      disabled for drivers that use them, since consecutive transactions may
+      land on different server connections.
+    sqlite: left to Flask-SQLAlchemy's defaults (StaticPool for :memory:).
+    """
+    profile = resolve_profile(database_url, config.get('DB_PROFILE'))
+    if profile == 'sqlite':
+        return {}
+
+    pre_ping = config.get('DB_POOL_PRE_PING', False)
+    if profile == 'direct':
+        pool_size, max_overflow = worker_pool_budget(config, 5, 5)
+        options = {
+            'poolclass': TimedQueuePool,
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'pool_timeout': config.get('DB_POOL_TIMEOUT', 10),
+            'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+            'pool_use_lifo': True,
+            'pool_pre_ping': pre_ping
+        }
+    else:
+        pool_size, max_overflow = worker_pool_budget(config, 2, 3)
+        if pool_size <= 0:
+            options = {'poolclass': TimedNullPool, 'pool_pre_ping': pre_ping}
+        else:
+            options = {
+                'poolclass': TimedQueuePool,
+                'pool_size': pool_size,
+                'max_overflow': max_overflow,
+                'pool_timeout': config.get('DB_POOL_TIMEOUT', 10),
+                # The pooler drops idle clients on its own schedule; recycle sooner
+                'pool_recycle': config.get('DB_POOL_RECYCLE', 300),
+                'pool_use_lifo': True,
+                'pool_pre_ping': pre_ping
+            }
+        driver = make_url(database_url).get_driver_name()
+        if driver == 'psycopg':
+            options['connect_args'] = {'prepare_threshold': None}
+        elif driver == 'asyncpg':
+            options['connect_args'] = {'statement_cache_size': 0, 'prepared_statement_cache_size': 0}
+    return options
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class PoolMetrics:
+    """Checkout latency, wait time and connections in use for this worker's pool
+
+    Latency is the time spent in pool.connect() (timed by the Timed* pool
+    classes); a checkout counts as a wait when every pool slot was taken as
+    it started. Only the engine passed to init_app records here, so replica
+    engines built with the same pool classes don't skew the primary's numbers.
+    Pool sizing comes from the app's SQLALCHEMY_ENGINE_OPTIONS.
+    """
+
+    def __init__(self, window=1000):
+        self.profile = None
+        self.pool_size = None
+        self.max_overflow = None
+        self.pool_timeout = None
+        self._lock = threading.Lock()
+        self._engine = None
+        self.recent_ms = deque(maxlen=window)
+        self.recent_waits = deque(maxlen=window)
+        self.in_use = 0
+        self.waiting = 0
+        self.reset()
+
+    def reset(self):
+        """Zero the counters; connections currently checked out stay counted"""
+        with self._lock:
+            self.checkouts = 0
+            self.waits = 0
+            self.wait_ms = 0.0
+            self.timeouts = 0
+            self.connections_opened = 0
+            self.peak_in_use = self.in_use
+            self.recent_ms.clear()
+            self.recent_waits.clear()
+
+    def init_app(self, app, engine):
+        self.profile = app.config.get('DB_PROFILE')
+        options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+        self.pool_size = options.get('pool_size')
+        self.max_overflow = options.get('max_overflow')
+        self.pool_timeout = options.get('pool_timeout')
+        if engine is not self._engine:
+            self.in_use = 0
+            if self._engine is not None and isinstance(self._engine.pool, _TimedCheckout):
+                self._engine.pool.metrics = None
+        self._engine = engine
+        if isinstance(engine.pool, _TimedCheckout):
+            engine.pool.metrics = self
+        self.reset()
+        app.extensions['pool_metrics'] = self
+        # Listening on the engine keeps the hooks when dispose() replaces the pool
+        if not event.contains(engine, 'checkout', self._on_checkout):
+            event.listen(engine, 'checkout', self._on_checkout)
+            event.listen(engine, 'checkin', self._on_checkin)
+            event.listen(engine, 'connect', self._on_connect)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connections_opened += 1
+
+    def start_wait(self):
+        with self._lock:
+            self.waiting += 1
+
+    def end_wait(self):
+        with self._lock:
+            self.waiting = max(0, self.waiting - 1)
+
+    def record_checkout(self, elapsed_ms, waited, timed_out=False):
+        with self._lock:
+            if waited or timed_out:
+                self.recent_waits.append((time.monotonic(), elapsed_ms))
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.recent_ms.append(elapsed_ms)
+            if waited:
+                self.waits += 1
+                self.wait_ms += elapsed_ms
+
+    def pressure(self, window=10.0, now=None):
+        """Load signal for shedding, 1.0 meaning the pool can't keep up
+
+        The larger of checkouts queued for a connection per pool slot, and
+        the average wait of the last `window` seconds as a fraction of
+        pool_timeout. A fully used pool that hands connections over without
+        anyone waiting stays at 0.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            capacity = (self.pool_size or 0) + max(0, self.max_overflow or 0)
+            queued = self.waiting / capacity if capacity > 0 else 0.0
+            waits = [elapsed_ms for at, elapsed_ms in self.recent_waits if now - at <= window]
+        timeout_ms = (self.pool_timeout or 0) * 1000
+        waited = sum(waits) / len(waits) / timeout_ms if waits and timeout_ms > 0 else 0.0
+        return max(queued, waited)
+
+    def stats(self):
+        with self._lock:
+            recent = sorted(self.recent_ms)
+            stats = {
+                'profile': self.profile,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_ms_total': round(self.wait_ms, 2),
+                'timeouts': self.timeouts,
+                'connections_opened': self.connections_opened,
+                'in_use': self.in_use,
+                'peak_in_use': self.peak_in_use,
+                'waiting': self.waiting,
+                'checkout_ms': {
+                    'samples': len(recent),
+                    'avg': round(sum(recent) / len(recent), 3) if recent else 0.0,
+                    'p50': round(_percentile(recent, 0.5), 3),
+                    'p95': round(_percentile(recent, 0.95), 3),
+                    'p99': round(_percentile(recent, 0.99), 3),
+                    'max': round(recent[-1], 3) if recent else 0.0
+                }
+            }
+        stats['pressure'] = round(self.pressure(), 3)
+        pool = self._engine.pool if self._engine is not None else None
+        if isinstance(pool, QueuePool):
+            stats['pool'] = {
+                'class': type(pool).__name__,
+                'size': pool.size(),
+                'max_overflow': self.max_overflow,
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow()
+            }
+        elif pool is not None:
+            stats['pool'] = {'class': type(pool).__name__}
+        return stats
+
+pool_metrics = PoolMetrics()
+
+class _TimedCheckout:
+    """Times pool.connect() into the PoolMetrics bound to this pool's engine, if any"""
+
+    metrics = None
+
+    def _saturated(self):
+        return False
+
+    def recreate(self):
+        # dispose() swaps in a recreated pool; it keeps recording into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self):
+        metrics = self.metrics
+        if metrics is None:
+            return super().connect()
+        waited = self._saturated()
+        started = time.perf_counter()
+        if waited:
+            metrics.start_wait()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            metrics.record_checkout((time.perf_counter() - started) * 1000, waited, timed_out=True)
+            raise
+        finally:
+            if waited:
+                metrics.end_wait()
+        metrics.record_checkout((time.perf_counter() - started) * 1000, waited)
+        return connection
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    def _saturated(self):
+        return self._max_overflow >= 0 and self.checkedout() >= self.size() + self._max_overflow
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    pass
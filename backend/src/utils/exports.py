@@ -0,0 +1,160 @@
+import csv
+import io
+import json
+import uuid
+import zlib
+from datetime import datetime, date
+from decimal import Decimal
+from sqlalchemy import select
+from src.models import db
+from src.models.user import User, ServiceProviderProfile
+from src.models.service import Booking
+from src.utils.pagination import encode_cursor, decode_cursor, seek_condition
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson')
+}
+DEFAULT_BATCH_SIZE = 2000
+
+def _export_columns(dataset):
+    """(header, column expression) pairs for each exportable dataset"""
+    if dataset == 'bookings':
+        return [
+            ('id', Booking.id),
+            ('customer_id', Booking.customer_id),
+            ('provider_id', Booking.provider_id),
+            ('service_id', Booking.service_id),
+            ('booking_status', Booking.booking_status),
+            ('scheduled_date', Booking.scheduled_date),
+            ('governorate', Booking.service_address['governorate'].as_string()),
+            ('city', Booking.service_address['city'].as_string()),
+            ('total_amount', Booking.total_amount),
+            ('platform_commission', Booking.platform_commission),
+            ('provider_earnings', Booking.provider_earnings),
+            ('payment_status', Booking.payment_status),
+            ('payment_method', Booking.payment_method),
+            ('created_at', Booking.created_at),
+            ('updated_at', Booking.updated_at)
+        ]
+    if dataset == 'users':
+        return [
+            ('id', User.id),
+            ('email', User.email),
+            ('phone', User.phone),
+            ('user_type', User.user_type),
+            ('status', User.status),
+            ('is_active', User.is_active),
+            ('is_verified', User.is_verified),
+            ('last_login_at', User.last_login_at),
+            ('created_at', User.created_at)
+        ]
+    if dataset == 'providers':
+        return [
+            ('id', ServiceProviderProfile.id),
+            ('user_id', ServiceProviderProfile.user_id),
+            ('email', User.email),
+            ('phone', User.phone),
+            ('first_name', ServiceProviderProfile.first_name),
+            ('last_name', ServiceProviderProfile.last_name),
+            ('business_name', ServiceProviderProfile.business_name),
+            ('verification_status', ServiceProviderProfile.verification_status),
+            ('is_available', ServiceProviderProfile.is_available),
+            ('average_rating', ServiceProviderProfile.average_rating),
+            ('total_reviews', ServiceProviderProfile.total_reviews),
+            ('total_completed_jobs', ServiceProviderProfile.total_completed_jobs),
+            ('total_earnings', ServiceProviderProfile.total_earnings),
+            ('created_at', ServiceProviderProfile.created_at)
+        ]
+    raise ValueError(f'Unknown export dataset: {dataset}')
+
+_MODELS = {'bookings': Booking, 'users': User, 'providers': ServiceProviderProfile}
+
+def build_export_query(dataset, filters, cursor=None, dialect_name=None):
+    """Build the export SELECT ordered by (created_at, id), resuming after ``cursor``
+
+    Returns (statement, headers). Raises ValueError for unknown datasets and
+    InvalidCursor for malformed cursors.
+    """
+    columns = _export_columns(dataset)
+    model = _MODELS[dataset]
+    key_columns = [model.created_at, model.id]
+
+    stmt = select(*[column.label(header) for header, column in columns])
+    if dataset == 'providers':
+        stmt = stmt.select_from(ServiceProviderProfile).outerjoin(User, User.id == ServiceProviderProfile.user_id)
+
+    if dataset == 'bookings' and filters.get('status'):
+        stmt = stmt.where(Booking.booking_status == filters['status'])
+    if dataset == 'users':
+        if filters.get('user_type'):
+            stmt = stmt.where(User.user_type == filters['user_type'])
+        if filters.get('status'):
+            stmt = stmt.where(User.status == filters['status'])
+    if dataset == 'providers' and filters.get('verification_status'):
+        stmt = stmt.where(ServiceProviderProfile.verification_status == filters['verification_status'])
+
+    if filters.get('date_from'):
+        stmt = stmt.where(model.created_at >= filters['date_from'])
+    if filters.get('date_to'):
+        stmt = stmt.where(model.created_at <= filters['date_to'])
+
+    if cursor:
+        _, values = decode_cursor(cursor, key_columns)
+        stmt = stmt.where(seek_condition(key_columns, values, False, dialect_name))
+
+    stmt = stmt.order_by(*[column.asc() for column in key_columns])
+    return stmt, [header for header, _ in columns]
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def stream_export(stmt, headers, export_format='csv', batch_size=DEFAULT_BATCH_SIZE):
+    """Yield encoded chunks (one per fetched batch) for a streaming response
+
+    ``yield_per`` makes the driver use a server-side cursor where supported,
+    so memory is bounded by one batch regardless of the export size. Every
+    record carries a ``cursor`` that resumes the export after that row.
+    """
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    created_index = headers.index('created_at')
+    id_index = headers.index('id')
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+
+    try:
+        if writer:
+            writer.writerow(headers + ['cursor'])
+            yield buffer.getvalue().encode('utf-8')
+
+        for partition in result.partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            for row in partition:
+                cursor = encode_cursor([row[created_index], row[id_index]])
+                values = [_plain(value) for value in row]
+                if writer:
+                    writer.writerow(values + [cursor])
+                else:
+                    record = dict(zip(headers, values))
+                    record['cursor'] = cursor
+                    buffer.write(json.dumps(record, ensure_ascii=False))
+                    buffer.write('\n')
+            yield buffer.getvalue().encode('utf-8')
+    finally:
+        result.close()
+
+def gzip_stream(chunks, level=6):
+    """Compress a chunk stream on the fly, flushing after every chunk"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
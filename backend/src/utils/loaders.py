@@ -0,0 +1,52 @@
+from collections import defaultdict
+from sqlalchemy import func, and_
+from src.models import db
+from src.models.user import User, ProviderDocument
+from src.models.location import ProviderLocation
+
+def load_users_by_id(user_ids):
+    """Load users for a page of rows in one IN query, keyed by id"""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return {}
+    return {user.id: user for user in User.query.filter(User.id.in_(user_ids)).all()}
+
+def load_documents_by_provider(provider_ids):
+    """Load documents for a page of providers in one IN query, grouped by provider id"""
+    provider_ids = {str(provider_id) for provider_id in provider_ids if provider_id is not None}
+    documents = defaultdict(list)
+    if not provider_ids:
+        return documents
+    query = ProviderDocument.query.filter(
+        ProviderDocument.provider_id.in_(provider_ids)
+    ).order_by(ProviderDocument.created_at.asc())
+    for document in query.all():
+        documents[str(document.provider_id)].append(document)
+    return documents
+
+def load_latest_locations(user_ids):
+    """Load each provider's latest online location in one grouped query, keyed by user id"""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return {}
+    # Served by ix_provider_locations_provider_online_updated
+    latest = db.session.query(
+        ProviderLocation.provider_id,
+        func.max(ProviderLocation.last_updated).label('last_updated')
+    ).filter(
+        ProviderLocation.provider_id.in_(user_ids),
+        ProviderLocation.is_online.is_(True)
+    ).group_by(ProviderLocation.provider_id).subquery()
+    query = ProviderLocation.query.join(latest, and_(
+        ProviderLocation.provider_id == latest.c.provider_id,
+        ProviderLocation.last_updated == latest.c.last_updated
+    )).filter(ProviderLocation.is_online.is_(True))
+    locations = {}
+    for location in query.all():
+        locations.setdefault(location.provider_id, location)
+    return locations
+
+def has_valid_document_url(document):
+    """Documents uploaded with an empty or placeholder URL are hidden from admins"""
+    url = (document.document_url or '').strip()
+    return bool(url) and url != '#'
@@ -0,0 +1,463 @@
+import glob
+import hmac
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+# The request context var directly: the request proxy costs more than the rest of a hook
+from flask.globals import _cv_request
+
+# Upper bounds (seconds) of the request latency buckets; the last one catches everything
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+                   1.0, 2.5, 5.0, 10.0, math.inf)
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+HELP = {
+    'http_requests_total': ('counter', 'Requests served, by route, method and status'),
+    'http_request_duration_seconds': ('histogram', 'Request latency, by route and method'),
+    'http_requests_in_flight': ('gauge', 'Requests being served right now'),
+    'db_pool_checkouts_total': ('counter', 'Connections checked out of the pool'),
+    'db_pool_waits_total': ('counter', 'Checkouts that had to wait for a free connection'),
+    'db_pool_wait_seconds_total': ('counter', 'Time spent waiting for a pooled connection'),
+    'db_pool_timeouts_total': ('counter', 'Checkouts that gave up waiting'),
+    'db_pool_connections_opened_total': ('counter', 'New database connections opened'),
+    'db_pool_connections_in_use': ('gauge', 'Connections checked out right now'),
+    'cache_hits_total': ('counter', 'Cache lookups served fresh'),
+    'cache_stale_hits_total': ('counter', 'Cache lookups served stale while refreshing'),
+    'cache_misses_total': ('counter', 'Cache lookups that had to compute'),
+}
+
+def _key(name, labels):
+    return json.dumps([name, sorted(labels.items())], separators=(',', ':'))
+
+def _parse_key(key):
+    name, labels = json.loads(key)
+    return name, tuple(tuple(pair) for pair in labels)
+
+class MemoryValues:
+    """Process-local metric values (no METRICS_DIR: a single process serves everything)"""
+
+    def __init__(self):
+        self.values = []
+        self.slots = {}
+
+    def slot(self, key):
+        index = self.slots.get(key)
+        if index is None:
+            index = self.slots[key] = len(self.values)
+            self.values.append(0.0)
+        return index
+
+    def add(self, index, amount):
+        self.values[index] += amount
+
+    def set(self, index, value):
+        self.values[index] = value
+
+    def items(self):
+        return [(key, self.values[index]) for key, index in self.slots.items()]
+
+    def close(self):
+        pass
+
+class MmapValues(MemoryValues):
+    """Metric values kept in a memory-mapped file other workers can read
+
+    Layout: an 8 byte header holding the bytes used, then entries of
+    <key length:int32><key utf-8, padded to 8 bytes><value:float64>.
+    Entries are written before the header grows, so a reader never sees a
+    half-written key; values are aligned doubles, updated in place through
+    a float64 view of the map.
+    """
+
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size < self.INITIAL_SIZE:
+            self._file.truncate(self.INITIAL_SIZE)
+        self._map_file(os.fstat(self._file.fileno()).st_size)
+        self._used = struct.unpack_from('<q', self._map, 0)[0] or 8
+        for key, _, offset in _read_entries(self._map, self._used):
+            self.slots[key] = offset // 8
+
+    def _map_file(self, capacity):
+        self._capacity = capacity
+        self._map = mmap.mmap(self._file.fileno(), capacity)
+        self.values = memoryview(self._map).cast('d')
+
+    def slot(self, key):
+        index = self.slots.get(key)
+        if index is not None:
+            return index
+        encoded = key.encode('utf-8')
+        padded = len(encoded) + (8 - (len(encoded) + 4) % 8) % 8
+        size = 4 + padded + 8
+        if self._used + size > self._capacity:
+            capacity = self._capacity
+            while capacity < self._used + size:
+                capacity *= 2
+            self.close()
+            self._file = open(self.path, 'a+b')
+            self._file.truncate(capacity)
+            self._map_file(capacity)
+        struct.pack_into(f'<i{padded}sd', self._map, self._used, len(encoded), encoded, 0.0)
+        index = self.slots[key] = (self._used + 4 + padded) // 8
+        self._used += size
+        struct.pack_into('<q', self._map, 0, self._used)
+        return index
+
+    def close(self):
+        self.values.release()
+        self._map.close()
+        self._file.close()
+
+def _read_entries(buffer, used):
+    offset = 8
+    while offset < used:
+        length = struct.unpack_from('<i', buffer, offset)[0]
+        padded = length + (8 - (length + 4) % 8) % 8
+        key = bytes(buffer[offset + 4:offset + 4 + length]).decode('utf-8')
+        value_offset = offset + 4 + padded
+        yield key, struct.unpack_from('<d', buffer, value_offset)[0], value_offset
+        offset = value_offset + 8
+
+def read_values_file(path):
+    """(key, value) pairs from one worker's file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < 8:
+        return []
+    used = struct.unpack_from('<q', data, 0)[0]
+    return [(key, value) for key, value, _ in _read_entries(data, min(used, len(data)))]
+
+class RouteSeries:
+    """Slots for one (route, method) latency histogram"""
+    __slots__ = ('buckets', 'sum', 'count')
+
+    def __init__(self, store, route, method):
+        labels = {'route': route, 'method': method}
+        # Buckets are stored per bucket and made cumulative when rendered
+        self.buckets = [store.slot(_key('http_request_duration_seconds_bucket', dict(labels, le=_format_bound(bound))))
+                        for bound in LATENCY_BUCKETS]
+        self.sum = store.slot(_key('http_request_duration_seconds_sum', labels))
+        self.count = store.slot(_key('http_request_duration_seconds_count', labels))
+
+class ProcessMetrics:
+    """This worker's metric stores: counters survive the worker, gauges die with it"""
+
+    def __init__(self, directory):
+        self.pid = os.getpid()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.counters = MmapValues(os.path.join(directory, f'counters_{self.pid}.db'))
+            self.gauges = MmapValues(os.path.join(directory, f'gauges_{self.pid}.db'))
+        else:
+            self.counters = MemoryValues()
+            self.gauges = MemoryValues()
+        self.in_flight = self.gauges.slot(_key('http_requests_in_flight', {}))
+        self.routes = {}
+        # (route, method, status) -> the four counter slots one request adds to
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, route, method, status, elapsed):
+        with self.lock:
+            slots = self.series.get((route, method, status))
+            if slots is None:
+                slots = self._series_slots(route, method, status)
+            buckets, total, count, requests = slots
+            add = self.counters.add
+            add(buckets[bisect_left(LATENCY_BUCKETS, elapsed)], 1)
+            add(total, elapsed)
+            add(count, 1)
+            add(requests, 1)
+            self.gauges.add(self.in_flight, -1)
+
+    def _series_slots(self, route, method, status):
+        histogram = self.routes.get((route, method))
+        if histogram is None:
+            histogram = self.routes[(route, method)] = RouteSeries(self.counters, route, method)
+        requests = self.counters.slot(_key('http_requests_total', {'route': route, 'method': method, 'status': str(status)}))
+        slots = self.series[(route, method, status)] = (histogram.buckets, histogram.sum, histogram.count, requests)
+        return slots
+
+    def begin(self):
+        with self.lock:
+            self.gauges.add(self.in_flight, 1)
+
+    def end(self):
+        with self.lock:
+            self.gauges.add(self.in_flight, -1)
+
+    def set_snapshot(self, name, labels, value, gauge=False):
+        store = self.gauges if gauge else self.counters
+        with self.lock:
+            store.set(store.slot(_key(name, labels)), value)
+
+    def close(self):
+        self.counters.close()
+        self.gauges.close()
+
+def _format_bound(bound):
+    return '+Inf' if bound == math.inf else repr(float(bound))
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+def _quantile(buckets, count, q):
+    """Estimate a quantile from cumulative (bound, count) buckets, as histogram_quantile does"""
+    if not count:
+        return 0.0
+    rank = q * count
+    lower_bound, lower_count = 0.0, 0
+    for bound, cumulative in buckets:
+        if cumulative >= rank:
+            if bound == math.inf:
+                return lower_bound
+            if cumulative == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (cumulative - lower_count)
+        lower_bound, lower_count = bound, cumulative
+    return lower_bound
+
+class RequestMetrics:
+    """Per-route latency histograms, status counts and in-flight requests for Prometheus
+
+    Before/after-request hooks add to this worker's stores. With METRICS_DIR
+    set, each worker's values live in memory-mapped files in that directory
+    and a scrape of any worker sums them all; gauge files are removed when
+    gunicorn reaps a worker (mark_process_dead), counter files are kept so
+    totals never go backwards. DB pool counters and cache hit counts are
+    copied in at most every METRICS_SNAPSHOT_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.directory = None
+        self.snapshot_interval = 1.0
+        self.token = None
+        self.require_token = False
+        self.caches = {}
+        self.pool_metrics = None
+        self._process = None
+        self._next_snapshot = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app, pool_metrics=None):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.directory = app.config.get('METRICS_DIR')
+        self.snapshot_interval = app.config.get('METRICS_SNAPSHOT_INTERVAL', 1.0)
+        self.token = app.config.get('METRICS_TOKEN')
+        self.require_token = app.config.get('METRICS_REQUIRE_TOKEN', False)
+        if self.require_token and not self.token:
+            print("⚠️ METRICS_TOKEN is not set; /metrics is disabled")
+        self.pool_metrics = pool_metrics
+        self.reset()
+        app.extensions['request_metrics'] = self
+        if not self.enabled:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+
+    def scrape_status(self, authorization):
+        """HTTP status for a scrape: 200, 401 for a wrong token, 404 when scraping is closed
+
+        Without METRICS_TOKEN the endpoint is open, unless METRICS_REQUIRE_TOKEN
+        (the production default) closes it rather than serve metrics to anyone.
+        """
+        if not self.token:
+            return 404 if self.require_token else 200
+        return 200 if hmac.compare_digest(authorization or '', f'Bearer {self.token}') else 401
+
+    def track_cache(self, name, cache):
+        """Export a SnapshotCache's hit/stale/miss counters under cache="name\""""
+        self.caches[name] = cache
+
+    def process(self):
+        # Opened lazily so every forked worker writes its own files
+        process = self._process
+        if process is None or process.pid != os.getpid():
+            with self._lock:
+                process = self._process
+                if process is None or process.pid != os.getpid():
+                    process = self._process = ProcessMetrics(self.directory)
+        return process
+
+    def _start_request(self):
+        process = self.process()
+        process.begin()
+        _cv_request.get().request.environ['metrics.started'] = (process, time.perf_counter())
+
+    def _finish_request(self, response):
+        current = _cv_request.get().request
+        started = current.environ.pop('metrics.started', None)
+        if started is None:
+            return response
+        process, started = started
+        now = time.perf_counter()
+        rule = current.url_rule
+        process.observe(rule.rule if rule is not None else UNMATCHED_ROUTE, current.method,
+                        response.status_code, now - started)
+        if now >= self._next_snapshot:
+            self._next_snapshot = now + self.snapshot_interval
+            self.snapshot()
+        return response
+
+    def _teardown_request(self, exc):
+        # after_request did not run (the exception propagated): the request is no longer in flight
+        ctx = _cv_request.get(None)
+        started = ctx.request.environ.pop('metrics.started', None) if ctx is not None else None
+        if started is not None:
+            started[0].end()
+
+    def snapshot(self):
+        """Copy pool and cache counters into this worker's stores"""
+        process = self.process()
+        pool = self.pool_metrics
+        if pool is not None:
+            labels = {'profile': pool.profile or 'default'}
+            process.set_snapshot('db_pool_checkouts_total', labels, pool.checkouts)
+            process.set_snapshot('db_pool_waits_total', labels, pool.waits)
+            process.set_snapshot('db_pool_wait_seconds_total', labels, pool.wait_ms / 1000)
+            process.set_snapshot('db_pool_timeouts_total', labels, pool.timeouts)
+            process.set_snapshot('db_pool_connections_opened_total', labels, pool.connections_opened)
+            process.set_snapshot('db_pool_connections_in_use', labels, pool.in_use, gauge=True)
+        for name, cache in self.caches.items():
+            labels = {'cache': name}
+            process.set_snapshot('cache_hits_total', labels, cache.hits)
+            process.set_snapshot('cache_stale_hits_total', labels, cache.stale_hits)
+            process.set_snapshot('cache_misses_total', labels, cache.misses)
+
+    def collect(self):
+        """{(name, labels): value} summed over every worker"""
+        self.snapshot()
+        process = self.process()
+        if not self.directory:
+            items = process.counters.items() + process.gauges.items()
+        else:
+            items = []
+            for path in sorted(glob.glob(os.path.join(self.directory, '*.db'))):
+                try:
+                    items.extend(read_values_file(path))
+                except (OSError, ValueError, struct.error) as e:
+                    print(f"⚠️ Skipping unreadable metrics file {path}: {e}")
+        totals = defaultdict(float)
+        for key, value in items:
+            totals[_parse_key(key)] += value
+        return totals
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        families = defaultdict(list)
+        for (name, labels), value in self.collect().items():
+            family = name
+            for suffix in ('_bucket', '_sum', '_count'):
+                if name.startswith('http_request_duration_seconds') and name.endswith(suffix):
+                    family = name[:-len(suffix)]
+            families[family].append((name, labels, value))
+
+        lines = []
+        for family in sorted(families):
+            kind, description = HELP.get(family, ('untyped', family))
+            lines.append(f'# HELP {family} {description}')
+            lines.append(f'# TYPE {family} {kind}')
+            samples = families[family]
+            if kind == 'histogram':
+                samples = self._cumulative(samples)
+            for name, labels, value in sorted(samples, key=lambda sample: (sample[1], sample[0])):
+                lines.append(f'{name}{_format_labels(labels)} {value!r}')
+        return '\n'.join(lines) + '\n'
+
+    def _cumulative(self, samples):
+        """Turn stored per-bucket counts into Prometheus' cumulative le buckets"""
+        per_series = defaultdict(dict)
+        others = []
+        for name, labels, value in samples:
+            if name.endswith('_bucket'):
+                label_map = dict(labels)
+                bound = label_map.pop('le')
+                per_series[tuple(sorted(label_map.items()))][bound] = value
+            else:
+                others.append((name, labels, value))
+        cumulative = []
+        for labels, counts in per_series.items():
+            running = 0.0
+            for bound in LATENCY_BUCKETS:
+                formatted = _format_bound(bound)
+                running += counts.get(formatted, 0.0)
+                cumulative.append(('http_request_duration_seconds_bucket',
+                                   tuple(sorted(labels + (('le', formatted),))), running))
+        return cumulative + others
+
+    def summary(self):
+        """Per-route percentiles and status counts over every worker, for the admin API"""
+        totals = self.collect()
+        routes = defaultdict(lambda: {'buckets': defaultdict(float), 'count': 0.0, 'sum': 0.0, 'statuses': {}})
+        in_flight = 0.0
+        for (name, labels), value in totals.items():
+            label_map = dict(labels)
+            if name == 'http_requests_in_flight':
+                in_flight += value
+                continue
+            if 'route' not in label_map:
+                continue
+            route = routes[f"{label_map['method']} {label_map['route']}"]
+            if name == 'http_request_duration_seconds_bucket':
+                route['buckets'][label_map['le']] += value
+            elif name == 'http_request_duration_seconds_count':
+                route['count'] += value
+            elif name == 'http_request_duration_seconds_sum':
+                route['sum'] += value
+            elif name == 'http_requests_total':
+                route['statuses'][label_map['status']] = int(value)
+
+        result = {}
+        for route, data in sorted(routes.items(), key=lambda item: item[1]['count'], reverse=True):
+            running, cumulative = 0.0, []
+            for bound in LATENCY_BUCKETS:
+                running += data['buckets'].get(_format_bound(bound), 0.0)
+                cumulative.append((bound, running))
+            count = data['count']
+            result[route] = {
+                'requests': int(count),
+                'avg_ms': round(data['sum'] / count * 1000, 2) if count else 0.0,
+                'p50_ms': round(_quantile(cumulative, count, 0.5) * 1000, 2),
+                'p95_ms': round(_quantile(cumulative, count, 0.95) * 1000, 2),
+                'p99_ms': round(_quantile(cumulative, count, 0.99) * 1000, 2),
+                'statuses': data['statuses']
+            }
+        return {'in_flight': int(in_flight), 'routes': result}
+
+    def reset(self):
+        with self._lock:
+            if self._process is not None and self._process.pid == os.getpid():
+                self._process.close()
+            self._process = None
+            self._next_snapshot = 0.0
+
+request_metrics = RequestMetrics()
+
+def mark_process_dead(directory, pid):
+    """Drop a reaped worker's gauges (its counters stay in the totals)"""
+    try:
+        os.remove(os.path.join(directory, f'gauges_{pid}.db'))
+    except FileNotFoundError:
+        pass
+
+def clear_metrics_dir(directory):
+    """Remove files left by a previous run (call once in the master, before workers start)"""
+    for path in glob.glob(os.path.join(directory, '*.db')):
+        os.remove(path)
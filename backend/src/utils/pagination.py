@@ -0,0 +1,155 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from sqlalchemy import and_, or_, tuple_, DateTime, Uuid
+
+MAX_PAGE_SIZE = 100
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+class KeysetPage:
+    """One page of keyset-paginated results with opaque next/prev cursors"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, per_page=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.per_page = per_page
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def to_dict(self):
+        return {
+            'per_page': self.per_page,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev,
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor
+        }
+
+def _serialize(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+def _deserialize(column, value):
+    if value is None:
+        return None
+    column_type = getattr(column, 'type', None)
+    if isinstance(column_type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column_type, Uuid) and getattr(column_type, 'as_uuid', False):
+        return uuid.UUID(value)
+    return value
+
+def encode_cursor(values, direction='next'):
+    """Encode the sort key of a boundary row as an opaque URL-safe token"""
+    payload = json.dumps({'d': direction, 'k': [_serialize(v) for v in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token, columns):
+    """Decode a cursor token into (direction, typed key values)"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        direction = payload['d']
+        values = payload['k']
+        if direction not in ('next', 'prev') or len(values) != len(columns):
+            raise ValueError('cursor shape mismatch')
+        return direction, [_deserialize(column, value) for column, value in zip(columns, values)]
+    except Exception as e:
+        raise InvalidCursor(f'Invalid cursor: {e}')
+
+def seek_condition(columns, values, forward_is_less, dialect_name):
+    """Rows strictly after the boundary in the walk direction"""
+    if dialect_name == 'postgresql':
+        # Row-value comparison lets Postgres range-scan a composite index
+        left, right = tuple_(*columns), tuple_(*values)
+        return left < right if forward_is_less else left > right
+
+    conditions = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        step = column < values[i] if forward_is_less else column > values[i]
+        conditions.append(and_(*equal_prefix, step))
+    return or_(*conditions)
+
+def keyset_paginate(query, columns, cursor=None, per_page=20, descending=True, dialect_name=None):
+    """Paginate a query on a unique sort key such as (created_at, id)
+
+    Fetches ``per_page + 1`` rows to detect another page, so no COUNT(*) or
+    OFFSET is ever issued and every page costs the same index seek.
+    """
+    per_page = max(1, min(int(per_page or 20), MAX_PAGE_SIZE))
+    direction = 'next'
+    if cursor:
+        direction, values = decode_cursor(cursor, columns)
+        # Walking backwards flips both the comparison and the sort order
+        forward_is_less = descending if direction == 'next' else not descending
+        query = query.filter(seek_condition(columns, values, forward_is_less, dialect_name))
+
+    walk_descending = descending if direction == 'next' else not descending
+    query = query.order_by(*[column.desc() if walk_descending else column.asc() for column in columns])
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'prev':
+        rows.reverse()
+
+    def key_of(row):
+        entity = row[0] if isinstance(row, tuple) or hasattr(row, '_fields') else row
+        return [getattr(entity, column.key) for column in columns]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if direction == 'next':
+            if has_more:
+                next_cursor = encode_cursor(key_of(rows[-1]), 'next')
+            if cursor:
+                prev_cursor = encode_cursor(key_of(rows[0]), 'prev')
+        else:
+            next_cursor = encode_cursor(key_of(rows[-1]), 'next')
+            if has_more:
+                prev_cursor = encode_cursor(key_of(rows[0]), 'prev')
+
+    return KeysetPage(rows, next_cursor=next_cursor, prev_cursor=prev_cursor, per_page=per_page)
+
+class OffsetPage:
+    """Page-numbered results fetched without a COUNT(*); pair with counts.paginated_total"""
+
+    def __init__(self, items, page, per_page, has_next):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = page > 1
+
+    def to_dict(self, total=None):
+        data = {
+            'page': self.page,
+            'per_page': self.per_page,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev
+        }
+        if total is not None:
+            data.update(total.to_dict())
+            data['pages'] = -(-total.value // self.per_page) if total.value else 0
+        return data
+
+def offset_paginate(query, page=1, per_page=20):
+    """Fetch one numbered page (per_page + 1 rows to detect a next page)"""
+    page = max(1, int(page or 1))
+    per_page = max(1, min(int(per_page or 20), MAX_PAGE_SIZE))
+    rows = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    return OffsetPage(rows[:per_page], page, per_page, has_next=len(rows) > per_page)
@@ -0,0 +1,139 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import jsonify
+from werkzeug.security import check_password_hash
+import bcrypt
+
+# Prefixes written by the two hashing schemes the platform has used
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+WERKZEUG_PREFIXES = ('scrypt:', 'pbkdf2:')
+
+DEFAULT_LOG_ROUNDS = 12
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_TIMEOUT = 5.0
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool is saturated or a job times out"""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def password_busy_response(error):
+    """503 response for a saturated password hashing pool"""
+    response = jsonify({'error': 'Server is busy, please retry shortly'})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
+class PasswordHasher:
+    """Bounded thread pool for bcrypt hashing and verification
+
+    bcrypt releases the GIL while it works, so running it on a small pool
+    keeps a burst of logins from pinning every request thread. Jobs beyond
+    ``workers + queue_size`` are rejected immediately instead of piling up.
+    """
+
+    def __init__(self, log_rounds=DEFAULT_LOG_ROUNDS, workers=DEFAULT_WORKERS,
+                 queue_size=DEFAULT_QUEUE_SIZE, timeout=DEFAULT_TIMEOUT):
+        self.log_rounds = log_rounds
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configure the hasher from Flask config"""
+        self.configure(
+            log_rounds=app.config.get('BCRYPT_LOG_ROUNDS', DEFAULT_LOG_ROUNDS),
+            workers=app.config.get('PASSWORD_HASH_WORKERS', DEFAULT_WORKERS),
+            queue_size=app.config.get('PASSWORD_HASH_QUEUE_SIZE', DEFAULT_QUEUE_SIZE),
+            timeout=app.config.get('PASSWORD_HASH_TIMEOUT', DEFAULT_TIMEOUT)
+        )
+
+    def configure(self, log_rounds=None, workers=None, queue_size=None, timeout=None):
+        """Update settings, replacing the pool if its size changed"""
+        with self._lock:
+            if log_rounds is not None:
+                self.log_rounds = int(log_rounds)
+            if timeout is not None:
+                self.timeout = float(timeout)
+            if workers is not None or queue_size is not None:
+                self.workers = int(workers if workers is not None else self.workers)
+                self.queue_size = int(queue_size if queue_size is not None else self.queue_size)
+                self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+
+    def _get_executor(self):
+        # Created lazily so each gunicorn worker gets its own pool after fork
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix='password-hash'
+                    )
+        return self._executor
+
+    def _run(self, fn, *args):
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise PasswordHashingBusy('Password hashing queue is full')
+
+        def job():
+            try:
+                return fn(*args)
+            finally:
+                slots.release()
+
+        try:
+            future = self._get_executor().submit(job)
+        except Exception:
+            slots.release()
+            raise
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # A job that never started still holds its slot
+            if future.cancel():
+                slots.release()
+            raise PasswordHashingBusy('Password hashing timed out')
+
+    def hash(self, password):
+        """Hash a password with bcrypt at the configured cost"""
+        return self._run(_bcrypt_hash, password, self.log_rounds)
+
+    def verify(self, password, password_hash):
+        """Check a password against a bcrypt or legacy werkzeug hash"""
+        if not password_hash:
+            return False
+        if password_hash.startswith(BCRYPT_PREFIXES):
+            return self._run(_bcrypt_verify, password, password_hash)
+        if password_hash.startswith(WERKZEUG_PREFIXES):
+            return self._run(check_password_hash, password_hash, password)
+        return False
+
+    def needs_rehash(self, password_hash):
+        """Return True for legacy werkzeug hashes or bcrypt below the configured cost"""
+        if not password_hash or not password_hash.startswith(BCRYPT_PREFIXES):
+            return True
+        try:
+            return int(password_hash.split('$')[2]) < self.log_rounds
+        except (IndexError, ValueError):
+            return True
+
+def _bcrypt_hash(password, log_rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=log_rounds)).decode('utf-8')
+
+def _bcrypt_verify(password, password_hash):
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    except ValueError:
+        return False
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+from datetime import datetime
+from src.models import as_uuid
+from src.models.location import ProviderLocation
+
+class MemoryPresenceStore:
+    """Per-process presence entries that expire so other workers' updates are picked up"""
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def set(self, user_id, presence):
+        with self._lock:
+            self._entries[user_id] = (presence, time.monotonic() + self.ttl)
+
+class RedisPresenceStore:
+    """Presence shared by all workers; every status/location write lands here"""
+
+    def __init__(self, client, ttl=86400):
+        self.client = client
+        self.ttl = ttl
+
+    def get(self, user_id):
+        raw = self.client.get(f'presence:provider:{user_id}')
+        return json.loads(raw) if raw else None
+
+    def set(self, user_id, presence):
+        self.client.set(f'presence:provider:{user_id}', json.dumps(presence), ex=self.ttl)
+
+class ProviderPresence:
+    """Online status and last-seen time of providers, keyed by their user id
+
+    Written by the location/status endpoints after they commit and read by
+    cached documents (e.g. public profiles) at request time. A miss falls back
+    to the latest ProviderLocation row and is remembered.
+    """
+
+    def __init__(self):
+        self.store = MemoryPresenceStore()
+
+    def init_app(self, app):
+        self.store = self._create_store(app.config.get('PRESENCE_STORAGE_URL'), app.config.get('PRESENCE_TTL', 30))
+        app.extensions['provider_presence'] = self
+
+    def _create_store(self, storage_url, ttl):
+        if not storage_url or not storage_url.startswith(('redis://', 'rediss://')):
+            return MemoryPresenceStore(ttl=ttl)
+        try:
+            import redis
+            client = redis.Redis.from_url(storage_url, socket_timeout=0.2, socket_connect_timeout=0.2)
+            client.ping()
+            return RedisPresenceStore(client)
+        except Exception as e:
+            print(f"⚠️ Presence falling back to in-memory store: {e}")
+            return MemoryPresenceStore(ttl=ttl)
+
+    def mark(self, user_id, is_online, last_seen=None):
+        """Record a provider's current status (call after the DB commit)"""
+        last_seen = last_seen or datetime.utcnow()
+        presence = {'is_online': bool(is_online), 'last_seen': last_seen.isoformat()}
+        try:
+            self.store.set(str(user_id), presence)
+        except Exception as e:
+            print(f"⚠️ Failed to record presence for {user_id}: {e}")
+
+    def get(self, user_id):
+        """Return {'is_online', 'last_seen'} for a provider's user id"""
+        key = str(user_id)
+        try:
+            presence = self.store.get(key)
+        except Exception as e:
+            print(f"⚠️ Presence lookup failed for {user_id}: {e}")
+            presence = None
+        if presence is not None:
+            return presence
+
+        location = ProviderLocation.query.filter_by(
+            provider_id=as_uuid(user_id),
+            is_online=True
+        ).order_by(ProviderLocation.last_updated.desc()).first()
+        presence = {
+            'is_online': location is not None,
+            'last_seen': location.last_updated.isoformat() if location and location.last_updated else None
+        }
+        try:
+            self.store.set(key, presence)
+        except Exception:
+            pass
+        return presence
+
+provider_presence = ProviderPresence()
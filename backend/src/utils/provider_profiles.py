@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import joinedload
+from src.models import db, as_uuid
+from src.models.user import ServiceProviderProfile, CustomerProfile
+from src.models.service import Service, ProviderService, BookingReview
+from src.utils.cache import SnapshotCache
+from src.utils.presence import provider_presence
+
+INVALIDATION_CHANNEL = 'provider-profile-invalidations'
+INVALIDATE_ALL = '*'
+
+# Profile columns whose changes don't alter the cached document
+VOLATILE_PROFILE_FIELDS = {'updated_at', 'search_text'}
+PRIVATE_PROFILE_FIELDS = ('national_id', 'date_of_birth')
+
+def build_public_profile(provider_id):
+    """Precompute the public profile document, or None if not publicly visible"""
+    provider = db.session.get(ServiceProviderProfile, as_uuid(provider_id))
+    if provider is None or provider.verification_status != 'approved':
+        return None
+
+    services = ProviderService.query.options(
+        joinedload(ProviderService.service)
+    ).filter_by(provider_id=str(provider.id), is_active=True).all()
+
+    reviews = BookingReview.query.filter_by(
+        provider_id=str(provider.id),
+        is_verified=True
+    ).order_by(BookingReview.created_at.desc()).limit(10).all()
+
+    customer_ids = {as_uuid(review.customer_id) for review in reviews} - {None}
+    customers = {
+        str(customer.id): customer
+        for customer in CustomerProfile.query.filter(CustomerProfile.id.in_(customer_ids)).all()
+    } if customer_ids else {}
+
+    profile = provider.to_dict()
+    for field in PRIVATE_PROFILE_FIELDS:
+        profile.pop(field, None)
+    profile['id'] = str(provider.id)
+    profile['user_id'] = str(provider.user_id)
+    profile.update({
+        'services': [ps.to_dict() for ps in services],
+        'reviews': [review.to_dict(customer=customers.get(str(as_uuid(review.customer_id)))) for review in reviews]
+    })
+    return profile
+
+class ProviderProfileCache:
+    """Cached public provider profiles, invalidated when their source rows change
+
+    Committed changes to a provider's profile, services or reviews drop that
+    provider's document; service catalogue changes drop everything. With Redis
+    configured, invalidations are broadcast so every worker's copy is dropped.
+    Live presence (is_online, last_seen) is overlaid on every read; the
+    profile's own is_available flag is part of the cached document.
+    """
+
+    def __init__(self):
+        self.cache = SnapshotCache(ttl=300, stale_ttl=0)
+        self._redis = None
+        self._listener_pid = None
+        self._listening = False
+
+    def init_app(self, app):
+        self.cache.ttl = app.config.get('PROVIDER_PROFILE_CACHE_TTL', 300)
+        self._redis = self._connect(app.config.get('PROVIDER_PROFILE_CACHE_URL'))
+        app.extensions['provider_profiles'] = self
+        if not self._listening:
+            event.listen(db.session, 'after_flush', self._collect_changes)
+            event.listen(db.session, 'after_commit', self._apply_changes)
+            event.listen(db.session, 'after_rollback', self._discard_changes)
+            self._listening = True
+
+    def _connect(self, url):
+        if not url or not url.startswith(('redis://', 'rediss://')):
+            return None
+        try:
+            import redis
+            client = redis.Redis.from_url(url, socket_connect_timeout=0.2, health_check_interval=30)
+            client.ping()
+            return client
+        except Exception as e:
+            print(f"⚠️ Provider profile invalidations are local only: {e}")
+            return None
+
+    def get(self, provider_id):
+        """Public profile with live presence, or None if the provider isn't visible"""
+        key = str(as_uuid(provider_id))
+        self._ensure_listener()
+        document = self.cache.get(key, lambda: build_public_profile(key))
+        if document is None:
+            return None
+
+        presence = provider_presence.get(document['user_id'])
+        profile = dict(document)
+        profile.update({
+            'is_online': presence['is_online'],
+            'last_seen': presence['last_seen']
+        })
+        return profile
+
+    def invalidate(self, provider_id=None):
+        """Drop one provider's document (or all) here and, with Redis, in every worker"""
+        key = INVALIDATE_ALL if provider_id is None else str(as_uuid(provider_id))
+        self.cache.invalidate(None if key == INVALIDATE_ALL else key)
+        if self._redis is not None:
+            try:
+                self._redis.publish(INVALIDATION_CHANNEL, key)
+            except Exception as e:
+                print(f"⚠️ Failed to broadcast profile invalidation for {key}: {e}")
+
+    def _ensure_listener(self):
+        # Started lazily so each forked worker subscribes on its own connection
+        if self._redis is None or self._listener_pid == os.getpid():
+            return
+        self._listener_pid = os.getpid()
+        threading.Thread(target=self._listen, name='provider-profile-invalidations', daemon=True).start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                for message in pubsub.listen():
+                    key = message['data'].decode() if isinstance(message['data'], bytes) else message['data']
+                    self.cache.invalidate(None if key == INVALIDATE_ALL else key)
+            except Exception as e:
+                print(f"⚠️ Profile invalidation listener reconnecting: {e}")
+                # Messages may have been missed while disconnected
+                self.cache.invalidate()
+                time.sleep(1)
+
+    def _collect_changes(self, session, flush_context):
+        pending = session.info.setdefault('provider_profile_pending', set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, ServiceProviderProfile):
+                state = inspect(obj)
+                changed = {attr.key for attr in state.attrs if attr.history.has_changes()}
+                if obj in session.dirty and changed <= VOLATILE_PROFILE_FIELDS:
+                    continue
+                pending.add(str(obj.id))
+            elif isinstance(obj, (ProviderService, BookingReview)):
+                if obj.provider_id:
+                    pending.add(str(obj.provider_id))
+            elif isinstance(obj, Service) and obj not in session.new:
+                pending.add(INVALIDATE_ALL)
+
+    def _apply_changes(self, session):
+        pending = session.info.pop('provider_profile_pending', set())
+        if INVALIDATE_ALL in pending:
+            self.invalidate()
+            return
+        for provider_id in pending:
+            self.invalidate(provider_id)
+
+    def _discard_changes(self, session):
+        session.info.pop('provider_profile_pending', None)
+
+provider_profiles = ProviderProfileCache()
@@ -0,0 +1,17 @@
+from flask import request
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+def trust_proxies(app):
+    """Resolve remote_addr from X-Forwarded-For, trusting only PROXY_FIX_X_FOR hops
+
+    Each trusted proxy appends the address it saw, so the client is the
+    entry that many hops from the right; anything further left was sent by
+    the client and is ignored. 0 leaves remote_addr as the socket peer.
+    """
+    hops = app.config.get('PROXY_FIX_X_FOR', 0)
+    if hops > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops)
+
+def client_ip():
+    """The requesting client's address, for per-client keys (never the raw X-Forwarded-For)"""
+    return request.remote_addr or 'unknown'
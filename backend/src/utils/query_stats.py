@@ -0,0 +1,199 @@
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.utils.metrics import UNMATCHED_ROUTE
+
+class RequestQueries:
+    """Statements run while serving one request"""
+    __slots__ = ('started', 'count', 'db_ms', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.db_ms = 0.0
+        self.statements = Counter()
+
+    def record(self, statement, elapsed_ms):
+        self.count += 1
+        self.db_ms += elapsed_ms
+        self.statements[statement] += 1
+
+    def repeated(self, threshold):
+        """(statement, times) run at least threshold times: the N+1 signatures"""
+        return [(statement, times) for statement, times in self.statements.most_common() if times >= threshold]
+
+class EndpointStats:
+    """Running totals for one endpoint"""
+    __slots__ = ('requests', 'queries', 'max_queries', 'db_ms', 'total_ms', 'slow', 'n_plus_one', 'signatures')
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_ms = 0.0
+        self.total_ms = 0.0
+        self.slow = 0
+        self.n_plus_one = 0
+        self.signatures = Counter()
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'avg_queries': round(self.queries / self.requests, 2) if self.requests else 0.0,
+            'max_queries': self.max_queries,
+            'avg_db_ms': round(self.db_ms / self.requests, 2) if self.requests else 0.0,
+            'avg_ms': round(self.total_ms / self.requests, 2) if self.requests else 0.0,
+            'slow_requests': self.slow,
+            'n_plus_one_requests': self.n_plus_one,
+            'n_plus_one_signatures': [
+                {'statement': statement, 'requests': requests}
+                for statement, requests in self.signatures.most_common(5)
+            ]
+        }
+
+def _shorten(statement, limit=200):
+    statement = ' '.join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + '…'
+
+class QueryInstrumentation:
+    """Counts queries and DB time per request and flags N+1 patterns
+
+    Cursor events on every engine (primary and replicas) feed a per-request
+    RequestQueries. A statement repeated N_PLUS_ONE_THRESHOLD times in one
+    request is reported as an N+1 signature against the route. Results go
+    to X-Query-Count/Server-Timing headers (QUERY_TIMING_HEADERS, off in
+    production), a slow-request log (SLOW_REQUEST_MS) and per-endpoint
+    totals for /api/admin/metrics.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.headers = False
+        self.slow_request_ms = 500
+        self.n_plus_one_threshold = 5
+        self.endpoints = defaultdict(EndpointStats)
+        self._reported = set()
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def init_app(self, app):
+        self.enabled = app.config.get('QUERY_STATS_ENABLED', True)
+        self.headers = app.config.get('QUERY_TIMING_HEADERS', False)
+        self.slow_request_ms = app.config.get('SLOW_REQUEST_MS', 500)
+        self.n_plus_one_threshold = app.config.get('N_PLUS_ONE_THRESHOLD', 5)
+        app.extensions['query_stats'] = self
+        if not self.enabled:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_execute)
+            self._listening = True
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get('query_started')
+        if not stack:
+            return
+        started = stack.pop()
+        if has_request_context():
+            queries = g.get('request_queries')
+            if queries is not None:
+                queries.record(statement, (time.perf_counter() - started) * 1000)
+
+    def _start_request(self):
+        g.request_queries = RequestQueries()
+
+    def _finish_request(self, response):
+        queries = g.pop('request_queries', None)
+        if queries is None:
+            return response
+        total_ms = (time.perf_counter() - queries.started) * 1000
+        # Unrouted paths share one bucket so scanners can't grow the table
+        endpoint = request.endpoint or UNMATCHED_ROUTE
+        repeated = queries.repeated(self.n_plus_one_threshold)
+
+        with self._lock:
+            stats = self.endpoints[endpoint]
+            stats.requests += 1
+            stats.queries += queries.count
+            stats.max_queries = max(stats.max_queries, queries.count)
+            stats.db_ms += queries.db_ms
+            stats.total_ms += total_ms
+            stats.slow += total_ms >= self.slow_request_ms
+            stats.n_plus_one += bool(repeated)
+            for statement, _ in repeated:
+                stats.signatures[_shorten(statement)] += 1
+            new_signatures = [(statement, times) for statement, times in repeated
+                              if (endpoint, statement) not in self._reported]
+            self._reported.update((endpoint, statement) for statement, _ in new_signatures)
+
+        # Each signature is logged once per worker; the counters keep the totals
+        for statement, times in new_signatures:
+            print(f"⚠️ Possible N+1 in {request.method} {endpoint}: {times}x {_shorten(statement)}")
+        if total_ms >= self.slow_request_ms:
+            print(f"🐢 Slow request {request.method} {request.path} ({endpoint}): {total_ms:.0f} ms, "
+                  f"{queries.count} queries, {queries.db_ms:.0f} ms in DB")
+
+        if self.headers:
+            response.headers['X-Query-Count'] = str(queries.count)
+            response.headers['Server-Timing'] = (
+                f'db;dur={queries.db_ms:.1f};desc="{queries.count} queries", total;dur={total_ms:.1f}'
+            )
+        return response
+
+    def stats(self):
+        """Per-endpoint totals for this worker, busiest first"""
+        with self._lock:
+            endpoints = sorted(self.endpoints.items(), key=lambda item: item[1].queries, reverse=True)
+            return {
+                'slow_request_ms': self.slow_request_ms,
+                'n_plus_one_threshold': self.n_plus_one_threshold,
+                'endpoints': {endpoint: stats.to_dict() for endpoint, stats in endpoints}
+            }
+
+    def reset(self):
+        with self._lock:
+            self.endpoints.clear()
+            self._reported.clear()
+
+query_instrumentation = QueryInstrumentation()
+
+class QueryBudgetExceeded(AssertionError):
+    """More statements ran than a query budget allows"""
+
+@contextmanager
+def assert_max_queries(budget, engine=None, n_plus_one_threshold=None):
+    """Fail if the block runs more than budget statements (or repeats one n_plus_one_threshold times)
+
+    Counts every engine unless one is given; yields the RequestQueries so
+    callers can inspect what ran.
+    """
+    queries = RequestQueries()
+    target = engine if engine is not None else Engine
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        queries.record(statement, 0.0)
+
+    event.listen(target, 'after_cursor_execute', count)
+    try:
+        yield queries
+    finally:
+        event.remove(target, 'after_cursor_execute', count)
+
+    problems = []
+    if queries.count > budget:
+        problems.append(f'{queries.count} queries ran, budget is {budget}')
+    if n_plus_one_threshold is not None:
+        problems.extend(f'N+1: {times}x {_shorten(statement)}'
+                        for statement, times in queries.repeated(n_plus_one_threshold))
+    if problems:
+        ran = '\n'.join(f'  {times}x {_shorten(statement)}' for statement, times in queries.statements.most_common())
+        raise QueryBudgetExceeded('; '.join(problems) + '\n' + ran)
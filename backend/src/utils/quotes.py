@@ -0,0 +1,283 @@
+import threading
+import time
+from decimal import Decimal, ROUND_HALF_UP
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from sqlalchemy import event, inspect
+from src.models import db
+from src.models.user import ServiceProviderProfile
+from src.models.service import Service, ProviderService
+
+VERSION_KEY = 'quote-tables:version'
+DEFAULT_COMMISSION_RATE = Decimal('15.00')
+CENTS = Decimal('0.01')
+
+# Columns that change a quote; edits to anything else leave the tables valid
+PRICED_FIELDS = {
+    Service: {'base_price', 'is_active', 'is_emergency_service', 'emergency_surcharge_percentage'},
+    ServiceProviderProfile: {'commission_rate', 'emergency_rate_multiplier'},
+    ProviderService: {'custom_price', 'is_active', 'provider_id', 'service_id'}
+}
+
+class InvalidQuote(Exception):
+    """A quote id that is malformed, tampered with or expired"""
+
+def _money(value):
+    return Decimal(value).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+class Quote:
+    """A priced service, optionally for one provider"""
+    __slots__ = ('service_id', 'provider_id', 'is_emergency', 'base_price', 'surcharge', 'total_amount',
+                 'commission_rate', 'platform_commission', 'provider_earnings', 'quote_id')
+
+    def __init__(self, service_id, provider_id, is_emergency, base_price, surcharge, total_amount,
+                 commission_rate, platform_commission, provider_earnings, quote_id=None):
+        self.service_id = service_id
+        self.provider_id = provider_id
+        self.is_emergency = is_emergency
+        self.base_price = base_price
+        self.surcharge = surcharge
+        self.total_amount = total_amount
+        self.commission_rate = commission_rate
+        self.platform_commission = platform_commission
+        self.provider_earnings = provider_earnings
+        self.quote_id = quote_id
+
+    def payload(self):
+        return {
+            'service_id': self.service_id,
+            'provider_id': self.provider_id,
+            'is_emergency': self.is_emergency,
+            **{field: str(getattr(self, field)) for field in (
+                'base_price', 'surcharge', 'total_amount', 'commission_rate', 'platform_commission',
+                'provider_earnings'
+            )}
+        }
+
+    def to_dict(self):
+        return {
+            'quote_id': self.quote_id,
+            'service_id': self.service_id,
+            'provider_id': self.provider_id,
+            'is_emergency': self.is_emergency,
+            'base_price': float(self.base_price),
+            'surcharge': float(self.surcharge),
+            'total_amount': float(self.total_amount),
+            'commission_rate': float(self.commission_rate),
+            'platform_commission': float(self.platform_commission),
+            'provider_earnings': float(self.provider_earnings)
+        }
+
+class PriceTables:
+    """Immutable in-memory snapshot of everything a quote depends on"""
+
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        # service id -> (base_price, is_active, is_emergency_service, surcharge percentage)
+        self.services = {
+            row.id: (row.base_price, row.is_active, row.is_emergency_service, row.emergency_surcharge_percentage)
+            for row in db.session.query(
+                Service.id, Service.base_price, Service.is_active, Service.is_emergency_service,
+                Service.emergency_surcharge_percentage
+            )
+        }
+        # (provider id, service id) -> custom price or None, for active offers only
+        self.offers = {
+            (str(row.provider_id), row.service_id): row.custom_price
+            for row in db.session.query(
+                ProviderService.provider_id, ProviderService.service_id, ProviderService.custom_price
+            ).filter(ProviderService.is_active.is_(True))
+        }
+        # provider id -> (commission rate percent, emergency multiplier)
+        self.providers = {
+            str(row.id): (row.commission_rate, row.emergency_rate_multiplier)
+            for row in db.session.query(
+                ServiceProviderProfile.id, ServiceProviderProfile.commission_rate,
+                ServiceProviderProfile.emergency_rate_multiplier
+            )
+        }
+
+class QuoteEngine:
+    """Prices services from cached price tables and signs quotes for checkout
+
+    Pricing: the provider's custom price, else the service base price. An
+    emergency on an emergency-capable service adds the provider's emergency
+    multiplier when quoting a provider, else the service's surcharge
+    percentage. Commission is the provider's rate, else the platform default.
+
+    The tables are reloaded when their version moves: committed pricing edits
+    bump it here and, with Redis, in every worker (checked at most every
+    QUOTE_VERSION_CHECK_INTERVAL seconds). Without Redis, tables older than
+    QUOTE_TABLES_MAX_AGE seconds are reloaded so other workers' edits land.
+    Quote ids are signed, so a quoted price is honoured by any worker for
+    QUOTE_TTL seconds without server-side storage.
+    """
+
+    def __init__(self):
+        self.ttl = 900
+        self.max_age = 60
+        self.check_interval = 5
+        self._tables = None
+        self._local_version = 0
+        self._shared_version = None
+        self._checked_at = 0.0
+        self._redis = None
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def init_app(self, app):
+        self.ttl = app.config.get('QUOTE_TTL', 900)
+        self.max_age = app.config.get('QUOTE_TABLES_MAX_AGE', 60)
+        self.check_interval = app.config.get('QUOTE_VERSION_CHECK_INTERVAL', 5)
+        self._redis = self._connect(app.config.get('QUOTE_VERSION_URL'))
+        self._tables = None
+        app.extensions['quote_engine'] = self
+        if not self._listening:
+            event.listen(db.session, 'after_flush', self._collect_changes)
+            event.listen(db.session, 'after_commit', self._apply_changes)
+            event.listen(db.session, 'after_rollback', self._discard_changes)
+            self._listening = True
+
+    def _connect(self, url):
+        if not url or not url.startswith(('redis://', 'rediss://')):
+            return None
+        try:
+            import redis
+            client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+            client.ping()
+            return client
+        except Exception as e:
+            print(f"⚠️ Quote table versions are local only: {e}")
+            return None
+
+    def _version(self):
+        if self._redis is not None and time.monotonic() - self._checked_at >= self.check_interval:
+            try:
+                self._shared_version = self._redis.get(VERSION_KEY)
+            except Exception as e:
+                print(f"⚠️ Failed to read quote table version: {e}")
+            self._checked_at = time.monotonic()
+        return (self._local_version, self._shared_version)
+
+    def tables(self):
+        """Current price tables, reloading them if their version moved"""
+        version = self._version()
+        tables = self._tables
+        expired = self._redis is None and tables is not None and time.monotonic() - tables.loaded_at > self.max_age
+        if tables is None or tables.version != version or expired:
+            with self._lock:
+                tables = self._tables
+                if tables is None or tables.version != version or expired:
+                    tables = PriceTables(version)
+                    self._tables = tables
+        return tables
+
+    def invalidate(self):
+        """Drop the price tables here and, with Redis, in every worker"""
+        self._local_version += 1
+        if self._redis is not None:
+            try:
+                self._shared_version = self._redis.incr(VERSION_KEY)
+            except Exception as e:
+                print(f"⚠️ Failed to broadcast quote table version: {e}")
+
+    def quote(self, service_id, provider_id=None, is_emergency=False):
+        """Quote one service, optionally for one provider; None if it can't be booked"""
+        if provider_id is None:
+            return self._price(self.tables(), service_id, None, is_emergency)
+        return self.quote_many(service_id, [provider_id], is_emergency).get(str(provider_id))
+
+    def quote_many(self, service_id, provider_ids, is_emergency=False):
+        """Quote one service for many providers from one table snapshot (no queries)
+
+        Returns {provider_id: Quote}; providers not offering the service are omitted.
+        """
+        tables = self.tables()
+        quotes = {}
+        for provider_id in provider_ids:
+            quote = self._price(tables, service_id, str(provider_id), is_emergency)
+            if quote is not None:
+                quotes[str(provider_id)] = quote
+        return quotes
+
+    def _price(self, tables, service_id, provider_id, is_emergency):
+        service = tables.services.get(service_id)
+        if service is None or not service[1]:
+            return None
+        base_price, _, emergency_capable, surcharge_percentage = service
+        commission_rate = DEFAULT_COMMISSION_RATE
+        multiplier = None
+
+        if provider_id is not None:
+            offer_key = (provider_id, service_id)
+            if offer_key not in tables.offers:
+                return None
+            if tables.offers[offer_key] is not None:
+                base_price = tables.offers[offer_key]
+            provider_commission, multiplier = tables.providers.get(provider_id, (None, None))
+            if provider_commission is not None:
+                commission_rate = Decimal(provider_commission)
+
+        base_price = _money(base_price)
+        surcharge = Decimal('0')
+        emergency = bool(is_emergency and emergency_capable)
+        if emergency:
+            if multiplier is not None:
+                surcharge = base_price * (Decimal(multiplier) - 1)
+            else:
+                surcharge = base_price * Decimal(surcharge_percentage or 0) / 100
+        surcharge = _money(max(surcharge, Decimal('0')))
+        total = base_price + surcharge
+        commission = _money(total * commission_rate / 100)
+
+        return Quote(service_id, provider_id, emergency, base_price, surcharge, total,
+                     _money(commission_rate), commission, total - commission)
+
+    def _serializer(self):
+        return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='booking-quote')
+
+    def issue(self, quote):
+        """Sign the quote so its price can be redeemed at checkout; returns the quote"""
+        quote.quote_id = self._serializer().dumps(quote.payload())
+        return quote
+
+    def redeem(self, quote_id):
+        """The Quote locked by quote_id; raises InvalidQuote if tampered with or expired"""
+        try:
+            payload = self._serializer().loads(quote_id, max_age=self.ttl)
+        except SignatureExpired:
+            raise InvalidQuote('Quote has expired, please request a new one')
+        except BadSignature:
+            raise InvalidQuote('Invalid quote')
+        amounts = {
+            field: Decimal(payload[field]) for field in (
+                'base_price', 'surcharge', 'total_amount', 'commission_rate', 'platform_commission',
+                'provider_earnings'
+            )
+        }
+        return Quote(payload['service_id'], payload['provider_id'], payload['is_emergency'], quote_id=quote_id,
+                     **amounts)
+
+    def _collect_changes(self, session, flush_context):
+        if session.info.get('quote_tables_changed'):
+            return
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            fields = PRICED_FIELDS.get(type(obj))
+            if fields is None:
+                continue
+            if obj in session.dirty:
+                state = inspect(obj)
+                if not any(state.attrs[field].history.has_changes() for field in fields):
+                    continue
+            session.info['quote_tables_changed'] = True
+            return
+
+    def _apply_changes(self, session):
+        if session.info.pop('quote_tables_changed', False):
+            self.invalidate()
+
+    def _discard_changes(self, session):
+        session.info.pop('quote_tables_changed', None)
+
+quote_engine = QuoteEngine()
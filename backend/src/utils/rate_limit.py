@@ -0,0 +1,224 @@
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+from flask import current_app, jsonify, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from src.utils.proxy import client_ip
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Atomic refill-and-take on a Redis hash; returns {allowed, retry_after}
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+def parse_rate(rate):
+    """Parse '30/minute' style limits into tokens per second"""
+    match = re.match(r'^\s*(\d+)\s*/\s*(second|minute|hour|day)\s*$', rate)
+    if not match:
+        raise ValueError(f'Invalid rate limit: {rate}')
+    return int(match.group(1)) / PERIODS[match.group(2)]
+
+class MemoryBucketStore:
+    """Per-process token buckets, used when Redis is not configured"""
+
+    def __init__(self, max_keys=50000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._counters = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now=None):
+        """Take one token; return (allowed, retry_after_seconds)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + max(0.0, now - ts) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (1 - tokens) / rate
+
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+
+        return allowed, retry_after
+
+    def _prune(self, now):
+        # Buckets idle for an hour have long since refilled
+        stale = [key for key, (_, ts) in self._buckets.items() if now - ts > 3600]
+        for key in stale:
+            del self._buckets[key]
+
+    def incr_counter(self, route, reason):
+        with self._lock:
+            self._counters[route][reason] += 1
+
+    def counters(self):
+        with self._lock:
+            return {route: dict(reasons) for route, reasons in self._counters.items()}
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._counters.clear()
+
+class RedisBucketStore:
+    """Token buckets shared by every gunicorn worker through Redis"""
+
+    counters_key = 'ratelimit:rejected'
+
+    def __init__(self, client, prefix='ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_LUA)
+
+    def take(self, key, rate, burst, now=None):
+        now = time.time() if now is None else now
+        allowed, retry_after = self._script(keys=[self.prefix + key], args=[rate, burst, now])
+        return bool(int(allowed)), float(retry_after)
+
+    def incr_counter(self, route, reason):
+        self.client.hincrby(self.counters_key, f'{route}|{reason}', 1)
+
+    def counters(self):
+        result = defaultdict(dict)
+        for field, value in self.client.hgetall(self.counters_key).items():
+            field = field.decode('utf-8') if isinstance(field, bytes) else field
+            route, _, reason = field.rpartition('|')
+            result[route][reason] = int(value)
+        return dict(result)
+
+    def reset(self):
+        self.client.delete(self.counters_key)
+
+class RateLimiter:
+    """Token-bucket rate limiting and DB pool load shedding for hot endpoints"""
+
+    def __init__(self):
+        self.store = MemoryBucketStore()
+        self.shed_threshold = 0.9
+        self.shed_retry_after = 2
+        self.pool_metrics = None
+
+    def init_app(self, app, pool_metrics=None):
+        """Pick a bucket store and shedding threshold from Flask config"""
+        self.shed_threshold = app.config.get('RATELIMIT_SHED_THRESHOLD', 0.9)
+        self.shed_retry_after = app.config.get('RATELIMIT_SHED_RETRY_AFTER', 2)
+        self.pool_metrics = pool_metrics
+        self.store = self._create_store(app.config.get('RATELIMIT_STORAGE_URL'))
+        app.extensions['rate_limiter'] = self
+
+    def _create_store(self, storage_url):
+        if not storage_url or not storage_url.startswith(('redis://', 'rediss://')):
+            return MemoryBucketStore()
+        try:
+            import redis
+            client = redis.Redis.from_url(storage_url, socket_timeout=0.2, socket_connect_timeout=0.2)
+            client.ping()
+            return RedisBucketStore(client)
+        except Exception as e:
+            print(f"⚠️ Rate limiter falling back to in-memory buckets: {e}")
+            return MemoryBucketStore()
+
+    def is_enabled(self):
+        return current_app.config.get('RATELIMIT_ENABLED', True) and not current_app.testing
+
+    def pool_pressure(self):
+        """How far requests are queueing for DB connections (see PoolMetrics.pressure)"""
+        if self.pool_metrics is None:
+            return 0.0
+        return self.pool_metrics.pressure()
+
+    def record_rejection(self, route, reason):
+        try:
+            self.store.incr_counter(route, reason)
+        except Exception as e:
+            print(f"⚠️ Failed to record rate limit rejection: {e}")
+
+    def stats(self):
+        """Rejected request counters per route and reason"""
+        try:
+            return self.store.counters()
+        except Exception as e:
+            return {'error': str(e)}
+
+    def _identity(self, key):
+        ip = client_ip()
+        if key == 'ip':
+            return f'ip:{ip}'
+        if key == 'route':
+            return 'route'
+
+        # Per-user limits fall back to the client IP for anonymous requests
+        try:
+            verify_jwt_in_request(optional=True)
+            user_id = get_jwt_identity()
+        except Exception:
+            user_id = None
+        return f'user:{user_id}' if user_id else f'ip:{ip}'
+
+    def limit(self, rate, burst=None, key='user', shed=True):
+        """Decorator applying a token bucket keyed by route and user, IP or route"""
+        tokens_per_second = parse_rate(rate)
+        bucket_size = burst if burst is not None else max(1, int(round(tokens_per_second * 60)))
+
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if not self.is_enabled():
+                    return f(*args, **kwargs)
+
+                route = request.endpoint or request.path
+
+                if shed and self.pool_pressure() >= self.shed_threshold:
+                    self.record_rejection(route, 'shed')
+                    return self._reject(503, 'Server is busy, please retry shortly', self.shed_retry_after)
+
+                bucket_key = f'{route}:{self._identity(key)}'
+                try:
+                    allowed, retry_after = self.store.take(bucket_key, tokens_per_second, bucket_size)
+                except Exception as e:
+                    # Never fail requests because the limiter backend is down
+                    print(f"⚠️ Rate limiter error: {e}")
+                    allowed, retry_after = True, 0
+
+                if not allowed:
+                    self.record_rejection(route, 'rate_limited')
+                    return self._reject(429, 'Too many requests', retry_after)
+
+                return f(*args, **kwargs)
+
+            return decorated
+
+        return decorator
+
+    def _reject(self, status, message, retry_after):
+        retry_after = max(1, int(math.ceil(retry_after)))
+        response = jsonify({'error': message, 'retry_after': retry_after})
+        response.headers['Retry-After'] = str(retry_after)
+        return response, status
+
+rate_limiter = RateLimiter()
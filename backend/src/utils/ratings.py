@@ -0,0 +1,83 @@
+from sqlalchemy import func, update, case
+from src.models import db, as_uuid
+from src.models.user import ServiceProviderProfile
+from src.models.service import BookingReview
+from src.utils.aggregates import supports_aggregate_filter, count_where
+
+STARS = range(1, 6)
+
+def _average(rating_sum, review_count):
+    """Average rating expression/value rounded to the column's 2 decimals"""
+    return func.round(rating_sum * 1.0 / review_count, 2)
+
+def apply_provider_rating(provider_id, rating, sign=1):
+    """Add (or with sign=-1 remove) one review's rating in a single UPDATE
+
+    Runs in the caller's transaction. The database increments the counters
+    from the row's current values, so concurrent reviews never lose updates
+    and the cost does not depend on how many reviews the provider has.
+    """
+    if rating not in STARS:
+        raise ValueError('Rating must be between 1 and 5')
+
+    profile = ServiceProviderProfile
+    new_sum = func.coalesce(profile.rating_sum, 0) + sign * rating
+    new_count = func.coalesce(profile.total_reviews, 0) + sign
+    star_column = getattr(profile, f'rating_count_{rating}')
+    average = case((new_count > 0, _average(new_sum, new_count)), else_=0)
+
+    db.session.execute(
+        update(profile)
+        .where(profile.id == as_uuid(provider_id))
+        .values({
+            profile.rating_sum: new_sum,
+            profile.total_reviews: new_count,
+            star_column: func.coalesce(star_column, 0) + sign,
+            profile.average_rating: average,
+            profile.rating: average
+        })
+        .execution_options(synchronize_session=False)
+    )
+
+def reconcile_provider_ratings(provider_ids=None):
+    """Rebuild rating aggregates from booking_reviews; returns providers updated
+
+    Runs in the caller's transaction. Providers without reviews are reset to zero.
+    """
+    use_filter = supports_aggregate_filter(db.engine)
+    query = db.session.query(
+        BookingReview.provider_id,
+        func.count(BookingReview.id).label('review_count'),
+        func.coalesce(func.sum(BookingReview.rating), 0).label('rating_sum'),
+        *[count_where(BookingReview.rating == stars, use_filter).label(f'count_{stars}') for stars in STARS]
+    ).group_by(BookingReview.provider_id)
+
+    reset = update(ServiceProviderProfile)
+    if provider_ids:
+        query = query.filter(BookingReview.provider_id.in_([str(pid) for pid in provider_ids]))
+        reset = reset.where(ServiceProviderProfile.id.in_([as_uuid(pid) for pid in provider_ids]))
+
+    db.session.execute(
+        reset.values(
+            rating_sum=0, total_reviews=0, average_rating=0, rating=0,
+            **{f'rating_count_{stars}': 0 for stars in STARS}
+        ).execution_options(synchronize_session=False)
+    )
+
+    updated = 0
+    for row in query.all():
+        average = round(row.rating_sum / row.review_count, 2) if row.review_count else 0
+        result = db.session.execute(
+            update(ServiceProviderProfile)
+            .where(ServiceProviderProfile.id == as_uuid(row.provider_id))
+            .values(
+                rating_sum=int(row.rating_sum),
+                total_reviews=row.review_count,
+                average_rating=average,
+                rating=average,
+                **{f'rating_count_{stars}': int(getattr(row, f'count_{stars}') or 0) for stars in STARS}
+            )
+            .execution_options(synchronize_session=False)
+        )
+        updated += result.rowcount
+    return updated
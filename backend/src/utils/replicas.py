@@ -0,0 +1,252 @@
+import itertools
+import threading
+import time
+from flask import g, request, current_app, has_request_context
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from sqlalchemy import create_engine, event, text
+from src.models import db
+from src.utils.db_engine import engine_options
+from src.utils.proxy import client_ip
+
+READ_METHODS = ('GET', 'HEAD')
+STICKY_PREFIX = 'replica-sticky:'
+
+# Seconds the replica is behind; 0 on a primary or when replay has caught up with what was received
+PG_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+def read_only(f):
+    """Mark a non-GET endpoint as safe to serve from a replica"""
+    f.db_route = 'replica'
+    return f
+
+def use_primary(f):
+    """Keep a GET endpoint on the primary (it must see the latest writes)"""
+    f.db_route = 'primary'
+    return f
+
+class MemoryStickyStore:
+    """Per-worker read-your-writes windows"""
+
+    def __init__(self):
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def mark(self, identity, seconds):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._until) > 10000:
+                self._until = {key: until for key, until in self._until.items() if until > now}
+            self._until[identity] = now + seconds
+
+    def is_sticky(self, identity):
+        return self._until.get(identity, 0) > time.monotonic()
+
+class RedisStickyStore:
+    """Read-your-writes windows shared by every worker"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def mark(self, identity, seconds):
+        self.client.set(STICKY_PREFIX + identity, 1, ex=max(1, int(seconds)))
+
+    def is_sticky(self, identity):
+        return bool(self.client.exists(STICKY_PREFIX + identity))
+
+class ReplicaState:
+    """Health of one replica as of its last check"""
+    __slots__ = ('key', 'healthy', 'lag_seconds', 'checked_at', 'error', 'reads')
+
+    def __init__(self, key):
+        self.key = key
+        self.healthy = False
+        self.lag_seconds = None
+        self.checked_at = 0.0
+        self.error = None
+        self.reads = 0
+
+    def to_dict(self):
+        return {
+            'key': self.key,
+            'healthy': self.healthy,
+            'lag_seconds': self.lag_seconds,
+            'error': self.error,
+            'reads': self.reads
+        }
+
+class ReplicaRouter:
+    """Routes read-only requests to healthy replicas
+
+    GET/HEAD requests and endpoints marked @read_only read from a replica
+    (round robin); flushes, DML and SELECT ... FOR UPDATE always go to the
+    primary. A client that committed a write stays on the primary for
+    REPLICA_STICKY_SECONDS so it reads its own writes. Replicas are checked
+    at most every REPLICA_CHECK_INTERVAL seconds and skipped while down or
+    more than REPLICA_MAX_LAG seconds behind; a disconnect marks one down
+    immediately.
+    """
+
+    def __init__(self):
+        self.max_lag = 5.0
+        self.check_interval = 5.0
+        self.sticky_seconds = 10
+        self.sticky = MemoryStickyStore()
+        self.replicas = {}
+        self.engines = {}
+        self._cycle = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_lag = app.config.get('REPLICA_MAX_LAG', 5.0)
+        self.check_interval = app.config.get('REPLICA_CHECK_INTERVAL', 5.0)
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 10)
+        self.sticky = self._create_store(app.config.get('REPLICA_STICKY_URL'))
+        for engine in self.engines.values():
+            engine.dispose()
+        # Each replica gets the engine profile its own URL calls for
+        replica_config = dict(app.config, DB_PROFILE=None)
+        self.engines = {
+            f'replica_{i}': create_engine(url, **engine_options(url, replica_config))
+            for i, url in enumerate(app.config.get('DATABASE_REPLICA_URLS') or [])
+        }
+        self.replicas = {key: ReplicaState(key) for key in self.engines}
+        self._cycle = itertools.cycle(list(self.engines)) if self.engines else None
+        if not self.engines:
+            return
+
+        app.extensions['replica_router'] = self
+        app.before_request(self._choose_route)
+        for key, engine in self.engines.items():
+            event.listen(engine, 'handle_error', self._on_error_for(key))
+        if not event.contains(db.session, 'after_commit', self._on_commit):
+            event.listen(db.session, 'after_flush', self._on_flush)
+            event.listen(db.session, 'after_commit', self._on_commit)
+            event.listen(db.session, 'after_rollback', self._on_rollback)
+
+    def _create_store(self, url):
+        if not url or not url.startswith(('redis://', 'rediss://')):
+            return MemoryStickyStore()
+        try:
+            import redis
+            client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+            client.ping()
+            return RedisStickyStore(client)
+        except Exception as e:
+            print(f"⚠️ Replica stickiness is per worker only: {e}")
+            return MemoryStickyStore()
+
+    def _identity(self):
+        try:
+            verify_jwt_in_request(optional=True)
+            user_id = get_jwt_identity()
+        except Exception:
+            user_id = None
+        if user_id:
+            return f'user:{user_id}'
+        ip = client_ip()
+        return f'ip:{ip}'
+
+    def _wants_replica(self):
+        view = current_app.view_functions.get(request.endpoint)
+        marked = getattr(view, 'db_route', None)
+        if marked is not None:
+            return marked == 'replica'
+        return request.method in READ_METHODS
+
+    def _choose_route(self):
+        g.db_replica = None
+        db.session.info.pop('replica_off', None)
+        if not self._wants_replica():
+            return
+        try:
+            if self.sticky.is_sticky(self._identity()):
+                return
+        except Exception as e:
+            print(f"⚠️ Replica stickiness check failed, using primary: {e}")
+            return
+        g.db_replica = self.pick()
+
+    def pick(self):
+        """Key of the next healthy replica, or None to use the primary"""
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                key = next(self._cycle)
+            state = self.replicas[key]
+            if time.monotonic() - state.checked_at >= self.check_interval:
+                self.check(key)
+            if state.healthy:
+                return key
+        return None
+
+    def check(self, key):
+        """Refresh one replica's health and lag"""
+        state = self.replicas[key]
+        state.checked_at = time.monotonic()
+        try:
+            engine = self.engines[key]
+            with engine.connect() as conn:
+                if engine.dialect.name == 'postgresql':
+                    lag = float(conn.execute(PG_LAG_SQL).scalar() or 0)
+                else:
+                    conn.execute(text('SELECT 1'))
+                    lag = 0.0
+            state.lag_seconds = round(lag, 3)
+            state.healthy = lag <= self.max_lag
+            state.error = None if state.healthy else f'lagging {lag:.1f}s behind'
+        except Exception as e:
+            state.healthy = False
+            state.error = str(e)
+            print(f"⚠️ Replica {key} unavailable, reading from primary: {e}")
+        return state
+
+    def engine_for(self, session, clause=None):
+        """Replica engine for this statement, or None for the primary"""
+        if not has_request_context():
+            return None
+        key = g.get('db_replica')
+        if key is None:
+            return None
+        if session._flushing or session.info.get('replica_off'):
+            return None
+        if clause is not None and (getattr(clause, 'is_dml', False)
+                                   or getattr(clause, '_for_update_arg', None) is not None):
+            # Locking reads and writes belong on the primary; so does the rest of this request
+            session.info['replica_off'] = True
+            return None
+        self.replicas[key].reads += 1
+        return self.engines[key]
+
+    def _on_error_for(self, key):
+        def on_error(context):
+            if context.is_disconnect:
+                self.replicas[key].healthy = False
+                self.replicas[key].error = str(context.original_exception)
+        return on_error
+
+    def _on_flush(self, session, flush_context):
+        session.info['replica_off'] = True
+        session.info['replica_wrote'] = True
+
+    def _on_commit(self, session):
+        if session.info.pop('replica_wrote', False) and has_request_context():
+            try:
+                self.sticky.mark(self._identity(), self.sticky_seconds)
+            except Exception as e:
+                print(f"⚠️ Failed to mark replica stickiness: {e}")
+
+    def _on_rollback(self, session):
+        session.info.pop('replica_wrote', None)
+
+    def stats(self):
+        return {
+            'max_lag_seconds': self.max_lag,
+            'sticky_seconds': self.sticky_seconds,
+            'replicas': [state.to_dict() for state in self.replicas.values()]
+        }
+
+replica_router = ReplicaRouter()
@@ -0,0 +1,134 @@
+import glob
+import json
+import os
+import random
+import threading
+import time
+from flask import g, request
+
+# Values kept verbatim (enums, paging and search knobs); everything else is reduced to its type
+SAFE_VALUE_KEYS = frozenset({
+    'status', 'booking_status', 'user_type', 'payment_method', 'payment_status', 'address_type',
+    'preferred_language', 'language', 'lang', 'page', 'per_page', 'limit', 'radius', 'radius_km',
+    'max_distance_km', 'days', 'period', 'sort', 'sort_by', 'order', 'include_total', 'format',
+    'rating', 'quantity', 'duration_hours',
+})
+
+def value_shape(value, key=None):
+    """A payload with its values replaced by type markers (<str>, <int>, <float>)
+
+    Booleans, nulls and the values of SAFE_VALUE_KEYS are kept; dicts keep
+    their keys and lists keep their length with the first item's shape.
+    """
+    if isinstance(value, dict):
+        return {k: value_shape(v, k) for k, v in value.items()}
+    if isinstance(value, list):
+        if not value:
+            return []
+        return {'<list>': value_shape(value[0], key), 'length': len(value)}
+    if value is None or isinstance(value, bool):
+        return value
+    if key in SAFE_VALUE_KEYS and (isinstance(value, (int, float)) or (isinstance(value, str) and len(value) <= 32)):
+        return value
+    if isinstance(value, int):
+        return '<int>'
+    if isinstance(value, float):
+        return '<float>'
+    return '<str>'
+
+class RequestRecorder:
+    """Sanitized request log for traffic replay (benchmarks/replay_traffic.py)
+
+    Each worker appends JSON lines to REQUEST_LOG_DIR/requests-<pid>.jsonl:
+    the route template, path/query/body shapes (no ids, text or locations),
+    the caller's role, the status and the server time. Off unless
+    REQUEST_LOG_DIR is set; REQUEST_LOG_SAMPLE_RATE keeps a fraction.
+    """
+
+    def __init__(self):
+        self.directory = None
+        self.sample_rate = 1.0
+        self._file = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.directory = app.config.get('REQUEST_LOG_DIR')
+        self.sample_rate = app.config.get('REQUEST_LOG_SAMPLE_RATE', 1.0)
+        self.close()
+        app.extensions['request_recorder'] = self
+        if not self.directory or self.sample_rate <= 0:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._start_request)
+        app.after_request(self._record_request)
+
+    def _start_request(self):
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            request.environ['request_log.started'] = (time.time(), time.perf_counter())
+
+    def _record_request(self, response):
+        started = request.environ.pop('request_log.started', None)
+        if started is None or request.url_rule is None or request.method == 'OPTIONS':
+            return response
+        ts, t0 = started
+        self.write(self.entry(ts, (time.perf_counter() - t0) * 1000, response.status_code))
+        return response
+
+    def entry(self, ts, duration_ms, status):
+        """The log line for the current request"""
+        user = g.get('current_user')
+        body = None
+        if request.is_json:
+            body = value_shape(request.get_json(silent=True))
+        elif request.files or request.form:
+            body = {'<form>': value_shape(request.form.to_dict()), 'files': sorted(request.files)}
+        return {
+            'ts': round(ts, 3),
+            'method': request.method,
+            'route': request.url_rule.rule,
+            'endpoint': request.endpoint,
+            'role': user.user_type if user is not None else None,
+            'args': value_shape(request.view_args or {}),
+            'query': value_shape(request.args.to_dict()),
+            'body': body,
+            'status': status,
+            'duration_ms': round(duration_ms, 2),
+        }
+
+    def write(self, entry):
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self._file is None or self._pid != os.getpid():
+                # Opened lazily so every forked worker appends to its own file
+                self._pid = os.getpid()
+                self._file = open(os.path.join(self.directory, f'requests-{self._pid}.jsonl'), 'a', buffering=1)
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None and self._pid == os.getpid():
+                self._file.close()
+            self._file = None
+            self._pid = None
+
+request_recorder = RequestRecorder()
+
+def load_request_logs(paths):
+    """Entries from log files or directories of them, oldest first"""
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(os.path.join(path, 'requests-*.jsonl'))) if os.path.isdir(path) else [path])
+    entries = []
+    for path in files:
+        with open(path) as handle:
+            for line in handle:
+                line = line.strip()
+                if line:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # A worker killed mid-write leaves a partial last line
+                        continue
+    entries.sort(key=lambda entry: entry['ts'])
+    return entries
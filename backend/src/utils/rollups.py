@@ -0,0 +1,207 @@
+from datetime import datetime, date
+from sqlalchemy import func, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models import db
+from src.models.analytics import BookingDailyRollup
+from src.models.service import Booking, BookingReview, Service
+
+KEY_COLUMNS = ('day', 'service_id', 'category_id', 'provider_id', 'governorate', 'booking_status')
+MEASURES = ('booking_count', 'gross_amount', 'commission_amount', 'provider_earnings', 'rating_sum', 'rating_count')
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+def rollup_key(booking, status=None, provider_id=None, category_id=None):
+    """Rollup key of a booking (day of creation x service x category x provider x governorate x status)"""
+    if category_id is None:
+        service = booking.service or Service.query.get(booking.service_id)
+        category_id = service.category_id if service else ''
+    address = booking.service_address if isinstance(booking.service_address, dict) else {}
+
+    return {
+        'day': _as_date(booking.created_at or datetime.utcnow()),
+        'service_id': str(booking.service_id),
+        'category_id': str(category_id or ''),
+        'provider_id': str(provider_id if provider_id is not None else (booking.provider_id or '')),
+        'governorate': str(address.get('governorate') or '')[:100],
+        'booking_status': status or booking.booking_status or 'pending'
+    }
+
+def booking_measures(booking, sign=1):
+    return {
+        'booking_count': sign,
+        'gross_amount': sign * (booking.total_amount or 0),
+        'commission_amount': sign * (booking.platform_commission or 0),
+        'provider_earnings': sign * (booking.provider_earnings or 0)
+    }
+
+def apply_rollup_delta(key, deltas):
+    """Add deltas to one rollup row inside the caller's transaction (upsert)"""
+    table = BookingDailyRollup.__table__
+    values = dict(key)
+    for measure in MEASURES:
+        values[measure] = deltas.get(measure, 0)
+    values['updated_at'] = datetime.utcnow()
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = pg_insert if dialect == 'postgresql' else sqlite_insert
+        stmt = insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(KEY_COLUMNS),
+            set_={
+                **{m: table.c[m] + stmt.excluded[m] for m in MEASURES},
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        db.session.execute(stmt)
+        return
+
+    # Portable fallback for dialects without ON CONFLICT
+    match = and_(*[table.c[col] == key[col] for col in KEY_COLUMNS])
+    result = db.session.execute(
+        table.update().where(match).values(
+            **{m: table.c[m] + values[m] for m in MEASURES},
+            updated_at=values['updated_at']
+        )
+    )
+    if result.rowcount == 0:
+        db.session.execute(table.insert().values(**values))
+
+def record_booking_created(booking, category_id=None):
+    """Count a newly created booking (call after flush so created_at is set)"""
+    apply_rollup_delta(rollup_key(booking, category_id=category_id), booking_measures(booking))
+
+def record_booking_transition(booking, old_status, new_status, previous_provider_id=None, category_id=None):
+    """Move a booking between rollup rows when its status (or provider) changes"""
+    old_key = rollup_key(booking, status=old_status, provider_id=previous_provider_id, category_id=category_id)
+    new_key = rollup_key(booking, status=new_status, category_id=old_key['category_id'])
+    if old_key == new_key:
+        return
+
+    old_deltas = booking_measures(booking, sign=-1)
+    new_deltas = booking_measures(booking)
+
+    # Ratings travel with the booking (e.g. completed -> disputed)
+    if old_status == 'completed' and booking.reviews:
+        rating_sum = sum(review.rating for review in booking.reviews)
+        old_deltas.update({'rating_sum': -rating_sum, 'rating_count': -len(booking.reviews)})
+        new_deltas.update({'rating_sum': rating_sum, 'rating_count': len(booking.reviews)})
+
+    apply_rollup_delta(old_key, old_deltas)
+    apply_rollup_delta(new_key, new_deltas)
+
+def record_booking_transitions(moved, new_status):
+    """Bulk record_booking_transition for [(booking row, old_status)] from a set-based update
+
+    Rows carry category_id. Deltas are summed per rollup row first, so a bulk
+    move costs one upsert per distinct rollup row rather than two per booking.
+    """
+    completed_ids = [row.id for row, old_status in moved if old_status == 'completed']
+    ratings = {}
+    if completed_ids:
+        ratings = {
+            booking_id: (rating_sum, rating_count)
+            for booking_id, rating_sum, rating_count in db.session.query(
+                BookingReview.booking_id, func.sum(BookingReview.rating), func.count(BookingReview.id)
+            ).filter(BookingReview.booking_id.in_(completed_ids)).group_by(BookingReview.booking_id)
+        }
+
+    totals = {}
+    def add(key, deltas):
+        entry = totals.setdefault(tuple(key.items()), {})
+        for measure, value in deltas.items():
+            entry[measure] = entry.get(measure, 0) + value
+
+    for row, old_status in moved:
+        old_key = rollup_key(row, status=old_status, category_id=row.category_id)
+        new_key = rollup_key(row, status=new_status, category_id=row.category_id)
+        if old_key == new_key:
+            continue
+        old_deltas = booking_measures(row, sign=-1)
+        new_deltas = booking_measures(row)
+        if row.id in ratings:
+            rating_sum, rating_count = ratings[row.id]
+            old_deltas.update({'rating_sum': -rating_sum, 'rating_count': -rating_count})
+            new_deltas.update({'rating_sum': rating_sum, 'rating_count': rating_count})
+        add(old_key, old_deltas)
+        add(new_key, new_deltas)
+
+    for key, deltas in totals.items():
+        apply_rollup_delta(dict(key), deltas)
+
+def record_booking_review(booking, rating):
+    """Add a review's rating to the booking's rollup row"""
+    apply_rollup_delta(rollup_key(booking), {'rating_sum': rating, 'rating_count': 1})
+
+def rebuild_booking_rollups(since=None):
+    """Recompute rollups from bookings and reviews, for all days or from ``since`` on
+
+    Runs in the caller's transaction; returns the number of rollup rows written.
+    """
+    day = func.date(Booking.created_at)
+    governorate = func.coalesce(Booking.service_address['governorate'].as_string(), '')
+    group_columns = [
+        day.label('day'),
+        Booking.service_id.label('service_id'),
+        func.coalesce(Service.category_id, '').label('category_id'),
+        func.coalesce(Booking.provider_id, '').label('provider_id'),
+        governorate.label('governorate'),
+        func.coalesce(Booking.booking_status, 'pending').label('booking_status')
+    ]
+    group_by = [column.element for column in group_columns]
+
+    booking_rows = db.session.query(
+        *group_columns,
+        func.count(Booking.id).label('booking_count'),
+        func.coalesce(func.sum(Booking.total_amount), 0).label('gross_amount'),
+        func.coalesce(func.sum(Booking.platform_commission), 0).label('commission_amount'),
+        func.coalesce(func.sum(Booking.provider_earnings), 0).label('provider_earnings')
+    ).outerjoin(Service, Service.id == Booking.service_id)
+
+    rating_rows = db.session.query(
+        *group_columns,
+        func.sum(BookingReview.rating).label('rating_sum'),
+        func.count(BookingReview.id).label('rating_count')
+    ).select_from(BookingReview).join(Booking, Booking.id == BookingReview.booking_id).outerjoin(
+        Service, Service.id == Booking.service_id
+    )
+
+    if since is not None:
+        since_dt = datetime.combine(since, datetime.min.time())
+        booking_rows = booking_rows.filter(Booking.created_at >= since_dt)
+        rating_rows = rating_rows.filter(Booking.created_at >= since_dt)
+
+    rollups = {}
+    for row in booking_rows.group_by(*group_by):
+        key = tuple(_as_date(row.day) if col == 'day' else str(getattr(row, col))[:100] for col in KEY_COLUMNS)
+        rollups[key] = {
+            'booking_count': row.booking_count,
+            'gross_amount': row.gross_amount,
+            'commission_amount': row.commission_amount,
+            'provider_earnings': row.provider_earnings,
+            'rating_sum': 0,
+            'rating_count': 0
+        }
+
+    for row in rating_rows.group_by(*group_by):
+        key = tuple(_as_date(row.day) if col == 'day' else str(getattr(row, col))[:100] for col in KEY_COLUMNS)
+        if key in rollups:
+            rollups[key]['rating_sum'] = int(row.rating_sum or 0)
+            rollups[key]['rating_count'] = row.rating_count
+
+    delete = BookingDailyRollup.__table__.delete()
+    if since is not None:
+        delete = delete.where(BookingDailyRollup.day >= since)
+    db.session.execute(delete)
+
+    now = datetime.utcnow()
+    rows = [dict(zip(KEY_COLUMNS, key), updated_at=now, **measures) for key, measures in rollups.items()]
+    if rows:
+        db.session.execute(BookingDailyRollup.__table__.insert(), rows)
+    return len(rows)
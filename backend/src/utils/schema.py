@@ -0,0 +1,74 @@
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateIndex
+
+class SchemaReport:
+    """Differences between the live database and the models"""
+
+    def __init__(self):
+        self.missing_tables = []
+        self.missing_columns = []
+        self.missing_indexes = []
+        self.unexpected_columns = []
+
+    @property
+    def ok(self):
+        return not (self.missing_tables or self.missing_columns or self.missing_indexes)
+
+    def to_dict(self):
+        return {
+            'ok': self.ok,
+            'missing_tables': self.missing_tables,
+            'missing_columns': [f'{table}.{column}' for table, column in self.missing_columns],
+            'missing_indexes': [index.name for index in self.missing_indexes],
+            'unexpected_columns': [f'{table}.{column}' for table, column in self.unexpected_columns]
+        }
+
+def _applies_to(index, dialect_name):
+    # Indexes declared with .ddl_if(dialect=...) only exist on that dialect
+    ddl_if = getattr(index, '_ddl_if', None)
+    if ddl_if is None or ddl_if.dialect is None:
+        return True
+    dialects = (ddl_if.dialect,) if isinstance(ddl_if.dialect, str) else ddl_if.dialect
+    return dialect_name in dialects
+
+def verify_schema(engine, metadata):
+    """Compare tables, columns and indexes in the live database against the models
+
+    An index counts as present when one with the same name or the same
+    columns exists (unique constraints included, as their backing index
+    serves the same lookups).
+    """
+    inspector = inspect(engine)
+    report = SchemaReport()
+    live_tables = set(inspector.get_table_names())
+
+    for table in metadata.sorted_tables:
+        if table.name not in live_tables:
+            report.missing_tables.append(table.name)
+            continue
+
+        live_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        report.missing_columns.extend((table.name, column.name) for column in table.columns
+                                      if column.name not in live_columns)
+        report.unexpected_columns.extend((table.name, column) for column in sorted(live_columns)
+                                         if column not in table.columns)
+
+        live_indexes = inspector.get_indexes(table.name) + inspector.get_unique_constraints(table.name)
+        live_names = {index['name'] for index in live_indexes}
+        live_column_sets = {tuple(index['column_names']) for index in live_indexes}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if not _applies_to(index, engine.dialect.name):
+                continue
+            if index.name in live_names or tuple(column.name for column in index.columns) in live_column_sets:
+                continue
+            report.missing_indexes.append(index)
+
+    return report
+
+def create_index_sql(index, engine):
+    """DDL to build a missing index (CONCURRENTLY on Postgres)"""
+    sql = str(CreateIndex(index).compile(dialect=engine.dialect)).strip()
+    if engine.dialect.name == 'postgresql':
+        sql = sql.replace('CREATE INDEX ', 'CREATE INDEX CONCURRENTLY IF NOT EXISTS ', 1)
+        sql = sql.replace('CREATE UNIQUE INDEX ', 'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ', 1)
+    return sql + ';'
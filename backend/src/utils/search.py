@@ -0,0 +1,255 @@
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from sqlalchemy import event, case, false, or_, func, DDL
+from src.models import db
+from src.models.user import User, ServiceProviderProfile
+from src.utils.auth import normalize_phone
+
+# Arabic letter variants folded to one form so spelling differences still match
+ARABIC_FOLDING = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي', 'ؤ': 'و',
+    'ة': 'ه',
+    '\u0640': None  # tatweel
+})
+ARABIC_DIACRITICS = re.compile('[\u064B-\u0652\u0670]')
+PHONE_QUERY = re.compile(r'^\+?[\d\s\-()]{3,}$')
+
+# Mirrors pg_trgm's default word_similarity_threshold
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+def normalize_search_text(text):
+    """Lowercase, fold Arabic letter variants, strip diacritics and collapse spaces"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKC', str(text)).lower()
+    text = ARABIC_DIACRITICS.sub('', text).translate(ARABIC_FOLDING)
+    return ' '.join(text.split())
+
+def phone_search_key(phone):
+    """Digits of the canonical +20 form, so 010..., +2010... and 2010... share one key"""
+    if not phone:
+        return ''
+    digits = re.sub(r'\D', '', unicodedata.normalize('NFKC', phone))
+    if not digits:
+        return ''
+    return re.sub(r'\D', '', normalize_phone(digits))
+
+def normalize_search_query(term):
+    """Normalize an admin search box query the same way stored search text is built"""
+    term = unicodedata.normalize('NFKC', term or '').strip()
+    if PHONE_QUERY.match(term):
+        digits = re.sub(r'\D', '', term)
+        # Only canonicalize full-prefix numbers; a digit fragment is searched as typed
+        if digits.startswith(('0020', '20', '01')):
+            return phone_search_key(digits)
+        return digits
+    return normalize_search_text(term)
+
+def user_search_text(user):
+    return ' '.join(filter(None, [normalize_search_text(user.email), phone_search_key(user.phone)]))
+
+def provider_search_text(provider):
+    return ' '.join(filter(None, [
+        normalize_search_text(provider.first_name),
+        normalize_search_text(provider.last_name),
+        normalize_search_text(provider.business_name)
+    ]))
+
+SEARCHABLE = {
+    User: user_search_text,
+    ServiceProviderProfile: provider_search_text
+}
+
+def trigrams(text):
+    """pg_trgm-style trigrams: each word padded with two leading spaces and one trailing"""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def word_similarity(term, text):
+    """Best trigram similarity between the query and any word of the text"""
+    term_grams = trigrams(term)
+    if not term_grams:
+        return 0.0
+    best = 0.0
+    for word in text.split():
+        word_grams = trigrams(word)
+        best = max(best, len(term_grams & word_grams) / len(term_grams | word_grams))
+    return best
+
+def match_rank(term, text):
+    """Rank shared by both backends: word prefix > substring > fuzzy similarity"""
+    rank = word_similarity(term, text)
+    if term in text:
+        rank += 0.5
+        if text.startswith(term) or f' {term}' in text:
+            rank += 1.0
+    return rank
+
+class NgramIndex:
+    """In-process trigram index over search_text for databases without pg_trgm
+
+    Built lazily per model on first search and kept current from committed
+    session changes. Intended for SQLite development and tests; with several
+    worker processes each keeps its own copy.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._texts = {}
+        self._postings = {}
+
+    def _grams(self, text):
+        # Padded word trigrams for fuzzy matches, raw trigrams for substrings
+        raw = {text[i:i + 3] for i in range(len(text) - 2)}
+        return trigrams(text) | raw
+
+    def _ensure_built(self, model):
+        if model in self._texts:
+            return
+        texts, postings = {}, defaultdict(set)
+        build = SEARCHABLE[model]
+        for row in db.session.query(model).yield_per(1000):
+            text = row.search_text or build(row)
+            texts[row.id] = text
+            for gram in self._grams(text):
+                postings[gram].add(row.id)
+        self._texts[model] = texts
+        self._postings[model] = postings
+
+    def update(self, model, row_id, text):
+        with self._lock:
+            if model not in self._texts:
+                return
+            self.remove(model, row_id)
+            self._texts[model][row_id] = text
+            for gram in self._grams(text):
+                self._postings[model][gram].add(row_id)
+
+    def remove(self, model, row_id):
+        with self._lock:
+            if model not in self._texts:
+                return
+            old = self._texts[model].pop(row_id, None)
+            if old is None:
+                return
+            for gram in self._grams(old):
+                self._postings[model][gram].discard(row_id)
+
+    def search(self, model, term):
+        """Return {id: rank} for rows matching the normalized term"""
+        with self._lock:
+            self._ensure_built(model)
+            texts = self._texts[model]
+            if len(term) < 3:
+                candidates = texts.keys()
+            else:
+                candidates = set()
+                for gram in self._grams(term):
+                    candidates |= self._postings[model].get(gram, set())
+
+            matches = {}
+            for row_id in candidates:
+                text = texts[row_id]
+                if term in text or word_similarity(term, text) >= WORD_SIMILARITY_THRESHOLD:
+                    matches[row_id] = match_rank(term, text)
+            return matches
+
+    def clear(self):
+        with self._lock:
+            self._texts.clear()
+            self._postings.clear()
+
+class SearchIndex:
+    """Ranked admin search over users and providers
+
+    On Postgres this filters and ranks with pg_trgm (GIN-indexed LIKE and
+    word similarity on search_text); elsewhere it uses the in-process NgramIndex.
+    """
+
+    def __init__(self):
+        self.ngrams = NgramIndex()
+        self._listening = False
+
+    def init_app(self, app):
+        app.extensions['search_index'] = self
+        if self._listening:
+            return
+        for model, build in SEARCHABLE.items():
+            def set_search_text(mapper, connection, target, build=build):
+                target.search_text = build(target)
+            event.listen(model, 'before_insert', set_search_text)
+            event.listen(model, 'before_update', set_search_text)
+        event.listen(db.session, 'after_flush', self._collect_changes)
+        event.listen(db.session, 'after_commit', self._apply_changes)
+        event.listen(db.session, 'after_rollback', self._discard_changes)
+        self._listening = True
+
+    def _collect_changes(self, session, flush_context):
+        pending = session.info.setdefault('search_index_pending', [])
+        for obj in list(session.new) + list(session.dirty):
+            if type(obj) in SEARCHABLE:
+                pending.append((type(obj), obj.id, obj.search_text or SEARCHABLE[type(obj)](obj)))
+        for obj in session.deleted:
+            if type(obj) in SEARCHABLE:
+                pending.append((type(obj), obj.id, None))
+
+    def _apply_changes(self, session):
+        for model, row_id, text in session.info.pop('search_index_pending', []):
+            if text is None:
+                self.ngrams.remove(model, row_id)
+            else:
+                self.ngrams.update(model, row_id, text)
+
+    def _discard_changes(self, session):
+        session.info.pop('search_index_pending', None)
+
+    def apply(self, query, model, search):
+        """Filter a query to rows matching ``search``; returns (query, rank expression)"""
+        term = normalize_search_query(search)
+        if not term:
+            return query, None
+
+        if db.session.get_bind().dialect.name == 'postgresql':
+            column = model.search_text
+            escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            contains = column.like(f'%{escaped}%', escape='\\')
+            word_prefix = or_(column.like(f'{escaped}%', escape='\\'), column.like(f'% {escaped}%', escape='\\'))
+            rank = (
+                func.word_similarity(term, column)
+                + case((contains, 0.5), else_=0.0)
+                + case((word_prefix, 1.0), else_=0.0)
+            )
+            return query.filter(or_(contains, column.op('%>')(term))), rank
+
+        matches = self.ngrams.search(model, term)
+        if not matches:
+            return query.filter(false()), None
+        return query.filter(model.id.in_(list(matches))), case(matches, value=model.id, else_=0.0)
+
+    def reindex(self, batch_size=1000):
+        """Recompute stored search_text for every searchable row; returns rows updated"""
+        updated = 0
+        for model, build in SEARCHABLE.items():
+            for row in db.session.query(model).yield_per(batch_size):
+                text = build(row)
+                if row.search_text != text:
+                    row.search_text = text
+                    updated += 1
+            db.session.flush()
+        self.ngrams.clear()
+        return updated
+
+search_index = SearchIndex()
+
+# Trigram operators and GIN opclasses come from the pg_trgm extension
+event.listen(
+    db.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from src.models import db
+from src.models.service import Booking, booking_state_machine
+from src.utils.rollups import record_booking_transitions
+
+STALE_STATUSES = ('pending', 'confirmed')
+EXPIRY_REASON = 'Expired: scheduled date passed before work started'
+# pg_try_advisory_xact_lock key, so only one worker sweeps at a time
+SWEEP_LOCK_KEY = 0x5357454550
+
+class SweepRun:
+    """Outcome of one sweeper run"""
+    __slots__ = ('started_at', 'duration_ms', 'swept', 'batches', 'skipped')
+
+    def __init__(self, started_at, duration_ms, swept, batches, skipped=False):
+        self.started_at = started_at
+        self.duration_ms = duration_ms
+        self.swept = swept
+        self.batches = batches
+        self.skipped = skipped
+
+    def to_dict(self):
+        return {
+            'started_at': self.started_at.isoformat(),
+            'duration_ms': round(self.duration_ms, 2),
+            'swept': self.swept,
+            'batches': self.batches,
+            'skipped': self.skipped
+        }
+
+class StaleBookingSweeper:
+    """Cancels pending/confirmed bookings whose scheduled date passed long ago
+
+    Each run moves at most max_batches x batch_size bookings, oldest
+    scheduled first, through the booking state machine's set-based bulk
+    transition (one transaction per batch). Runs via `flask bookings sweep`
+    or, with BOOKING_SWEEP_INTERVAL set, on a background thread per worker.
+    """
+
+    def __init__(self):
+        self.batch_size = 200
+        self.max_batches = 10
+        self.grace = timedelta(minutes=120)
+        self.interval = 0
+        self.runs = deque(maxlen=50)
+        self.total_swept = 0
+        self._running = threading.Lock()
+        self._thread_pid = None
+
+    def init_app(self, app):
+        self.batch_size = app.config.get('BOOKING_SWEEP_BATCH_SIZE', 200)
+        self.max_batches = app.config.get('BOOKING_SWEEP_MAX_BATCHES', 10)
+        self.grace = timedelta(minutes=app.config.get('BOOKING_SWEEP_GRACE_MINUTES', 120))
+        self.interval = app.config.get('BOOKING_SWEEP_INTERVAL', 0)
+        app.extensions['booking_sweeper'] = self
+        if self.interval > 0:
+            app.before_request(lambda: self.start(app))
+
+    def start(self, app):
+        # Started on the first request so each forked (preloaded) worker runs its own thread
+        if self._thread_pid == os.getpid():
+            return
+        self._thread_pid = os.getpid()
+        threading.Thread(target=self._loop, args=(app,), name='booking-sweeper', daemon=True).start()
+
+    def _loop(self, app):
+        while True:
+            time.sleep(self.interval)
+            try:
+                with app.app_context():
+                    self.run()
+            except Exception as e:
+                print(f"⚠️ Stale booking sweep failed: {e}")
+
+    def _claim_sweep(self):
+        # Another worker holding the lock is already sweeping this round
+        if db.session.get_bind().dialect.name != 'postgresql':
+            return True
+        return bool(db.session.execute(text('SELECT pg_try_advisory_xact_lock(:key)'), {'key': SWEEP_LOCK_KEY}).scalar())
+
+    def run(self, now=None):
+        """Sweep overdue bookings in bounded batches; returns the SweepRun"""
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        cutoff = (now or started_at) - self.grace
+        swept = batches = 0
+        skipped = not self._running.acquire(blocking=False)
+
+        if not skipped:
+            try:
+                while batches < self.max_batches:
+                    if not self._claim_sweep():
+                        db.session.rollback()
+                        skipped = True
+                        break
+                    moved = booking_state_machine.bulk_transition(
+                        [Booking.booking_status.in_(STALE_STATUSES), Booking.scheduled_date < cutoff],
+                        'admin',
+                        'cancelled',
+                        reason=EXPIRY_REASON,
+                        limit=self.batch_size,
+                        order_by=(Booking.scheduled_date, Booking.id)
+                    )
+                    record_booking_transitions(moved, 'cancelled')
+                    db.session.commit()
+                    batches += 1
+                    swept += len(moved)
+                    if len(moved) < self.batch_size:
+                        break
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                self._running.release()
+
+        run = SweepRun(started_at, (time.perf_counter() - started) * 1000, swept, batches, skipped)
+        self.runs.append(run)
+        self.total_swept += swept
+        if swept:
+            print(f"🧹 Expired {swept} stale bookings in {run.duration_ms:.1f} ms ({batches} batches)")
+        return run
+
+    def stats(self):
+        runs = list(self.runs)
+        return {
+            'interval_seconds': self.interval,
+            'batch_size': self.batch_size,
+            'max_batches': self.max_batches,
+            'grace_minutes': int(self.grace.total_seconds() // 60),
+            'total_swept': self.total_swept,
+            'last_run': runs[-1].to_dict() if runs else None,
+            'recent_runs': [run.to_dict() for run in reversed(runs)]
+        }
+
+stale_booking_sweeper = StaleBookingSweeper()
@@ -0,0 +1,7 @@
+import pytest
+from src.utils.query_stats import assert_max_queries
+
+@pytest.fixture
+def query_budget():
+    """Assert a block stays within a query budget: `with query_budget(3): client.get(...)`"""
+    return assert_max_queries
@@ -55,8 +55,7 @@ class TestPasswordUtils:
         hashed = hash_password(password)
         
         assert hashed != password
-        assert len(hashed) > 50  # Werkzeug hashes are typically long
-        assert hashed.startswith('scrypt:')  # Werkzeug uses scrypt by default
+        assert hashed.startswith('$2b$')  # bcrypt, the scheme logins rehash to
     
     def test_verify_password_correct(self):
         """Test password verification with correct password."""
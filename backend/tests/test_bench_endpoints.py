@@ -0,0 +1,16 @@
+from benchmarks.bench_endpoints import create_bench_app, seed, run_suite, compare, load_baseline
+
+class TestHotEndpointQueryCounts:
+    """Test the hot endpoints against the recorded benchmark baseline."""
+
+    def test_no_scenario_runs_more_queries_than_its_baseline(self, tmp_path):
+        """Test every hot path answers as expected without adding queries per request."""
+        baseline = load_baseline()
+        app = create_bench_app(f"sqlite:///{tmp_path / 'bench.db'}")
+        # Same data set as the baseline (query counts follow list sizes), only a few requests each
+        data = seed(app, **baseline['data'], pending=5)
+
+        results = run_suite(app, data, iterations=3, warmup=2)
+
+        assert set(results) == set(baseline['scenarios'])
+        assert compare(results, baseline, check_latency=False) == []
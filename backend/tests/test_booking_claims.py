@@ -0,0 +1,151 @@
+import inspect
+import threading
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from flask import Flask
+from src.models import db
+from src.models.user import User, CustomerProfile, ServiceProviderProfile
+from src.models.service import ServiceCategory, Service, ProviderService, Booking, BookingStatusHistory
+from src.models import location  # noqa: F401 (mapped by User relationships)
+from src.utils.claims import claim_next_booking
+from src.routes.providers import claim_booking
+
+# Downtown Cairo; the far booking is in Alexandria
+CAIRO = (30.0444, 31.2357)
+ALEXANDRIA = (31.2001, 29.9187)
+PROVIDERS = 12
+OPEN_BOOKINGS = 8
+
+@pytest.fixture
+def claim_app(tmp_path):
+    """File-backed SQLite app seeded with open bookings and competing providers."""
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "claims.db"}',
+        SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 30, 'check_same_thread': False}}
+    )
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        category = ServiceCategory(name_ar='سباكة', name_en='Plumbing')
+        db.session.add(category)
+        db.session.flush()
+        offered = Service(category_id=category.id, name_ar='إصلاح', name_en='Repair', base_price=100)
+        other = Service(category_id=category.id, name_ar='تركيب', name_en='Install', base_price=100)
+        customer_user = User(email=f'{uuid.uuid4().hex}@example.com', user_type='customer', password_hash='!')
+        db.session.add_all([offered, other, customer_user])
+        db.session.flush()
+        customer = CustomerProfile(user_id=customer_user.id, first_name='Cu', last_name='Stomer')
+        db.session.add(customer)
+
+        providers = []
+        for index in range(PROVIDERS):
+            user = User(email=f'{uuid.uuid4().hex}@example.com', user_type='service_provider', password_hash='!')
+            db.session.add(user)
+            db.session.flush()
+            provider = ServiceProviderProfile(user_id=user.id, first_name='Pro', last_name=str(index),
+                                              verification_status='approved', service_radius=10)
+            db.session.add(provider)
+            db.session.flush()
+            db.session.add(ProviderService(provider_id=str(provider.id), service_id=offered.id))
+            providers.append((str(user.id), provider.id))
+        db.session.flush()
+
+        def book(service, position, minutes):
+            booking = Booking(
+                customer_id=str(customer.id), service_id=service.id, booking_status='pending',
+                scheduled_date=datetime.utcnow() + timedelta(minutes=minutes),
+                service_address={'governorate': 'Cairo'}, service_latitude=position[0], service_longitude=position[1],
+                total_amount=100, platform_commission=15, provider_earnings=85
+            )
+            db.session.add(booking)
+            return booking
+
+        nearby = [book(offered, (CAIRO[0] + i * 0.001, CAIRO[1]), 60 + i) for i in range(OPEN_BOOKINGS)]
+        far = book(offered, ALEXANDRIA, 30)
+        unoffered = book(other, CAIRO, 30)
+        db.session.commit()
+        ids = {'open': [b.id for b in nearby], 'far': far.id, 'unoffered': unoffered.id, 'providers': providers}
+
+    yield app, ids
+
+    with app.app_context():
+        db.drop_all()
+
+class TestBookingClaims:
+    """Test the SKIP LOCKED style claim queue."""
+
+    def test_concurrent_claims_never_double_assign(self, claim_app):
+        """Test racing providers each get a different booking and the surplus get none."""
+        app, ids = claim_app
+        barrier = threading.Barrier(PROVIDERS, timeout=30)
+        claimed, errors = [], []
+
+        def claim(user_id, provider_id):
+            try:
+                with app.app_context():
+                    provider = db.session.get(ServiceProviderProfile, provider_id)
+                    barrier.wait()
+                    booking = claim_next_booking(provider, *CAIRO, radius_km=10, changed_by=user_id)
+                    db.session.commit()
+                    claimed.append((booking.id if booking else None, str(provider_id)))
+            except Exception as e:
+                barrier.abort()
+                errors.append(e)
+
+        threads = [threading.Thread(target=claim, args=pair) for pair in ids['providers']]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        won = [booking_id for booking_id, _ in claimed if booking_id]
+        assert sorted(won) == sorted(ids['open'])
+        assert len(claimed) - len(won) == PROVIDERS - OPEN_BOOKINGS
+
+        with app.app_context():
+            for booking_id, provider_id in claimed:
+                if booking_id:
+                    booking = db.session.get(Booking, booking_id)
+                    assert (booking.booking_status, booking.provider_id) == ('confirmed', provider_id)
+            assert BookingStatusHistory.query.count() == OPEN_BOOKINGS
+            # Out of range and unoffered services are never handed out
+            assert db.session.get(Booking, ids['far']).provider_id is None
+            assert db.session.get(Booking, ids['unoffered']).provider_id is None
+
+    def test_claims_earliest_scheduled_first(self, claim_app):
+        """Test a single provider receives bookings in scheduled order."""
+        app, ids = claim_app
+        user_id, provider_id = ids['providers'][0]
+        with app.app_context():
+            provider = db.session.get(ServiceProviderProfile, provider_id)
+            first = claim_next_booking(provider, *CAIRO, radius_km=10, changed_by=user_id)
+            db.session.commit()
+            second = claim_next_booking(provider, *CAIRO, radius_km=10, changed_by=user_id)
+            db.session.commit()
+
+            assert first.scheduled_date < second.scheduled_date
+
+    def test_malformed_claim_requests_are_rejected(self, claim_app):
+        """Test non-numeric positions or radii and non-positive radii get 400 without claiming."""
+        app, ids = claim_app
+        user_id, _ = ids['providers'][0]
+        bodies = [
+            {'latitude': 'north', 'longitude': CAIRO[1]},
+            {'latitude': CAIRO[0], 'longitude': None},
+            {'latitude': CAIRO[0], 'longitude': CAIRO[1], 'radius_km': 'far'},
+            {'latitude': CAIRO[0], 'longitude': CAIRO[1], 'radius_km': 0},
+            {'latitude': CAIRO[0], 'longitude': CAIRO[1], 'radius_km': -5},
+        ]
+        for body in bodies:
+            with app.test_request_context(method='POST', json=body):
+                user = db.session.get(User, uuid.UUID(user_id))
+                response, code = inspect.unwrap(claim_booking)(current_user=user)
+            assert code == 400, body
+
+        with app.app_context():
+            assert Booking.query.filter(Booking.provider_id.isnot(None)).count() == 0
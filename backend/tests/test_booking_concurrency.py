@@ -0,0 +1,129 @@
+import threading
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from flask import Flask
+from src.models import db
+from src.models.user import User, CustomerProfile, ServiceProviderProfile
+from src.models.service import ServiceCategory, Service, Booking, BookingStatusHistory
+from src.models.analytics import BookingDailyRollup
+from src.routes.services import update_booking_status
+from src.utils.passwords import password_hasher
+
+# Stays within the default pool (5 + 10 overflow): every racer holds a connection
+THREADS = 12
+
+@pytest.fixture
+def booking_app(tmp_path):
+    """App on a file-backed SQLite database so each thread gets its own connection."""
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "bookings.db"}',
+        SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 30, 'check_same_thread': False}}
+    )
+    db.init_app(app)
+    password_hasher.configure(log_rounds=4)
+
+    with app.app_context():
+        db.create_all()
+        users = {}
+        for user_type in ('customer', 'service_provider'):
+            user = User(email=f'{uuid.uuid4().hex}@example.com', user_type=user_type)
+            user.set_password('TestPassword123!')
+            db.session.add(user)
+            users[user_type] = user
+        db.session.flush()
+
+        customer = CustomerProfile(user_id=users['customer'].id, first_name='Cu', last_name='Stomer')
+        provider = ServiceProviderProfile(user_id=users['service_provider'].id, first_name='Pro', last_name='Vider',
+                                          verification_status='approved')
+        category = ServiceCategory(name_ar='سباكة', name_en='Plumbing')
+        db.session.add_all([customer, provider, category])
+        db.session.flush()
+        service = Service(category_id=category.id, name_ar='إصلاح', name_en='Repair', base_price=100)
+        db.session.add(service)
+        db.session.flush()
+
+        booking = Booking(
+            customer_id=str(customer.id), provider_id=str(provider.id), service_id=service.id,
+            booking_status='confirmed', scheduled_date=datetime.utcnow() + timedelta(days=1),
+            service_address={'governorate': 'Cairo'}, total_amount=100, platform_commission=15, provider_earnings=85
+        )
+        db.session.add(booking)
+        db.session.commit()
+        ids = {'booking': booking.id, 'customer': users['customer'].id, 'provider': users['service_provider'].id}
+
+    yield app, ids
+
+    with app.app_context():
+        db.drop_all()
+
+class TestBookingOptimisticConcurrency:
+    """Test compare-and-swap status transitions under contention."""
+
+    def test_concurrent_transitions_have_exactly_one_winner(self, booking_app):
+        """Test racing start/cancel requests produce one write, one history row and 409s."""
+        app, ids = booking_app
+        barrier = threading.Barrier(THREADS, timeout=30)
+        results, errors = [], []
+
+        def attempt(index):
+            # Half the threads are the provider starting work, half the customer cancelling
+            actor, status = ('provider', 'in_progress') if index % 2 else ('customer', 'cancelled')
+            try:
+                with app.test_request_context(method='PUT', json={'status': status}):
+                    user = db.session.get(User, ids[actor])
+                    user.customer_profile, user.provider_profile  # load before racing
+                    barrier.wait()
+                    response, code = update_booking_status.__wrapped__(current_user=user, booking_id=ids['booking'])
+                    results.append((code, status, response.get_json()))
+                    db.session.remove()
+            except Exception as e:
+                barrier.abort()
+                errors.append(e)
+
+        threads = [threading.Thread(target=attempt, args=(i,)) for i in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        winners = [(status, body) for code, status, body in results if code == 200]
+        assert len(winners) == 1
+        # Losers either lost the CAS (409) or saw the new state and were refused (400)
+        assert all(code in (400, 409) for code, _, _ in results if code != 200)
+        assert all(body['code'] == 'version_conflict' for code, _, body in results if code == 409)
+
+        with app.app_context():
+            booking = db.session.get(Booking, ids['booking'])
+            history = BookingStatusHistory.query.filter_by(booking_id=ids['booking']).all()
+            rollup_count = db.session.query(db.func.sum(BookingDailyRollup.booking_count)).scalar()
+
+            assert booking.booking_status == winners[0][0]
+            assert booking.version == 2
+            assert [(h.previous_status, h.new_status) for h in history] == [('confirmed', winners[0][0])]
+            assert rollup_count in (None, 0)  # net rollup delta of a move is zero
+
+    def test_stale_client_version_is_rejected(self, booking_app):
+        """Test a request carrying an outdated version gets 409 without writing."""
+        app, ids = booking_app
+        with app.test_request_context(method='PUT', json={'status': 'in_progress', 'version': 0}):
+            user = db.session.get(User, ids['provider'])
+            response, code = update_booking_status.__wrapped__(current_user=user, booking_id=ids['booking'])
+
+        assert code == 409
+        assert response.get_json()['booking']['version'] == 1
+
+    def test_malformed_client_version_is_rejected(self, booking_app):
+        """Test a version that is not an integer gets 400 without writing."""
+        app, ids = booking_app
+        for version in ('latest', 1.5, True, [1]):
+            with app.test_request_context(method='PUT', json={'status': 'in_progress', 'version': version}):
+                user = db.session.get(User, ids['provider'])
+                response, code = update_booking_status.__wrapped__(current_user=user, booking_id=ids['booking'])
+            assert (code, response.get_json()['error']) == (400, 'Version must be an integer')
+
+        with app.app_context():
+            assert db.session.get(Booking, ids['booking']).version == 1
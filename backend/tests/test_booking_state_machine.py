@@ -0,0 +1,122 @@
+import inspect
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from flask import Flask
+from src.models import db
+from src.models import location  # noqa: F401 (mapped by User relationships)
+from src.models.user import User, CustomerProfile, ServiceProviderProfile
+from src.models.service import (ServiceCategory, Service, Booking, BookingStatusHistory, booking_state_machine,
+                                BookingTransitionError)
+from src.routes.admin import bulk_update_booking_status
+
+@pytest.fixture
+def app():
+    """In-memory app with one provider's bookings in every active status."""
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI='sqlite://')
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def seed_bookings(statuses):
+    category = ServiceCategory(name_ar='سباكة', name_en='Plumbing')
+    db.session.add(category)
+    db.session.flush()
+    service = Service(category_id=category.id, name_ar='إصلاح', name_en='Repair', base_price=100)
+    users = [User(email=f'{uuid.uuid4().hex}@example.com', user_type=kind, password_hash='!')
+             for kind in ('customer', 'service_provider')]
+    db.session.add_all([service, *users])
+    db.session.flush()
+    customer = CustomerProfile(user_id=users[0].id, first_name='Cu', last_name='Stomer')
+    provider = ServiceProviderProfile(user_id=users[1].id, first_name='Pro', last_name='Vider', total_completed_jobs=0,
+                                      total_earnings=0)
+    db.session.add_all([customer, provider])
+    db.session.flush()
+    bookings = [
+        Booking(customer_id=str(customer.id), provider_id=str(provider.id), service_id=service.id,
+                booking_status=status, scheduled_date=datetime.utcnow() + timedelta(days=1),
+                service_address={'governorate': 'Cairo'}, total_amount=100, platform_commission=15,
+                provider_earnings=85)
+        for status in statuses
+    ]
+    db.session.add_all(bookings)
+    db.session.commit()
+    return provider, bookings
+
+class TestBookingStateMachine:
+    """Test the compiled transition table, guards and bulk transitions."""
+
+    def test_transition_table_is_compiled_both_ways(self):
+        """Test forward lookups and reverse source sets."""
+        assert booking_state_machine.can('service_provider', 'confirmed', 'in_progress')
+        assert not booking_state_machine.can('customer', 'completed', 'cancelled')
+        assert booking_state_machine.sources_of('admin', 'cancelled') == {'pending', 'confirmed', 'in_progress'}
+
+    def test_guard_rejects_other_customers(self):
+        """Test a customer cannot cancel someone else's booking."""
+        booking = SimpleNamespace(booking_status='pending', customer_id='someone-else', provider_id=None)
+        actor = SimpleNamespace(user_type='customer', customer_profile=SimpleNamespace(id='me'))
+
+        with pytest.raises(BookingTransitionError) as error:
+            booking_state_machine.check(booking, actor, 'cancelled')
+        assert error.value.status_code == 403
+
+    def test_completion_sets_duration_and_counters(self, app):
+        """Test completing a booking stamps its end time and bumps provider counters."""
+        provider, (booking,) = seed_bookings(['in_progress'])
+        booking.actual_start_time = datetime.utcnow() - timedelta(minutes=90)
+
+        booking_state_machine.apply(booking, 'completed')
+        db.session.commit()
+        db.session.refresh(provider)
+
+        assert booking.actual_duration == 90
+        assert (provider.total_completed_jobs, float(provider.total_earnings)) == (1, 85.0)
+
+    def test_bulk_cancel_moves_only_cancellable_bookings(self, app):
+        """Test a bulk cancel skips terminal bookings and writes one history row per move."""
+        provider, bookings = seed_bookings(['pending', 'confirmed', 'in_progress', 'completed', 'cancelled'])
+
+        moved = booking_state_machine.bulk_transition(
+            [Booking.provider_id == str(provider.id)], 'admin', 'cancelled', reason='Provider suspended'
+        )
+        db.session.commit()
+        db.session.expire_all()
+
+        assert sorted(old for _, old in moved) == ['confirmed', 'in_progress', 'pending']
+        assert [b.booking_status for b in bookings] == ['cancelled'] * 3 + ['completed', 'cancelled']
+        assert [b.version for b in bookings] == [2, 2, 2, 1, 1]
+        history = BookingStatusHistory.query.all()
+        assert len(history) == 3
+        assert {h.change_reason for h in history} == {'Provider suspended'}
+
+    def test_bulk_rejects_unreachable_status(self, app):
+        """Test bulk moves to a status the role can never reach fail up front."""
+        with pytest.raises(BookingTransitionError):
+            booking_state_machine.bulk_transition([], 'customer', 'completed')
+
+    def test_bulk_endpoint_validates_from_status(self, app):
+        """Test the bulk endpoint only filters on a list of known statuses."""
+        provider, bookings = seed_bookings(['pending', 'confirmed', 'in_progress'])
+        admin = User(email='admin@example.com', user_type='admin', password_hash='!')
+        db.session.add(admin)
+        db.session.commit()
+        endpoint = inspect.unwrap(bulk_update_booking_status)
+
+        for from_status in ('pending', ['pending', 'lost'], [], [['pending']]):
+            with app.test_request_context(method='POST', json={'status': 'cancelled', 'provider_id': str(provider.id),
+                                                               'from_status': from_status}):
+                response, code = endpoint(current_user=admin)
+            assert code == 400
+            assert response.get_json()['error'].startswith('from_status must be a list of')
+
+        with app.test_request_context(method='POST', json={'status': 'cancelled', 'provider_id': str(provider.id),
+                                                           'from_status': ['pending', 'confirmed']}):
+            response, code = endpoint(current_user=admin)
+        assert (code, response.get_json()['moved']) == (200, 2)
+        assert bookings[2].booking_status == 'in_progress'
@@ -0,0 +1,54 @@
+import threading
+import time
+from src.utils.cache import SnapshotCache
+
+class TestSnapshotCache:
+    """Test the shared snapshot cache used by admin dashboards."""
+
+    def test_concurrent_misses_share_one_computation(self):
+        """Test concurrent callers on a cold key compute it once."""
+        cache = SnapshotCache(ttl=60, stale_ttl=120)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return {'total': 42}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get('stats', compute))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [{'total': 42}] * 8
+
+    def test_stale_value_served_while_refreshing(self):
+        """Test an expired entry is served immediately and refreshed in the background."""
+        cache = SnapshotCache(ttl=0, stale_ttl=60)
+        cache.set('stats', 'old')
+        refreshed = threading.Event()
+
+        def compute():
+            refreshed.set()
+            return 'new'
+
+        assert cache.get('stats', compute) == 'old'
+        assert refreshed.wait(2)
+
+        for _ in range(50):
+            if cache.peek('stats') == 'new':
+                break
+            time.sleep(0.01)
+        assert cache.peek('stats') == 'new'
+        assert cache.stats()['stale_hits'] == 1
+
+    def test_invalidate(self):
+        """Test invalidated keys are recomputed."""
+        cache = SnapshotCache(ttl=60)
+        cache.set('stats', 1)
+        cache.invalidate('stats')
+
+        assert cache.get('stats', lambda: 2) == 2
@@ -0,0 +1,145 @@
+import csv
+import gzip
+import io
+import json
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from src.models import db
+from src.models import location  # noqa: F401 (mapped by User relationships)
+from src.models.user import User, CustomerProfile
+from src.models.service import ServiceCategory, Service, Booking
+from src.routes.admin import admin_bp
+from src.utils.rate_limit import rate_limiter
+from src.utils.exports import gzip_stream
+
+START = datetime(2026, 1, 1)
+
+@pytest.fixture
+def app():
+    """In-memory app serving the admin blueprint, exporting two rows per batch."""
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI='sqlite://', JWT_SECRET_KEY='test-secret',
+                      EXPORT_BATCH_SIZE=2)
+    db.init_app(app)
+    JWTManager(app)
+    rate_limiter.init_app(app)
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def admin_headers(app):
+    admin = User(email='admin@example.com', user_type='admin', password_hash='!', created_at=START)
+    db.session.add(admin)
+    db.session.commit()
+    return {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+
+def seed_bookings(statuses):
+    """One customer with a booking per status, created a day apart."""
+    category = ServiceCategory(name_ar='سباكة', name_en='Plumbing')
+    db.session.add(category)
+    db.session.flush()
+    service = Service(category_id=category.id, name_ar='إصلاح', name_en='Repair', base_price=100)
+    user = User(email=f'{uuid.uuid4().hex}@example.com', user_type='customer', password_hash='!',
+                created_at=START + timedelta(days=1))
+    db.session.add_all([service, user])
+    db.session.flush()
+    customer = CustomerProfile(user_id=user.id, first_name='Cu', last_name='Stomer')
+    db.session.add(customer)
+    db.session.flush()
+    bookings = [
+        Booking(customer_id=str(customer.id), service_id=service.id, booking_status=status,
+                scheduled_date=START + timedelta(days=30), service_address={'governorate': 'Cairo', 'city': 'Nasr City'},
+                total_amount=100 + day, platform_commission=15, provider_earnings=85 + day,
+                created_at=START + timedelta(days=day))
+        for day, status in enumerate(statuses)
+    ]
+    db.session.add_all(bookings)
+    db.session.commit()
+    return bookings
+
+def read_csv(response):
+    return list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+def read_ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+class TestExportStreaming:
+    """Test on-the-fly compression of export streams."""
+
+    def test_gzip_stream_emits_bytes_per_chunk(self):
+        """Test each chunk is flushed immediately and the whole stream decompresses."""
+        chunks = [b'id,cursor\n', b'1,a\n' * 100, b'2,b\n' * 100]
+        compressed = list(gzip_stream(iter(chunks)))
+
+        # One flushed block per input chunk plus the gzip trailer
+        assert len(compressed) == len(chunks) + 1
+        assert all(compressed[:len(chunks)])
+        assert gzip.decompress(b''.join(compressed)) == b''.join(chunks)
+
+class TestExportEndpoint:
+    """Test the admin export endpoint."""
+
+    def test_csv_rows_in_creation_order(self, app, admin_headers):
+        """Test a CSV export has a header row and one row per booking, oldest first, across batches."""
+        bookings = seed_bookings(['pending', 'confirmed', 'completed', 'cancelled', 'pending'])
+
+        response = app.test_client().get('/api/admin/export/bookings', headers=admin_headers)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/csv'
+        assert response.headers['Content-Disposition'].endswith('.csv"')
+        rows = read_csv(response)
+        assert [row['id'] for row in rows] == [str(booking.id) for booking in bookings]
+        first = rows[0]
+        assert (first['booking_status'], first['governorate'], first['city']) == ('pending', 'Cairo', 'Nasr City')
+        assert (float(first['total_amount']), float(first['provider_earnings'])) == (100.0, 85.0)
+        assert first['created_at'] == START.isoformat()
+        assert all(row['cursor'] for row in rows)
+
+    def test_ndjson_filters(self, app, admin_headers):
+        """Test NDJSON records honour the status and date filters."""
+        bookings = seed_bookings(['pending', 'confirmed', 'pending', 'pending'])
+        client = app.test_client()
+
+        response = client.get('/api/admin/export/bookings?format=ndjson&status=pending', headers=admin_headers)
+        assert response.mimetype == 'application/x-ndjson'
+        records = read_ndjson(response)
+        assert [record['id'] for record in records] == [str(bookings[i].id) for i in (0, 2, 3)]
+        assert records[0]['total_amount'] == 100.0
+        assert records[0]['created_at'] == START.isoformat()
+
+        since = (START + timedelta(days=2)).isoformat()
+        records = read_ndjson(client.get(f'/api/admin/export/bookings?format=ndjson&status=pending&date_from={since}',
+                                         headers=admin_headers))
+        assert [record['id'] for record in records] == [str(bookings[i].id) for i in (2, 3)]
+
+        records = read_ndjson(client.get('/api/admin/export/users?format=ndjson&user_type=customer',
+                                         headers=admin_headers))
+        assert [record['user_type'] for record in records] == ['customer']
+
+    def test_cursor_resumes_after_row(self, app, admin_headers):
+        """Test passing a row's cursor exports only the rows after it."""
+        bookings = seed_bookings(['pending'] * 5)
+        client = app.test_client()
+        rows = read_csv(client.get('/api/admin/export/bookings', headers=admin_headers))
+
+        resumed = read_csv(client.get(f"/api/admin/export/bookings?cursor={rows[1]['cursor']}", headers=admin_headers))
+
+        assert [row['id'] for row in resumed] == [str(booking.id) for booking in bookings[2:]]
+        assert resumed == rows[2:]
+
+    def test_rejects_unknown_dataset_and_bad_input(self, app, admin_headers):
+        """Test unknown datasets are 404 and malformed formats, dates and cursors are 400."""
+        client = app.test_client()
+
+        assert client.get('/api/admin/export/payments', headers=admin_headers).status_code == 404
+        assert client.get('/api/admin/export/bookings?format=xml', headers=admin_headers).status_code == 400
+        assert client.get('/api/admin/export/bookings?date_from=yesterday', headers=admin_headers).status_code == 400
+        assert client.get('/api/admin/export/bookings?cursor=not-a-cursor', headers=admin_headers).status_code == 400
@@ -0,0 +1,82 @@
+import pytest
+from flask import Flask, jsonify
+from src.utils.cache import SnapshotCache
+from src.utils.metrics import request_metrics, MmapValues, mark_process_dead, _key
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(METRICS_DIR=str(tmp_path), METRICS_SNAPSHOT_INTERVAL=0)
+    request_metrics.init_app(app)
+
+    @app.route('/items/<int:item_id>')
+    def get_item(item_id):
+        if item_id == 0:
+            return jsonify({'error': 'Item not found'}), 404
+        return jsonify({'id': item_id})
+
+    yield app
+    request_metrics.reset()
+    request_metrics.caches.clear()
+
+class TestRequestMetrics:
+    """Test per-route histograms, status counts and cross-worker aggregation."""
+
+    def test_routes_are_labelled_by_rule(self, app):
+        """Test requests count under their URL rule and status, with cumulative buckets."""
+        client = app.test_client()
+        for item_id in (1, 2, 0):
+            client.get(f'/items/{item_id}')
+        client.get('/nowhere')
+
+        text = request_metrics.render()
+        assert 'http_requests_total{method="GET",route="/items/<int:item_id>",status="200"} 2.0' in text
+        assert 'http_requests_total{method="GET",route="/items/<int:item_id>",status="404"} 1.0' in text
+        assert 'http_requests_total{method="GET",route="<unmatched>",status="404"} 1.0' in text
+        assert 'http_request_duration_seconds_bucket{le="+Inf",method="GET",route="/items/<int:item_id>"} 3.0' in text
+        assert 'http_requests_in_flight 0.0' in text
+
+        route = request_metrics.summary()['routes']['GET /items/<int:item_id>']
+        assert (route['requests'], route['statuses']) == (3, {'200': 2, '404': 1})
+        assert 0 < route['p50_ms'] <= route['p99_ms']
+
+    def test_other_workers_files_are_summed(self, app, tmp_path):
+        """Test a scrape adds up every worker's counters and drops a dead worker's gauges."""
+        app.test_client().get('/items/1')
+        other = MmapValues(str(tmp_path / 'counters_999999.db'))
+        other.add(other.slot(_key('http_requests_total', {'route': '/items/<int:item_id>', 'method': 'GET', 'status': '200'})), 4)
+        other_gauges = MmapValues(str(tmp_path / 'gauges_999999.db'))
+        other_gauges.add(other_gauges.slot(_key('http_requests_in_flight', {})), 2)
+        other.close()
+        other_gauges.close()
+
+        summary = request_metrics.summary()
+        assert summary['in_flight'] == 2
+        assert summary['routes']['GET /items/<int:item_id>']['statuses'] == {'200': 5}
+
+        mark_process_dead(str(tmp_path), 999999)
+        assert request_metrics.summary()['in_flight'] == 0
+
+    def test_cache_counters_are_exported(self, app):
+        """Test tracked cache hits and misses show up per cache."""
+        cache = SnapshotCache(ttl=60, stale_ttl=0)
+        request_metrics.track_cache('widgets', cache)
+        cache.get('a', lambda: 1)
+        cache.get('a', lambda: 1)
+
+        text = request_metrics.render()
+        assert 'cache_hits_total{cache="widgets"} 1.0' in text
+        assert 'cache_misses_total{cache="widgets"} 1.0' in text
+
+    def test_scrapes_need_a_token_when_required(self, app):
+        """Test a configured token is checked and a required but missing token closes scraping."""
+        request_metrics.token, request_metrics.require_token = None, False
+        assert request_metrics.scrape_status(None) == 200
+
+        request_metrics.require_token = True
+        assert request_metrics.scrape_status('Bearer anything') == 404
+
+        request_metrics.token = 's3cret'
+        assert request_metrics.scrape_status('Bearer s3cret') == 200
+        assert request_metrics.scrape_status('Bearer wrong') == 401
+        assert request_metrics.scrape_status(None) == 401
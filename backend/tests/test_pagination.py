@@ -0,0 +1,64 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, Column, Integer, DateTime
+from sqlalchemy.orm import declarative_base, Session
+from src.utils.pagination import keyset_paginate, offset_paginate, encode_cursor, decode_cursor, InvalidCursor
+
+Base = declarative_base()
+
+class Row(Base):
+    __tablename__ = 'rows'
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        base = datetime(2025, 1, 1)
+        # Pairs of rows share a timestamp so the id tie-breaker matters
+        session.add_all([Row(id=i, created_at=base + timedelta(minutes=i // 2)) for i in range(1, 12)])
+        session.commit()
+        yield session
+
+class TestKeysetPagination:
+    """Test cursor pagination over (created_at, id)."""
+
+    def test_cursor_round_trip(self):
+        """Test cursors decode back to typed key values."""
+        when = datetime(2025, 1, 1, 12, 30)
+        token = encode_cursor([when, 7], 'prev')
+
+        assert decode_cursor(token, [Row.created_at, Row.id]) == ('prev', [when, 7])
+
+    def test_invalid_cursor(self):
+        """Test malformed cursors are rejected."""
+        with pytest.raises(InvalidCursor):
+            decode_cursor('not-a-cursor', [Row.created_at, Row.id])
+
+    def test_walks_forward_and_back_without_gaps(self, session):
+        """Test every row is seen exactly once and prev returns the previous page."""
+        columns = [Row.created_at, Row.id]
+        pages, cursor = [], None
+        while True:
+            page = keyset_paginate(session.query(Row), columns, cursor=cursor, per_page=4)
+            pages.append([row.id for row in page.items])
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        assert pages == [[11, 10, 9, 8], [7, 6, 5, 4], [3, 2, 1]]
+
+        previous = keyset_paginate(session.query(Row), columns, cursor=page.prev_cursor, per_page=4)
+        assert [row.id for row in previous.items] == [7, 6, 5, 4]
+        assert previous.has_prev and previous.has_next
+
+    def test_offset_paginate_detects_next_page_without_count(self, session):
+        """Test numbered pages fetch one extra row instead of counting."""
+        query = session.query(Row).order_by(Row.id)
+
+        last = offset_paginate(query, page=3, per_page=4)
+        assert [row.id for row in last.items] == [9, 10, 11]
+        assert last.has_prev and not last.has_next
+        assert offset_paginate(query, page=2, per_page=4).has_next
@@ -0,0 +1,62 @@
+import threading
+import pytest
+from werkzeug.security import generate_password_hash
+from src.utils.passwords import PasswordHasher, PasswordHashingBusy
+
+@pytest.fixture
+def hasher():
+    """Low-cost hasher so the tests stay fast."""
+    return PasswordHasher(log_rounds=4, workers=2, queue_size=2, timeout=5)
+
+class TestPasswordHasher:
+    """Test the pooled bcrypt password service."""
+
+    def test_hash_and_verify(self, hasher):
+        """Test bcrypt round trip through the pool."""
+        hashed = hasher.hash('TestPassword123!')
+
+        assert hashed.startswith('$2b$04$')
+        assert hasher.verify('TestPassword123!', hashed) is True
+        assert hasher.verify('WrongPassword123!', hashed) is False
+
+    def test_verify_legacy_werkzeug_hash(self, hasher):
+        """Test legacy werkzeug hashes still verify and are flagged for rehash."""
+        legacy = generate_password_hash('TestPassword123!')
+
+        assert hasher.verify('TestPassword123!', legacy) is True
+        assert hasher.needs_rehash(legacy) is True
+
+    def test_needs_rehash_on_low_cost(self, hasher):
+        """Test bcrypt hashes below the configured cost are flagged."""
+        hashed = hasher.hash('TestPassword123!')
+
+        assert hasher.needs_rehash(hashed) is False
+        hasher.configure(log_rounds=5)
+        assert hasher.needs_rehash(hashed) is True
+
+    def test_unknown_hash_format_rejected(self, hasher):
+        """Test unrecognised hash formats never verify."""
+        assert hasher.verify('TestPassword123!', 'plaintext') is False
+        assert hasher.verify('TestPassword123!', None) is False
+
+    def test_full_queue_sheds_load(self):
+        """Test jobs beyond workers + queue size are rejected immediately."""
+        hasher = PasswordHasher(log_rounds=4, workers=1, queue_size=0, timeout=5)
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocker():
+            started.set()
+            release.wait(5)
+            return True
+
+        worker = threading.Thread(target=hasher._run, args=(blocker,))
+        worker.start()
+        started.wait(5)
+
+        with pytest.raises(PasswordHashingBusy):
+            hasher.hash('TestPassword123!')
+
+        release.set()
+        worker.join(5)
+        assert hasher.hash('TestPassword123!').startswith('$2b$')
@@ -0,0 +1,86 @@
+import uuid
+import pytest
+from datetime import datetime
+from contextlib import contextmanager
+from sqlalchemy import event
+from flask import Flask
+from src.models import db
+from src.models import location  # noqa: F401 (mapped by User relationships)
+from src.models.user import User, ServiceProviderProfile
+from src.utils.passwords import password_hasher
+from src.utils.presence import provider_presence
+from src.utils.provider_profiles import provider_profiles
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI='sqlite://')
+    db.init_app(app)
+    provider_presence.init_app(app)
+    provider_profiles.init_app(app)
+    return app
+
+@pytest.fixture
+def provider(app):
+    """Create an approved provider in a fresh in-memory database."""
+    password_hasher.configure(log_rounds=4)
+    with app.app_context():
+        db.create_all()
+        provider_profiles.cache.invalidate()
+        user = User(email=f'{uuid.uuid4().hex}@example.com', user_type='service_provider')
+        user.set_password('TestPassword123!')
+        db.session.add(user)
+        db.session.flush()
+        profile = ServiceProviderProfile(user_id=user.id, first_name='Test', last_name='Provider',
+                                         verification_status='approved', national_id='29001011234567')
+        db.session.add(profile)
+        db.session.commit()
+        yield profile
+        db.session.remove()
+        db.drop_all()
+
+@contextmanager
+def recorded_statements():
+    statements = []
+    record = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+class TestProviderProfileCache:
+    """Test cached public provider profiles."""
+
+    def test_second_read_is_a_cache_hit(self, provider):
+        """Test a warm profile is served without touching the database."""
+        provider_presence.mark(provider.user_id, True)
+        first = provider_profiles.get(provider.id)
+        with recorded_statements() as statements:
+            second = provider_profiles.get(provider.id)
+
+        assert statements == []
+        assert second == first
+        assert second['is_online'] is True
+        assert 'national_id' not in second
+
+    def test_profile_change_invalidates_but_location_pings_do_not(self, provider):
+        """Test committed profile edits drop the document while unchanged availability keeps it."""
+        provider_profiles.get(provider.id)
+
+        provider.is_available = True
+        provider.updated_at = datetime.utcnow()
+        db.session.commit()
+        assert provider_profiles.cache.peek(str(provider.id)) is not None
+
+        provider.is_available = False
+        db.session.commit()
+        assert provider_profiles.cache.peek(str(provider.id)) is None
+        provider_presence.mark(provider.user_id, True)
+        profile = provider_profiles.get(provider.id)
+        assert (profile['is_available'], profile['is_online']) == (False, True)
+
+        provider.bio_en = 'Licensed electrician'
+        db.session.commit()
+        assert provider_profiles.cache.peek(str(provider.id)) is None
+        assert provider_profiles.get(provider.id)['bio_en'] == 'Licensed electrician'
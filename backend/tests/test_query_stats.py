@@ -0,0 +1,92 @@
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from flask import Flask, jsonify
+from src.models import db
+from src.models.user import User, ServiceProviderProfile
+from src.models.service import ServiceCategory
+from src.models.location import ProviderLocation
+from src.utils.loaders import load_latest_locations
+from src.utils.query_stats import query_instrumentation, QueryBudgetExceeded
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI='sqlite://', QUERY_TIMING_HEADERS=True,
+                      N_PLUS_ONE_THRESHOLD=3)
+    db.init_app(app)
+    query_instrumentation.init_app(app)
+    query_instrumentation.reset()
+
+    @app.route('/categories')
+    def list_categories():
+        ids = [category.id for category in ServiceCategory.query]
+        # One query per row: the classic N+1
+        return jsonify([db.session.get(ServiceCategory, category_id).name_en for category_id in ids])
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([ServiceCategory(name_ar=str(i), name_en=f'Category {i}') for i in range(4)])
+        db.session.commit()
+        db.session.expunge_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def add_provider_with_locations(positions):
+    """A provider user with one location row per (hours ago, is_online) pair; returns the user id"""
+    user = User(email=f'{uuid.uuid4().hex}@example.com', user_type='service_provider', password_hash='!')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(ServiceProviderProfile(user_id=user.id, first_name='Pro', last_name='Vider'))
+    for hours_ago, is_online in positions:
+        db.session.add(ProviderLocation(provider_id=user.id, latitude=30 + hours_ago, longitude=31,
+                                        is_online=is_online, last_updated=datetime.utcnow() - timedelta(hours=hours_ago)))
+    db.session.commit()
+    return user.id
+
+class TestQueryInstrumentation:
+    """Test per-request query counting and N+1 detection."""
+
+    def test_headers_and_n_plus_one_signature(self, app):
+        """Test a per-row lookup is counted in the headers and flagged against its endpoint."""
+        db.session.remove()
+        response = app.test_client().get('/categories')
+
+        assert response.headers['X-Query-Count'] == '5'
+        assert response.headers['Server-Timing'].startswith('db;dur=')
+        stats = query_instrumentation.stats()['endpoints']['list_categories']
+        assert (stats['requests'], stats['max_queries'], stats['n_plus_one_requests']) == (1, 5, 1)
+        assert stats['n_plus_one_signatures'][0]['statement'].startswith('SELECT service_categories.id')
+
+    def test_unmatched_paths_share_one_bucket(self, app):
+        """Test requests that match no route are counted under one key, not per path."""
+        client = app.test_client()
+        for path in ('/wp-admin', '/.env', '/categories/../etc/passwd'):
+            assert client.get(path).status_code == 404
+
+        endpoints = query_instrumentation.stats()['endpoints']
+        assert list(endpoints) == ['<unmatched>']
+        assert endpoints['<unmatched>']['requests'] == 3
+
+class TestQueryBudgets:
+    """Test the query_budget fixture and batched loaders."""
+
+    def test_budget_catches_n_plus_one(self, app, query_budget):
+        """Test exceeding a budget fails with the statements that ran."""
+        db.session.remove()
+        with pytest.raises(QueryBudgetExceeded, match='5 queries ran, budget is 2'):
+            with query_budget(2):
+                app.test_client().get('/categories')
+
+    def test_latest_locations_load_in_one_query(self, app, query_budget):
+        """Test each provider's newest online location comes back from a single statement."""
+        moving = add_provider_with_locations([(3, True), (1, True), (0, False)])
+        parked = add_provider_with_locations([(5, True)])
+        offline = add_provider_with_locations([(2, False)])
+
+        with query_budget(1):
+            locations = load_latest_locations([moving, parked, offline])
+
+        assert set(locations) == {moving, parked}
+        assert float(locations[moving].latitude) == 31
@@ -0,0 +1,92 @@
+import uuid
+import pytest
+from decimal import Decimal
+from flask import Flask
+from src.models import db
+from src.models import location  # noqa: F401 (mapped by User relationships)
+from src.models.user import User, ServiceProviderProfile
+from src.models.service import ServiceCategory, Service, ProviderService
+from src.utils.quotes import quote_engine, InvalidQuote
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SECRET_KEY='test', SQLALCHEMY_DATABASE_URI='sqlite://', QUOTE_TTL=60)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def catalogue(app):
+    """An emergency-capable service, a provider with overrides and one with defaults."""
+    category = ServiceCategory(name_ar='سباكة', name_en='Plumbing')
+    db.session.add(category)
+    db.session.flush()
+    service = Service(category_id=category.id, name_ar='إصلاح', name_en='Repair', base_price=200,
+                      is_emergency_service=True, emergency_surcharge_percentage=20)
+    db.session.add(service)
+    providers = []
+    for commission_rate, multiplier in ((10, 1.5), (None, None)):
+        user = User(email=f'{uuid.uuid4().hex}@example.com', user_type='service_provider', password_hash='!')
+        db.session.add(user)
+        db.session.flush()
+        provider = ServiceProviderProfile(user_id=user.id, first_name='Pro', last_name='Vider',
+                                          commission_rate=commission_rate, emergency_rate_multiplier=multiplier)
+        db.session.add(provider)
+        providers.append(provider)
+    db.session.flush()
+    db.session.add(ProviderService(provider_id=str(providers[0].id), service_id=service.id, custom_price=250))
+    db.session.commit()
+    quote_engine.init_app(app)
+    return quote_engine, service, providers
+
+class TestQuoteEngine:
+    """Test cached price tables, batch quoting and signed quotes."""
+
+    def test_quote_many_applies_provider_overrides(self, catalogue):
+        """Test custom price, emergency multiplier and commission rate come from the provider."""
+        engine, service, (priced, not_offering) = catalogue
+        quotes = engine.quote_many(service.id, [priced.id, not_offering.id], is_emergency=True)
+
+        assert list(quotes) == [str(priced.id)]
+        quote = quotes[str(priced.id)]
+        assert (quote.base_price, quote.surcharge, quote.total_amount) == (Decimal('250.00'), Decimal('125.00'),
+                                                                         Decimal('375.00'))
+        assert (quote.platform_commission, quote.provider_earnings) == (Decimal('37.50'), Decimal('337.50'))
+
+    def test_open_quote_uses_service_surcharge_and_platform_commission(self, catalogue):
+        """Test quoting without a provider falls back to service and platform defaults."""
+        engine, service, _ = catalogue
+        quote = engine.quote(service.id, is_emergency=True)
+
+        assert (quote.total_amount, quote.platform_commission) == (Decimal('240.00'), Decimal('36.00'))
+
+    def test_pricing_edits_invalidate_tables(self, catalogue):
+        """Test a committed price change is quoted immediately while unrelated edits keep the tables."""
+        engine, service, (priced, _) = catalogue
+        assert engine.quote(service.id).total_amount == Decimal('200.00')
+        tables = engine.tables()
+
+        priced.is_available = False
+        db.session.commit()
+        assert engine.tables() is tables
+
+        service.base_price = 300
+        db.session.commit()
+        assert engine.quote(service.id).total_amount == Decimal('300.00')
+
+    def test_quote_ids_lock_the_price(self, catalogue):
+        """Test redeeming a signed quote returns its price and tampering is rejected."""
+        engine, service, (priced, _) = catalogue
+        issued = engine.issue(engine.quote(service.id, provider_id=priced.id))
+
+        service.base_price = 999
+        db.session.commit()
+        redeemed = engine.redeem(issued.quote_id)
+        assert (redeemed.provider_id, redeemed.total_amount) == (str(priced.id), Decimal('250.00'))
+
+        with pytest.raises(InvalidQuote):
+            engine.redeem(issued.quote_id[:-2] + 'xx')
@@ -0,0 +1,110 @@
+import pytest
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager
+from src.utils.rate_limit import RateLimiter, MemoryBucketStore, parse_rate
+from src.utils.proxy import trust_proxies
+
+class FakePoolMetrics:
+    """PoolMetrics stand-in reporting a fixed pressure."""
+
+    def __init__(self, pressure=0.0):
+        self._pressure = pressure
+
+    def pressure(self):
+        return self._pressure
+
+@pytest.fixture
+def limited_app():
+    """Minimal Flask app with one rate-limited route."""
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-secret'
+    JWTManager(app)
+
+    metrics = FakePoolMetrics()
+    limiter = RateLimiter()
+    limiter.init_app(app, pool_metrics=metrics)
+
+    @app.route('/ping', methods=['POST'])
+    @limiter.limit('60/minute', burst=3, key='ip')
+    def ping():
+        return jsonify({'ok': True}), 200
+
+    return app, limiter, metrics
+
+class TestTokenBucket:
+    """Test the in-memory token bucket store."""
+
+    def test_parse_rate(self):
+        """Test rate strings are converted to tokens per second."""
+        assert parse_rate('60/minute') == 1.0
+        assert parse_rate('10/second') == 10.0
+        with pytest.raises(ValueError):
+            parse_rate('ten per minute')
+
+    def test_burst_then_refill(self):
+        """Test a bucket allows its burst, rejects, then refills over time."""
+        store = MemoryBucketStore()
+
+        assert all(store.take('k', 1.0, 3, now=100.0)[0] for _ in range(3))
+        allowed, retry_after = store.take('k', 1.0, 3, now=100.0)
+        assert allowed is False
+        assert retry_after == pytest.approx(1.0)
+
+        assert store.take('k', 1.0, 3, now=101.0)[0] is True
+
+    def test_keys_are_independent(self):
+        """Test one client's bucket does not drain another's."""
+        store = MemoryBucketStore()
+        store.take('a', 1.0, 1, now=0.0)
+
+        assert store.take('a', 1.0, 1, now=0.0)[0] is False
+        assert store.take('b', 1.0, 1, now=0.0)[0] is True
+
+class TestRateLimiterDecorator:
+    """Test the route decorator, rejection counters and load shedding."""
+
+    def test_rejects_with_retry_after(self, limited_app):
+        """Test requests over the burst get 429 with Retry-After."""
+        app, limiter, _ = limited_app
+        client = app.test_client()
+
+        statuses = [client.post('/ping').status_code for _ in range(4)]
+        assert statuses == [200, 200, 200, 429]
+
+        response = client.post('/ping')
+        assert response.headers['Retry-After'] == '1'
+        assert limiter.stats() == {'ping': {'rate_limited': 2}}
+
+    def test_forged_forwarded_for_shares_the_client_bucket(self, limited_app):
+        """Test rotating the client-supplied X-Forwarded-For entry does not reset the IP bucket."""
+        app, _, _ = limited_app
+        app.config['PROXY_FIX_X_FOR'] = 1
+        trust_proxies(app)
+        client = app.test_client()
+
+        # The proxy (10.0.0.1) appends the real client after whatever the client sent
+        statuses = [client.post('/ping', environ_base={'REMOTE_ADDR': '10.0.0.1'},
+                                headers={'X-Forwarded-For': f'198.51.100.{i}, 203.0.113.7'}).status_code
+                    for i in range(4)]
+        assert statuses == [200, 200, 200, 429]
+        other = client.post('/ping', environ_base={'REMOTE_ADDR': '10.0.0.1'}, headers={'X-Forwarded-For': '203.0.113.8'})
+        assert other.status_code == 200
+
+    def test_sheds_load_when_pool_saturated(self, limited_app):
+        """Test requests get 503 when checkouts are queueing for the DB pool."""
+        app, limiter, metrics = limited_app
+        metrics._pressure = 1.0
+        client = app.test_client()
+
+        response = client.post('/ping')
+        assert response.status_code == 503
+        assert 'Retry-After' in response.headers
+        assert limiter.stats() == {'ping': {'shed': 1}}
+
+    def test_disabled_in_testing_mode(self, limited_app):
+        """Test limits are bypassed when the app runs in TESTING mode."""
+        app, _, _ = limited_app
+        app.config['TESTING'] = True
+        client = app.test_client()
+
+        assert all(client.post('/ping').status_code == 200 for _ in range(10))
@@ -0,0 +1,77 @@
+import uuid
+import pytest
+from flask import Flask
+from src.models import db
+from src.models import location  # noqa: F401 (mapped by User relationships)
+from src.models.user import User, ServiceProviderProfile
+from src.models.service import BookingReview
+from src.utils.passwords import password_hasher
+from src.utils.ratings import apply_provider_rating, reconcile_provider_ratings
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI='sqlite://')
+    db.init_app(app)
+    return app
+
+@pytest.fixture
+def provider(app):
+    """Create a provider in a fresh in-memory database."""
+    password_hasher.configure(log_rounds=4)
+    with app.app_context():
+        db.create_all()
+        user = User(email=f'{uuid.uuid4().hex}@example.com', user_type='service_provider')
+        user.set_password('TestPassword123!')
+        db.session.add(user)
+        db.session.flush()
+        profile = ServiceProviderProfile(user_id=user.id, first_name='Test', last_name='Provider')
+        db.session.add(profile)
+        db.session.commit()
+        yield profile
+        db.session.remove()
+        db.drop_all()
+
+class TestProviderRatings:
+    """Test running provider rating aggregates."""
+
+    def test_reviews_update_sums_histogram_and_average(self, provider):
+        """Test each review is applied with one UPDATE and rating columns agree."""
+        for rating in [5, 4, 4, 1]:
+            apply_provider_rating(str(provider.id), rating)
+        db.session.commit()
+        db.session.refresh(provider)
+
+        data = provider.to_dict()
+        assert data['total_reviews'] == 4
+        assert data['average_rating'] == data['rating'] == 3.5
+        assert data['rating_histogram'] == {'1': 1, '2': 0, '3': 0, '4': 2, '5': 1}
+
+    def test_reconcile_resets_drifted_aggregates(self, provider):
+        """Test reconciliation rebuilds from booking_reviews (none here)."""
+        apply_provider_rating(str(provider.id), 5)
+        db.session.commit()
+
+        reconcile_provider_ratings()
+        db.session.commit()
+        db.session.refresh(provider)
+
+        assert provider.total_reviews == 0
+        assert provider.rating_count_5 == 0
+        assert float(provider.average_rating) == 0
+
+    def test_new_review_extends_reconciled_history(self, provider):
+        """Test a review after the deploy-time reconcile adds to the historical average instead of replacing it."""
+        # Reviews written before the aggregate columns existed (which start at zero)
+        for rating in (4, 4, 1):
+            db.session.add(BookingReview(booking_id=str(uuid.uuid4()), customer_id=str(uuid.uuid4()),
+                                         provider_id=str(provider.id), rating=rating))
+        db.session.commit()
+
+        reconcile_provider_ratings()
+        apply_provider_rating(str(provider.id), 5)
+        db.session.commit()
+        db.session.refresh(provider)
+
+        assert (provider.rating_sum, provider.total_reviews) == (14, 4)
+        assert float(provider.average_rating) == 3.5
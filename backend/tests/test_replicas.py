@@ -0,0 +1,79 @@
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import insert
+from src.models import db
+from src.models import location  # noqa: F401 (mapped by User relationships)
+from src.models.service import ServiceCategory
+from src.utils.replicas import replica_router, read_only
+
+def make_app(tmp_path, replica_url):
+    """A primary and one replica, each a SQLite file, with a few category routes"""
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "primary.db"}',
+                      DATABASE_REPLICA_URLS=[replica_url], REPLICA_STICKY_SECONDS=30,
+                      REPLICA_CHECK_INTERVAL=60)
+    db.init_app(app)
+    replica_router.init_app(app)
+
+    @app.route('/categories', methods=['GET'])
+    def list_categories():
+        return jsonify(sorted(c.name_en for c in ServiceCategory.query))
+
+    @app.route('/categories/search', methods=['POST'])
+    @read_only
+    def search_categories():
+        return jsonify(sorted(c.name_en for c in ServiceCategory.query))
+
+    @app.route('/categories', methods=['POST'])
+    def add_category():
+        db.session.add(ServiceCategory(name_ar='جديد', name_en='New'))
+        db.session.commit()
+        return jsonify(sorted(c.name_en for c in ServiceCategory.query)), 201
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(ServiceCategory(name_ar='سباكة', name_en='Plumbing'))
+        db.session.commit()
+    return app
+
+@pytest.fixture
+def replicated_app(tmp_path):
+    app = make_app(tmp_path, f'sqlite:///{tmp_path / "replica.db"}')
+    # The replica lags: it has not seen the primary's row but has one of its own
+    replica = replica_router.engines['replica_0']
+    db.metadata.create_all(replica)
+    with replica.begin() as conn:
+        conn.execute(insert(ServiceCategory).values(id='replica-only', name_ar='نجارة', name_en='Carpentry'))
+    return app
+
+class TestReplicaRouting:
+    """Test read routing between a primary and a replica SQLite file."""
+
+    def test_reads_go_to_the_replica_and_writes_to_the_primary(self, replicated_app):
+        """Test GETs and @read_only POSTs read the replica while other POSTs use the primary."""
+        client = replicated_app.test_client()
+
+        assert client.get('/categories').get_json() == ['Carpentry']
+        assert client.post('/categories/search').get_json() == ['Carpentry']
+        assert client.post('/categories').get_json() == ['New', 'Plumbing']
+        assert replica_router.stats()['replicas'][0]['reads'] == 2
+
+    def test_writers_read_their_own_writes(self, replicated_app):
+        """Test a client that just wrote keeps reading the primary within the sticky window."""
+        client = replicated_app.test_client()
+        client.post('/categories')
+
+        assert client.get('/categories').get_json() == ['New', 'Plumbing']
+        other = replicated_app.test_client()
+        assert other.get('/categories', environ_base={'REMOTE_ADDR': '10.0.0.2'}).get_json() == ['Carpentry']
+        # A forged X-Forwarded-For does not take over the writer's stickiness
+        forged = other.get('/categories', environ_base={'REMOTE_ADDR': '10.0.0.2'}, headers={'X-Forwarded-For': '127.0.0.1'})
+        assert forged.get_json() == ['Carpentry']
+
+    def test_unavailable_replica_falls_back_to_primary(self, tmp_path):
+        """Test a replica that cannot be reached is marked down and reads use the primary."""
+        app = make_app(tmp_path, f'sqlite:///{tmp_path / "missing" / "replica.db"}')
+
+        assert app.test_client().get('/categories').get_json() == ['Plumbing']
+        state = replica_router.stats()['replicas'][0]
+        assert state['healthy'] is False and state['error']
@@ -0,0 +1,66 @@
+import pytest
+from types import SimpleNamespace
+from flask import Flask, g, jsonify
+from src.utils.request_log import request_recorder, load_request_logs
+from benchmarks.replay_traffic import AppTarget, ReplayContext, plan, replay, summarize
+
+def create_app(log_dir):
+    app = Flask(__name__)
+    app.config.update(TESTING=True, REQUEST_LOG_DIR=str(log_dir))
+    request_recorder.init_app(app)
+
+    @app.route('/api/items/<item_id>', methods=['POST'])
+    def update_item(item_id):
+        g.current_user = SimpleNamespace(user_type='customer')
+        return jsonify({'id': item_id}), 200
+
+    @app.route('/api/items', methods=['GET'])
+    def list_items():
+        return jsonify({'items': []}), 200
+
+    return app
+
+@pytest.fixture
+def app(tmp_path):
+    yield create_app(tmp_path / 'logs')
+    request_recorder.close()
+
+class TestRequestLog:
+    """Test the sanitized request log and its replay."""
+
+    def test_log_keeps_shapes_not_values(self, app, tmp_path):
+        """Test a recorded request keeps its route template and payload shape but no ids, text or locations."""
+        client = app.test_client()
+        client.post('/api/items/4f1c9a', json={'latitude': 30.0512, 'status': 'pending', 'notes': 'Call 01012345678',
+                                               'urgent': True, 'photos': [{'url': 'a.jpg'}, {'url': 'b.jpg'}]})
+        client.get('/api/items?per_page=20&q=plumber')
+        client.get('/not-a-route')
+
+        raw = ''.join(path.read_text() for path in (tmp_path / 'logs').iterdir())
+        for secret in ('4f1c9a', '30.0512', '01012345678', 'a.jpg', 'plumber'):
+            assert secret not in raw
+        update, listing = load_request_logs([str(tmp_path / 'logs')])
+        assert (update['route'], update['role'], update['status']) == ('/api/items/<item_id>', 'customer', 200)
+        assert update['args'] == {'item_id': '<str>'}
+        assert update['body'] == {'latitude': '<float>', 'status': 'pending', 'notes': '<str>', 'urgent': True,
+                                  'photos': {'<list>': {'url': '<str>'}, 'length': 2}}
+        assert (listing['role'], listing['query']) == (None, {'per_page': '20', 'q': '<str>'})
+
+    def test_replay_reports_per_route(self, app, tmp_path):
+        """Test replaying a log sends every request it can and skips the ones it has no account for."""
+        client = app.test_client()
+        for _ in range(3):
+            client.get('/api/items?per_page=20')
+        client.post('/api/items/7', json={'latitude': 30.05})
+        entries = load_request_logs([str(tmp_path / 'logs')])
+
+        replay_app = create_app(tmp_path / 'replay-logs')
+        context = ReplayContext(AppTarget(replay_app), accounts=0)
+        requests, skipped = plan(entries, context, speed=100)
+        results, wall = replay(AppTarget(replay_app), requests, concurrency=2)
+        report = summarize(results, wall, skipped)
+
+        listing = report['routes']['GET /api/items']
+        assert (listing['requests'], listing['error_rate'], listing['statuses']) == (3, 0.0, {200: 3})
+        assert report['skipped'] == {'POST /api/items/<item_id>': {'no customer account': 1}}
+        assert report['total']['requests'] == 3
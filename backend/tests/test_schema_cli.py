@@ -0,0 +1,134 @@
+import os
+import uuid
+import pytest
+from sqlalchemy import text
+from flask import Flask
+from flask_migrate import Migrate, upgrade
+from src.models import db
+from src.models import location  # noqa: F401
+from src.models.user import ServiceProviderProfile
+from src.models.service import ServiceCategory, Booking
+from src.models.analytics import BookingDailyRollup
+from src.cli import register_commands
+from src.utils.schema import verify_schema
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path / "schema.db"}')
+    db.init_app(app)
+    register_commands(app)
+    Migrate(app, db, directory=MIGRATIONS_DIR)
+    return app
+
+class TestSchemaCommands:
+    """Test schema creation and seeding as explicit CLI steps."""
+
+    def test_create_then_seed_once(self, app):
+        """Test `schema create` builds the tables and `schema seed` only seeds an empty catalogue."""
+        runner = app.test_cli_runner()
+
+        assert '✅ Schema ready' in runner.invoke(args=['schema', 'create']).output
+        # An existing database is migrated, never create_all'd over
+        assert 'flask schema upgrade' in runner.invoke(args=['schema', 'create']).output
+        assert '✅ Seeded sample data' in runner.invoke(args=['schema', 'seed']).output
+        assert 'nothing seeded' in runner.invoke(args=['schema', 'seed']).output
+        with app.app_context():
+            assert ServiceCategory.query.count() == 6
+
+    def test_verify_reports_missing_indexes(self, app):
+        """Test `schema verify` passes on a fresh schema and fails with DDL for a dropped index."""
+        runner = app.test_cli_runner()
+        runner.invoke(args=['schema', 'create'])
+        assert runner.invoke(args=['schema', 'verify']).exit_code == 0
+
+        with app.app_context():
+            db.session.execute(text('DROP INDEX ix_booking_reviews_provider_created'))
+            db.session.commit()
+        result = runner.invoke(args=['schema', 'verify'])
+
+        assert result.exit_code == 1
+        assert ('Missing index ix_booking_reviews_provider_created: CREATE INDEX ix_booking_reviews_provider_created '
+                'ON booking_reviews (provider_id, created_at);') in result.output
+
+    def test_upgrade_stamps_untracked_baseline_database(self, app):
+        """Test `schema upgrade` stamps a pre-migration database at the baseline instead of replaying it."""
+        runner = app.test_cli_runner()
+        with app.app_context():
+            upgrade(directory=MIGRATIONS_DIR, revision='0001_baseline')
+            # What create_all left behind: the baseline tables with no migration history
+            db.session.execute(text('DROP TABLE alembic_version'))
+            db.session.commit()
+
+        result = runner.invoke(args=['schema', 'upgrade'])
+
+        assert result.exit_code == 0, result.output
+        assert '✅ Stamped existing schema at 0001_baseline' in result.output
+        assert runner.invoke(args=['schema', 'verify']).exit_code == 0
+        # Already tracked: later starts only upgrade
+        assert 'Stamped' not in runner.invoke(args=['schema', 'upgrade']).output
+
+    def test_upgrade_refuses_unknown_untracked_schema(self, app):
+        """Test `schema upgrade` will not stamp a database that lacks the baseline tables."""
+        with app.app_context():
+            db.session.execute(text('CREATE TABLE legacy (id INTEGER PRIMARY KEY)'))
+            db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=['schema', 'upgrade'])
+
+        assert result.exit_code == 1
+        assert 'missing baseline tables' in result.output
+
+    def test_upgrade_builds_an_empty_database(self, app):
+        """Test `schema upgrade` on an empty database runs every migration."""
+        runner = app.test_cli_runner()
+
+        result = runner.invoke(args=['schema', 'upgrade'])
+
+        assert result.exit_code == 0, result.output
+        assert 'Stamped' not in result.output
+        assert runner.invoke(args=['schema', 'verify']).exit_code == 0
+
+    def test_upgrade_from_baseline_backfills_existing_rows(self, app):
+        """Test upgrading a baseline database adds the new schema and backfills ratings, search text and rollups."""
+        user_id, provider_id, idle_provider_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        with app.app_context():
+            upgrade(directory=MIGRATIONS_DIR, revision='0001_baseline')
+            db.session.execute(text("INSERT INTO users (id, email, phone, password_hash, user_type) "
+                                    "VALUES (:id, 'Ahmed@Example.com', '01012345678', 'x', 'service_provider')"),
+                               {'id': user_id.hex})
+            db.session.execute(text("INSERT INTO service_provider_profiles (id, user_id, first_name, last_name, "
+                                    "average_rating, total_reviews) VALUES (:id, :user_id, 'Ahmed', 'Hassan', 4.5, 2)"),
+                               {'id': provider_id.hex, 'user_id': user_id.hex})
+            # Stale counters with no reviews behind them are reset
+            db.session.execute(text("INSERT INTO service_provider_profiles (id, user_id, first_name, last_name, "
+                                    "average_rating, total_reviews) VALUES (:id, :user_id, 'Mona', 'Adel', 3.0, 4)"),
+                               {'id': idle_provider_id.hex, 'user_id': user_id.hex})
+            for rating in (4, 5):
+                booking_id = str(uuid.uuid4())
+                db.session.execute(text(
+                    "INSERT INTO bookings (id, customer_id, provider_id, service_id, booking_status, scheduled_date, "
+                    "service_address, total_amount, platform_commission, provider_earnings, created_at) VALUES "
+                    "(:id, 'c', :provider_id, 's', 'completed', '2026-01-02 10:00:00', "
+                    "'{\"governorate\": \"Cairo\", \"latitude\": 30.05, \"longitude\": 31.23}', 100, 10, 90, '2026-01-01 09:00:00')"
+                ), {'id': booking_id, 'provider_id': str(provider_id)})
+                db.session.execute(text("INSERT INTO booking_reviews (id, booking_id, customer_id, provider_id, rating) "
+                                        "VALUES (:id, :booking_id, 'c', :provider_id, :rating)"),
+                                   {'id': str(uuid.uuid4()), 'booking_id': booking_id, 'provider_id': str(provider_id),
+                                    'rating': rating})
+            db.session.commit()
+
+            upgrade(directory=MIGRATIONS_DIR)
+
+            assert verify_schema(db.engine, db.metadata).ok
+            provider = db.session.get(ServiceProviderProfile, provider_id)
+            assert (provider.rating_sum, provider.total_reviews, provider.rating_count_4, provider.rating_count_5) == (9, 2, 1, 1)
+            assert provider.search_text == 'ahmed hassan'
+            idle = db.session.get(ServiceProviderProfile, idle_provider_id)
+            assert (idle.rating_sum, idle.total_reviews, float(idle.average_rating)) == (0, 0, 0.0)
+            assert provider.user.search_text == 'ahmed@example.com 201012345678'
+            assert {(b.version, float(b.service_latitude)) for b in Booking.query} == {(1, 30.05)}
+            rollup = BookingDailyRollup.query.one()
+            assert (rollup.booking_count, rollup.rating_sum, rollup.rating_count) == (2, 9, 2)
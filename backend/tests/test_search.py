@@ -0,0 +1,130 @@
+import inspect
+import uuid
+import pytest
+from flask import Flask
+from src.models import db
+from src.models import location, service  # noqa: F401 (mapped by User relationships)
+from src.models.user import User, ServiceProviderProfile
+from src.routes import admin
+from src.utils.search import (normalize_search_text, normalize_search_query, phone_search_key, match_rank,
+                              search_index)
+
+@pytest.fixture
+def app():
+    """In-memory SQLite app, so searches go through the n-gram fallback."""
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI='sqlite://')
+    db.init_app(app)
+    search_index.init_app(app)
+    with app.app_context():
+        db.create_all()
+        search_index.ngrams.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        search_index.ngrams.clear()
+
+def add_providers(*names):
+    """One provider per (first, last, business) name; returns the profiles in order"""
+    profiles = []
+    for first_name, last_name, business_name in names:
+        user = User(email=f'{uuid.uuid4().hex}@example.com', user_type='service_provider', password_hash='!')
+        db.session.add(user)
+        db.session.flush()
+        profiles.append(ServiceProviderProfile(user_id=user.id, first_name=first_name, last_name=last_name,
+                                               business_name=business_name))
+    db.session.add_all(profiles)
+    db.session.commit()
+    return profiles
+
+def search_providers(term):
+    query, rank = search_index.apply(ServiceProviderProfile.query, ServiceProviderProfile, term)
+    if rank is not None:
+        query = query.order_by(rank.desc())
+    return query.all()
+
+class TestSearchNormalization:
+    """Test the normalization shared by stored search text and queries."""
+
+    def test_phone_variants_share_one_key(self):
+        """Test local, international and 00-prefixed numbers normalize alike."""
+        stored = phone_search_key('+20 101-234-5678')
+
+        for query in ['01012345678', '+201012345678', '201012345678', '00201012345678']:
+            assert normalize_search_query(query) == stored
+        assert normalize_search_query('010123') in stored
+
+    def test_digit_fragment_is_searched_as_typed(self):
+        """Test partial digits without a country/trunk prefix are not rewritten."""
+        assert normalize_search_query('2345 67') == '234567'
+
+    def test_arabic_folding(self):
+        """Test alef, yaa and taa marbuta variants and diacritics fold together."""
+        assert normalize_search_text('أحمد') == normalize_search_text('احمد') == normalize_search_text('إحمد')
+        assert normalize_search_text('فاطمة') == normalize_search_text('فاطمه')
+        assert normalize_search_text('مُصطفى') == normalize_search_text('مصطفي')
+
+    def test_ranking_prefers_word_prefix_over_substring(self):
+        """Test a word-prefix match outranks a mid-word match."""
+        assert match_rank('ahmed', 'ahmed hassan') > match_rank('ahmed', 'mohamed ahmedy') > match_rank('ahmed', 'xahmedx')
+
+class TestNgramSearch:
+    """Test ranked search through the in-process n-gram index used on SQLite."""
+
+    def test_misspelled_name_ranks_the_right_provider_first(self, app):
+        """Test a typo still finds the provider and ranks them above weaker matches."""
+        mohamed, hassan_electric, carpenter, elhassany = add_providers(('Mohamed', 'Salah', 'Salah Plumbing'),
+                                                                       ('Mahmoud', 'Hassan', 'Hassan Electric'),
+                                                                       ('Karim', 'Adel', 'Adel Carpentry'),
+                                                                       ('Ali', 'Elhassany', None))
+
+        assert search_providers('Mohammed') == [mohamed]
+        assert search_providers('Electrik')[0] == hassan_electric
+        assert search_providers('Carpentery')[0] == carpenter
+        # A whole-word match outranks the same letters inside a longer name
+        assert search_providers('Hassan') == [hassan_electric, elhassany]
+        assert search_providers('zzzz') == []
+
+    def test_index_follows_committed_renames(self, app):
+        """Test a renamed provider is found by the new name and not the old one."""
+        provider, = add_providers(('Omar', 'Fathy', None))
+        assert search_providers('Omar') == [provider]
+
+        provider.first_name = 'Youssef'
+        db.session.commit()
+        assert search_providers('Youssef') == [provider]
+        assert search_providers('Omar') == []
+
+class TestProviderSearchPaging:
+    """Test paging through ranked provider search results in the admin list."""
+
+    def list_providers(self, app, query):
+        with app.test_request_context(f'/api/admin/providers?{query}'):
+            response, code = inspect.unwrap(admin.get_all_providers)(current_user=None)
+            return code, response.get_json()
+
+    def test_pages_walk_every_match_once(self, app):
+        """Test page numbers reach every match, best first, and the last page has no next."""
+        exact, *others = add_providers(('Hassan', 'Adel', None), *[('Ali', 'Elhassany', None)] * 4)
+        add_providers(('Karim', 'Salah', None))
+
+        seen = []
+        for number in (1, 2, 3):
+            code, body = self.list_providers(app, f'search=Hassan&per_page=2&page={number}')
+            assert code == 200
+            seen += [provider['id'] for provider in body['providers']]
+            assert body['pagination']['has_next'] is (number < 3)
+            assert body['pagination']['truncated'] is False
+        assert seen[0] == str(exact.id)
+        assert sorted(seen) == sorted(str(provider.id) for provider in [exact, *others])
+
+    def test_search_is_capped_and_rejects_cursors(self, app, monkeypatch):
+        """Test pages stop at MAX_SEARCH_RESULTS with a truncated flag, and cursors are refused."""
+        monkeypatch.setattr(admin, 'MAX_SEARCH_RESULTS', 4)
+        add_providers(*[('Mahmoud', 'Hassan', None)] * 5)
+
+        code, body = self.list_providers(app, 'search=Hassan&per_page=2&page=2')
+        assert code == 200
+        assert (body['pagination']['has_next'], body['pagination']['truncated']) == (False, True)
+        assert self.list_providers(app, 'search=Hassan&per_page=2&page=3')[0] == 400
+        assert self.list_providers(app, 'search=Hassan&cursor=abc')[0] == 400
@@ -0,0 +1,65 @@
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from flask import Flask
+from src.models import db
+from src.models import location  # noqa: F401 (mapped by User relationships)
+from src.models.user import User, CustomerProfile
+from src.models.service import ServiceCategory, Service, Booking, BookingStatusHistory
+from src.utils.sweeper import StaleBookingSweeper, EXPIRY_REASON
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI='sqlite://', BOOKING_SWEEP_BATCH_SIZE=3,
+                      BOOKING_SWEEP_MAX_BATCHES=2, BOOKING_SWEEP_GRACE_MINUTES=60)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def add_bookings(schedule):
+    """Create one booking per (status, hours from now) pair"""
+    category = ServiceCategory(name_ar='سباكة', name_en='Plumbing')
+    db.session.add(category)
+    db.session.flush()
+    service = Service(category_id=category.id, name_ar='إصلاح', name_en='Repair', base_price=100)
+    user = User(email=f'{uuid.uuid4().hex}@example.com', user_type='customer', password_hash='!')
+    db.session.add_all([service, user])
+    db.session.flush()
+    customer = CustomerProfile(user_id=user.id, first_name='Cu', last_name='Stomer')
+    db.session.add(customer)
+    db.session.flush()
+    bookings = [
+        Booking(customer_id=str(customer.id), service_id=service.id, booking_status=status,
+                scheduled_date=datetime.utcnow() + timedelta(hours=hours), service_address={'governorate': 'Cairo'},
+                total_amount=100, platform_commission=15, provider_earnings=85)
+        for status, hours in schedule
+    ]
+    db.session.add_all(bookings)
+    db.session.commit()
+    return bookings
+
+class TestStaleBookingSweeper:
+    """Test expiring overdue bookings in bounded batches."""
+
+    def test_run_is_bounded_and_only_touches_overdue_bookings(self, app):
+        """Test a run stops at max_batches and skips started, recent and future bookings."""
+        overdue = add_bookings([('pending', -48 - i) for i in range(5)] + [('confirmed', -30), ('confirmed', -25)])
+        kept = add_bookings([('in_progress', -48), ('pending', -0.5), ('confirmed', 24)])
+        sweeper = StaleBookingSweeper()
+        sweeper.init_app(app)
+
+        first = sweeper.run()
+        assert (first.swept, first.batches) == (6, 2)
+
+        second = sweeper.run()
+        assert (second.swept, second.batches) == (1, 1)
+
+        db.session.expire_all()
+        assert {b.booking_status for b in overdue} == {'cancelled'}
+        assert [b.booking_status for b in kept] == ['in_progress', 'pending', 'confirmed']
+        assert {h.change_reason for h in BookingStatusHistory.query} == {EXPIRY_REASON}
+        assert sweeper.stats()['total_swept'] == 7
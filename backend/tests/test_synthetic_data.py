@@ -0,0 +1,75 @@
+import pytest
+from flask import Flask
+from sqlalchemy.engine import make_url
+from src.cli import register_commands, is_local_database
+from src.models import db
+from src.models import location, analytics  # noqa: F401
+from src.models.user import User, ServiceProviderProfile
+from src.models.service import Booking, BookingStatusHistory, BookingReview
+from src.synthetic_data import SyntheticDataGenerator
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI='sqlite://')
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def generate(seed=7):
+    generator = SyntheticDataGenerator(seed=seed, customers=40, providers=10, pings_per_provider=6,
+                                       bookings_per_customer=3, log=lambda message: None)
+    return generator.run()
+
+class TestSyntheticData:
+    """Test the synthetic data generator."""
+
+    def test_bookings_have_consistent_timelines(self, app):
+        """Test every booking's last history row is its status and only completed bookings are reviewed."""
+        counts = generate()
+
+        assert (counts['users'], counts['provider_locations']) == (50, 60)
+        assert counts['bookings'] == Booking.query.count() > 0
+        latest = {}
+        for row in BookingStatusHistory.query.order_by(BookingStatusHistory.created_at):
+            latest[row.booking_id] = row.new_status
+        assert all(latest[booking.id] == booking.booking_status for booking in Booking.query)
+        reviewed = {review.booking_id for review in BookingReview.query}
+        assert {b.booking_status for b in Booking.query.filter(Booking.id.in_(reviewed))} <= {'completed'}
+        # Aggregates were rebuilt from the bulk-loaded reviews
+        histogram = sum(p.rating_count_1 + p.rating_count_2 + p.rating_count_3 + p.rating_count_4 + p.rating_count_5
+                        for p in ServiceProviderProfile.query)
+        assert histogram == counts['booking_reviews']
+
+    def test_same_seed_gives_same_rows(self, app):
+        """Test a seed reproduces its rows and refuses to load twice into one database."""
+        counts = generate()
+        ids = sorted(str(user.id) for user in User.query)
+        with pytest.raises(ValueError, match='already exists'):
+            generate()
+
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        assert generate() == counts
+        assert sorted(str(user.id) for user in User.query) == ids
+
+    def test_generate_refuses_remote_databases(self):
+        """Test only local database hosts are loaded without --force."""
+        for url in ('sqlite://', 'sqlite:////tmp/bench.db', 'postgresql://app@localhost/app',
+                    'postgresql://app@127.0.0.1:5432/app'):
+            assert is_local_database(make_url(url))
+        for url in ('postgresql://app@db.internal/app', 'postgresql://app@10.0.0.5/app'):
+            assert not is_local_database(make_url(url))
+
+        remote = Flask(__name__)
+        remote.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI='postgresql://app@db.internal/app')
+        db.init_app(remote)
+        register_commands(remote)
+        with remote.app_context():
+            result = remote.test_cli_runner().invoke(args=['data', 'generate', '--customers', '1'])
+        assert result.exit_code != 0
+        assert 'Refusing to load synthetic data into database host db.internal' in result.output